@@ -95,9 +95,17 @@ CREATE TABLE IF NOT EXISTS groq_usage (
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
 );
 
--- Training datasets table
+-- Training datasets table; manifest datasets list example_hashes instead of storing data inline
 CREATE TABLE IF NOT EXISTS training_datasets (
     name TEXT PRIMARY KEY,
+    data JSONB,
+    example_hashes TEXT[],
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Examples of manifest datasets, stored once per content hash (written by the pipeline)
+CREATE TABLE IF NOT EXISTS training_examples (
+    hash TEXT PRIMARY KEY,
     data JSONB NOT NULL,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
@@ -119,6 +127,63 @@ CREATE TABLE IF NOT EXISTS evaluation_runs (
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Precomputed readings materialized by the pipeline (tarot-pipeline cache refresh)
+CREATE TABLE IF NOT EXISTS reading_cache (
+    cache_key TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    spread_type TEXT NOT NULL,
+    tone TEXT NOT NULL,
+    cards JSONB NOT NULL,
+    overview TEXT NOT NULL,
+    card_breakdowns JSONB NOT NULL,
+    synthesis TEXT NOT NULL,
+    actionable_reflection TEXT NOT NULL,
+    model TEXT NOT NULL,
+    frequency INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Telemetry rollups maintained by the pipeline (tarot-pipeline telemetry rollup); type '*' is all events
+CREATE TABLE IF NOT EXISTS telemetry_rollup_hourly (
+    bucket TIMESTAMPTZ NOT NULL,
+    type TEXT NOT NULL,
+    events BIGINT NOT NULL,
+    sessions BIGINT NOT NULL,
+    users BIGINT NOT NULL,
+    ttft_sum_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ttft_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (bucket, type)
+);
+
+CREATE TABLE IF NOT EXISTS telemetry_rollup_daily (
+    day DATE NOT NULL,
+    type TEXT NOT NULL,
+    events BIGINT NOT NULL,
+    sessions BIGINT NOT NULL,
+    users BIGINT NOT NULL,
+    ttft_sum_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ttft_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (day, type)
+);
+
+-- Distinct (type, session, user) per hour, so distinct metrics survive raw event compaction
+CREATE TABLE IF NOT EXISTS telemetry_rollup_members (
+    bucket TIMESTAMPTZ NOT NULL,
+    type TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    user_id UUID
+);
+
+-- Progress markers of incremental pipeline jobs
+CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+    job TEXT PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- Indexes for sessions
 CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
@@ -141,6 +206,12 @@ CREATE INDEX IF NOT EXISTS idx_telemetry_events_user_id ON telemetry_events(user
 CREATE INDEX IF NOT EXISTS idx_telemetry_events_session_id ON telemetry_events(session_id);
 CREATE INDEX IF NOT EXISTS idx_telemetry_events_type_timestamp ON telemetry_events(type, timestamp);
 
+-- Indexes for telemetry rollups
+CREATE INDEX IF NOT EXISTS idx_telemetry_rollup_members_bucket ON telemetry_rollup_members(bucket);
+
+-- Indexes for reading cache
+CREATE INDEX IF NOT EXISTS idx_reading_cache_prompt_version ON reading_cache(prompt_version, expires_at);
+
 -- Indexes for groq usage
 CREATE INDEX IF NOT EXISTS idx_groq_usage_timestamp ON groq_usage(request_timestamp);
 CREATE INDEX IF NOT EXISTS idx_groq_usage_model ON groq_usage(model);
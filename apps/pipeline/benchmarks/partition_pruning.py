@@ -0,0 +1,141 @@
+"""Compare a plain and a monthly-partitioned readings table on a synthetic dataset.
+
+Usage (against a scratch database; tables live in their own schema):
+
+    PYTHONPATH=src python benchmarks/partition_pruning.py --rows 10000000 --months 24
+
+Reports execution time and partitions touched for the pipeline's hot queries, plus the cost of expiring one month
+of data by DELETE versus DROP of a partition (both rolled back).
+"""
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timezone
+
+import typer
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.partitioning import PartitionSpec, add_months, iter_months, month_floor, partition_ddl, partition_name
+from daily_tarot_pipeline.postgres_store import PostgresStore
+
+SCHEMA = "bench_partitioning"
+INSERT_CHUNK = 1_000_000
+
+QUERIES = {
+    "latest 2000": "SELECT id, created_at FROM {table} ORDER BY created_at DESC LIMIT 2000",
+    "last 30d, latest 2000": """
+        SELECT id, created_at FROM {table}
+        WHERE created_at >= now() - interval '30 days'
+        ORDER BY created_at DESC LIMIT 2000
+    """,
+    "last 30d by prompt_version": """
+        SELECT prompt_version, COUNT(*) FROM {table}
+        WHERE created_at >= now() - interval '30 days'
+        GROUP BY prompt_version
+    """,
+    "one month, count": """
+        SELECT COUNT(*) FROM {table}
+        WHERE created_at >= date_trunc('month', now()) - interval '6 months'
+          AND created_at < date_trunc('month', now()) - interval '5 months'
+    """,
+}
+
+
+def main(
+    rows: int = typer.Option(10_000_000, help="Synthetic rows per table"),
+    months: int = typer.Option(24, help="Months of history the rows are spread over"),
+    reset: bool = typer.Option(True, "--reset/--reuse", help="Rebuild the synthetic tables"),
+):
+    store = PostgresStore(get_settings())
+    now = datetime.now(timezone.utc)
+    first_month = add_months(month_floor(now), -(months - 1))
+    spec = PartitionSpec(table="readings_part", column="created_at")
+
+    with store.connection() as conn:
+        with conn.cursor() as cur:
+            if reset:
+                cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+            cur.execute(f"SET search_path TO {SCHEMA}")
+            if reset:
+                _build_tables(cur, spec, rows, first_month, now)
+            conn.commit()
+
+            typer.echo(f"{rows:,} rows over {months} months\n")
+            typer.echo(f"{'query':<30} {'plain ms':>10} {'partitioned ms':>15} {'partitions scanned':>19}")
+            for label, sql in QUERIES.items():
+                flat_ms, _ = _explain(cur, sql.format(table="readings_flat"))
+                part_ms, scanned = _explain(cur, sql.format(table="readings_part"))
+                typer.echo(f"{label:<30} {flat_ms:>10.1f} {part_ms:>15.1f} {scanned:>12}/{months}")
+
+            oldest = partition_name(spec.table, first_month)
+            upper = add_months(first_month, 1)
+            delete_ms = _timed_rollback(conn, cur, f"""
+                DELETE FROM readings_flat WHERE created_at >= '{first_month.isoformat()}' AND created_at < '{upper.isoformat()}'
+            """)
+            drop_ms = _timed_rollback(conn, cur, f"DROP TABLE {oldest}")
+            typer.echo(f"\nexpire oldest month: DELETE {delete_ms:.0f} ms vs DROP partition {drop_ms:.0f} ms")
+
+
+def _build_tables(cur, spec: PartitionSpec, rows: int, first_month: datetime, now: datetime) -> None:
+    columns = """
+        id UUID NOT NULL DEFAULT gen_random_uuid(),
+        user_id UUID NOT NULL,
+        prompt_version TEXT,
+        overview TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL
+    """
+    cur.execute(f"CREATE TABLE readings_flat ({columns}, PRIMARY KEY (id))")
+    cur.execute(f"CREATE TABLE readings_part ({columns}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)")
+    for month in iter_months(first_month, now):
+        for statement in partition_ddl(spec, month):
+            cur.execute(statement)
+
+    span_seconds = (now - first_month).total_seconds()
+    started = time.perf_counter()
+    for offset in range(0, rows, INSERT_CHUNK):
+        count = min(INSERT_CHUNK, rows - offset)
+        # Uniform timestamps over the history window; ~20 prompt versions and ~200-byte texts
+        cur.execute("""
+            INSERT INTO readings_flat (user_id, prompt_version, overview, created_at)
+            SELECT gen_random_uuid(), 'v' || (random() * 20)::int, repeat(md5(g::text), 6),
+                   %s::timestamptz + random() * %s * interval '1 second'
+            FROM generate_series(1, %s) g
+        """, [first_month, span_seconds, count])
+    cur.execute("INSERT INTO readings_part SELECT * FROM readings_flat")
+    for table in ("readings_flat", "readings_part"):
+        cur.execute(f"CREATE INDEX ON {table} (created_at DESC)")
+        cur.execute(f"ANALYZE {table}")
+    typer.echo(f"Loaded synthetic tables in {time.perf_counter() - started:.1f}s")
+
+
+def _explain(cur, sql: str) -> tuple[float, int]:
+    """Execution time and number of distinct relations scanned, from EXPLAIN ANALYZE."""
+    cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+    row = cur.fetchone()
+    plan = (row["QUERY PLAN"] if isinstance(row, dict) else row[0])
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    relations: set[str] = set()
+
+    def walk(node: dict) -> None:
+        if "Relation Name" in node and not node.get("Actual Loops") == 0:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return plan[0]["Execution Time"], len(relations)
+
+
+def _timed_rollback(conn, cur, sql: str) -> float:
+    started = time.perf_counter()
+    cur.execute(sql)
+    elapsed = (time.perf_counter() - started) * 1000
+    conn.rollback()
+    cur.execute(f"SET search_path TO {SCHEMA}")
+    return elapsed
+
+
+if __name__ == "__main__":
+    typer.run(main)
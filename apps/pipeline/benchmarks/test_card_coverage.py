@@ -0,0 +1,57 @@
+"""Card coverage throughput: the metric, a full-deck scan for every spread and the old raw-id substring check.
+
+A full-deck scan costs the same whatever the spread, but its trie starts with common letters ("the", "two", "one"),
+so searching for the drawn cards only is cheaper for single and three-card spreads.
+
+    PYTHONPATH=src pytest benchmarks/test_card_coverage.py
+"""
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from daily_tarot_pipeline.datasets import build_training_examples
+from daily_tarot_pipeline.evaluate.card_index import mentioned_card_ids
+from daily_tarot_pipeline.evaluate.metrics import card_coverage_metric
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+ROWS = int(os.getenv("SYNTHETIC_READINGS", "20000"))
+
+
+@pytest.fixture(scope="module", params=["single", "three-card", "celtic-cross"])
+def examples(request):
+    readings = [reading for reading in generate_readings(SyntheticConfig(readings=ROWS)) if reading.spread_type == request.param]
+    return build_training_examples(InMemoryStore(readings, []), limit=ROWS)
+
+
+def _raw_id_coverage(example) -> float:
+    """The previous metric: literal card id substring search (almost never matched prose)."""
+    text = f"{example.overview} {example.synthesis} {example.actionable_reflection}".lower()
+    hits = sum(item.card_id.lower() in text for item in example.card_breakdowns)
+    return hits / len(example.card_breakdowns) if example.card_breakdowns else 0.0
+
+
+def _full_deck_scan(example) -> float:
+    """One scan for all 78 cards, then set membership for the drawn ones."""
+    mentioned = mentioned_card_ids(f"{example.overview} {example.synthesis} {example.actionable_reflection}")
+    hits = sum(item.card_id in mentioned for item in example.card_breakdowns)
+    return hits / len(example.card_breakdowns) if example.card_breakdowns else 0.0
+
+
+def _run(benchmark, metric, examples):
+    total = benchmark(lambda: sum(metric(example) for example in examples))
+    benchmark.extra_info.update(rows=len(examples), mean_coverage=round(total / len(examples), 3))
+    return total
+
+
+def test_card_coverage_metric(benchmark, examples):
+    assert _run(benchmark, card_coverage_metric, examples) / len(examples) > 0.95
+
+
+def test_full_deck_scan(benchmark, examples):
+    assert _run(benchmark, _full_deck_scan, examples) / len(examples) > 0.95
+
+
+def test_raw_id_baseline(benchmark, examples):
+    _run(benchmark, _raw_id_coverage, examples)
@@ -0,0 +1,72 @@
+"""Per-call cost of the embedding metric the way MIPRO calls it: one example and one fresh prediction at a time.
+
+    PYTHONPATH=src pytest benchmarks/test_embedding_metric.py
+    EMBEDDING_MODEL=sentence-transformers/all-MiniLM-L6-v2 PYTHONPATH=src pytest benchmarks/test_embedding_metric.py
+
+Gold readings are warmed up front as ``run_mipro`` does, so each call encodes only the prediction's texts.
+"""
+from __future__ import annotations
+
+import os
+from itertools import count
+
+import dspy
+import pytest
+
+from daily_tarot_pipeline.datasets import build_training_examples
+from daily_tarot_pipeline.evaluate.embeddings import (
+    EmbeddingCache,
+    EmbeddingScorer,
+    HashingEncoder,
+    SentenceTransformerEncoder,
+)
+from daily_tarot_pipeline.optimizers.mipro import _overlap_score
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+CALLS = int(os.getenv("EMBEDDING_CALLS", "500"))
+MODEL = os.getenv("EMBEDDING_MODEL", "hashing")
+
+
+@pytest.fixture(scope="module")
+def examples():
+    readings = list(generate_readings(SyntheticConfig(readings=CALLS)))
+    return build_training_examples(InMemoryStore(readings, []), limit=CALLS)
+
+
+@pytest.fixture()
+def scorer(examples, tmp_path):
+    encoder = HashingEncoder() if MODEL == "hashing" else SentenceTransformerEncoder(MODEL)
+    scorer = EmbeddingScorer(encoder, EmbeddingCache(tmp_path, encoder.dim))
+    scorer.warm([text for example in examples for text in (example.overview, example.synthesis,
+                                                           example.actionable_reflection, example.intent) if text])
+    return scorer
+
+
+def _predictions(examples, attempt):
+    return [
+        dspy.Prediction(
+            overview=f"{example.overview} (attempt {attempt})",
+            synthesis=f"{example.synthesis} (attempt {attempt})",
+            actionable_reflection=f"{example.actionable_reflection} (attempt {attempt})",
+        )
+        for example in examples
+    ]
+
+
+def test_embedding_metric_per_call(benchmark, examples, scorer):
+    attempts = count()
+
+    def run():
+        # Fresh prediction texts every round, as each optimizer trial generates new readings
+        predictions = _predictions(examples, next(attempts))
+        return sum(scorer.score(example, prediction) for example, prediction in zip(examples, predictions))
+
+    total = benchmark.pedantic(run, rounds=3, iterations=1)
+    benchmark.extra_info.update(calls=len(examples), model=MODEL, mean_score=round(total / len(examples), 3))
+
+
+def test_overlap_metric_per_call(benchmark, examples):
+    predictions = _predictions(examples, 0)
+    benchmark(lambda: sum(_overlap_score(example.overview, prediction.overview)
+                          for example, prediction in zip(examples, predictions)))
+    benchmark.extra_info.update(calls=len(examples))
@@ -0,0 +1,65 @@
+"""Per-call overhead of requests to the local OpenAI-compatible stub, with and without the shared pool.
+
+``test_client_per_call`` opens a fresh client per call, the way every caller building its own HTTP client did, so
+every call pays a TCP connect; ``test_shared_pool`` sends every call over one keep-alive connection.
+``test_pooled_lm`` is a full DSPy LM call over the process-wide pool. Against Groq the saved connect also includes
+the TLS handshake.
+
+    PYTHONPATH=src pytest benchmarks/test_http_client.py
+"""
+from __future__ import annotations
+
+import threading
+
+import httpx
+import pytest
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.lm import PooledLM, build_http_client, build_http_transport, http_pool_stats
+from daily_tarot_pipeline.stub_lm import STUB_MODEL_NAME, StubLM, StubLMServer
+
+MESSAGES = [{"role": "user", "content": "Read {'cardId': '17-star', 'orientation': 'reversed'}"}]
+BODY = {"model": STUB_MODEL_NAME, "messages": MESSAGES}
+
+
+@pytest.fixture(scope="module")
+def api_base():
+    server = StubLMServer(StubLM()).serve(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("LM_BACKEND", "stub-http")
+        get_settings.cache_clear()
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    get_settings.cache_clear()
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_per_call(benchmark, api_base):
+    def call():
+        with httpx.Client() as client:
+            return client.post(f"{api_base}/chat/completions", json=BODY).json()
+
+    assert benchmark(call)
+
+
+def test_shared_pool(benchmark, api_base):
+    transport = build_http_transport()
+    client = build_http_client(transport)
+
+    def call():
+        return client.post(f"{api_base}/chat/completions", json=BODY).json()
+
+    assert benchmark(call)
+    stats = transport.stats()
+    benchmark.extra_info.update(requests=stats["requests"], connections_opened=stats["connections_opened"])
+    assert stats["connections_opened"] == 1
+    client.close()
+
+
+def test_pooled_lm(benchmark, api_base):
+    lm = PooledLM(f"openai/{STUB_MODEL_NAME}", api_base=api_base, api_key="stub", cache=False, num_retries=0)
+
+    assert benchmark(lambda: lm(messages=MESSAGES))
+    benchmark.extra_info.update(http_pool_stats())
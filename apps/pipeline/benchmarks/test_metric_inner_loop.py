@@ -0,0 +1,86 @@
+"""Metric calls/s inside a simulated MIPRO compile: every candidate prompt is scored against the same valset.
+
+    PYTHONPATH=src pytest benchmarks/test_metric_inner_loop.py
+
+``extra_info`` records ``calls_per_second`` for the indexed ``_metric_fn`` and for the per-call set tokenization it
+replaced.
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+
+import dspy
+import pytest
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.datasets import build_training_examples
+from daily_tarot_pipeline.optimizers.mipro import _metric_fn, _overlap_score, get_gold_token_index
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+VALSET = int(os.getenv("VALSET_SIZE", "200"))
+CANDIDATES = int(os.getenv("CANDIDATES", "30"))
+FIELDS = ("overview", "synthesis", "actionable_reflection")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def overlap_backend(tmp_path_factory):
+    env = {"LM_BACKEND": "stub", "METRIC_BACKEND": "overlap", "PROMPT_WORKSPACE": str(tmp_path_factory.mktemp("ws")),
+           "DATASET_WORKSPACE": str(tmp_path_factory.mktemp("ws"))}
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in env.items():
+            patch.setenv(name, value)
+        get_settings.cache_clear()
+        yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def compile_calls():
+    readings = list(generate_readings(SyntheticConfig(readings=VALSET)))
+    examples = [
+        dspy.Example(**{field: getattr(example, field) for field in FIELDS})
+        for example in build_training_examples(InMemoryStore(readings, []), limit=VALSET)
+    ]
+    rng = random.Random(0)
+
+    def perturb(text: str) -> str:
+        words = text.split()
+        rng.shuffle(words)
+        return " ".join(words[: max(1, int(len(words) * rng.uniform(0.5, 1.2)))])
+
+    # One prediction per (candidate, example) pair, like a trial evaluating a candidate prompt on the valset
+    return [
+        (example, dspy.Prediction(**{field: perturb(example[field]) for field in FIELDS}))
+        for _ in range(CANDIDATES)
+        for example in examples
+    ]
+
+
+def _set_metric(example, prediction, trace=None) -> float:
+    """``_metric_fn`` before the gold index: gold tokenized on every call."""
+    scores = [_overlap_score(str(example[field]), str(getattr(prediction, field))) for field in FIELDS]
+    return sum(scores) / len(scores)
+
+
+def _run(benchmark, metric, calls):
+    def compile_loop():
+        return sum(metric(example, prediction) for example, prediction in calls)
+
+    total = benchmark(compile_loop)
+    started = time.perf_counter()
+    compile_loop()
+    benchmark.extra_info.update(calls=len(calls), calls_per_second=round(len(calls) / (time.perf_counter() - started)))
+    return total
+
+
+def test_indexed_metric(benchmark, compile_calls):
+    get_gold_token_index().index(example[field] for example, _ in compile_calls[:VALSET] for field in FIELDS)
+    assert _run(benchmark, _metric_fn, compile_calls) == pytest.approx(
+        sum(_set_metric(example, prediction) for example, prediction in compile_calls)
+    )
+
+
+def test_set_metric_baseline(benchmark, compile_calls):
+    _run(benchmark, _set_metric, compile_calls)
@@ -0,0 +1,97 @@
+"""Throughput and peak memory of the dataset stages on a synthetic corpus.
+
+    PYTHONPATH=src pytest benchmarks --benchmark-autosave           # record a run
+    PYTHONPATH=src pytest benchmarks --benchmark-compare            # compare with the last saved run
+    SYNTHETIC_READINGS=1000000 PYTHONPATH=src pytest benchmarks     # larger corpus
+
+Each benchmark stores ``rows_per_second`` and ``peak_mb`` (tracemalloc, one extra run) in ``extra_info`` so saved
+runs track both over time.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from daily_tarot_pipeline.datasets import build_training_examples, persist_dataset
+from daily_tarot_pipeline.evaluate.metrics import detailed_evaluation
+from daily_tarot_pipeline.evaluate.score_cache import ScoreCache
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_feedback, generate_readings
+from daily_tarot_pipeline.watch import QualityWatcher
+
+ROWS = int(os.getenv("SYNTHETIC_READINGS", "20000"))
+ROUNDS = int(os.getenv("BENCHMARK_ROUNDS", "3"))
+
+
+@pytest.fixture(scope="module")
+def config() -> SyntheticConfig:
+    return SyntheticConfig(readings=ROWS, users=max(1, ROWS // 20))
+
+
+@pytest.fixture(scope="module")
+def store(config) -> InMemoryStore:
+    readings = list(generate_readings(config))
+    return InMemoryStore(readings, generate_feedback(readings, config))
+
+
+@pytest.fixture(scope="module")
+def examples(store):
+    return build_training_examples(store, limit=ROWS)
+
+
+def _measure(benchmark, fn, rows: int):
+    result = benchmark.pedantic(fn, rounds=ROUNDS, iterations=1)
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info.update(rows=rows, peak_mb=round(peak / 1e6, 1), rows_per_second=round(rows / elapsed))
+    return result
+
+
+def test_generate_readings(benchmark, config):
+    _measure(benchmark, lambda: sum(1 for _ in generate_readings(config)), config.readings)
+
+
+def test_build_training_examples(benchmark, store):
+    examples = _measure(benchmark, lambda: build_training_examples(store, limit=ROWS), ROWS)
+    assert len(examples) == ROWS
+
+
+def test_detailed_evaluation(benchmark, examples):
+    metrics = _measure(benchmark, lambda: detailed_evaluation(examples), len(examples))
+    assert 0 < metrics["composite"] <= 1
+
+
+def test_detailed_evaluation_warm_score_cache(benchmark, examples, tmp_path):
+    cache = ScoreCache(tmp_path / "scores.sqlite3")
+    detailed_evaluation(examples, cache=cache)
+    metrics = _measure(benchmark, lambda: detailed_evaluation(examples, cache=cache), len(examples))
+    assert metrics == detailed_evaluation(examples)
+
+
+def test_persist_dataset(benchmark, store, examples):
+    _measure(benchmark, lambda: persist_dataset(store, "bench", examples), len(examples))
+    assert "bench" in store.datasets
+
+
+def test_watch_micro_batches(benchmark, store):
+    """`tarot-pipeline watch` minus Postgres: one notification per reading and thumb, scored in batches of 200."""
+    payloads = [json.dumps({"table": "readings", "reading_id": reading.id}) for reading in reversed(store.readings)]
+    payloads += [json.dumps({"table": "feedback", "reading_id": item.reading_id}) for item in store.feedback]
+
+    def watch():
+        watcher = QualityWatcher(store, batch_size=200, window=200)
+        for payload in payloads:
+            if watcher.notify(payload):
+                watcher.flush()
+        watcher.flush()
+        return watcher
+
+    watcher = _measure(benchmark, watch, len(payloads))
+    assert watcher.stats.readings == ROWS and watcher.stats.feedback == len(store.feedback)
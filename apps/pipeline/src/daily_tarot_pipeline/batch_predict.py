@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+import dspy
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .batched_generation import BatchStats, BatchedReadingGenerator
+from .datasets import example_hash
+from .models import TrainingExample
+
+PREDICTION_SCHEMA = pa.schema([
+    ("row_id", pa.string()),
+    ("status", pa.string()),
+    ("error", pa.string()),
+    ("label", pa.string()),
+    ("intent", pa.string()),
+    ("spread_type", pa.string()),
+    ("tone", pa.string()),
+    ("cards", pa.string()),
+    ("gold_overview", pa.string()),
+    ("gold_synthesis", pa.string()),
+    ("gold_actionable_reflection", pa.string()),
+    ("overview", pa.string()),
+    ("card_breakdowns", pa.string()),
+    ("synthesis", pa.string()),
+    ("actionable_reflection", pa.string()),
+    ("latency_ms", pa.float64()),
+])
+
+
+@dataclass
+class BatchPredictResult:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    parts_written: int = 0
+    elapsed_s: float = 0.0
+    batch_stats: Optional[BatchStats] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        processed = self.succeeded + self.failed
+        return processed / self.elapsed_s if self.elapsed_s else 0.0
+
+
+def example_row_id(example: TrainingExample) -> str:
+    """Stable id of an input row, used to skip rows that already succeeded on rerun and to pair rows across runs.
+
+    It is the example's content hash, so it survives reordering, filtering or appending to the input; identical
+    examples share an id and are predicted once.
+    """
+    return example_hash(example)
+
+
+def completed_row_ids(output_dir: Path) -> set[str]:
+    """Row ids with a successful prediction in any existing part file."""
+    parts = sorted(output_dir.glob("part-*.parquet"))
+    if not parts:
+        return set()
+    done: set[str] = set()
+    for part in parts:
+        table = pq.read_table(part, columns=["row_id", "status"])
+        for row_id, status in zip(table.column("row_id").to_pylist(), table.column("status").to_pylist()):
+            if status == "ok":
+                done.add(row_id)
+    return done
+
+
+def read_predictions(output_dir: Path) -> pa.Table:
+    """Load all parts, keeping the latest attempt per row."""
+    parts = sorted(output_dir.glob("part-*.parquet"))
+    if not parts:
+        return PREDICTION_SCHEMA.empty_table()
+    latest: dict[str, dict[str, Any]] = {}
+    for part in parts:
+        for row in pq.read_table(part).to_pylist():
+            previous = latest.get(row["row_id"])
+            if previous is None or previous["status"] != "ok":
+                latest[row["row_id"]] = row
+    return pa.Table.from_pylist(list(latest.values()), schema=PREDICTION_SCHEMA)
+
+
+class _PartWriter:
+    """Buffers rows and flushes them to numbered Parquet part files."""
+
+    def __init__(self, output_dir: Path, flush_rows: int):
+        self.output_dir = output_dir
+        self.flush_rows = flush_rows
+        self.buffer: list[dict[str, Any]] = []
+        self.parts_written = 0
+        existing = sorted(output_dir.glob("part-*.parquet"))
+        self._next_index = int(existing[-1].stem.split("-")[1]) + 1 if existing else 0
+
+    def add(self, row: dict[str, Any]) -> None:
+        self.buffer.append(row)
+        if len(self.buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        path = self.output_dir / f"part-{self._next_index:05d}.parquet"
+        tmp_path = path.with_suffix(".parquet.tmp")
+        pq.write_table(pa.Table.from_pylist(self.buffer, schema=PREDICTION_SCHEMA), tmp_path)
+        # Rename last so an interrupted run never leaves a truncated part behind
+        tmp_path.rename(path)
+        self._next_index += 1
+        self.parts_written += 1
+        self.buffer = []
+
+
+def run_batch_predict(
+    examples: Iterable[TrainingExample],
+    module: dspy.Module,
+    lm: dspy.BaseLM,
+    output_dir: Path,
+    label: str,
+    concurrency: int = 8,
+    max_pending: Optional[int] = None,
+    flush_rows: int = 500,
+    progress: Optional[Callable[[BatchPredictResult], None]] = None,
+    batch_size: int = 1,
+) -> BatchPredictResult:
+    """Stream examples through a compiled module and write predictions incrementally.
+
+    At most ``max_pending`` rows are in flight at once, so the input iterator is only advanced as fast as the LM
+    drains it. Rows that already succeeded in ``output_dir`` are skipped, which makes reruns retry failures only.
+    With ``batch_size`` above 1 each LM request generates that many readings (see ``BatchedReadingGenerator``) and
+    every row of a request records the request's latency split evenly across them.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    done = completed_row_ids(output_dir)
+    writer = _PartWriter(output_dir, flush_rows)
+    result = BatchPredictResult()
+    max_pending = max_pending or concurrency * 2
+    generator = BatchedReadingGenerator(module, batch_size) if batch_size > 1 else None
+    started = time.perf_counter()
+
+    def predict(rows: list[tuple[str, TrainingExample]]) -> list[dict[str, Any]]:
+        inputs = [_inputs(example) for _, example in rows]
+        call_started = time.perf_counter()
+        with dspy.context(lm=lm):
+            if generator is not None:
+                predictions = generator(inputs)
+            else:
+                predictions = []
+                for example_inputs in inputs:
+                    try:
+                        predictions.append(module(**example_inputs))
+                    except Exception as exc:
+                        predictions.append(exc)
+        latency_ms = (time.perf_counter() - call_started) * 1000 / len(rows)
+        return [
+            _prediction_row(_base_row(row_id, label, example), prediction, latency_ms)
+            for (row_id, example), prediction in zip(rows, predictions)
+        ]
+
+    def drain(pending: set[Future], block_until: int) -> set[Future]:
+        while len(pending) > block_until:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for row in future.result():
+                    writer.add(row)
+                    if row["status"] == "ok":
+                        result.succeeded += 1
+                    else:
+                        result.failed += 1
+            if progress:
+                result.elapsed_s = time.perf_counter() - started
+                progress(result)
+        return pending
+
+    pending: set[Future] = set()
+    # max_pending counts rows; each submitted task carries up to batch_size of them
+    max_tasks = max(max_pending // batch_size, 1)
+    batch: list[tuple[str, TrainingExample]] = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-predict") as executor:
+            for row_id, example in _with_row_ids(examples):
+                result.total += 1
+                if row_id in done:
+                    result.skipped += 1
+                    continue
+                # A repeated example is already queued under the same id
+                done.add(row_id)
+                batch.append((row_id, example))
+                if len(batch) < batch_size:
+                    continue
+                pending.add(executor.submit(predict, batch))
+                batch = []
+                # Backpressure: stop reading input until a slot frees up
+                pending = drain(pending, max_tasks - 1)
+            if batch:
+                pending.add(executor.submit(predict, batch))
+            drain(pending, 0)
+    finally:
+        writer.flush()
+        result.parts_written = writer.parts_written
+        result.elapsed_s = time.perf_counter() - started
+        if generator is not None:
+            result.batch_stats = generator.stats
+    return result
+
+
+def iter_jsonl_examples(path: Path) -> Iterator[TrainingExample]:
+    """Stream training examples (or reading exports with the same fields) from a JSON Lines file."""
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield TrainingExample.model_validate_json(line)
+
+
+def _with_row_ids(examples: Iterable[TrainingExample]) -> Iterator[tuple[str, TrainingExample]]:
+    for example in examples:
+        yield example_row_id(example), example
+
+
+def _inputs(example: TrainingExample) -> dict[str, Any]:
+    return {
+        "intent": example.intent,
+        "spread_type": example.spread_type,
+        "cards": [card.model_dump() for card in example.cards],
+        "tone": example.tone,
+    }
+
+
+def _prediction_row(row: dict[str, Any], prediction: Union[dspy.Prediction, Exception], latency_ms: float) -> dict[str, Any]:
+    if isinstance(prediction, Exception):
+        row.update(status="error", error=f"{type(prediction).__name__}: {prediction}")
+    else:
+        breakdowns = prediction.card_breakdowns
+        row.update(
+            status="ok",
+            overview=str(prediction.overview),
+            card_breakdowns=breakdowns if isinstance(breakdowns, str) else json.dumps(breakdowns, default=str),
+            synthesis=str(prediction.synthesis),
+            actionable_reflection=str(prediction.actionable_reflection),
+        )
+    row["latency_ms"] = latency_ms
+    return row
+
+
+def _base_row(row_id: str, label: str, example: TrainingExample) -> dict[str, Any]:
+    return {
+        "row_id": row_id,
+        "status": "error",
+        "error": None,
+        "label": label,
+        "intent": example.intent,
+        "spread_type": example.spread_type,
+        "tone": example.tone,
+        "cards": json.dumps([card.model_dump(by_alias=True) for card in example.cards]),
+        "gold_overview": example.overview,
+        "gold_synthesis": example.synthesis,
+        "gold_actionable_reflection": example.actionable_reflection,
+        "overview": None,
+        "card_breakdowns": None,
+        "synthesis": None,
+        "actionable_reflection": None,
+        "latency_ms": None,
+    }
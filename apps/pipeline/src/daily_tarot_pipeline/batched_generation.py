@@ -0,0 +1,161 @@
+"""Multi-reading generation: several readings per LM request for offline workloads.
+
+A single-reading request repeats the system prompt, instructions and demos for every reading. For eval and batch
+regeneration, where request count and prompt tokens matter more than per-reading latency, ``BatchedReadingGenerator``
+asks for up to ``batch_size`` readings at once as a JSON array, under the module's own instructions and demos, and
+regenerates any reading that comes back missing or invalid with a normal single call. Serving never batches.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Union
+
+import dspy
+from pydantic import ValidationError
+
+from .models import BatchedReading
+
+logger = logging.getLogger(__name__)
+
+READING_INPUTS = ("intent", "spread_type", "cards", "tone")
+READING_OUTPUTS = ("overview", "card_breakdowns", "synthesis", "actionable_reflection", "disclaimer")
+
+
+class TarotReadingBatchSignature(dspy.Signature):
+    """Generate one tarot reading for each request. Follow the reading instructions for every request on its own and
+    tag each reading with the index of its request."""
+
+    requests: list[dict] = dspy.InputField(desc="Reading requests, each with index, intent, spread_type, cards and tone.")
+    readings: list[dict] = dspy.OutputField(
+        desc="One reading per request: index, overview, card_breakdowns (cardId, orientation and summary per card), "
+        "synthesis, actionable_reflection and disclaimer."
+    )
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    batched: int = 0
+    fallbacks: int = 0
+    failed_requests: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def summary(self) -> str:
+        return (f"Batched generation: {self.batched} readings from {self.requests} requests, "
+                f"{self.fallbacks} single-call fallbacks ({self.failed_requests} unusable responses)")
+
+
+def batch_predictor(module: Any) -> dspy.Predict:
+    """A predictor for the batch signature with ``module``'s reading instructions, its demos packed as one batch."""
+    generator = module.generator
+    signature = TarotReadingBatchSignature.with_instructions(
+        f"{TarotReadingBatchSignature.instructions}\n\nReading instructions: {generator.signature.instructions}"
+    )
+    predictor = dspy.Predict(signature)
+    # Loaded state restores demos as plain dicts; only complete readings make useful batch demos
+    demos = [demo for demo in generator.demos if all(demo.get(name) for name in READING_OUTPUTS[:-1])]
+    if demos:
+        predictor.demos = [dspy.Example(
+            requests=[_request(index, demo) for index, demo in enumerate(demos)],
+            readings=[{"index": index, **{name: demo.get(name) for name in READING_OUTPUTS}} for index, demo in enumerate(demos)],
+        )]
+    return predictor
+
+
+class BatchedReadingGenerator:
+    """Generates readings ``batch_size`` at a time with the instructions and demos of a ``TarotReadingModule``."""
+
+    def __init__(self, module: Any, batch_size: int = 8):
+        if batch_size < 2:
+            raise ValueError("batch_size must be at least 2")
+        self.module = module
+        self.batch_size = batch_size
+        self.predictor = batch_predictor(module)
+        self.stats = BatchStats()
+
+    def __call__(self, inputs: list[dict[str, Any]]) -> list[Union[dspy.Prediction, Exception]]:
+        """Readings for ``inputs`` in order; a reading whose single-call fallback also fails is returned as its error."""
+        results: list[Union[dspy.Prediction, Exception]] = []
+        for start in range(0, len(inputs), self.batch_size):
+            results.extend(self._generate(inputs[start:start + self.batch_size]))
+        return results
+
+    def precompute(self, examples: Iterable[dspy.Example]) -> "PrecomputedReadings":
+        """Generate readings for ``examples`` up front, for code that calls a module once per example."""
+        inputs = [{name: example.get(name) for name in READING_INPUTS} for example in examples]
+        return PrecomputedReadings(dict(zip(map(reading_key, inputs), self(inputs))))
+
+    def _generate(self, chunk: list[dict[str, Any]]) -> list[Union[dspy.Prediction, Exception]]:
+        readings = self._batch(chunk)
+        results: list[Union[dspy.Prediction, Exception]] = []
+        for index, inputs in enumerate(chunk):
+            reading = readings.get(index)
+            if reading is not None:
+                results.append(dspy.Prediction(**_outputs(reading)))
+                continue
+            try:
+                results.append(self.module(**{name: inputs.get(name) for name in READING_INPUTS}))
+            except Exception as exc:
+                results.append(exc)
+        self.stats.add(batched=len(readings), fallbacks=len(chunk) - len(readings))
+        return results
+
+    def _batch(self, chunk: list[dict[str, Any]]) -> dict[int, BatchedReading]:
+        """Valid readings of one multi-reading request by request index; the rest fall back to single calls."""
+        try:
+            prediction = self.predictor(requests=[_request(index, inputs) for index, inputs in enumerate(chunk)])
+        except Exception as exc:
+            logger.warning("Batched request for %d readings failed, generating them one by one: %s", len(chunk), exc)
+            self.stats.add(requests=1, failed_requests=1)
+            return {}
+        self.stats.add(requests=1)
+        items = prediction.readings if isinstance(prediction.readings, list) else []
+        readings: dict[int, BatchedReading] = {}
+        for item in items:
+            try:
+                reading = BatchedReading.model_validate(item)
+            except ValidationError:
+                continue
+            if 0 <= reading.index < len(chunk):
+                readings.setdefault(reading.index, reading)
+        return readings
+
+
+class PrecomputedReadings(dspy.Module):
+    """Serves readings generated ahead of time to callers that run a module per example, such as ``dspy.Evaluate``."""
+
+    def __init__(self, readings: dict[str, Union[dspy.Prediction, Exception]]):
+        super().__init__()
+        self.readings = readings
+
+    def forward(self, **inputs: Any) -> dspy.Prediction:
+        result = self.readings[reading_key(inputs)]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def reading_key(inputs: dict[str, Any]) -> str:
+    return json.dumps({name: inputs.get(name) for name in READING_INPUTS}, sort_keys=True, default=str)
+
+
+def _request(index: int, inputs: Any) -> dict[str, Any]:
+    return {"index": index, **{name: inputs.get(name) for name in READING_INPUTS}}
+
+
+def _outputs(reading: BatchedReading) -> dict[str, Any]:
+    return {
+        "overview": reading.overview,
+        "card_breakdowns": [item.model_dump(by_alias=True) for item in reading.card_breakdowns],
+        "synthesis": reading.synthesis,
+        "actionable_reflection": reading.actionable_reflection,
+        "disclaimer": reading.disclaimer,
+    }
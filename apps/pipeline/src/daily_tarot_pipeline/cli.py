@@ -7,12 +7,15 @@ from typing import Optional
 import typer
 
 from .config import get_settings
-from .datasets import build_training_examples, persist_dataset
+from .datasets import Dataset, build_training_examples, diff_manifests, load_dataset, persist_dataset
 from .postgres_store import PostgresStore
 from .evaluate.metrics import evaluate_dataset, detailed_evaluation
-from .models import EvaluationRun, MetricResult, TrainingExample
+from .evaluate.score_cache import get_score_cache
+from .models import EvaluationRun, MetricResult, PromptCandidate, TrainingExample
 from .optimizers.mipro import run_mipro, _metric_fn
+from .optimizers.warm_start import keep_promoted_prompt, promoted_model_uri
 from .mlflow_tracker import get_mlflow_tracker
+from .tracing import get_trace_sampler
 
 app = typer.Typer(help="Tarot Daily offline pipeline", pretty_exceptions_enable=False)
 
@@ -26,20 +29,158 @@ app.add_typer(dataset_app, name="dataset")
 app.add_typer(optimizer_app, name="optimize")
 app.add_typer(eval_app, name="eval")
 
+cache_app = typer.Typer(help="Precomputed reading cache")
+app.add_typer(cache_app, name="cache")
+
+prompt_app = typer.Typer(help="Prompt version management")
+app.add_typer(prompt_app, name="prompt")
+
+usage_app = typer.Typer(help="Groq latency and cost analytics")
+app.add_typer(usage_app, name="usage")
+
+telemetry_app = typer.Typer(help="Telemetry rollups and retention")
+app.add_typer(telemetry_app, name="telemetry")
+
+db_app = typer.Typer(help="Database schema maintenance")
+app.add_typer(db_app, name="db")
+
+quota_app = typer.Typer(help="Groq quota shared by all pipeline processes")
+app.add_typer(quota_app, name="quota")
+
+
+@app.callback()
+def main(ctx: typer.Context,
+         profile: bool = typer.Option(False, "--profile", help="Run the command under cProfile (main thread) and save the stats, span report and Chrome trace"),
+         profile_memory: bool = typer.Option(False, "--profile-memory", help="Track peak memory per stage with tracemalloc (slower)"),
+         chrome_trace: Optional[Path] = typer.Option(None, help="Write stage spans as a Chrome trace JSON file")):
+    """Offline pipeline for Tarot Daily; every command records stage spans (see --profile)."""
+    from .profiling import enable_memory_tracing, get_profiler
+    from .quota import install_quota
+
+    # LM calls of every command share the Groq quota with other processes (at QUOTA_PRIORITY unless a command overrides)
+    install_quota()
+    profiler = get_profiler()
+    profiler.trace_path = chrome_trace
+    if profile_memory:
+        enable_memory_tracing()
+
+    if profile:
+        import cProfile
+        stem = get_settings().profile_workspace / f"{ctx.invoked_subcommand}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+        profiler.trace_path = chrome_trace or stem.with_suffix(".trace.json")
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+        ctx.call_on_close(lambda: _finish_profile(cprofile, stem))
+    elif chrome_trace is not None:
+        ctx.call_on_close(lambda: typer.echo(f"Chrome trace written to {profiler.write_chrome_trace(chrome_trace)}"))
+
 
 @dataset_app.command("build")
-def build_dataset(name: str = typer.Argument(..., help="Dataset label"), limit: int = typer.Option(2000, help="Max rows")):
+def build_dataset(name: str = typer.Argument(..., help="Dataset label"), limit: int = typer.Option(2000, help="Max rows"),
+                  days: Optional[int] = typer.Option(None, help="Only use readings from the last N days")):
     """Build a dataset by merging readings and feedback."""
+    from datetime import timedelta
+
+    store = PostgresStore(get_settings())
+    store.initialize_schema()
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    examples = build_training_examples(store, limit=limit, since=since)
+    new = persist_dataset(store, name, examples)
+    typer.echo(f"Persisted {len(examples)} examples to dataset '{name}' ({new} not stored by earlier datasets).")
+
+
+@dataset_app.command("export")
+def export_dataset(name: str = typer.Argument(..., help="Dataset label"),
+                   out: Path = typer.Argument(..., help="Arrow IPC file to write (e.g. var/datasets/<name>.arrow)")):
+    """Write a stored dataset to a columnar file that commands accept in place of a dataset name."""
+    examples = _load_dataset_examples(PostgresStore(get_settings()), name)
+    if not examples:
+        raise typer.BadParameter(f"Dataset '{name}' not found")
+    typer.echo(f"Wrote {len(examples)} examples to {examples.save(out)}")
+
 
+@dataset_app.command("diff")
+def diff_datasets(base: str = typer.Argument(..., help="Earlier dataset name"),
+                  head: str = typer.Argument(..., help="Later dataset name"),
+                  out: Optional[Path] = typer.Option(None, help="Write the examples new in HEAD to this Arrow IPC file")):
+    """Examples added and dropped between two datasets, compared by content hash."""
     store = PostgresStore(get_settings())
-    examples = build_training_examples(store, limit=limit)
-    persist_dataset(store, name, examples)
-    typer.echo(f"Persisted {len(examples)} examples to dataset '{name}'.")
+    manifests = {name: store.get_dataset_manifest(name) for name in (base, head)}
+    for name, manifest in manifests.items():
+        if manifest is None:
+            raise typer.BadParameter(f"Dataset '{name}' not found or not stored as a manifest; run `dataset compact`")
+    diff = diff_manifests(manifests[base], manifests[head])
+    typer.echo(f"{base} -> {head}: {diff.summary()}")
+    if out is not None:
+        added = [TrainingExample.model_validate(data) for data in store.fetch_training_examples(diff.added).values()]
+        typer.echo(f"Wrote {len(added)} new examples to {Dataset.of(added).save(out)}")
+
+
+@dataset_app.command("compact")
+def compact_datasets():
+    """Rewrite datasets that store their examples inline as manifests over the shared example table."""
+    store = PostgresStore(get_settings())
+    store.initialize_schema()
+    for dataset in store.list_training_datasets():
+        if dataset["manifest"]:
+            continue
+        examples = load_dataset(store, dataset["name"])
+        new = persist_dataset(store, dataset["name"], examples)
+        typer.echo(f"{dataset['name']}: {len(examples)} examples, {new} new to the example store")
+
+
+@dataset_app.command("synth")
+def synth_dataset(readings: int = typer.Option(100_000, help="Synthetic readings to generate"),
+                  users: int = typer.Option(1_000, help="Distinct synthetic users"),
+                  seed: int = typer.Option(0, help="Generator seed; the same seed always yields the same data"),
+                  days: int = typer.Option(90, help="Days of history the readings are spread over"),
+                  feedback_rate: float = typer.Option(0.3, help="Share of readings with a thumb"),
+                  load: bool = typer.Option(False, "--load", help="COPY users, readings and feedback into Postgres"),
+                  out: Optional[Path] = typer.Option(None, help="Write readings as JSON Lines (readable by model batch-predict)")):
+    """Generate a deterministic synthetic reading/feedback corpus.
+
+    ``--load`` needs the web app's schema (apps/db/init.sql); the tables ``initialize_schema`` creates use other enum
+    values and column types, so the load stops before writing anything when they are found.
+    """
+    from .synthetic import (
+        SPREAD_WEIGHTS,
+        TONES,
+        SyntheticConfig,
+        generate_feedback,
+        generate_readings,
+        reading_to_json,
+        synthetic_user_ids,
+    )
+
+    if not load and out is None:
+        raise typer.BadParameter("Pass --load and/or --out")
+    config = SyntheticConfig(readings=readings, users=users, seed=seed, days=days, feedback_rate=feedback_rate)
+    store = PostgresStore(get_settings()) if load else None
+    if store is not None:
+        problems = store.synthetic_schema_problems(SPREAD_WEIGHTS, TONES)
+        if problems:
+            typer.echo("dataset synth --load needs the schema from apps/db/init.sql: " + "; ".join(problems), err=True)
+            raise typer.Exit(code=1)
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8") as handle:
+            for reading in generate_readings(config):
+                handle.write(reading_to_json(reading) + "\n")
+        typer.echo(f"Wrote {readings} synthetic readings to {out}")
+    if store is not None:
+        started = datetime.utcnow()
+        store.copy_users(synthetic_user_ids(config))
+        # The generator is deterministic, so feedback is derived from a second pass instead of buffering readings
+        loaded = store.copy_readings(generate_readings(config))
+        feedback = store.copy_feedback(generate_feedback(generate_readings(config), config))
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        typer.echo(f"Loaded {loaded} readings and {feedback} feedback rows in {elapsed:.1f}s "
+                   f"({loaded / elapsed if elapsed else 0:.0f} readings/s)")
 
 
 @optimizer_app.command("mipro")
 def optimize_mipro(
-    dataset: Optional[str] = typer.Argument(None, help="Dataset name to use (if not provided, builds from feedback)"),
+    dataset: Optional[str] = typer.Argument(None, help="Dataset name or exported .arrow file (if not provided, builds from feedback)"),
     limit: int = typer.Option(2000, help="Max feedback examples to use when building dataset"),
     out: Optional[Path] = typer.Option(None, help="Output directory for optimized prompt"),
 ):
@@ -60,9 +201,10 @@ def optimize_mipro(
 
     # Initialize MLflow tracking
     tracker = get_mlflow_tracker("mipro-optimization")
+    label = _dataset_label(dataset)
     
     with tracker.start_run(
-        run_name=f"mipro-{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+        run_name=f"mipro-{label}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
         tags={"dataset": dataset, "optimizer": "MIPROv2"}
     ):
         # Log dataset and optimizer configuration
@@ -80,18 +222,23 @@ def optimize_mipro(
             examples=examples,
         )
 
-        output_dir = out or (get_settings().prompt_workspace / dataset)
+        output_dir = out or (get_settings().prompt_workspace / label)
         candidate = run_mipro(examples, output_dir)
         
         # Log optimization results
         tracker.log_dspy_candidate(candidate, "MIPROv2")
         
         typer.echo(f"Optimizer complete. Prompt stored at {candidate.prompt_path} (loss={candidate.loss})")
+        _echo_frontier(candidate)
+        _echo_schedule(candidate)
+        typer.echo(get_trace_sampler().stats.summary())
         typer.echo(f"Results tracked in MLflow experiment 'mipro-optimization'")
 
 
 @eval_app.command("dataset")
-def evaluate_dataset_cmd(dataset: str, model_uri: Optional[str] = typer.Option(None, help="MLflow model URI to evaluate (optional)")):
+def evaluate_dataset_cmd(dataset: str, model_uri: Optional[str] = typer.Option(None, help="MLflow model URI to evaluate (optional)"),
+                         score_cache: bool = typer.Option(True, "--score-cache/--no-score-cache", help="Reuse per-example scores of unchanged examples"),
+                         batch_size: int = typer.Option(1, help="Readings generated per LM request with --model-uri (invalid ones are retried singly)")):
     """Evaluate aggregate metrics on a dataset with MLflow tracking."""
 
     store = PostgresStore(get_settings())
@@ -103,48 +250,48 @@ def evaluate_dataset_cmd(dataset: str, model_uri: Optional[str] = typer.Option(N
     tracker = get_mlflow_tracker("evaluation")
     
     with tracker.start_run(
-        run_name=f"eval-{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+        run_name=f"eval-{_dataset_label(dataset)}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
         tags={"dataset": dataset, "evaluation_type": "dataset"}
     ):
         if model_uri:
             # Evaluate a specific model from MLflow
             try:
                 import mlflow.dspy
+                from .quota import install_quota
+                install_quota("interactive")
                 loaded_model = mlflow.dspy.load_model(model_uri)
                 
                 # Convert examples to DSPy format for evaluation
-                dspy_examples = [
-                    dspy.Example(
-                        intent=example.intent,
-                        spread_type=example.spread_type,
-                        cards=[card.model_dump() for card in example.cards],
-                        tone=example.tone,
-                        overview=example.overview,
-                        card_breakdowns=[item.model_dump() for item in example.card_breakdowns],
-                        synthesis=example.synthesis,
-                        actionable_reflection=example.actionable_reflection,
-                        disclaimer="For reflection and entertainment; not medical or financial advice.",
-                    ).with_inputs("intent", "spread_type", "cards", "tone")
-                    for example in examples
-                ]
+                dspy_examples = examples.to_dspy()
+                generator = None
+                if batch_size > 1:
+                    from .batched_generation import BatchedReadingGenerator
+                    generator = BatchedReadingGenerator(loaded_model, batch_size)
+                    loaded_model = generator.precompute(dspy_examples)
                 
                 # Run evaluation with the loaded model
                 eval_scores = tracker.log_dspy_evaluation(
                     dspy_examples, 
                     loaded_model, 
-                    lambda gold, pred: _metric_fn(gold, pred)
+                    _metric_fn
                 )
                 
                 typer.echo(f"Evaluating model from MLflow: {model_uri}")
                 typer.echo(f"Evaluation scores: {eval_scores}")
+                if generator is not None:
+                    typer.echo(generator.stats.summary())
+                typer.echo(get_trace_sampler().stats.summary())
                 
             except Exception as e:
                 typer.echo(f"Error loading model from MLflow: {e}", err=True)
                 raise
         else:
             # Get detailed metrics without MLflow model loading
-            metrics = detailed_evaluation(examples)
+            cache = get_score_cache() if score_cache else None
+            metrics = detailed_evaluation(examples, cache=cache)
             composite_score = metrics["composite"]
+            if cache is not None:
+                typer.echo(cache.stats.summary())
             
             # Log metrics to MLflow
             tracker.log_evaluation_metrics(metrics, dataset)
@@ -155,6 +302,272 @@ def evaluate_dataset_cmd(dataset: str, model_uri: Optional[str] = typer.Option(N
         typer.echo(f"Results tracked in MLflow experiment 'evaluation'")
 
 
+@eval_app.command("compare")
+def compare_prompt_versions(baseline: Path = typer.Argument(..., help="batch-predict output of the baseline prompt version"),
+                            candidates: list[Path] = typer.Argument(..., help="batch-predict outputs of candidate prompt versions"),
+                            metric: str = typer.Option("composite", help="Per-example score to compare (composite, overlap, coverage, ...)"),
+                            by: list[str] = typer.Option(["spread_type", "tone"], help="Columns to break results down by"),
+                            resamples: int = typer.Option(2000, help="Bootstrap resamples"),
+                            confidence: float = typer.Option(0.95, help="Confidence level of the intervals")):
+    """Paired bootstrap comparison of prompt versions regenerated over the same dataset."""
+    from .evaluate.compare import align_frames, compare_frames, load_score_frame
+
+    frames = align_frames([load_score_frame(baseline), *[load_score_frame(path) for path in candidates]])
+    base_frame, candidate_frames = frames[0], frames[1:]
+    typer.echo(f"Baseline '{base_frame.label}': {len(base_frame.row_ids)} paired examples "
+               f"({base_frame.failed} failed predictions scored as 0)")
+
+    tracker = get_mlflow_tracker("evaluation")
+    with tracker.start_run(run_name=f"compare-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+                           tags={"evaluation_type": "ab_compare", "baseline": base_frame.label}):
+        for frame in candidate_frames:
+            results = compare_frames(base_frame, frame, metric, by, resamples, confidence)
+            typer.echo(f"\nCandidate '{frame.label}' vs '{base_frame.label}' on {metric} ({frame.failed} failed predictions):")
+            for result in results:
+                verdict = "WIN" if result.significant_win else "LOSS" if result.significant_loss else "tie"
+                typer.echo(f"  {result.group:<28} n={result.n:<7} {result.baseline_mean:.3f} -> {result.candidate_mean:.3f} "
+                           f"delta={result.delta:+.4f} CI[{result.ci_low:+.4f}, {result.ci_high:+.4f}] "
+                           f"P(better)={result.prob_improvement:.2f} {verdict}")
+            overall = results[0]
+            tracker.log_evaluation_metrics({
+                f"{frame.label}_delta": overall.delta,
+                f"{frame.label}_ci_low": overall.ci_low,
+                f"{frame.label}_ci_high": overall.ci_high,
+            }, f"compare-{metric}")
+
+
+@prompt_app.command("promote")
+def promote_prompt_version(version: int = typer.Argument(..., help="prompt_versions id to activate"),
+                           baseline: Path = typer.Option(..., help="batch-predict output of the currently active prompt"),
+                           candidate: Path = typer.Option(..., help="batch-predict output of the prompt being promoted"),
+                           metric: str = typer.Option("composite", help="Per-example score the candidate must win on"),
+                           confidence: float = typer.Option(0.95, help="Confidence level required for the win"),
+                           min_paired: int = typer.Option(100, help="Fewest examples both versions were run on"),
+                           usage_gate: bool = typer.Option(False, "--usage-gate", help="Also block when the candidate's batch-predict latency or completion tokens regress"),
+                           usage_tolerance: float = typer.Option(0.10, help="Relative change the usage gate counts as a regression"),
+                           force: bool = typer.Option(False, "--force", help="Promote without a statistical win"),
+                           prompt: Optional[Path] = typer.Option(None, "--prompt", help="Exported prompt.txt of the version; nightly warm-starts from it")):
+    """Activate a prompt version only if it beats the baseline with a confident paired win.
+
+    Failed predictions score 0, so a candidate that fails more often than the baseline has to make up for it.
+    """
+    from .evaluate.compare import align_frames, compare_frames, load_score_frame
+
+    base_frame, candidate_frame = align_frames([load_score_frame(baseline), load_score_frame(candidate)])
+    overall = compare_frames(base_frame, candidate_frame, metric, by=(), confidence=confidence)[0]
+    typer.echo(f"{metric}: delta={overall.delta:+.4f} CI[{overall.ci_low:+.4f}, {overall.ci_high:+.4f}] over {overall.n} paired examples")
+    typer.echo(f"Failed predictions (scored as 0): baseline {base_frame.failed}, candidate {candidate_frame.failed}")
+
+    if overall.n < min_paired and not force:
+        typer.echo(f"Not promoting prompt version {version}: only {overall.n} paired examples, "
+                   f"at least {min_paired} are required.", err=True)
+        raise typer.Exit(code=1)
+
+    if not overall.significant_win and not force:
+        typer.echo(f"Not promoting prompt version {version}: no significant win at {confidence:.0%} confidence.", err=True)
+        raise typer.Exit(code=1)
+
+    if usage_gate:
+        from .usage import batch_regressions
+
+        try:
+            regressions = batch_regressions(baseline, candidate, tolerance=usage_tolerance)
+        except ValueError as exc:
+            typer.echo(str(exc), err=True)
+            if not force:
+                typer.echo(f"Not promoting prompt version {version}: the usage gate could not run.", err=True)
+                raise typer.Exit(code=1)
+            regressions = []
+        for regression in regressions:
+            typer.echo(f"Usage regression: {regression.describe()}", err=True)
+        if regressions and not force:
+            typer.echo(f"Not promoting prompt version {version}: batch-predict latency or tokens regressed.", err=True)
+            raise typer.Exit(code=1)
+
+    PostgresStore(get_settings()).activate_prompt_version(version)
+    typer.echo(f"Prompt version {version} activated.")
+    kept = keep_promoted_prompt(version, prompt)
+    if kept is not None:
+        typer.echo(f"Nightly will warm-start from {kept}")
+
+
+@usage_app.command("report")
+def usage_report(days: int = typer.Option(7, help="Window of groq_usage rows to aggregate"),
+                 baseline_version: Optional[str] = typer.Option(None, help="Prompt version other versions are compared against"),
+                 tolerance: float = typer.Option(0.10, help="Relative change that counts as a regression"),
+                 min_calls: int = typer.Option(20, help="Minimum calls before a version is compared"),
+                 fail_on_regression: bool = typer.Option(False, "--fail-on-regression", help="Exit non-zero when a regression is flagged")):
+    """Latency percentiles, throughput and cost per model and prompt version, logged to MLflow."""
+    from datetime import timedelta
+    from .usage import find_regressions, uncompared_versions, usage_metrics
+
+    store = PostgresStore(get_settings())
+    aggregates = store.aggregate_groq_usage(datetime.utcnow() - timedelta(days=days))
+    if not aggregates:
+        typer.echo(f"No Groq usage recorded in the last {days} days.")
+        return
+
+    typer.echo(f"Groq usage over the last {days} days:")
+    for agg in aggregates:
+        typer.echo(f"  {agg.model:<26} prompt={agg.prompt_version or '-':<18} calls={agg.calls:<7} "
+                   f"p50/p95/p99={agg.p50_latency_ms:.0f}/{agg.p95_latency_ms:.0f}/{agg.p99_latency_ms:.0f}ms "
+                   f"tok/s={agg.tokens_per_second:.1f} completion={agg.avg_completion_tokens:.0f} "
+                   f"cost={agg.avg_cost_cents:.2f}c")
+
+    regressions = find_regressions(aggregates, baseline_version, tolerance, min_calls) if baseline_version else []
+    for regression in regressions:
+        typer.echo(f"REGRESSION {regression.describe()}")
+    for reason in uncompared_versions(aggregates, baseline_version, min_calls) if baseline_version else []:
+        typer.echo(f"NOT COMPARED {reason}")
+
+    tracker = get_mlflow_tracker("usage")
+    with tracker.start_run(run_name=f"usage-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+                           tags={"report": "groq_usage", "window_days": str(days)}):
+        import mlflow
+        mlflow.log_metrics(usage_metrics(aggregates))
+        mlflow.log_metric("usage_regressions", len(regressions))
+        mlflow.log_dict([agg.model_dump() for agg in aggregates], "groq_usage.json")
+
+    if regressions and fail_on_regression:
+        raise typer.Exit(code=1)
+
+
+@telemetry_app.command("rollup")
+def telemetry_rollup(lateness_minutes: int = typer.Option(15, help="Hours are rolled up once this long has passed after they end"),
+                     retention_days: int = typer.Option(90, help="Raw events older than this are deleted after rollup"),
+                     batch_size: int = typer.Option(10000, help="Rows deleted per transaction"),
+                     compact: bool = typer.Option(True, "--compact/--no-compact", help="Delete raw events past retention")):
+    """Incrementally roll raw telemetry events into hourly/daily tables and compact the raw table."""
+    from datetime import timedelta
+    from .telemetry_rollup import run_rollup
+
+    store = PostgresStore(get_settings())
+    store.initialize_schema()
+    result = run_rollup(
+        store,
+        lateness=timedelta(minutes=lateness_minutes),
+        retention=timedelta(days=retention_days) if compact else None,
+        batch_size=batch_size,
+    )
+    if result.watermark is None:
+        typer.echo("No telemetry events to roll up.")
+        return
+    typer.echo(f"Rolled up {len(result.windows)} window(s): {result.hourly_rows} hourly and {result.daily_rows} daily rows "
+               f"upserted; watermark now {result.watermark.isoformat()}")
+    if result.retention_cutoff is not None:
+        typer.echo(f"Deleted {result.deleted} raw events older than {result.retention_cutoff.isoformat()}")
+
+
+@app.command("watch")
+def watch_quality(batch_size: Optional[int] = typer.Option(None, help="Readings scored per micro-batch (default WATCH_BATCH_SIZE)"),
+                  max_wait_s: Optional[float] = typer.Option(None, help="Longest a notified reading waits to be scored (default WATCH_MAX_WAIT_S)"),
+                  window: Optional[int] = typer.Option(None, help="Recent readings per prompt version compared against its history (default WATCH_WINDOW)")):
+    """Score new readings and feedback as they are inserted and raise alerts when a prompt version's quality drops."""
+    from datetime import timedelta
+    from .watch import QualityWatcher, run_watch
+
+    settings = get_settings()
+    store = PostgresStore(settings)
+    store.initialize_schema()
+    watcher = QualityWatcher(
+        store,
+        batch_size=batch_size or settings.watch_batch_size,
+        window=window or settings.watch_window,
+        max_drop=settings.watch_max_drop,
+        max_thumbs_down_rate=settings.watch_max_thumbs_down_rate,
+        cooldown=timedelta(minutes=settings.watch_alert_cooldown_minutes),
+    )
+
+    def report(alerts):
+        for alert in alerts:
+            typer.echo(f"ALERT {alert['type']}: {alert['message']}")
+
+    typer.echo(f"Watching readings and feedback (batches of {watcher.batch_size}, window {watcher.window}); Ctrl-C to stop")
+    try:
+        run_watch(store, watcher, max_wait_s=max_wait_s or settings.watch_max_wait_s,
+                  backfill_limit=settings.watch_backfill_limit, on_flush=report)
+    except KeyboardInterrupt:
+        pass
+    typer.echo(watcher.stats.summary())
+    for version, summary in watcher.summary().items():
+        composite, rate = summary["means"].get("composite"), summary["thumbs_down_rate"]
+        typer.echo(f"  {version}: {summary['scored']} scored, window composite "
+                   f"{'n/a' if composite is None else f'{composite:.3f}'}, thumbs-down "
+                   f"{'n/a' if rate is None else f'{rate:.0%}'}")
+
+
+@app.command("gc")
+def garbage_collect(max_age_days: int = typer.Option(30, help="Datasets, runs, traces and files older than this are eligible"),
+                    keep_last: int = typer.Option(7, help="Always keep this many newest datasets per prefix and runs per experiment"),
+                    prefix: list[str] = typer.Option(["nightly_", "feedback-built-"], help="Dataset name prefixes gc manages"),
+                    batch_size: int = typer.Option(500, help="Rows or runs deleted per batch"),
+                    dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be deleted and its size")):
+    """Delete old datasets, prompt directories, dataset dumps, MLflow runs and traces; promoted lineage is kept."""
+    from datetime import timedelta
+    from mlflow import MlflowClient
+    from .mlflow_tracker import tracking_uri
+    from .retention import RetentionPolicy, plan_gc, run_gc
+
+    settings = get_settings()
+    store = PostgresStore(settings)
+    if not dry_run:
+        store.initialize_schema()
+    client = MlflowClient(tracking_uri())
+    policy = RetentionPolicy(max_age=timedelta(days=max_age_days), keep_last=keep_last, prefixes=tuple(prefix))
+    plan = plan_gc(store, client, settings, policy)
+    for line in plan.report():
+        typer.echo(line)
+    if dry_run:
+        for name in plan.datasets:
+            typer.echo(f"  dataset {name}")
+        for run in plan.runs:
+            typer.echo(f"  run {run.run_id} {run.name} ({run.dataset or 'no dataset'})")
+        for run in plan.purge_runs:
+            typer.echo(f"  deleted run {run.run_id} {run.name} ({run.dataset or 'no dataset'})")
+        return
+    deleted = run_gc(store, client, plan, tracking_uri(), batch_size=batch_size)
+    typer.echo("Deleted " + ", ".join(f"{count} {kind.replace('_', ' ')}" for kind, count in deleted.items()))
+
+
+@db_app.command("migrate-partitions")
+def migrate_partitions(tables: Optional[list[str]] = typer.Argument(None, help="Tables to convert (default: readings telemetry_events)"),
+                       months_ahead: Optional[int] = typer.Option(None, help="Future months to pre-create")):
+    """Convert plain tables into monthly range-partitioned tables, copying existing rows."""
+    from .partitioning import PARTITIONED_TABLES
+
+    store = PostgresStore(get_settings())
+    for table in tables or list(PARTITIONED_TABLES):
+        if table not in PARTITIONED_TABLES:
+            raise typer.BadParameter(f"{table} is not partitionable; choose from {', '.join(PARTITIONED_TABLES)}")
+        if store.is_partitioned(table):
+            typer.echo(f"{table} is already partitioned.")
+            continue
+        result = store.migrate_to_partitioned(table, months_ahead)
+        typer.echo(f"{table}: copied {result['rows']} rows into {len(result['partitions'])} partitions "
+                   f"({result['partitions'][0]} .. {result['partitions'][-1]})")
+        for fk in result["dropped_foreign_keys"]:
+            typer.echo(f"  dropped foreign key {fk}")
+
+
+@db_app.command("ensure-partitions")
+def ensure_partitions(months_ahead: Optional[int] = typer.Option(None, help="Future months to pre-create")):
+    """Create upcoming monthly partitions, moving rows out of DEFAULT partitions; run monthly (nightly does it too)."""
+    created = PostgresStore(get_settings()).ensure_partitions(months_ahead)
+    typer.echo(f"Ensured {len(created)} partitions: {', '.join(created) or 'no partitioned tables'}")
+    for name, moved in created.items():
+        if moved:
+            typer.echo(f"Moved {moved} rows from the DEFAULT partition into {name}")
+
+
+@db_app.command("partitions")
+def list_partitions(table: str = typer.Argument("readings", help="Partitioned table")):
+    """List a table's partitions with bounds and approximate sizes."""
+    store = PostgresStore(get_settings())
+    for partition in store.list_partitions(table):
+        typer.echo(f"{partition['name']:<28} rows~{partition['approx_rows']:<10} {partition['bytes'] / 1e6:8.1f} MB  "
+                   f"{partition['bounds']}")
+
+
 @app.command("serve")
 def serve_mlflow(port: int = typer.Option(5000, help="Port for MLflow UI server"),
                 host: str = typer.Option("0.0.0.0", help="Host for MLflow UI server")):
@@ -194,15 +607,54 @@ def serve_mlflow(port: int = typer.Option(5000, help="Port for MLflow UI server"
         raise
 
 
+@quota_app.command("status")
+def quota_status():
+    """Current use of the shared Groq quota: bucket levels, leases in flight and callers waiting, by priority."""
+    import json
+    from .quota import get_quota_coordinator
+
+    coordinator = get_quota_coordinator()
+    if coordinator is None:
+        typer.echo("Quota coordination is off; set QUOTA_REQUESTS_PER_MINUTE, QUOTA_TOKENS_PER_MINUTE or QUOTA_MAX_CONCURRENCY.")
+        raise typer.Exit(code=1)
+    typer.echo(json.dumps(coordinator.utilization(), indent=2))
+
+
 @app.command("nightly")
-def nightly(limit: int = typer.Option(2000, help="Max rows for dataset build")):
+def nightly(limit: int = typer.Option(2000, help="Max rows for dataset build"),
+            days: int = typer.Option(90, help="Only use readings from the last N days"),
+            score_cache: bool = typer.Option(True, "--score-cache/--no-score-cache", help="Reuse per-example scores of unchanged readings"),
+            full_search: bool = typer.Option(False, "--full-search", help="Optimize from a blank module with MIPRO's light search instead of warm-starting from the promoted one")):
     """Full nightly workflow: dataset build -> optimize -> evaluate -> record with MLflow tracking."""
+    from datetime import timedelta
 
     timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
     dataset_name = f"nightly_{timestamp}"
-    store = PostgresStore(get_settings())
-    examples = build_training_examples(store, limit=limit)
+    settings = get_settings()
+    store = PostgresStore(settings)
+    store.initialize_schema()
+    # Keep next months' partitions ahead of the web app's inserts (no-op on plain tables)
+    store.ensure_partitions()
+    active = None if full_search else store.fetch_active_prompt_version()
+    warm_start = None if full_search else promoted_model_uri(active.id if active else None, settings)
+    examples = None
+    if warm_start:
+        # The promoted prompt was optimized on what came before its version; search on the feedback since then
+        if active is not None:
+            examples = build_training_examples(store, limit=limit, since=active.created_at)
+            if len(examples) < settings.warm_start_min_examples:
+                typer.echo(f"Only {len(examples)} readings since prompt version {active.id}; using the full window.")
+                examples = None
+    if examples is None:
+        # A bounded window lets Postgres prune the monthly partitions older than it
+        examples = build_training_examples(store, limit=limit, since=datetime.utcnow() - timedelta(days=days))
+    previous = next((row["name"] for row in store.list_training_datasets("nightly_")
+                     if row["manifest"] and row["name"] != dataset_name), None)
     persist_dataset(store, dataset_name, examples)
+    diff = None
+    if previous is not None:
+        diff = diff_manifests(store.get_dataset_manifest(previous), store.get_dataset_manifest(dataset_name))
+        typer.echo(f"Dataset {dataset_name} vs {previous}: {diff.summary()}")
     
     # Initialize MLflow tracking for the full workflow
     tracker = get_mlflow_tracker("nightly-workflow")
@@ -214,20 +666,27 @@ def nightly(limit: int = typer.Option(2000, help="Max rows for dataset build")):
         # Log dataset creation
         tracker.log_dspy_optimizer(
             optimizer_name="dataset_build",
-            optimizer_config={"limit": limit},
+            optimizer_config={"limit": limit, "warm_start": warm_start, "previous_dataset": previous,
+                              "new_examples": len(diff.added) if diff else len(examples)},
             dataset_name=dataset_name,
             dataset_size=len(examples),
             examples=examples,
         )
         
-        prompt_dir = get_settings().prompt_workspace / dataset_name
-        candidate = run_mipro(examples, prompt_dir)
+        prompt_dir = settings.prompt_workspace / dataset_name
+        typer.echo(f"Warm start from {warm_start}" if warm_start else "Full search from a blank module")
+        candidate = run_mipro(examples, prompt_dir, warm_start=warm_start)
+        _echo_frontier(candidate)
+        _echo_schedule(candidate)
         
         # Log optimization results
         tracker.log_dspy_candidate(candidate, "MIPROv2")
         
-        # Evaluate results
-        metrics = detailed_evaluation(examples)
+        # Evaluate results; readings scored on earlier nights come from the score cache
+        cache = get_score_cache() if score_cache else None
+        metrics = detailed_evaluation(examples, cache=cache)
+        if cache is not None:
+            typer.echo(cache.stats.summary())
         composite_score = metrics["composite"]
         tracker.log_evaluation_metrics(metrics, dataset_name)
 
@@ -252,6 +711,7 @@ def nightly(limit: int = typer.Option(2000, help="Max rows for dataset build")):
         
         typer.echo("Nightly workflow complete.")
         typer.echo(f"Composite score: {composite_score:.3f}")
+        typer.echo(get_trace_sampler().stats.summary())
         typer.echo(f"All results tracked in MLflow experiment 'nightly-workflow'")
 
 
@@ -283,8 +743,18 @@ def list_models(experiment: Optional[str] = typer.Option(None, help="Experiment
 
 @model_app.command("serve")
 def serve_model(model_uri: str = typer.Argument(..., help="MLflow model URI to serve"), 
-                port: int = typer.Option(8080, help="Port to serve on")):
+                port: int = typer.Option(8080, help="Port to serve on"),
+                in_process: bool = typer.Option(False, "--in-process", help="Serve from a warm in-process module pool instead of mlflow.pyfunc.serving"),
+                pool_size: int = typer.Option(4, help="Max compiled modules kept loaded (in-process mode)"),
+                allow_model_uri: list[str] = typer.Option([], "--allow-model-uri", help="Further model URIs requests may select (in-process mode); any other is refused"),
+                workers: int = typer.Option(8, help="Concurrent LM calls (in-process mode)"),
+                stub_lm: bool = typer.Option(False, "--stub-lm", help="Answer with the offline stub LM for load testing"),
+                stub_latency_ms: float = typer.Option(0.0, help="Simulated stub LM latency per call")):
     """Serve a DSPy model from MLflow using MLflow model serving."""
+    if in_process:
+        _serve_in_process(model_uri, port, pool_size, allow_model_uri, workers, stub_lm, stub_latency_ms)
+        return
+
     import mlflow.pyfunc
     import subprocess
     import sys
@@ -312,6 +782,32 @@ def serve_model(model_uri: str = typer.Argument(..., help="MLflow model URI to s
         raise
 
 
+def _serve_in_process(model_uri: str, port: int, pool_size: int, allowed_model_uris: list[str], workers: int,
+                      stub_lm: bool, stub_latency_ms: float) -> None:
+    from .lm import get_shared_lm
+    from .quota import get_quota_coordinator, install_quota
+    from .serving import ReadingServer
+    from .stub_lm import StubLM
+
+    install_quota("serving")
+    lm = StubLM(latency_ms=stub_latency_ms) if stub_lm else get_shared_lm(get_settings().groq_prod_model)
+    app_server = ReadingServer(model_uri, lm, pool_size=pool_size, max_workers=workers, quota=get_quota_coordinator(),
+                               allowed_model_uris=allowed_model_uris)
+    # Warm the default model before accepting traffic
+    app_server.pool.get(model_uri)
+    http_server = app_server.serve(port=port)
+
+    typer.echo(f"Serving {model_uri} in-process on port {port} ({'stub LM' if stub_lm else lm.model})")
+    typer.echo(f"POST http://localhost:{port}/predict, GET /metrics for latency histograms")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        typer.echo("\nModel server stopped")
+    finally:
+        http_server.server_close()
+        app_server.close()
+
+
 @model_app.command("predict")
 def predict_model(model_uri: str = typer.Argument(..., help="MLflow model URI"),
                   intent: str = typer.Option("What guidance do I need today?", help="User intent"),
@@ -336,8 +832,14 @@ def predict_model(model_uri: str = typer.Argument(..., help="MLflow model URI"),
         typer.echo(f"Running prediction with model: {model_uri}")
         typer.echo(f"Input: intent='{intent}', spread_type='{spread_type}', card='{card_id}' ({orientation})")
         
-        # Make prediction
-        result = model(intent=intent, spread_type=spread_type, cards=cards, tone=tone)
+        # Make prediction; stub backends replace the LM saved with the model so this runs offline
+        if get_settings().lm_backend != "groq":
+            import dspy
+            from .lm import build_lm
+            with dspy.context(lm=build_lm()):
+                result = model(intent=intent, spread_type=spread_type, cards=cards, tone=tone)
+        else:
+            result = model(intent=intent, spread_type=spread_type, cards=cards, tone=tone)
         
         typer.echo("\nPrediction Result:")
         typer.echo(f"Overview: {result.overview}")
@@ -349,8 +851,232 @@ def predict_model(model_uri: str = typer.Argument(..., help="MLflow model URI"),
         raise
 
 
-def _load_dataset_examples(store: PostgresStore, dataset: str) -> list[TrainingExample]:
-    dataset_data = store.get_training_dataset(dataset)
-    if not dataset_data:
-        return []
-    return [TrainingExample.model_validate_json(data) if isinstance(data, str) else TrainingExample.model_validate(data) for data in dataset_data]
+@model_app.command("batch-predict")
+def batch_predict(model_uri: str = typer.Argument(..., help="MLflow model URI, exported prompt file, or 'baseline'"),
+                  source: str = typer.Argument(..., help="Dataset name, 'readings' to stream the readings table, a .jsonl export or an exported .arrow file"),
+                  out: Path = typer.Option(..., help="Output directory for Parquet part files"),
+                  label: Optional[str] = typer.Option(None, help="Label stored with each row (defaults to the model URI)"),
+                  limit: Optional[int] = typer.Option(None, help="Max rows to read from the source"),
+                  concurrency: int = typer.Option(8, help="Concurrent LM calls"),
+                  max_pending: Optional[int] = typer.Option(None, help="Max rows in flight before input reading pauses (default 2x concurrency)"),
+                  flush_rows: int = typer.Option(500, help="Rows per Parquet part file"),
+                  cache_dir: Optional[Path] = typer.Option(None, help="Directory for the on-disk LM response cache"),
+                  batch_size: int = typer.Option(1, help="Readings generated per LM request (invalid ones are retried singly)"),
+                  stub_lm: bool = typer.Option(False, "--stub-lm", help="Use the offline stub LM")):
+    """Regenerate readings for a dataset or reading export with a compiled module, resuming failed rows only."""
+    import dspy
+    from itertools import islice
+    from .batch_predict import iter_jsonl_examples, run_batch_predict
+    from .datasets import _to_training_example
+    from .lm import build_lm
+    from .serving import load_reading_module
+    from .stub_lm import StubLM, StubProfile
+
+    store = PostgresStore(get_settings())
+    source_path = Path(source)
+    if source_path.suffix == ".jsonl" and source_path.is_file():
+        examples = iter_jsonl_examples(source_path)
+    elif source == "readings":
+        examples = (_to_training_example(reading, None) for reading in store.iter_readings(limit))
+    else:
+        examples = _load_dataset_examples(store, source)
+        if not examples:
+            raise typer.BadParameter(f"Dataset '{source}' not found")
+    if limit is not None:
+        examples = islice(examples, limit)
+
+    if cache_dir is not None:
+        dspy.configure_cache(enable_disk_cache=True, enable_memory_cache=True, disk_cache_dir=str(cache_dir))
+    lm = StubLM(profile=StubProfile.from_settings(get_settings())) if stub_lm else build_lm(cache=True)
+
+    def report(progress):
+        done = progress.succeeded + progress.failed
+        if done and done % 100 == 0:
+            typer.echo(f"  {done} rows ({progress.failed} failed, {progress.rows_per_second:.1f} rows/s)")
+
+    result = run_batch_predict(
+        examples,
+        load_reading_module(model_uri),
+        lm,
+        out,
+        label=label or model_uri,
+        concurrency=concurrency,
+        max_pending=max_pending,
+        flush_rows=flush_rows,
+        progress=report,
+        batch_size=batch_size,
+    )
+    typer.echo(f"Batch prediction complete: {result.succeeded} succeeded, {result.failed} failed, "
+               f"{result.skipped} skipped as already done, {result.parts_written} parts written to {out} "
+               f"({result.rows_per_second:.1f} rows/s)")
+    if result.batch_stats is not None:
+        typer.echo(result.batch_stats.summary())
+    if result.failed:
+        typer.echo("Rerun the same command to retry failed rows only.")
+
+
+@model_app.command("stub-server")
+def stub_server(host: str = typer.Option("127.0.0.1", help="Interface to bind"),
+                port: int = typer.Option(8089, help="Port to serve on"),
+                latency_ms: float = typer.Option(0.0, help="Median latency per completion"),
+                distribution: str = typer.Option("fixed", help="Latency distribution: fixed, uniform or lognormal"),
+                spread: float = typer.Option(0.5, help="Relative spread (uniform) or sigma (lognormal) of the latency"),
+                ms_per_token: float = typer.Option(0.0, help="Extra latency per completion token"),
+                error_rate: float = typer.Option(0.0, help="Share of requests answered with a 500"),
+                rate_limit_rate: float = typer.Option(0.0, help="Share of requests answered with a random 429"),
+                rpm: Optional[int] = typer.Option(None, help="Requests per minute before the token bucket returns 429s"),
+                seed: int = typer.Option(0, help="Seed for latency and failure sampling")):
+    """Run an OpenAI-compatible stub LM endpoint for offline benchmarks (use with LM_BACKEND=stub-http)."""
+    from .stub_lm import StubLM, StubLMServer, StubProfile
+
+    if distribution not in ("fixed", "uniform", "lognormal"):
+        raise typer.BadParameter("distribution must be fixed, uniform or lognormal")
+    profile = StubProfile(
+        latency_ms=latency_ms,
+        latency_distribution=distribution,
+        latency_spread=spread,
+        ms_per_token=ms_per_token,
+        error_rate=error_rate,
+        rate_limit_rate=rate_limit_rate,
+        requests_per_minute=rpm,
+        seed=seed,
+    )
+    app_server = StubLMServer(StubLM(profile=profile))
+    http_server = app_server.serve(host=host, port=port)
+    typer.echo(f"Stub LM listening on http://{host}:{port}/v1 (GET /metrics for call counts)")
+    typer.echo(f"Set LM_BACKEND=stub-http STUB_API_BASE=http://{host}:{port}/v1 to route pipeline LM calls here")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        typer.echo(f"\nStub LM stopped: {app_server.lm.stats.__dict__}")
+    finally:
+        http_server.server_close()
+
+
+@cache_app.command("refresh")
+def refresh_cache(model_uri: str = typer.Argument(..., help="Promoted model URI used to generate cached readings"),
+                  prompt_version: Optional[str] = typer.Option(None, help="Prompt version the entries belong to (defaults to the one currently serving)"),
+                  top_n: int = typer.Option(500, help="Number of most frequent draws to materialize"),
+                  ttl_days: int = typer.Option(7, help="Days before an entry expires"),
+                  lookback_days: int = typer.Option(30, help="Window of readings used to rank draws"),
+                  concurrency: int = typer.Option(4, help="Concurrent generations")):
+    """Precompute readings for the most frequent draws under the serving prompt version."""
+    from datetime import timedelta
+    from .lm import get_shared_lm
+    from .reading_cache import refresh_reading_cache
+    from .serving import load_reading_module
+
+    store = PostgresStore(get_settings())
+    prompt_version = prompt_version or store.fetch_latest_prompt_version()
+    if prompt_version is None:
+        raise typer.BadParameter("No readings found to infer the serving prompt version; pass --prompt-version")
+
+    result = refresh_reading_cache(
+        store,
+        load_reading_module(model_uri),
+        get_shared_lm(get_settings().groq_prod_model),
+        prompt_version,
+        top_n=top_n,
+        ttl=timedelta(days=ttl_days),
+        lookback=timedelta(days=lookback_days),
+        concurrency=concurrency,
+    )
+    typer.echo(f"Cache refresh for prompt version '{prompt_version}': {result.generated} generated, "
+               f"{result.already_fresh} already fresh, {result.failed} failed, {result.invalidated} invalidated "
+               f"(of {result.candidates} candidate draws)")
+
+
+@cache_app.command("invalidate")
+def invalidate_cache(keep_prompt_version: Optional[str] = typer.Option(None, help="Keep entries for this prompt version only")):
+    """Drop expired cache entries and, optionally, every other prompt version's entries."""
+    deleted = PostgresStore(get_settings()).invalidate_reading_cache(keep_prompt_version)
+    typer.echo(f"Removed {deleted} cached readings.")
+
+
+@cache_app.command("stats")
+def cache_stats(prompt_version: Optional[str] = typer.Option(None, help="Prompt version to analyze (defaults to the one currently serving)"),
+                lookback_days: int = typer.Option(7, help="Window of readings to analyze")):
+    """Report cache hit rates computed from the readings table."""
+    from datetime import timedelta
+    from .reading_cache import cache_hit_report
+
+    store = PostgresStore(get_settings())
+    prompt_version = prompt_version or store.fetch_latest_prompt_version()
+    if prompt_version is None:
+        raise typer.BadParameter("No readings found to infer the serving prompt version; pass --prompt-version")
+
+    report = cache_hit_report(store, prompt_version, timedelta(days=lookback_days))
+    typer.echo(f"Reading cache stats for prompt version '{prompt_version}' over {lookback_days} days:")
+    typer.echo(f"  Readings: {int(report['readings'])} ({int(report['distinct_keys'])} distinct draws, "
+               f"{report['repeat_ratio']:.1%} repeats)")
+    typer.echo(f"  Hit rate: {report['hit_rate']:.1%} (servable without intent: {report['servable_hit_rate']:.1%})")
+
+
+def _finish_profile(cprofile, stem: Path) -> None:
+    """Save cProfile stats and the span report, and attach them to the command's last MLflow run if any."""
+    import io
+    import mlflow
+    import pstats
+    from .profiling import get_profiler
+
+    cprofile.disable()
+    profiler = get_profiler()
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    stats_path = stem.with_suffix(".prof")
+    cprofile.dump_stats(stats_path)
+    text = io.StringIO()
+    pstats.Stats(cprofile, stream=text).sort_stats("cumulative").print_stats(60)
+    report_path = stem.with_suffix(".txt")
+    report_path.write_text(f"{profiler.report()}\n\n{text.getvalue()}", encoding="utf-8")
+    trace_path = profiler.write_chrome_trace(profiler.trace_path)
+
+    typer.echo(f"\n{profiler.report()}")
+    typer.echo(f"Profile saved to {stats_path} (snakeviz/pstats), {report_path} and {trace_path}")
+    run = mlflow.last_active_run()
+    if run is not None:
+        from mlflow.tracking import MlflowClient
+        client = MlflowClient()
+        for path in (stats_path, report_path, trace_path):
+            client.log_artifact(run.info.run_id, str(path), "profile")
+        typer.echo(f"Profile attached to MLflow run {run.info.run_id}")
+
+
+def _echo_schedule(candidate: PromptCandidate) -> None:
+    schedule = candidate.schedule
+    if schedule is None:
+        return
+    rungs = ", ".join(f"{count}x{size}" for count, size in zip(schedule.rung_candidates, schedule.rung_examples))
+    typer.echo(
+        f"Successive halving: {schedule.candidates} candidates, rungs (candidates x examples) {rungs}; "
+        f"{schedule.eval_calls} evaluations vs {schedule.baseline_eval_calls} on the full valset "
+        f"({schedule.eval_calls_saved} saved), {schedule.lm_calls} LM calls, {schedule.tokens} tokens"
+        f"{' (budget exhausted)' if schedule.budget_exhausted else ''}"
+    )
+
+
+def _echo_frontier(candidate: PromptCandidate) -> None:
+    slo = get_settings().latency_slo_p95_ms
+    if not candidate.frontier:
+        return
+    typer.echo(f"Candidate cost vs quality (p95 SLO {slo:.0f} ms, * = Pareto frontier):")
+    for cost in candidate.frontier:
+        p95 = f"{cost.p95_latency_ms:.0f} ms" if cost.p95_latency_ms is not None else "n/a"
+        typer.echo(
+            f"  {'*' if cost.on_frontier else ' '} {cost.label:<14} quality={cost.quality:.3f} "
+            f"objective={cost.objective:.3f} p95={p95} tokens={cost.avg_completion_tokens:.0f} "
+            f"n={cost.examples}{'' if cost.meets_slo else '  (misses SLO)'}"
+        )
+
+
+def _load_dataset_examples(store: PostgresStore, dataset: str) -> Dataset:
+    """A stored dataset by name, or a file written by ``dataset export`` (memory-mapped, decoded lazily)."""
+    if dataset.endswith(".arrow") and Path(dataset).is_file():
+        return Dataset.open(Path(dataset))
+    return load_dataset(store, dataset) or Dataset.of([])
+
+
+def _dataset_label(dataset: str) -> str:
+    """Name a dataset argument's outputs go under: the file stem of an exported file, else the dataset name."""
+    if dataset.endswith(".arrow") and Path(dataset).is_file():
+        return Path(dataset).stem
+    return dataset
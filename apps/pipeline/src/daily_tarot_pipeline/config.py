@@ -1,16 +1,16 @@
 from __future__ import annotations
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings
 
 
 class EnvironmentSettings(BaseSettings):
     """Pipeline environment variables."""
 
-    groq_api_key: str = Field(..., env="GROQ_API_KEY")
+    groq_api_key: str = Field("", env="GROQ_API_KEY")
     groq_api_base: str = Field("https://api.groq.com/openai/v1", env="GROQ_API_BASE")
     groq_dev_model: Literal["groq/openai/gpt-oss-20b", "groq/openai/gpt-oss-120b"] = Field(
         "groq/openai/gpt-oss-20b", env="GROQ_DEV_MODEL"
@@ -25,6 +25,74 @@ class EnvironmentSettings(BaseSettings):
     postgres_database: str = Field("daily_tarot", env="POSTGRES_DB")
     prompt_workspace: Path = Field(Path("var/prompts"), env="PROMPT_WORKSPACE")
     dataset_workspace: Path = Field(Path("var/datasets"), env="DATASET_WORKSPACE")
+    profile_workspace: Path = Field(Path("var/profiles"), env="PROFILE_WORKSPACE")
+    score_cache_path: Path = Field(Path("var/score_cache.sqlite3"), env="SCORE_CACHE_PATH")
+    # "embedding" scores gold-vs-prediction similarity and intent relevance with EMBEDDING_MODEL instead of token overlap
+    metric_backend: Literal["overlap", "embedding"] = Field("overlap", env="METRIC_BACKEND")
+    embedding_model: str = Field("sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
+    embedding_batch_size: int = Field(64, env="EMBEDDING_BATCH_SIZE")
+    embedding_cache_dir: Path = Field(Path("var/embeddings"), env="EMBEDDING_CACHE_DIR")
+    trace_mode: Literal["all", "sampled", "low-score", "off"] = Field("sampled", env="TRACE_MODE")
+    trace_sample_rate: float = Field(0.1, env="TRACE_SAMPLE_RATE")
+    trace_score_threshold: float = Field(0.5, env="TRACE_SCORE_THRESHOLD")
+    trace_max_per_run: int = Field(200, env="TRACE_MAX_PER_RUN")
+    objective_cost_weight: float = Field(0.1, env="OBJECTIVE_COST_WEIGHT")
+    latency_slo_p95_ms: float = Field(4000.0, env="LATENCY_SLO_P95_MS")
+    completion_token_budget: int = Field(800, env="COMPLETION_TOKEN_BUDGET")
+    # "halving" races MIPRO's proposed candidates with successive halving; "mipro" keeps its Bayesian search
+    trial_scheduler: Literal["halving", "mipro"] = Field("halving", env="TRIAL_SCHEDULER")
+    trial_max_lm_calls: Optional[int] = Field(None, env="TRIAL_MAX_LM_CALLS")
+    trial_max_tokens: Optional[int] = Field(None, env="TRIAL_MAX_TOKENS")
+    halving_min_examples: int = Field(8, env="HALVING_MIN_EXAMPLES")
+    halving_eta: int = Field(3, env="HALVING_ETA")
+    # Nightly starts from the promoted module (this URI, else the prompt `prompt promote --prompt` kept for the active
+    # version) and runs a reduced search over feedback newer than that version; `nightly --full-search` starts from
+    # scratch
+    warm_start_model_uri: Optional[str] = Field(None, env="WARM_START_MODEL_URI")
+    warm_start_candidates: int = Field(3, env="WARM_START_CANDIDATES")
+    warm_start_trials: int = Field(6, env="WARM_START_TRIALS")
+    warm_start_min_examples: int = Field(50, env="WARM_START_MIN_EXAMPLES")
+    # One keep-alive connection pool per process for every LM call (see lm.get_http_transport)
+    http_max_connections: int = Field(20, env="HTTP_MAX_CONNECTIONS")
+    http_connect_timeout_s: float = Field(5.0, env="HTTP_CONNECT_TIMEOUT_S")
+    http_read_timeout_s: float = Field(120.0, env="HTTP_READ_TIMEOUT_S")
+    http_pool_timeout_s: float = Field(60.0, env="HTTP_POOL_TIMEOUT_S")
+    # Shared Groq quota across processes (see quota.py); coordination is off until one of the limits is set
+    quota_db_path: Path = Field(Path("var/quota.sqlite3"), env="QUOTA_DB_PATH")
+    quota_requests_per_minute: Optional[int] = Field(None, env="QUOTA_REQUESTS_PER_MINUTE")
+    quota_tokens_per_minute: Optional[int] = Field(None, env="QUOTA_TOKENS_PER_MINUTE")
+    quota_max_concurrency: Optional[int] = Field(None, env="QUOTA_MAX_CONCURRENCY")
+    quota_burst_seconds: float = Field(10.0, env="QUOTA_BURST_SECONDS")
+    quota_serving_reserve: float = Field(0.2, env="QUOTA_SERVING_RESERVE")
+    quota_priority: Literal["serving", "interactive", "batch"] = Field("batch", env="QUOTA_PRIORITY")
+    quota_max_wait_s: float = Field(300.0, env="QUOTA_MAX_WAIT_S")
+    # `tarot-pipeline watch`: micro-batches of notified readings, rolling windows per prompt version and alert rules
+    watch_batch_size: int = Field(200, env="WATCH_BATCH_SIZE")
+    watch_max_wait_s: float = Field(2.0, env="WATCH_MAX_WAIT_S")
+    watch_window: int = Field(200, env="WATCH_WINDOW")
+    watch_max_drop: float = Field(0.1, env="WATCH_MAX_DROP")
+    watch_max_thumbs_down_rate: float = Field(0.5, env="WATCH_MAX_THUMBS_DOWN_RATE")
+    watch_alert_cooldown_minutes: int = Field(60, env="WATCH_ALERT_COOLDOWN_MINUTES")
+    watch_backfill_limit: int = Field(10000, env="WATCH_BACKFILL_LIMIT")
+    postgres_partitioning: bool = Field(False, env="POSTGRES_PARTITIONING")
+    partition_months_ahead: int = Field(2, env="PARTITION_MONTHS_AHEAD")
+    # "stub" answers in-process, "stub-http" talks to `tarot-pipeline model stub-server` over the OpenAI protocol
+    lm_backend: Literal["groq", "stub", "stub-http"] = Field("groq", env="LM_BACKEND")
+    stub_api_base: str = Field("http://127.0.0.1:8089/v1", env="STUB_API_BASE")
+    stub_latency_ms: float = Field(0.0, env="STUB_LATENCY_MS")
+    stub_latency_distribution: Literal["fixed", "uniform", "lognormal"] = Field("fixed", env="STUB_LATENCY_DISTRIBUTION")
+    stub_latency_spread: float = Field(0.5, env="STUB_LATENCY_SPREAD")
+    stub_ms_per_token: float = Field(0.0, env="STUB_MS_PER_TOKEN")
+    stub_error_rate: float = Field(0.0, env="STUB_ERROR_RATE")
+    stub_rate_limit_rate: float = Field(0.0, env="STUB_RATE_LIMIT_RATE")
+    stub_requests_per_minute: Optional[int] = Field(None, env="STUB_REQUESTS_PER_MINUTE")
+    stub_seed: int = Field(0, env="STUB_SEED")
+
+    @model_validator(mode="after")
+    def _require_groq_key(self) -> "EnvironmentSettings":
+        if self.lm_backend == "groq" and not self.groq_api_key:
+            raise ValueError("GROQ_API_KEY is required unless LM_BACKEND selects a stub backend")
+        return self
 
     class Config:
         env_file = ".env"
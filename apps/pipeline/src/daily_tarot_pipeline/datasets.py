@@ -1,36 +1,132 @@
 from __future__ import annotations
 
-from typing import Iterable
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Protocol, Sequence, overload
+
+import dspy
+import numpy as np
+import pyarrow as pa
 
 from .postgres_store import PostgresStore
+from .profiling import get_profiler
 from .models import FeedbackRecord, ReadingRecord, TrainingExample
 
+DISCLAIMER = "For reflection and entertainment; not medical or financial advice."
+# Nested fields are stored as JSON text, as in batch_predict's PREDICTION_SCHEMA
+EXAMPLE_SCHEMA = pa.schema([
+    ("intent", pa.string()),
+    ("spread_type", pa.string()),
+    ("cards", pa.string()),
+    ("overview", pa.string()),
+    ("card_breakdowns", pa.string()),
+    ("synthesis", pa.string()),
+    ("actionable_reflection", pa.string()),
+    ("tone", pa.string()),
+    ("feedback_thumb", pa.int8()),
+    ("feedback_rationale", pa.string()),
+    ("prompt_version", pa.string()),
+])
+_JSON_COLUMNS = ("cards", "card_breakdowns")
+_DECODE_CHUNK = 1024
+
 
 def build_training_examples(
     store: PostgresStore,
     limit: int = 2000,
     include_negative: bool = True,
+    since: Optional[datetime] = None,
 ) -> list[TrainingExample]:
-    readings = store.fetch_readings(limit)
-    feedback = store.fetch_feedback(limit)
-
-    feedback_map: dict[str, FeedbackRecord] = {}
-    for item in feedback:
-        existing = feedback_map.get(item.reading_id)
-        if not existing or existing.created_at < item.created_at:
-            feedback_map[item.reading_id] = item
-
-    examples: list[TrainingExample] = []
-    for reading in readings:
-        fb = feedback_map.get(reading.id)
-        if fb is None and include_negative is False:
-            continue
-        examples.append(_to_training_example(reading, fb))
+    readings = store.fetch_readings(limit, since=since)
+    feedback = store.fetch_feedback(limit, since=since)
+
+    with get_profiler().span("dataset.merge", rows=len(readings)):
+        feedback_map: dict[str, FeedbackRecord] = {}
+        for item in feedback:
+            existing = feedback_map.get(item.reading_id)
+            if not existing or existing.created_at < item.created_at:
+                feedback_map[item.reading_id] = item
+
+        examples: list[TrainingExample] = []
+        for reading in readings:
+            fb = feedback_map.get(reading.id)
+            if fb is None and include_negative is False:
+                continue
+            examples.append(_to_training_example(reading, fb))
     return examples
 
 
-def persist_dataset(store: PostgresStore, dataset_name: str, examples: Iterable[TrainingExample]) -> None:
-    store.append_training_examples(dataset_name, examples)
+def persist_dataset(store: PostgresStore, dataset_name: str, examples: Iterable[TrainingExample]) -> int:
+    """Store ``examples`` once each in the content-addressed example table and the dataset as a manifest of their
+    hashes; returns how many examples were not stored before."""
+    with get_profiler().span("dataset.persist") as span:
+        hashes, payloads = [], {}
+        for example in examples:
+            payload = example_json(example)
+            example_hash = hashlib.sha256(payload.encode()).hexdigest()
+            hashes.append(example_hash)
+            payloads.setdefault(example_hash, payload)
+        span.rows = len(hashes)
+        return store.save_dataset_manifest(dataset_name, hashes, payloads)
+
+
+def example_json(example: TrainingExample) -> str:
+    """Canonical JSON of an example; its SHA-256 is the example's key in the example store."""
+    return json.dumps(example.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+
+
+def example_hash(example: TrainingExample) -> str:
+    return hashlib.sha256(example_json(example).encode()).hexdigest()
+
+
+def load_dataset(store: PostgresStore, dataset_name: str,
+                 cache: Optional[dict[str, TrainingExample]] = None) -> Optional["Dataset"]:
+    """A stored dataset, or None if there is no dataset of that name.
+
+    Each distinct example of a manifest dataset is fetched and validated once and shared by every row that lists it.
+    Passing the same ``cache`` when loading several datasets also shares the examples they have in common, so
+    consecutive nightly datasets cost little more than one.
+    """
+    manifest = store.get_dataset_manifest(dataset_name)
+    if manifest is None:
+        data = store.get_training_dataset(dataset_name)
+        if data is None:
+            return None
+        return Dataset.of([TrainingExample.model_validate_json(item) if isinstance(item, str)
+                           else TrainingExample.model_validate(item) for item in data])
+    cache = {} if cache is None else cache
+    missing = [example_hash for example_hash in dict.fromkeys(manifest) if example_hash not in cache]
+    with get_profiler().span("validate.training_examples", rows=len(missing)):
+        for example_hash, data in store.fetch_training_examples(missing).items():
+            cache[example_hash] = TrainingExample.model_validate(data)
+    unique = list(dict.fromkeys(manifest))
+    position = {example_hash: row for row, example_hash in enumerate(unique)}
+    return Dataset(ListStore([cache[example_hash] for example_hash in unique]),
+                   [position[example_hash] for example_hash in manifest])
+
+
+@dataclass
+class ManifestDiff:
+    """Examples added and removed between two dataset manifests, by content hash in manifest order."""
+
+    added: list[str]
+    removed: list[str]
+    unchanged: int
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} new, -{len(self.removed)} dropped, {self.unchanged} unchanged"
+
+
+def diff_manifests(base: Sequence[str], head: Sequence[str]) -> ManifestDiff:
+    base_set, head_set = set(base), set(head)
+    return ManifestDiff(
+        added=[example_hash for example_hash in dict.fromkeys(head) if example_hash not in base_set],
+        removed=[example_hash for example_hash in dict.fromkeys(base) if example_hash not in head_set],
+        unchanged=len(base_set & head_set),
+    )
 
 
 def _to_training_example(reading: ReadingRecord, feedback: FeedbackRecord | None) -> TrainingExample:
@@ -47,3 +143,155 @@ def _to_training_example(reading: ReadingRecord, feedback: FeedbackRecord | None
         feedback_rationale=feedback.rationale if feedback else None,
         prompt_version=reading.prompt_version,
     )
+
+
+def to_dspy_example(example: TrainingExample) -> dspy.Example:
+    """The DSPy form used for compile and evaluation: reading inputs, gold outputs and the fixed disclaimer."""
+    return dspy.Example(
+        intent=example.intent,
+        spread_type=example.spread_type,
+        cards=[card.model_dump() for card in example.cards],
+        tone=example.tone,
+        overview=example.overview,
+        card_breakdowns=[item.model_dump() for item in example.card_breakdowns],
+        synthesis=example.synthesis,
+        actionable_reflection=example.actionable_reflection,
+        disclaimer=DISCLAIMER,
+    ).with_inputs("intent", "spread_type", "cards", "tone")
+
+
+class ExampleStore(Protocol):
+    def __len__(self) -> int: ...
+
+    def take(self, rows: Sequence[int]) -> list[TrainingExample]: ...
+
+
+class ListStore:
+    """Examples already in memory; the list is referenced, not copied."""
+
+    def __init__(self, examples: list[TrainingExample]):
+        self.examples = examples
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def take(self, rows: Sequence[int]) -> list[TrainingExample]:
+        examples = self.examples
+        return [examples[row] for row in rows]
+
+
+class ArrowStore:
+    """Examples in an Arrow table, usually memory-mapped from an IPC file; rows are decoded only when read."""
+
+    def __init__(self, table: pa.Table, source: Optional[pa.MemoryMappedFile] = None):
+        self.table = table
+        # The table's buffers point into the mapping, so it stays open as long as the store
+        self._source = source
+
+    @classmethod
+    def open(cls, path: Path) -> "ArrowStore":
+        source = pa.memory_map(str(path))
+        return cls(pa.ipc.open_file(source).read_all(), source)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def take(self, rows: Sequence[int]) -> list[TrainingExample]:
+        if isinstance(rows, range) and rows.step == 1:
+            part = self.table.slice(rows.start, len(rows))
+        else:
+            part = self.table.take(pa.array(np.asarray(rows, dtype=np.int64)))
+        examples = []
+        for record in part.to_pylist():
+            for column in _JSON_COLUMNS:
+                record[column] = json.loads(record[column])
+            examples.append(TrainingExample.model_validate(record))
+        return examples
+
+
+class Dataset(Sequence[TrainingExample]):
+    """Training examples with a known length, random access and cheap views.
+
+    A dataset is a store plus the row numbers it exposes. Slicing, shuffling, splitting and sharding only build new
+    row-number ranges or arrays over the same store, so views never copy examples. Examples are materialized (and,
+    for an ``ArrowStore``, decoded) when read.
+    """
+
+    def __init__(self, store: ExampleStore, rows: Optional[Sequence[int]] = None):
+        self.store = store
+        self.rows = range(len(store)) if rows is None else rows
+
+    @classmethod
+    def of(cls, examples: Iterable[TrainingExample]) -> "Dataset":
+        """Wrap ``examples``: datasets are returned as-is, lists are referenced and other iterables consumed once."""
+        if isinstance(examples, Dataset):
+            return examples
+        return cls(ListStore(examples if isinstance(examples, list) else list(examples)))
+
+    @classmethod
+    def open(cls, path: Path) -> "Dataset":
+        """Memory-map a dataset written by ``save``."""
+        return cls(ArrowStore.open(path))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @overload
+    def __getitem__(self, index: int) -> TrainingExample: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Dataset": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Dataset(self.store, self.rows[index])
+        return self.store.take([self.rows[index]])[0]
+
+    def __iter__(self) -> Iterator[TrainingExample]:
+        for start in range(0, len(self.rows), _DECODE_CHUNK):
+            yield from self.store.take(self.rows[start:start + _DECODE_CHUNK])
+
+    def __repr__(self) -> str:
+        return f"Dataset({len(self)} examples, {type(self.store).__name__})"
+
+    def shuffle(self, seed: int = 0) -> "Dataset":
+        """Deterministic permutation: the same seed always gives the same order."""
+        return Dataset(self.store, np.random.default_rng(seed).permutation(np.asarray(self.rows, dtype=np.int64)))
+
+    def split(self, val_fraction: float = 0.2) -> tuple["Dataset", "Dataset"]:
+        """Train and validation views; the last ``val_fraction`` of rows (at least one) is held out."""
+        val_size = max(1, int(len(self) * val_fraction))
+        return self[:-val_size], self[-val_size:]
+
+    def shard(self, index: int, count: int) -> "Dataset":
+        """Every ``count``-th row starting at ``index``, so ``count`` workers together see each row once."""
+        if not 0 <= index < count:
+            raise ValueError(f"shard index must be within [0, {count}), got {index}")
+        return self[index::count]
+
+    def to_dspy(self) -> list[dspy.Example]:
+        return [to_dspy_example(example) for example in self]
+
+    def to_arrow(self) -> pa.Table:
+        if isinstance(self.store, ArrowStore):
+            if isinstance(self.rows, range) and self.rows.step == 1:
+                return self.store.table.slice(self.rows.start, len(self.rows))
+            return self.store.table.take(pa.array(np.asarray(self.rows, dtype=np.int64)))
+        records = []
+        for example in self:
+            record = example.model_dump(mode="json")
+            for column in _JSON_COLUMNS:
+                record[column] = json.dumps(record[column], separators=(",", ":"))
+            records.append(record)
+        return pa.Table.from_pylist(records, schema=EXAMPLE_SCHEMA)
+
+    def save(self, path: Path) -> Path:
+        """Write an uncompressed Arrow IPC file, which ``open`` can memory-map without copying."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = self.to_arrow()
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        tmp_path.rename(path)
+        return path
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class TarotCard:
+    id: str
+    name: str
+    arcana: str
+    suit: str
+    number: int
+    upright_meaning: str
+    reversed_meaning: str
+
+
+# Mirrors tarotDeck in the web app's lib/common/deck.ts
+DECK: tuple[TarotCard, ...] = (
+    TarotCard("major-00", "The Fool", "major", "major", 0,
+              "New beginnings, curiosity, and a leap of faith toward the unknown.",
+              "Recklessness, hesitation, or ignoring the consequences of impulsive choices."),
+    TarotCard("major-01", "The Magician", "major", "major", 1,
+              "Focused willpower and skillful manifestation of ideas into reality.",
+              "Misused talents, scattered focus, or manipulation without integrity."),
+    TarotCard("major-02", "The High Priestess", "major", "major", 2,
+              "Inner knowing, intuition, and patient trust in emerging truths.",
+              "Secrets withheld, self-doubt, or refusing to listen to inner guidance."),
+    TarotCard("major-03", "The Empress", "major", "major", 3,
+              "Abundant creativity, care, and nurturing connections.",
+              "Neglect, creative blocks, or overextending without reciprocity."),
+    TarotCard("major-04", "The Emperor", "major", "major", 4,
+              "Structure, leadership, and confident stewardship of resources.",
+              "Rigidity, control issues, or an erosion of healthy boundaries."),
+    TarotCard("major-05", "The Hierophant", "major", "major", 5,
+              "Tradition, shared wisdom, and trusted mentorship.",
+              "Stagnation, dogma, or questioning inherited beliefs."),
+    TarotCard("major-06", "The Lovers", "major", "major", 6,
+              "Aligned choices, heartfelt commitment, and mutual understanding.",
+              "Misalignment, difficult decisions, or values clash."),
+    TarotCard("major-07", "The Chariot", "major", "major", 7,
+              "Determined progress and disciplined focus in motion.",
+              "Lack of direction, burnout, or pushing ahead without consent."),
+    TarotCard("major-08", "Strength", "major", "major", 8,
+              "Inner resilience, compassion, and quiet confidence.",
+              "Self-doubt, impatience, or suppressing vulnerable truths."),
+    TarotCard("major-09", "The Hermit", "major", "major", 9,
+              "Reflective solitude, insight, and guiding others through earned wisdom.",
+              "Isolation, avoidance, or refusing to share what you have learned."),
+    TarotCard("major-10", "Wheel of Fortune", "major", "major", 10,
+              "Cycles turning, timely opportunities, and embracing change.",
+              "Resistance to change, unlucky timing, or repeating old patterns."),
+    TarotCard("major-11", "Justice", "major", "major", 11,
+              "Fairness, accountability, and measured decisions.",
+              "Bias, imbalance, or avoiding responsibility."),
+    TarotCard("major-12", "The Hanged One", "major", "major", 12,
+              "Perspective shifts, surrender, and patient observation.",
+              "Stagnation, martyrdom, or refusing to release control."),
+    TarotCard("major-13", "Death", "major", "major", 13,
+              "Transformation, closure, and embracing necessary endings.",
+              "Clinging to the past, stalled transitions, or fear of change."),
+    TarotCard("major-14", "Temperance", "major", "major", 14,
+              "Integration, balance, and gentle calibration.",
+              "Impatience, extremes, or lack of healthy moderation."),
+    TarotCard("major-15", "The Devil", "major", "major", 15,
+              "Confronting attachments, embodied desire, and radical honesty.",
+              "Breaking free, shame loops, or hidden motivations."),
+    TarotCard("major-16", "The Tower", "major", "major", 16,
+              "Sudden revelation, upheaval, and clearing what is unstable.",
+              "Prolonged tension, denial, or fear of necessary change."),
+    TarotCard("major-17", "The Star", "major", "major", 17,
+              "Hope, renewal, and gentle guidance after upheaval.",
+              "Doubt, dimmed optimism, or withholding care from yourself."),
+    TarotCard("major-18", "The Moon", "major", "major", 18,
+              "Dreams, intuition, and navigating liminal spaces.",
+              "Confusion, anxiety, or misreading emotional signals."),
+    TarotCard("major-19", "The Sun", "major", "major", 19,
+              "Joy, clarity, and shared warmth.",
+              "Ego, burnout, or overlooking others' needs."),
+    TarotCard("major-20", "Judgement", "major", "major", 20,
+              "Awakening, reconciliation, and meaningful review.",
+              "Self-criticism, stalled closure, or ignoring an inner calling."),
+    TarotCard("major-21", "The World", "major", "major", 21,
+              "Completion, integration, and expansive perspective.",
+              "Loose ends, delayed milestones, or reluctance to move on."),
+    TarotCard("wands-01", "Ace of Wands", "minor", "wands", 1,
+              "Spark of inspiration, bold initiative, and creative fuel.",
+              "False starts, waning enthusiasm, or misdirected energy."),
+    TarotCard("wands-02", "Two of Wands", "minor", "wands", 2,
+              "Strategic planning, personal vision, and choosing a path.",
+              "Indecision, fear of expansion, or neglecting follow-through."),
+    TarotCard("wands-03", "Three of Wands", "minor", "wands", 3,
+              "Momentum, results in transit, and collaborative support.",
+              "Delays, limited perspective, or hesitant delegation."),
+    TarotCard("wands-04", "Four of Wands", "minor", "wands", 4,
+              "Celebration, community anchoring, and milestones shared.",
+              "Disconnection, cancelled plans, or withholding recognition."),
+    TarotCard("wands-05", "Five of Wands", "minor", "wands", 5,
+              "Playful competition, testing ideas, and lively debate.",
+              "Chaos, ego clashes, or draining conflict."),
+    TarotCard("wands-06", "Six of Wands", "minor", "wands", 6,
+              "Recognition, shared wins, and confident visibility.",
+              "Imposter feelings, hollow praise, or seeking validation."),
+    TarotCard("wands-07", "Seven of Wands", "minor", "wands", 7,
+              "Defending progress, asserting boundaries, and resilience.",
+              "Overwhelm, defensiveness, or fighting unwinnable battles."),
+    TarotCard("wands-08", "Eight of Wands", "minor", "wands", 8,
+              "Swift movement, decisive communication, and rapid change.",
+              "Mixed messages, stalled travel, or acting without context."),
+    TarotCard("wands-09", "Nine of Wands", "minor", "wands", 9,
+              "Last-mile stamina, cautious optimism, and hard-earned resilience.",
+              "Exhaustion, hyper-vigilance, or refusing to rest."),
+    TarotCard("wands-10", "Ten of Wands", "minor", "wands", 10,
+              "Heavy responsibilities, dedicated effort, and carrying the load.",
+              "Burnout, poor delegation, or burdens that need release."),
+    TarotCard("wands-11", "Page of Wands", "minor", "wands", 11,
+              "Curious exploration, playful enthusiasm, and learning through action.",
+              "Restlessness, immaturity, or chasing novelty without grounding."),
+    TarotCard("wands-12", "Knight of Wands", "minor", "wands", 12,
+              "Adventurous drive, charisma, and bold pursuit.",
+              "Impulsive detours, inconsistency, or overpromising."),
+    TarotCard("wands-13", "Queen of Wands", "minor", "wands", 13,
+              "Magnetic leadership, warmth, and expressive authenticity.",
+              "Jealousy, overshadowing others, or self-doubt in visibility."),
+    TarotCard("wands-14", "King of Wands", "minor", "wands", 14,
+              "Visionary command, entrepreneurial spirit, and courageous stewardship.",
+              "Domineering leadership, impatience, or burnout from overextension."),
+    TarotCard("cups-01", "Ace of Cups", "minor", "cups", 1,
+              "Overflowing emotion, compassionate starts, and heartfelt invitations.",
+              "Emotional blockages, unexpressed feelings, or a delayed opening."),
+    TarotCard("cups-02", "Two of Cups", "minor", "cups", 2,
+              "Reciprocal partnership, shared sentiment, and mutual respect.",
+              "Misalignment, relationship strain, or uneven exchange."),
+    TarotCard("cups-03", "Three of Cups", "minor", "cups", 3,
+              "Community celebration, joy, and creative collaboration.",
+              "Overindulgence, gossip, or feeling left out."),
+    TarotCard("cups-04", "Four of Cups", "minor", "cups", 4,
+              "Contemplation, emotional recalibration, and assessing invitations.",
+              "Apathy, disengagement, or missing opportunities."),
+    TarotCard("cups-05", "Five of Cups", "minor", "cups", 5,
+              "Acknowledging loss, feeling grief, and processing disappointment.",
+              "Lingering sorrow, difficulty moving on, or focusing on scarcity."),
+    TarotCard("cups-06", "Six of Cups", "minor", "cups", 6,
+              "Sweet nostalgia, shared memories, and generous kindness.",
+              "Idealizing the past, stuck patterns, or reluctance to grow."),
+    TarotCard("cups-07", "Seven of Cups", "minor", "cups", 7,
+              "Dreaming big, weighing options, and imaginative exploration.",
+              "Analysis paralysis, illusions, or escapist fantasies."),
+    TarotCard("cups-08", "Eight of Cups", "minor", "cups", 8,
+              "Soulful departure, honoring growth, and walking toward authenticity.",
+              "Avoidance, premature exits, or fear of commitment."),
+    TarotCard("cups-09", "Nine of Cups", "minor", "cups", 9,
+              "Contentment, wishes granted, and appreciation of the present.",
+              "Smugness, shallow comfort, or overindulgence."),
+    TarotCard("cups-10", "Ten of Cups", "minor", "cups", 10,
+              "Collective joy, harmonious relationships, and shared fulfillment.",
+              "Fractured harmony, unmet expectations, or tension at home."),
+    TarotCard("cups-11", "Page of Cups", "minor", "cups", 11,
+              "Fresh feelings, creative musings, and intuitive curiosity.",
+              "Emotional immaturity, moodiness, or artistic self-doubt."),
+    TarotCard("cups-12", "Knight of Cups", "minor", "cups", 12,
+              "Romantic pursuit, heartfelt expression, and spiritual quests.",
+              "Idealism unchecked, inconsistency, or running from reality."),
+    TarotCard("cups-13", "Queen of Cups", "minor", "cups", 13,
+              "Empathy, emotional maturity, and compassionate leadership.",
+              "Emotional overwhelm, boundary challenges, or caretaking fatigue."),
+    TarotCard("cups-14", "King of Cups", "minor", "cups", 14,
+              "Steady emotional intelligence, diplomacy, and wise counsel.",
+              "Emotional detachment, manipulative charm, or avoidance."),
+    TarotCard("swords-01", "Ace of Swords", "minor", "swords", 1,
+              "Clarity, decisive insight, and truthful communication.",
+              "Fog, misinformation, or weaponized words."),
+    TarotCard("swords-02", "Two of Swords", "minor", "swords", 2,
+              "Balanced consideration, stalemate, and pausing before choice.",
+              "Indecision, blocked emotions, or delaying important decisions."),
+    TarotCard("swords-03", "Three of Swords", "minor", "swords", 3,
+              "Heartache processed through honesty and release.",
+              "Lingering pain, unspoken truths, or unnecessary self-blame."),
+    TarotCard("swords-04", "Four of Swords", "minor", "swords", 4,
+              "Rest, mental reset, and strategic recovery.",
+              "Restlessness, burnout, or avoidance of healing."),
+    TarotCard("swords-05", "Five of Swords", "minor", "swords", 5,
+              "Tension, hollow victory, and considering the cost of winning.",
+              "Making amends, lingering resentment, or walking away."),
+    TarotCard("swords-06", "Six of Swords", "minor", "swords", 6,
+              "Transition, thoughtful departure, and mental relief.",
+              "Difficulty releasing, carrying baggage, or reluctant change."),
+    TarotCard("swords-07", "Seven of Swords", "minor", "swords", 7,
+              "Strategy, discretion, and acting with cunning.",
+              "Exposure, guilt, or the need to realign with integrity."),
+    TarotCard("swords-08", "Eight of Swords", "minor", "swords", 8,
+              "Perceived limitation, anxiety, and needing fresh perspective.",
+              "Liberation, loosening restrictions, or reclaiming agency."),
+    TarotCard("swords-09", "Nine of Swords", "minor", "swords", 9,
+              "Night-time worry, rumination, and mental overload.",
+              "Relief, confronting fears, or support arriving."),
+    TarotCard("swords-10", "Ten of Swords", "minor", "swords", 10,
+              "Closure, finality, and accepting what has ended.",
+              "Lingering pain, resisting endings, or dramatizing a setback."),
+    TarotCard("swords-11", "Page of Swords", "minor", "swords", 11,
+              "Curious questions, alert intellect, and agile communication.",
+              "Overthinking, gossip, or scattered focus."),
+    TarotCard("swords-12", "Knight of Swords", "minor", "swords", 12,
+              "Swift action, assertive debate, and mission-driven movement.",
+              "Impulsivity, tunnel vision, or reckless messaging."),
+    TarotCard("swords-13", "Queen of Swords", "minor", "swords", 13,
+              "Clear boundaries, perceptive judgment, and candid truth.",
+              "Coldness, cynicism, or over-editing your vulnerability."),
+    TarotCard("swords-14", "King of Swords", "minor", "swords", 14,
+              "Strategic leadership, ethical logic, and impartial clarity.",
+              "Authoritarian tone, detached rulings, or weaponizing intellect."),
+    TarotCard("pentacles-01", "Ace of Pentacles", "minor", "pentacles", 1,
+              "Fresh opportunity, grounded prosperity, and practical support.",
+              "Missed chances, scarcity mindset, or delayed payoff."),
+    TarotCard("pentacles-02", "Two of Pentacles", "minor", "pentacles", 2,
+              "Skillful juggling, adaptable flow, and resource balancing.",
+              "Overcommitment, disorganization, or shaky priorities."),
+    TarotCard("pentacles-03", "Three of Pentacles", "minor", "pentacles", 3,
+              "Collaboration, craftsmanship, and constructive feedback.",
+              "Lack of teamwork, mismatched expectations, or shortcuts."),
+    TarotCard("pentacles-04", "Four of Pentacles", "minor", "pentacles", 4,
+              "Stability, mindful saving, and healthy boundaries with resources.",
+              "Scarcity fear, hoarding, or inflexibility."),
+    TarotCard("pentacles-05", "Five of Pentacles", "minor", "pentacles", 5,
+              "Hard times, seeking support, and mutual aid.",
+              "Recovery, new opportunities, or reframing scarcity."),
+    TarotCard("pentacles-06", "Six of Pentacles", "minor", "pentacles", 6,
+              "Generosity, reciprocal giving, and resource flow.",
+              "Strings attached, imbalance, or unclear expectations."),
+    TarotCard("pentacles-07", "Seven of Pentacles", "minor", "pentacles", 7,
+              "Patience, long-range vision, and incremental progress.",
+              "Restlessness, poor returns, or need for course correction."),
+    TarotCard("pentacles-08", "Eight of Pentacles", "minor", "pentacles", 8,
+              "Skill-building, diligence, and conscious practice.",
+              "Monotony, perfectionism, or underpaid labor."),
+    TarotCard("pentacles-09", "Nine of Pentacles", "minor", "pentacles", 9,
+              "Self-sufficiency, crafted comfort, and savoring achievements.",
+              "Overwork, isolation, or uneasy independence."),
+    TarotCard("pentacles-10", "Ten of Pentacles", "minor", "pentacles", 10,
+              "Legacy, shared resources, and multi-generational support.",
+              "Financial tension, inheritance conflict, or short-term thinking."),
+    TarotCard("pentacles-11", "Page of Pentacles", "minor", "pentacles", 11,
+              "Curious study, tangible planning, and grounded curiosity.",
+              "Lack of focus, procrastination, or undervaluing growth."),
+    TarotCard("pentacles-12", "Knight of Pentacles", "minor", "pentacles", 12,
+              "Steady progress, reliability, and methodical effort.",
+              "Stagnation, stubborn routines, or resistance to change."),
+    TarotCard("pentacles-13", "Queen of Pentacles", "minor", "pentacles", 13,
+              "Nurturing abundance, practical care, and resourceful wisdom.",
+              "Self-neglect, overgiving, or work-life imbalance."),
+    TarotCard("pentacles-14", "King of Pentacles", "minor", "pentacles", 14,
+              "Grounded leadership, prosperity stewardship, and long-term vision.",
+              "Materialism, rigidity, or fear of calculated risk."),
+)
+
+CARDS_BY_ID: dict[str, TarotCard] = {card.id: card for card in DECK}
+
+# Mirrors spreadPosition in the web app's lib/seed.ts
+SPREAD_POSITIONS: dict[str, tuple[str, ...]] = {
+    "single": ("focus",),
+    "three-card": ("past", "present", "potential"),
+    "celtic-cross": (
+        "significator", "crossing", "foundation", "recent past", "aspiration",
+        "near future", "self", "surroundings", "hopes and fears", "outcome",
+    ),
+}
+
+
+def get_card(card_id: str) -> TarotCard | None:
+    return CARDS_BY_ID.get(card_id)
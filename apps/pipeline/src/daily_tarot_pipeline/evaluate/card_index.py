@@ -0,0 +1,162 @@
+"""Deck index that recognises how readings actually refer to cards.
+
+Readings name cards in prose ("the Queen of Cups", "2 of Coins", "the Hanged Man"), never by id, so coverage is
+measured against every name and alias of the drawn cards. Each card's aliases are compiled once into a prefix-trie
+regular expression; ``mentioned_card_ids`` compiles all 78 cards into one for a single full-deck scan.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable
+
+from ..deck import CARDS_BY_ID, DECK, TarotCard
+
+RANK_WORDS = {
+    1: ("ace", "one"), 2: ("two", "2"), 3: ("three", "3"), 4: ("four", "4"), 5: ("five", "5"),
+    6: ("six", "6"), 7: ("seven", "7"), 8: ("eight", "8"), 9: ("nine", "9"), 10: ("ten", "10"),
+    11: ("page", "princess"), 12: ("knight", "prince"), 13: ("queen",), 14: ("king",),
+}
+SUIT_WORDS = {
+    "wands": ("wands", "rods", "staves", "batons"),
+    "cups": ("cups", "chalices"),
+    "swords": ("swords", "blades"),
+    "pentacles": ("pentacles", "coins", "disks", "discs"),
+}
+# Extra names for majors; bare names that are everyday words ("star", "world") are only matched as "the <name>"
+MAJOR_ALIASES = {
+    "major-01": ("magician",),
+    "major-02": ("high priestess",),
+    "major-03": ("empress",),
+    "major-04": ("emperor",),
+    "major-05": ("hierophant",),
+    "major-07": ("chariot",),
+    "major-09": ("hermit",),
+    "major-10": ("the wheel of fortune", "the wheel"),
+    "major-12": ("the hanged man", "hanged man", "hanged one"),
+    "major-20": ("judgment",),
+}
+# Names that are also everyday phrases only count with a capitalised last word ("the World", not "the world at large")
+CAPITALISED_ONLY = frozenset({
+    "strength", "justice", "death", "temperance", "judgement", "judgment",
+    "the fool", "the lovers", "the devil", "the tower", "the star", "the moon", "the sun", "the world", "the wheel",
+})
+# From this many drawn cards one full-deck scan beats searching card by card (benchmarks/test_card_coverage.py)
+FULL_SCAN_MIN_CARDS = 6
+
+
+def legacy_card_id(card: TarotCard) -> str:
+    """Older readings and prompts use ids like ``00-fool`` / ``12-hanged-one`` for the major arcana."""
+    slug = re.sub(r"[^a-z]+", "-", card.name.lower().removeprefix("the ")).strip("-")
+    return f"{card.number:02d}-{slug}"
+
+
+def card_aliases(card: TarotCard) -> tuple[str, ...]:
+    """Lower-case phrases that refer to ``card`` in prose, including its raw id."""
+    aliases = {card.name.lower(), card.id}
+    if card.arcana == "major":
+        aliases.add(legacy_card_id(card))
+        aliases.update(MAJOR_ALIASES.get(card.id, ()))
+    else:
+        for rank in RANK_WORDS[card.number]:
+            for suit in SUIT_WORDS[card.suit]:
+                aliases.add(f"{rank} of {suit}")
+    return tuple(sorted(aliases))
+
+
+@lru_cache()
+def _matcher() -> tuple[re.Pattern[str], dict[str, str]]:
+    owner: dict[str, str] = {}
+    for card in DECK:
+        for alias in card_aliases(card):
+            owner[alias] = card.id
+    # A plain alternation of the ~500 aliases is tried alias by alias at every position; folding them into a prefix
+    # trie lets the engine reject most positions on their first character. Text is lower-cased up front because
+    # case-insensitive matching folds every character it compares.
+    pattern = r"(?<![\w-])" + _trie_pattern(owner) + r"(?![\w-])"
+    return re.compile(pattern), owner
+
+
+def _trie_pattern(aliases: Iterable[str]) -> str:
+    trie: dict = {}
+    for alias in aliases:
+        node = trie
+        for char in alias:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_node(trie)
+
+
+def _trie_node(node: dict) -> str:
+    branches = [
+        (r"\s+" if char == " " else re.escape(char)) + _trie_node(child)
+        for char, child in sorted(node.items()) if char
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # Greedy optional: the longer alias wins ("the wheel of fortune" over "the wheel")
+    return f"(?:{body})?" if "" in node else body
+
+
+def _counts(alias: str, original: str) -> bool:
+    """Everyday-word names only count when their last word is capitalised in the original text."""
+    return alias not in CAPITALISED_ONLY or original.split()[-1][0].isupper()
+
+
+def canonical_card_id(card_id: str) -> str:
+    """Map legacy ids to the deck's ids; unknown ids are returned unchanged."""
+    return _matcher()[1].get(card_id.lower(), card_id)
+
+
+def mentioned_card_ids(text: str) -> set[str]:
+    """Deck ids of every card named in ``text``, in a single scan."""
+    pattern, owner = _matcher()
+    lowered = text.lower()
+    # Lower-casing keeps offsets for everything but a few non-ASCII characters; then case cannot be checked
+    original = text if len(lowered) == len(text) else lowered
+    found = set()
+    for match in pattern.finditer(lowered):
+        alias = " ".join(match.group(0).split())
+        if _counts(alias, original[match.start():match.end()]):
+            found.add(owner[alias])
+    return found
+
+
+@lru_cache(maxsize=None)
+def _card_pattern(card_id: str) -> re.Pattern[str] | None:
+    card = CARDS_BY_ID.get(canonical_card_id(card_id))
+    if card is None:
+        return None
+    return re.compile(r"(?<![\w-])" + _trie_pattern(card_aliases(card)) + r"(?![\w-])")
+
+
+def card_coverage(text: str, card_ids: Iterable[str]) -> float:
+    """Share of ``card_ids`` named in ``text``; ids the deck does not know fall back to a literal id match.
+
+    Small spreads search for just their own cards, whose few first letters let the engine skip most positions; a
+    celtic cross is cheaper to cover with one full-deck scan.
+    """
+    card_ids = list(card_ids)
+    if not card_ids:
+        return 0.0
+    if len(card_ids) >= FULL_SCAN_MIN_CARDS:
+        mentioned = mentioned_card_ids(text)
+        lowered = text.lower()
+        hits = sum(
+            canonical_card_id(card_id) in mentioned if canonical_card_id(card_id) in CARDS_BY_ID
+            else card_id.lower() in lowered
+            for card_id in card_ids
+        )
+        return hits / len(card_ids)
+    lowered = text.lower()
+    original = text if len(lowered) == len(text) else lowered
+    hits = 0
+    for card_id in card_ids:
+        pattern = _card_pattern(card_id)
+        if pattern is None:
+            hits += card_id.lower() in lowered
+        elif any(_counts(" ".join(match.group(0).split()), original[match.start():match.end()])
+                 for match in pattern.finditer(lowered)):
+            hits += 1
+    return hits / len(card_ids)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from ..batch_predict import read_predictions
+from ..models import TrainingExample
+from .metrics import example_scores
+
+# Bound on resample-matrix elements materialized at once (~64 MB of int64 indices)
+_BOOTSTRAP_CHUNK_ELEMENTS = 8_000_000
+
+
+@dataclass
+class ScoreFrame:
+    """Per-example scores for one prompt version, aligned by batch-predict row id.
+
+    Failed predictions stay in the frame with every score at 0, so a version cannot win a paired comparison by
+    failing on the examples it would have scored poorly on.
+    """
+
+    label: str
+    row_ids: np.ndarray
+    spread_type: np.ndarray
+    tone: np.ndarray
+    scores: dict[str, np.ndarray]
+    ok: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        if self.ok is None:
+            self.ok = np.ones(len(self.row_ids), dtype=bool)
+
+    @property
+    def failed(self) -> int:
+        return int((~self.ok).sum())
+
+    def take(self, row_ids: np.ndarray) -> "ScoreFrame":
+        position = {row_id: i for i, row_id in enumerate(self.row_ids)}
+        index = np.fromiter((position[row_id] for row_id in row_ids), dtype=np.int64, count=len(row_ids))
+        return ScoreFrame(
+            label=self.label,
+            row_ids=self.row_ids[index],
+            spread_type=self.spread_type[index],
+            tone=self.tone[index],
+            scores={name: values[index] for name, values in self.scores.items()},
+            ok=self.ok[index],
+        )
+
+
+@dataclass
+class PairedComparison:
+    baseline: str
+    candidate: str
+    metric: str
+    group: str
+    n: int
+    baseline_mean: float
+    candidate_mean: float
+    delta: float
+    ci_low: float
+    ci_high: float
+    prob_improvement: float
+
+    @property
+    def significant_win(self) -> bool:
+        return self.ci_low > 0
+
+    @property
+    def significant_loss(self) -> bool:
+        return self.ci_high < 0
+
+
+def load_score_frame(output_dir: Path, label: Optional[str] = None) -> ScoreFrame:
+    """Score every prediction in a batch-predict output directory; failed predictions score 0 on every metric."""
+    table = read_predictions(output_dir).to_pylist()
+    ok = np.array([row["status"] == "ok" for row in table], dtype=bool)
+    per_example = [_score_row(row) if row_ok else {} for row, row_ok in zip(table, ok)]
+    names = next((list(scores) for scores in per_example if scores), ["composite", "overlap"])
+    return ScoreFrame(
+        label=label or (table[0]["label"] if table else output_dir.name),
+        row_ids=np.array([row["row_id"] for row in table], dtype=object),
+        spread_type=np.array([row["spread_type"] for row in table], dtype=object),
+        tone=np.array([row["tone"] for row in table], dtype=object),
+        scores={name: np.array([scores.get(name, 0.0) for scores in per_example], dtype=np.float64) for name in names},
+        ok=ok,
+    )
+
+
+def align_frames(frames: Iterable[ScoreFrame]) -> list[ScoreFrame]:
+    """Restrict frames to the rows every prompt version attempted, including the ones it failed."""
+    frames = list(frames)
+    common = set(frames[0].row_ids)
+    for frame in frames[1:]:
+        common &= set(frame.row_ids)
+    row_ids = np.array(sorted(common), dtype=object)
+    return [frame.take(row_ids) for frame in frames]
+
+
+def paired_bootstrap(
+    deltas: np.ndarray,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> tuple[float, float, float, float]:
+    """Bootstrap the mean of paired deltas; returns (mean, ci_low, ci_high, P(mean > 0)).
+
+    Resampled means are computed as a matrix of row indices per chunk of resamples, so the work is a handful of
+    vectorized gathers and reductions rather than a Python loop over resamples.
+    """
+    n = len(deltas)
+    if n == 0:
+        return 0.0, 0.0, 0.0, 0.0
+    rng = np.random.default_rng(seed)
+    means = np.empty(n_resamples, dtype=np.float64)
+    chunk = max(1, _BOOTSTRAP_CHUNK_ELEMENTS // n)
+    for start in range(0, n_resamples, chunk):
+        stop = min(start + chunk, n_resamples)
+        index = rng.integers(0, n, size=(stop - start, n))
+        means[start:stop] = deltas[index].mean(axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return float(deltas.mean()), float(low), float(high), float((means > 0).mean())
+
+
+def compare_frames(
+    baseline: ScoreFrame,
+    candidate: ScoreFrame,
+    metric: str = "composite",
+    by: Iterable[str] = ("spread_type", "tone"),
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> list[PairedComparison]:
+    """Paired comparison overall and per group; frames must already be aligned."""
+    deltas = candidate.scores[metric] - baseline.scores[metric]
+    groups: list[tuple[str, np.ndarray]] = [("all", np.ones(len(deltas), dtype=bool))]
+    for column in by:
+        values = getattr(baseline, column)
+        for value in sorted(set(values.tolist()), key=str):
+            groups.append((f"{column}={value}", values == value))
+
+    results = []
+    for group, mask in groups:
+        mean, low, high, prob = paired_bootstrap(deltas[mask], n_resamples, confidence, seed)
+        results.append(PairedComparison(
+            baseline=baseline.label,
+            candidate=candidate.label,
+            metric=metric,
+            group=group,
+            n=int(mask.sum()),
+            baseline_mean=float(baseline.scores[metric][mask].mean()) if mask.any() else 0.0,
+            candidate_mean=float(candidate.scores[metric][mask].mean()) if mask.any() else 0.0,
+            delta=mean,
+            ci_low=low,
+            ci_high=high,
+            prob_improvement=prob,
+        ))
+    return results
+
+
+def _score_row(row: dict) -> dict[str, float]:
+    breakdowns = row["card_breakdowns"]
+    try:
+        breakdowns = json.loads(breakdowns) if breakdowns else []
+    except json.JSONDecodeError:
+        breakdowns = []
+    if not isinstance(breakdowns, list):
+        breakdowns = []
+    example = TrainingExample.model_validate({
+        "intent": row["intent"],
+        "spread_type": row["spread_type"],
+        "cards": json.loads(row["cards"]),
+        "overview": row["overview"] or "",
+        "card_breakdowns": [item for item in breakdowns if isinstance(item, dict) and _is_breakdown(item)],
+        "synthesis": row["synthesis"] or "",
+        "actionable_reflection": row["actionable_reflection"] or "",
+        "tone": row["tone"],
+        "prompt_version": row["label"],
+    })
+    scores = example_scores(example)
+    scores["overlap"] = _gold_overlap(row)
+    return scores
+
+
+def _is_breakdown(item: dict) -> bool:
+    return bool(item.get("cardId") or item.get("card_id")) and item.get("orientation") in ("upright", "reversed") \
+        and isinstance(item.get("summary"), str)
+
+
+def _gold_overlap(row: dict) -> float:
+    """Token overlap against the gold reading, as optimized by MIPRO's metric."""
+    from ..optimizers.mipro import _overlap_score
+
+    pairs = [
+        (row["gold_overview"], row["overview"]),
+        (row["gold_synthesis"], row["synthesis"]),
+        (row["gold_actionable_reflection"], row["actionable_reflection"]),
+    ]
+    scores = [_overlap_score(str(gold), str(pred)) for gold, pred in pairs if gold and pred]
+    return sum(scores) / len(scores) if scores else 0.0
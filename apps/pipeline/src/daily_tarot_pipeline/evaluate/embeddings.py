@@ -0,0 +1,235 @@
+"""Semantic metric backend: gold-vs-prediction similarity and intent relevance from sentence embeddings.
+
+Selected with ``METRIC_BACKEND=embedding``. ``EMBEDDING_MODEL`` names a sentence-transformers model (install the
+``embeddings`` extra) or ``hashing`` for dependency-free lexical vectors. Every text is embedded once: vectors are
+kept in an append-only memory-mapped cache keyed by a hash of the text, so repeated gold readings cost a lookup and
+only new predictions reach the encoder, in batches.
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import re
+import threading
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Protocol, Sequence
+
+import numpy as np
+
+from ..config import get_settings
+
+_DIGEST_BYTES = 16
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+class Encoder(Protocol):
+    name: str
+    dim: int
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Unit-length float32 rows, one per text."""
+
+
+class HashingEncoder:
+    """Signed feature hashing of word unigrams and bigrams; a lexical baseline that needs no model download."""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            features = [*words, *(f"{a} {b}" for a, b in zip(words, words[1:]))]
+            buckets = np.fromiter((zlib.crc32(feature.encode()) for feature in features), np.int64, len(features))
+            np.add.at(vectors[row], buckets % self.dim, np.where(buckets & 0x80000000, 1.0, -1.0))
+        return _normalize(vectors)
+
+
+class SentenceTransformerEncoder:
+    """A small sentence-transformers model on CPU (all-MiniLM-L6-v2 embeds a few hundred readings per second)."""
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as exc:
+            raise RuntimeError(
+                f"EMBEDDING_MODEL={model_name} needs sentence-transformers: "
+                "pip install 'daily-tarot-pipeline[embeddings]' or set EMBEDDING_MODEL=hashing"
+            ) from exc
+        self.name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        # Optimizer threads would otherwise run several forward passes at once and oversubscribe the cores
+        self._lock = threading.Lock()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        with self._lock:
+            vectors = self.model.encode(
+                texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return vectors.astype(np.float32, copy=False)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=_DIGEST_BYTES).digest()
+
+
+class EmbeddingCache:
+    """Append-only vectors on disk: ``keys.bin`` holds 16-byte text digests, ``vectors.f32`` the matching rows.
+
+    Lookups read the memory-mapped vector file, so the cache costs page cache rather than heap. Appends take an
+    exclusive ``flock`` and first drop any rows a crashed writer left without a key, so several processes can share
+    one directory; rows they add become visible on the next append or ``refresh``.
+    """
+
+    def __init__(self, directory: Path, dim: int):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._keys_path = self.directory / "keys.bin"
+        self._vectors_path = self.directory / "vectors.f32"
+        self._keys_path.touch()
+        self._vectors_path.touch()
+        self._rows: dict[bytes, int] = {}
+        self._count = 0
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._refresh()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _complete_rows(self) -> int:
+        return min(self._keys_path.stat().st_size // _DIGEST_BYTES,
+                   self._vectors_path.stat().st_size // (4 * self.dim))
+
+    def _refresh(self) -> None:
+        count = self._complete_rows()
+        if count > self._count:
+            with self._keys_path.open("rb") as keys:
+                keys.seek(self._count * _DIGEST_BYTES)
+                new_keys = keys.read((count - self._count) * _DIGEST_BYTES)
+            for offset in range(0, len(new_keys), _DIGEST_BYTES):
+                self._rows.setdefault(new_keys[offset:offset + _DIGEST_BYTES], self._count + offset // _DIGEST_BYTES)
+            self._count = count
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh()
+
+    def lookup(self, digests: Sequence[bytes]) -> dict[bytes, int]:
+        """Row numbers of the digests already cached."""
+        rows = self._rows
+        return {digest: rows[digest] for digest in digests if digest in rows}
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        return np.asarray(self._vectors[np.asarray(rows, dtype=np.int64)]) if len(rows) else np.empty((0, self.dim), np.float32)
+
+    def append(self, digests: Sequence[bytes], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, self._keys_path.open("r+b") as keys:
+            fcntl.flock(keys, fcntl.LOCK_EX)
+            try:
+                count = self._complete_rows()
+                keys.truncate(count * _DIGEST_BYTES)
+                with self._vectors_path.open("r+b") as store:
+                    store.truncate(count * 4 * self.dim)
+                    store.seek(0, 2)
+                    store.write(vectors.tobytes())
+                keys.seek(0, 2)
+                keys.write(b"".join(digests))
+                keys.flush()
+            finally:
+                fcntl.flock(keys, fcntl.LOCK_UN)
+            self._refresh()
+
+
+class EmbeddingScorer:
+    """Batched, cached embeddings and the cosine-similarity scores built on them."""
+
+    def __init__(self, encoder: Encoder, cache: Optional[EmbeddingCache] = None, batch_size: int = 64):
+        self.encoder = encoder
+        self.cache = cache
+        self.batch_size = batch_size
+        self.encoded = 0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """One unit-length row per text; only texts the cache has never seen are encoded, ``batch_size`` at a time."""
+        digests = [text_digest(text) for text in texts]
+        known = self.cache.lookup(digests) if self.cache is not None else {}
+        missing = {digest: text for digest, text in zip(digests, texts) if digest not in known}
+        fresh: dict[bytes, np.ndarray] = {}
+        if missing:
+            pending = list(missing.items())
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                vectors = self.encoder.encode([text for _, text in chunk])
+                fresh.update(zip((digest for digest, _ in chunk), vectors))
+                if self.cache is not None:
+                    self.cache.append([digest for digest, _ in chunk], vectors)
+            self.encoded += len(pending)
+        out = np.empty((len(texts), self.encoder.dim), dtype=np.float32)
+        cached_at = [index for index, digest in enumerate(digests) if digest in known]
+        if cached_at:
+            out[cached_at] = self.cache.vectors([known[digests[index]] for index in cached_at])
+        for index, digest in enumerate(digests):
+            if digest in fresh:
+                out[index] = fresh[digest]
+        return out
+
+    def warm(self, texts: Sequence[str]) -> None:
+        """Embed ``texts`` ahead of time, e.g. every gold reading before an optimizer starts calling the metric."""
+        self.embed(list(dict.fromkeys(texts)))
+
+    def similarity(self, left: Sequence[str], right: Sequence[str]) -> np.ndarray:
+        """Row-wise cosine similarity, clipped to [0, 1]; both sides go to the encoder in one batch."""
+        vectors = self.embed([*left, *right])
+        return np.clip(np.einsum("ij,ij->i", vectors[:len(left)], vectors[len(left):]), 0.0, 1.0)
+
+    def score(self, example: Any, prediction: Any) -> float:
+        """Mean similarity of the predicted overview, synthesis and reflection to the gold ones, plus the relevance of
+        the predicted overview and synthesis to the intent when the example has one."""
+        golds, preds = [], []
+        for field in ("overview", "synthesis", "actionable_reflection"):
+            gold, pred = getattr(example, field, None), getattr(prediction, field, None)
+            if gold and pred:
+                golds.append(str(gold))
+                preds.append(str(pred))
+        intent = getattr(example, "intent", None)
+        answer = " ".join(str(getattr(prediction, field, None) or "") for field in ("overview", "synthesis")).strip()
+        if intent and answer:
+            golds.append(str(intent))
+            preds.append(answer)
+        if not golds:
+            return 0.0
+        return float(self.similarity(golds, preds).mean())
+
+
+def _cache_dir(root: Path, encoder: Encoder) -> Path:
+    return Path(root) / f"{re.sub(r'[^A-Za-z0-9._-]+', '-', encoder.name)}-{encoder.dim}"
+
+
+@lru_cache()
+def get_embedding_scorer() -> EmbeddingScorer:
+    """Process-wide scorer for ``EMBEDDING_MODEL`` with its vectors cached under ``EMBEDDING_CACHE_DIR``."""
+    settings = get_settings()
+    if settings.embedding_model == HashingEncoder.name:
+        encoder: Encoder = HashingEncoder()
+    else:
+        encoder = SentenceTransformerEncoder(settings.embedding_model, settings.embedding_batch_size)
+    cache = EmbeddingCache(_cache_dir(settings.embedding_cache_dir, encoder), encoder.dim)
+    return EmbeddingScorer(encoder, cache, batch_size=settings.embedding_batch_size)
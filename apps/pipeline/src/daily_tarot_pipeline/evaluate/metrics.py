@@ -1,30 +1,23 @@
 from __future__ import annotations
 
 import re
-from typing import Callable, Iterable
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
 
 from ..models import TrainingExample
+from ..profiling import get_profiler
+from .card_index import card_coverage
+
+if TYPE_CHECKING:
+    from .score_cache import ScoreCache
 
 
 MetricFn = Callable[[TrainingExample], float]
 
 
 def card_coverage_metric(example: TrainingExample) -> float:
-    """Check if all cards are referenced in the reading."""
-    mentioned = 0
+    """Check if all cards are referenced in the reading by name, alias or suit/rank phrasing."""
     text = f"{example.overview or ''} {example.synthesis or ''} {example.actionable_reflection or ''}"
-    text = text.lower()
-    
-    for card in example.card_breakdowns:
-        # Check both card name and ID
-        card_names = [card.card_id.lower()]
-        # Add common variations if needed
-        if any(name in text for name in card_names):
-            mentioned += 1
-    
-    if not example.card_breakdowns:
-        return 0.0
-    return mentioned / len(example.card_breakdowns)
+    return card_coverage(text, [card.card_id for card in example.card_breakdowns])
 
 
 def coherence_metric(example: TrainingExample) -> float:
@@ -149,28 +142,35 @@ def disclaimer_metric(example: TrainingExample) -> float:
     return 0.0
 
 
+METRIC_WEIGHTS = {
+    'coverage': 0.25,
+    'coherence': 0.20,
+    'actionability': 0.20,
+    'tone': 0.20,
+    'length': 0.10,
+    'disclaimer': 0.05
+}
+
+METRIC_FUNCTIONS: dict[str, MetricFn] = {
+    'coverage': card_coverage_metric,
+    'coherence': coherence_metric,
+    'actionability': actionability_metric,
+    'tone': tone_adherence_metric,
+    'length': length_window_metric,
+    'disclaimer': disclaimer_metric
+}
+
+
+def example_scores(example: TrainingExample) -> dict[str, float]:
+    """Score every quality dimension once, plus the weighted composite."""
+    scores = {name: metric(example) for name, metric in METRIC_FUNCTIONS.items()}
+    scores['composite'] = sum(weight * scores[name] for name, weight in METRIC_WEIGHTS.items())
+    return scores
+
+
 def composite_metric(example: TrainingExample) -> float:
     """Composite evaluation metric with all quality dimensions."""
-    weights = {
-        'coverage': 0.25,
-        'coherence': 0.20,
-        'actionability': 0.20,
-        'tone': 0.20,
-        'length': 0.10,
-        'disclaimer': 0.05
-    }
-    
-    metrics = {
-        'coverage': card_coverage_metric(example),
-        'coherence': coherence_metric(example),
-        'actionability': actionability_metric(example),
-        'tone': tone_adherence_metric(example),
-        'length': length_window_metric(example),
-        'disclaimer': disclaimer_metric(example)
-    }
-    
-    score = sum(weight * metrics[name] for name, weight in weights.items())
-    return score
+    return example_scores(example)['composite']
 
 
 def evaluate_dataset(examples: Iterable[TrainingExample], metric: MetricFn = composite_metric) -> float:
@@ -181,27 +181,38 @@ def evaluate_dataset(examples: Iterable[TrainingExample], metric: MetricFn = com
     return sum(scores) / len(scores)
 
 
-def detailed_evaluation(examples: Iterable[TrainingExample]) -> dict:
-    """Return detailed metrics for each dimension."""
-    metrics = {
-        'coverage': [],
-        'coherence': [],
-        'actionability': [],
-        'tone': [],
-        'length': [],
-        'disclaimer': [],
-        'composite': []
-    }
-    
-    for example in examples:
-        metrics['coverage'].append(card_coverage_metric(example))
-        metrics['coherence'].append(coherence_metric(example))
-        metrics['actionability'].append(actionability_metric(example))
-        metrics['tone'].append(tone_adherence_metric(example))
-        metrics['length'].append(length_window_metric(example))
-        metrics['disclaimer'].append(disclaimer_metric(example))
-        metrics['composite'].append(composite_metric(example))
+def detailed_evaluation(examples: Iterable[TrainingExample], cache: Optional["ScoreCache"] = None) -> dict:
+    """Return detailed metrics for each dimension.
+
+    With a ``cache``, only examples whose content (or the metric suite) changed since they were last scored are
+    recomputed; everything else is aggregated from stored score vectors.
+    """
+    metrics = {name: [] for name in [*METRIC_FUNCTIONS, 'composite']}
+    
+    with get_profiler().span("metrics.detailed_evaluation") as span:
+        for scores in (_cached_scores(examples, cache) if cache is not None else map(example_scores, examples)):
+            for name, score in scores.items():
+                metrics[name].append(score)
+        span.rows = len(metrics['composite'])
     
     # Calculate averages
     return {name: sum(scores) / len(scores) if scores else 0.0 
             for name, scores in metrics.items()}
+
+
+def _cached_scores(examples: Iterable[TrainingExample], cache: "ScoreCache") -> list[dict[str, float]]:
+    from .score_cache import example_content_hash
+
+    examples = list(examples)
+    hashes = [example_content_hash(example) for example in examples]
+    known = cache.get_many(hashes)
+    fresh: dict[str, dict[str, float]] = {}
+    for key, example in zip(hashes, examples):
+        if key not in known and key not in fresh:
+            fresh[key] = example_scores(example)
+    if fresh:
+        cache.put_many(fresh)
+    cache.stats.hits += len(hashes) - len(fresh)
+    cache.stats.misses += len(fresh)
+    known.update(fresh)
+    return [known[key] for key in hashes]
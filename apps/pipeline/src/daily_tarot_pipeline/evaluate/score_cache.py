@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import sqlite3
+import types
+from contextlib import closing
+from dataclasses import astuple, dataclass, is_dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+from ..config import get_settings
+from ..models import TrainingExample
+from . import metrics as metrics_module
+
+_LOOKUP_CHUNK = 500
+_PACKAGE = __name__.split(".")[0]
+
+
+def example_content_hash(example: TrainingExample) -> str:
+    """Stable hash of the fields the heuristic metrics read; feedback, tone and prompt version do not affect scores."""
+    payload = {
+        "overview": example.overview,
+        "synthesis": example.synthesis,
+        "actionable_reflection": example.actionable_reflection,
+        "card_breakdowns": [
+            [item.card_id, item.orientation, item.summary] for item in example.card_breakdowns
+        ],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def metric_suite_version() -> str:
+    """Hash of every metric function's source (plus the package helpers and constants they use) and the weights.
+
+    Editing any metric, a helper it calls or ``METRIC_WEIGHTS`` yields a new version, so cached scores from the old
+    definitions are never read again.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(metrics_module.METRIC_WEIGHTS, sort_keys=True).encode())
+    seen: set[str] = set()
+    for name, fn in sorted(metrics_module.METRIC_FUNCTIONS.items()):
+        digest.update(name.encode())
+        _hash_dependencies(fn, digest, seen)
+    _hash_dependencies(metrics_module.example_scores, digest, seen)
+    return digest.hexdigest()[:16]
+
+
+def _hash_dependencies(fn: types.FunctionType, digest, seen: set[str]) -> None:
+    key = f"{fn.__module__}.{fn.__qualname__}"
+    if key in seen:
+        return
+    seen.add(key)
+    digest.update(inspect.getsource(fn).encode())
+    for name in fn.__code__.co_names:
+        value = fn.__globals__.get(name)
+        if callable(value) and hasattr(value, "__wrapped__"):
+            value = inspect.unwrap(value)
+        if isinstance(value, types.FunctionType) and value.__module__.split(".")[0] == _PACKAGE:
+            _hash_dependencies(value, digest, seen)
+        elif name.isupper() and f"{fn.__module__}.{name}" not in seen and _is_constant(value):
+            seen.add(f"{fn.__module__}.{name}")
+            digest.update(f"{name}={_canonical_json(value)}".encode())
+
+
+def _canonical_json(value) -> str:
+    return json.dumps(_canonical(value), separators=(",", ":"))
+
+
+def _canonical(value):
+    """JSON form of a constant; sets and dicts are sorted since their iteration order follows PYTHONHASHSEED."""
+    if _is_frozen_dataclass(value):
+        return [type(value).__qualname__, _canonical(astuple(value))]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(item) for item in value), key=json.dumps)
+    if isinstance(value, (tuple, list)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return sorted(([_canonical(key), _canonical(item)] for key, item in value.items()), key=json.dumps)
+    return value
+
+
+def _is_constant(value) -> bool:
+    """Plain data that can be hashed in a canonical form (unlike function or object reprs)."""
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return True
+    if isinstance(value, (tuple, list, frozenset, set)):
+        return all(_is_constant(item) for item in value)
+    if isinstance(value, dict):
+        return all(_is_constant(key) and _is_constant(item) for key, item in value.items())
+    if _is_frozen_dataclass(value):
+        # Deck cards: a changed name or meaning changes what card_coverage matches
+        return _is_constant(astuple(value))
+    return False
+
+
+def _is_frozen_dataclass(value) -> bool:
+    return is_dataclass(value) and not isinstance(value, type) and value.__dataclass_params__.frozen
+
+
+@dataclass
+class ScoreCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return f"Score cache: {self.hits} hits, {self.misses} scored ({self.hit_rate:.0%} reused)"
+
+
+class ScoreCache:
+    """Per-example metric scores in a local SQLite file, keyed by content hash and metric-suite version."""
+
+    def __init__(self, path: Path, suite_version: Optional[str] = None):
+        self.path = Path(path)
+        self.suite_version = suite_version or metric_suite_version()
+        self.stats = ScoreCacheStats()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS example_scores (
+                    suite_version TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    scores TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (suite_version, content_hash)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, hashes: Iterable[str]) -> dict[str, dict[str, float]]:
+        hashes = list(dict.fromkeys(hashes))
+        found: dict[str, dict[str, float]] = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(hashes), _LOOKUP_CHUNK):
+                chunk = hashes[start:start + _LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"""
+                    SELECT content_hash, scores FROM example_scores
+                    WHERE suite_version = ? AND content_hash IN ({",".join("?" * len(chunk))})
+                    """,
+                    [self.suite_version, *chunk],
+                )
+                found.update((content_hash, json.loads(scores)) for content_hash, scores in rows)
+        return found
+
+    def put_many(self, scores: dict[str, dict[str, float]]) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO example_scores VALUES (?, ?, ?, ?)",
+                [(self.suite_version, key, json.dumps(value), now) for key, value in scores.items()],
+            )
+
+    def prune_stale(self) -> int:
+        """Delete scores written by earlier metric-suite versions."""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "DELETE FROM example_scores WHERE suite_version != ?", [self.suite_version]
+            ).rowcount
+
+
+@lru_cache()
+def get_score_cache() -> ScoreCache:
+    """Process-wide cache at ``SCORE_CACHE_PATH``; stale suite versions are pruned on first use."""
+    cache = ScoreCache(get_settings().score_cache_path)
+    cache.prune_stale()
+    return cache
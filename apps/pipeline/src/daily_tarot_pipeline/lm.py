@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+import dspy
+import httpx
+import litellm
+from dspy.clients.cache import request_cache
+from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+from .config import EnvironmentSettings, get_settings
+from .profiling import LMSpanCallback, get_profiler
+from .quota import _is_rate_limit, is_retryable, quota_owns_retries
+from .stub_lm import STUB_MODEL_NAME, StubLM, StubProfile
+
+
+def build_lm(model: Optional[str] = None, max_tokens: int = 2000, **kwargs) -> dspy.BaseLM:
+    """Construct the DSPy LM selected by ``LM_BACKEND``: Groq, the in-process stub or the stub HTTP server."""
+    settings = get_settings()
+    # Every LM call shows up as an ``lm.call`` span next to the pipeline stages that issued it
+    kwargs.setdefault("callbacks", [LMSpanCallback(get_profiler())])
+    if settings.lm_backend == "stub":
+        return StubLM(profile=StubProfile.from_settings(settings), max_tokens=max_tokens, **kwargs)
+    if settings.lm_backend == "stub-http":
+        return PooledLM(
+            model=f"openai/{STUB_MODEL_NAME}",
+            api_base=settings.stub_api_base,
+            api_key="stub",
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+    return PooledLM(
+        model=model or settings.groq_dev_model,
+        api_base=settings.groq_api_base,
+        api_key=settings.groq_api_key,
+        max_tokens=max_tokens,
+        **kwargs,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_shared_lm(model: Optional[str] = None) -> dspy.BaseLM:
+    """Process-wide LM per model so every caller reuses one client and its connections."""
+    return build_lm(model)
+
+
+class PooledTransport(httpx.HTTPTransport):
+    """httpx's keep-alive connection pool, counting requests and opened connections so reuse can be reported."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.connections_opened = 0
+        self._counts_lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._counts_lock:
+            self.requests += 1
+        request.extensions = {**request.extensions, "trace": self._tracer(request.extensions.get("trace"))}
+        return super().handle_request(request)
+
+    def _tracer(self, inner: Optional[Callable[[str, dict], None]]) -> Callable[[str, dict], None]:
+        def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                with self._counts_lock:
+                    self.connections_opened += 1
+            if inner is not None:
+                inner(event, info)
+
+        return trace
+
+    def stats(self) -> dict[str, Any]:
+        connections = self._pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reused": reused,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+            "idle": idle,
+            "in_use": len(connections) - idle,
+        }
+
+
+def build_http_transport(settings: Optional[EnvironmentSettings] = None) -> PooledTransport:
+    """A connection pool bounded by ``HTTP_MAX_CONNECTIONS``."""
+    settings = settings or get_settings()
+    return PooledTransport(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_connections,
+        )
+    )
+
+
+def build_http_client(transport: httpx.BaseTransport, settings: Optional[EnvironmentSettings] = None) -> httpx.Client:
+    """A client over ``transport`` with the ``HTTP_*_TIMEOUT_S`` timeouts."""
+    return httpx.Client(transport=transport, timeout=http_timeout(settings), follow_redirects=True)
+
+
+def http_timeout(settings: Optional[EnvironmentSettings] = None) -> httpx.Timeout:
+    settings = settings or get_settings()
+    return httpx.Timeout(
+        settings.http_read_timeout_s,
+        connect=settings.http_connect_timeout_s,
+        pool=settings.http_pool_timeout_s,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_http_transport() -> PooledTransport:
+    return build_http_transport()
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    """Process-wide client every LM call goes through.
+
+    litellm's OpenAI-compatible providers (the stub server) build their SDK clients on ``litellm.client_session``;
+    its Groq handler takes the client per call, which ``PooledLM`` passes.
+    """
+    client = build_http_client(get_http_transport())
+    litellm.client_session = client
+    return client
+
+
+@lru_cache(maxsize=None)
+def _get_http_handler() -> HTTPHandler:
+    return HTTPHandler(client=get_http_client())
+
+
+class PooledLM(dspy.LM):
+    """``dspy.LM`` sending every call over the process-wide keep-alive client.
+
+    The client and timeouts are added per call, so they stay out of cache keys, saved state and pickles; a loaded
+    or copied LM uses the pool of the process it runs in.
+
+    With the shared quota installed, litellm makes a single attempt per call and the ``num_retries`` retries happen
+    here, around the callbacks: each attempt takes its own lease, and a 429 penalizes every process's buckets before
+    the retry waits for the next lease. litellm's internal retries would resend 429s unseen by the quota.
+    """
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        if not quota_owns_retries(self):
+            return super().__call__(prompt, messages, **kwargs)
+        for attempt in range(self.num_retries + 1):
+            try:
+                return super().__call__(prompt, messages, **kwargs)
+            except Exception as exc:
+                if attempt == self.num_retries or not is_retryable(exc):
+                    raise
+                time.sleep(_backoff_s(exc, attempt))
+
+    async def acall(self, prompt=None, messages=None, **kwargs):
+        if not quota_owns_retries(self):
+            return await super().acall(prompt, messages, **kwargs)
+        for attempt in range(self.num_retries + 1):
+            try:
+                return await super().acall(prompt, messages, **kwargs)
+            except Exception as exc:
+                if attempt == self.num_retries or not is_retryable(exc):
+                    raise
+                await asyncio.sleep(_backoff_s(exc, attempt))
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        return super().forward(prompt, messages, **self._pooled_kwargs(kwargs))
+
+    def _pooled_kwargs(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        get_http_client()
+        kwargs.setdefault("timeout", http_timeout())
+        if self.model.startswith("groq/"):
+            kwargs.setdefault("client", _get_http_handler())
+        return kwargs
+
+    def _get_cached_completion_fn(self, completion_fn, cache):
+        if cache:
+            completion_fn = request_cache(
+                cache_arg_name="request",
+                ignored_args_for_cache_key=["api_key", "api_base", "base_url", "client", "timeout"],
+            )(completion_fn)
+        if quota_owns_retries(self):
+            completion_fn = _single_attempt(completion_fn)
+        return completion_fn, {"no-cache": True, "no-store": True}
+
+
+def _single_attempt(completion_fn: Callable[..., Any]) -> Callable[..., Any]:
+    def completion(request: dict[str, Any], num_retries: int, cache: Optional[dict[str, Any]] = None):
+        return completion_fn(request=request, num_retries=0, cache=cache)
+
+    return completion
+
+
+def _backoff_s(exception: Exception, attempt: int) -> float:
+    """Pause before a retry: none after a 429, whose wait is the quota lease, else litellm's exponential backoff."""
+    return 0.0 if _is_rate_limit(exception) else min(0.5 * 2 ** attempt, 8.0)
+
+
+def http_pool_stats() -> Optional[dict[str, Any]]:
+    """Request and connection counts of the process-wide pool, or ``None`` if no LM has used it yet."""
+    if not get_http_transport.cache_info().currsize:
+        return None
+    return get_http_transport().stats()
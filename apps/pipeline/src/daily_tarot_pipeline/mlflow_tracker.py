@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import json
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 import dspy
 import mlflow
@@ -11,24 +12,33 @@ import mlflow.dspy
 from pydantic import BaseModel
 
 from .config import get_settings
+from .profiling import Profiler, get_profiler
+from .tracing import TraceSampler, TraceSamplingStats, get_trace_sampler
+
+# Local MLflow backend (SQLite) and the dataset dumps logged with each optimizer run
+MLFLOW_DATA_DIR = Path("./data")
+
+
+def tracking_uri(data_dir: Path = MLFLOW_DATA_DIR) -> str:
+    return f"sqlite:///{data_dir}/mlflow.db"
 
 
 class MLflowTracker:
     """MLflow tracking integration for DSPy experiments."""
     
-    def __init__(self, experiment_name: Optional[str] = None):
+    def __init__(self, experiment_name: Optional[str] = None, sampler: Optional[TraceSampler] = None):
         self.settings = get_settings()
         self.experiment_name = experiment_name or "daily-tarot-dspy"
+        self.sampler = sampler or get_trace_sampler()
         self._setup_tracking()
     
     def _setup_tracking(self) -> None:
         """Configure MLflow tracking server and experiment."""
         # Ensure data directory exists
-        data_dir = Path("./data")
-        data_dir.mkdir(parents=True, exist_ok=True)
+        MLFLOW_DATA_DIR.mkdir(parents=True, exist_ok=True)
         
         # Set MLflow tracking URI to local SQLite backend
-        mlflow.set_tracking_uri(f"sqlite:///{data_dir}/mlflow.db")
+        mlflow.set_tracking_uri(tracking_uri())
         
         # Create or get experiment
         experiment = mlflow.get_experiment_by_name(self.experiment_name)
@@ -37,17 +47,42 @@ class MLflowTracker:
         
         mlflow.set_experiment(self.experiment_name)
         
-        # Enable comprehensive DSPy autologging
+        # Head sampling happens inside MLflow's tracer, so sampled-out calls never build spans
+        os.environ["MLFLOW_TRACE_SAMPLING_RATIO"] = str(self.sampler.head_ratio)
+        mlflow.tracing.reset()
+
+        # Enable DSPy autologging; traces follow the configured sampling policy
         mlflow.dspy.autolog(
             log_compiles=True,
             log_evals=True,
-            log_traces_from_compile=True,
-            log_traces_from_eval=True
+            log_traces=self.sampler.enabled,
+            log_traces_from_compile=self.sampler.enabled,
+            log_traces_from_eval=self.sampler.enabled,
         )
     
-    def start_run(self, run_name: Optional[str] = None, tags: Optional[dict[str, str]] = None) -> mlflow.ActiveRun:
-        """Start a new MLflow run."""
-        return mlflow.start_run(run_name=run_name, tags=tags)
+    @contextmanager
+    def start_run(self, run_name: Optional[str] = None, tags: Optional[dict[str, str]] = None) -> Iterator[mlflow.ActiveRun]:
+        """Start a new MLflow run; stage timings collected while it was open are logged when it ends.
+
+        The trace sampler is process-wide, so its counters and per-run cap are reset here.
+        """
+        self.sampler.reset()
+        with mlflow.start_run(run_name=run_name, tags=tags) as run:
+            try:
+                yield run
+            finally:
+                self.log_profile()
+
+    def log_profile(self, profiler: Optional[Profiler] = None) -> None:
+        """Log per-stage span aggregates as ``profile.<span>.*`` metrics, plus the Chrome trace when one is requested."""
+        profiler = profiler or get_profiler()
+        if mlflow.active_run() is None:
+            return
+        metrics = profiler.as_metrics()
+        if metrics:
+            mlflow.log_metrics(metrics)
+        if profiler.trace_path is not None:
+            mlflow.log_dict(profiler.chrome_trace(), "profile/chrome_trace.json")
     
     def log_dspy_optimizer(
         self,
@@ -67,15 +102,15 @@ class MLflowTracker:
         })
         
         # Log dataset as artifact
-        data_dir = Path("./data")
-        dataset_dir = data_dir / "datasets"
+        dataset_dir = MLFLOW_DATA_DIR / "datasets"
         dataset_dir.mkdir(parents=True, exist_ok=True)
         dataset_path = dataset_dir / f"{dataset_name}.json"
         
-        with open(dataset_path, "w") as f:
-            json.dump([ex.model_dump() if hasattr(ex, 'model_dump') else ex for ex in examples], f, indent=2)
-        
-        mlflow.log_artifact(dataset_path, "datasets")
+        with get_profiler().span("mlflow.log_dataset", rows=dataset_size):
+            with open(dataset_path, "w") as f:
+                json.dump([ex.model_dump() if hasattr(ex, 'model_dump') else ex for ex in examples], f, indent=2)
+
+            mlflow.log_artifact(dataset_path, "datasets")
     
     def log_dspy_candidate(self, candidate: Any, optimizer_name: str) -> None:
         """Log DSPy optimization candidate results."""
@@ -91,16 +126,17 @@ class MLflowTracker:
     
     def log_compiled_module(self, module: dspy.Module, model_name: str = "model") -> None:
         """Log a compiled DSPy module to MLflow."""
-        model_info = mlflow.dspy.log_model(
-            module,
-            artifact_path=model_name,
-            input_example={
-                "intent": "What guidance do I need today?",
-                "spread_type": "single",
-                "cards": [{"card_id": "00-fool", "orientation": "upright", "position": "present"}],
-                "tone": "wise"
-            }
-        )
+        with get_profiler().span("mlflow.log_model"):
+            model_info = mlflow.dspy.log_model(
+                module,
+                artifact_path=model_name,
+                input_example={
+                    "intent": "What guidance do I need today?",
+                    "spread_type": "single",
+                    "cards": [{"card_id": "00-fool", "orientation": "upright", "position": "present"}],
+                    "tone": "wise"
+                }
+            )
         return model_info
     
     def log_evaluation_metrics(self, metrics: dict[str, float], dataset_name: str) -> None:
@@ -121,18 +157,51 @@ class MLflowTracker:
             if hasattr(metric, 'name') and hasattr(metric, 'value'):
                 mlflow.log_metric(f"metric_{metric.name}", metric.value)
     
+    def log_candidate_frontier(self, candidates: list[Any]) -> None:
+        """Log per-candidate quality, p95 latency and completion tokens, plus the selected prompt's cost."""
+        if mlflow.active_run() is None:
+            return
+        mlflow.log_dict([candidate.model_dump() for candidate in candidates], "pareto_frontier.json")
+        for candidate in candidates:
+            if candidate.label == "selected":
+                mlflow.log_metrics({
+                    "selected_quality": candidate.quality,
+                    "selected_avg_completion_tokens": candidate.avg_completion_tokens,
+                    **({"selected_p95_latency_ms": candidate.p95_latency_ms} if candidate.p95_latency_ms is not None else {}),
+                })
+
+    def log_trial_schedule(self, schedule: Any) -> None:
+        """Log how many evaluations successive halving ran against scoring every candidate on the full valset."""
+        if mlflow.active_run() is None:
+            return
+        mlflow.log_dict(schedule.model_dump(), "trial_schedule.json")
+        mlflow.log_metrics(schedule.as_metrics())
+
+    def sampled_metric(self, metric_fn: callable) -> callable:
+        """Wrap a metric so the traces it scores are subject to tail sampling."""
+        return self.sampler.wrap_metric(metric_fn)
+
+    def finalize_traces(self) -> TraceSamplingStats:
+        """Prune traces rejected by the sampling policy and log sampling counters."""
+        with get_profiler().span("mlflow.prune_traces"):
+            stats = self.sampler.prune()
+        if mlflow.active_run() is not None:
+            mlflow.log_metrics(stats.as_metrics())
+        return stats
+
     def log_dspy_evaluation(self, dataset: list[Any], module: dspy.Module, metric_fn: callable) -> dict[str, float]:
-        """Run and log DSPy evaluation with automatic tracing."""
+        """Run and log DSPy evaluation with sampled tracing."""
         evaluator = dspy.Evaluate(
             devset=dataset,
-            metric=metric_fn,
+            metric=self.sampled_metric(metric_fn),
             num_threads=1,
             display_progress=True,
             display_table=True
         )
         
         # Run evaluation - this will be automatically logged due to autologging
-        scores = evaluator(module)
+        with get_profiler().span("eval.dspy", rows=len(dataset)):
+            scores = evaluator(module)
         
         # Extract and log the final score
         if isinstance(scores, dict):
@@ -140,7 +209,8 @@ class MLflowTracker:
                 mlflow.log_metric(f"dspy_eval_{metric_name}", score)
         else:
             mlflow.log_metric("dspy_eval_overall", scores)
-            
+
+        self.finalize_traces()
         return scores if isinstance(scores, dict) else {"overall": scores}
     
     def end_run(self) -> None:
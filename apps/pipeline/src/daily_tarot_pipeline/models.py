@@ -3,20 +3,27 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from .deck import CARDS_BY_ID, SPREAD_POSITIONS
 
 CardOrientation = Literal["upright", "reversed"]
 ModelName = Literal["groq/openai/gpt-oss-20b", "groq/openai/gpt-oss-120b"]
 SpreadType = Literal["single", "three-card", "celtic-cross"]
+Tone = Literal["reflective", "direct", "inspirational", "cautious", "warm-analytical"]
 
 
 class CardDraw(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     card_id: str = Field(..., alias="cardId")
     orientation: CardOrientation
     position: str
 
 
 class CardBreakdown(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     card_id: str = Field(..., alias="cardId")
     orientation: CardOrientation
     summary: str
@@ -62,6 +69,17 @@ class TrainingExample(BaseModel):
     prompt_version: str
 
 
+class BatchedReading(BaseModel):
+    """One reading of a multi-reading LM response, matched back to its request by ``index``."""
+
+    index: int
+    overview: str = Field(..., min_length=1)
+    card_breakdowns: list[CardBreakdown] = Field(..., min_length=1)
+    synthesis: str = Field(..., min_length=1)
+    actionable_reflection: str = Field(..., min_length=1)
+    disclaimer: str = ""
+
+
 class MetricResult(BaseModel):
     name: str
     value: float
@@ -84,7 +102,113 @@ class PromptVersion(BaseModel):
     created_at: datetime
 
 
+class CandidateCost(BaseModel):
+    label: str
+    fingerprint: str
+    examples: int
+    quality: float
+    objective: float
+    p95_latency_ms: float | None = None
+    avg_completion_tokens: float
+    meets_slo: bool = False
+    on_frontier: bool = False
+
+
+class TrialSchedule(BaseModel):
+    """How the successive-halving scheduler spent a compile's evaluation budget."""
+
+    candidates: int
+    valset_size: int
+    rung_examples: list[int] = Field(default_factory=list)
+    rung_candidates: list[int] = Field(default_factory=list)
+    eval_calls: int = 0
+    baseline_eval_calls: int = 0
+    lm_calls: int = 0
+    tokens: int = 0
+    budget_exhausted: bool = False
+
+    @property
+    def eval_calls_saved(self) -> int:
+        """Program runs avoided compared with scoring every candidate on the full valset."""
+        return self.baseline_eval_calls - self.eval_calls
+
+    def as_metrics(self) -> dict[str, float]:
+        return {
+            "trial_candidates": float(self.candidates),
+            "trial_eval_calls": float(self.eval_calls),
+            "trial_baseline_eval_calls": float(self.baseline_eval_calls),
+            "trial_eval_calls_saved": float(self.eval_calls_saved),
+            "trial_lm_calls": float(self.lm_calls),
+            "trial_tokens": float(self.tokens),
+            "trial_budget_exhausted": float(self.budget_exhausted),
+        }
+
+
 class PromptCandidate(BaseModel):
     prompt_path: str
     optimizer: str
     loss: float | None = None
+    frontier: list[CandidateCost] = Field(default_factory=list)
+    schedule: TrialSchedule | None = None
+    warm_start: str | None = None
+
+
+class ReadingRequest(BaseModel):
+    """Body of a serving ``/predict`` request: a known spread with one distinct deck card per position."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    model_uri: str | None = None
+    intent: str | None = None
+    spread_type: SpreadType = "single"
+    cards: list[CardDraw]
+    tone: Tone = "reflective"
+
+    @model_validator(mode="after")
+    def _cards_fit_the_spread(self) -> "ReadingRequest":
+        expected = len(SPREAD_POSITIONS[self.spread_type])
+        if len(self.cards) != expected:
+            raise ValueError(f"{self.spread_type} spread takes {expected} cards, got {len(self.cards)}")
+        unknown = [card.card_id for card in self.cards if card.card_id not in CARDS_BY_ID]
+        if unknown:
+            raise ValueError(f"Unknown card ids: {', '.join(unknown)}")
+        if len({card.card_id for card in self.cards}) != len(self.cards):
+            raise ValueError("Cards must be distinct")
+        return self
+
+    def inputs(self) -> dict:
+        return {
+            "intent": self.intent,
+            "spread_type": self.spread_type,
+            "cards": [card.model_dump(by_alias=True) for card in self.cards],
+            "tone": self.tone,
+        }
+
+
+class CachedReading(BaseModel):
+    cache_key: str
+    prompt_version: str
+    spread_type: SpreadType
+    tone: str
+    cards: list[dict]
+    overview: str
+    card_breakdowns: list[dict]
+    synthesis: str
+    actionable_reflection: str
+    model: str
+    frequency: int = 0
+    expires_at: datetime
+
+
+class UsageAggregate(BaseModel):
+    model: str
+    prompt_version: str | None
+    calls: int
+    p50_latency_ms: float
+    p95_latency_ms: float
+    p99_latency_ms: float
+    avg_prompt_tokens: float
+    avg_completion_tokens: float
+    tokens_per_second: float
+    avg_cost_cents: float
+    total_cost_cents: float
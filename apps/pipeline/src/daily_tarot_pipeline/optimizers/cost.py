@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+import dspy
+import numpy as np
+from dspy.utils.callback import BaseCallback
+
+from ..models import CandidateCost
+
+# Share of the normalized cost taken by latency; the rest comes from completion tokens
+_LATENCY_SHARE = 0.5
+# Normalized cost terms are clipped so one runaway generation cannot swamp the quality signal
+_MAX_COST_TERM = 2.0
+
+
+@dataclass
+class ExampleCost:
+    fingerprint: str
+    latency_ms: Optional[float]
+    completion_tokens: int
+    measured: bool
+
+
+@dataclass
+class CostRecord:
+    fingerprint: str
+    quality: float
+    objective: float
+    latency_ms: Optional[float]
+    completion_tokens: int
+
+
+def program_fingerprint(program: dspy.Module) -> str:
+    """Hash of every predictor's instructions and demos; identical prompts share a fingerprint."""
+    state = [
+        [name, predictor.signature.instructions, [dict(demo) for demo in predictor.demos]]
+        for name, predictor in program.named_predictors()
+    ]
+    return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CostRecorder(BaseCallback):
+    """DSPy callback measuring wall time and completion tokens of each top-level reading module call.
+
+    Costs are keyed by the returned prediction so the metric can pick them up for the example it is scoring.
+    Responses served from the LM cache carry no usage and are not counted as latency samples.
+    """
+
+    def __init__(self, module_types: tuple[type, ...]):
+        self.module_types = module_types
+        self._started: dict[str, tuple[float, str]] = {}
+        self._costs: dict[int, ExampleCost] = {}
+        self._lock = threading.Lock()
+
+    def on_module_start(self, call_id: str, instance: Any, inputs: dict[str, Any]) -> None:
+        if isinstance(instance, self.module_types):
+            fingerprint = program_fingerprint(instance)
+            with self._lock:
+                self._started[call_id] = (time.perf_counter(), fingerprint)
+
+    def on_module_end(self, call_id: str, outputs: Any | None, exception: BaseException | None = None) -> None:
+        with self._lock:
+            started = self._started.pop(call_id, None)
+        if started is None or outputs is None:
+            return
+        started_at, fingerprint = started
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        usage = outputs.get_lm_usage() if isinstance(outputs, dspy.Prediction) else None
+        completion_tokens = _completion_tokens(usage)
+        measured = completion_tokens is not None
+        if not measured:
+            completion_tokens = estimate_completion_tokens(outputs)
+        with self._lock:
+            self._costs[id(outputs)] = ExampleCost(
+                fingerprint=fingerprint,
+                latency_ms=latency_ms if measured else None,
+                completion_tokens=completion_tokens,
+                measured=measured,
+            )
+
+    def pop(self, prediction: Any) -> Optional[ExampleCost]:
+        with self._lock:
+            return self._costs.pop(id(prediction), None)
+
+
+class CostAwareMetric:
+    """Quality metric minus a weighted, budget-normalized latency and completion-token penalty.
+
+    With ``cost_weight=0`` the objective equals the quality metric, but costs are still recorded so the
+    candidates' tradeoff can be reported after compile.
+    """
+
+    def __init__(
+        self,
+        quality_fn: Callable[..., float],
+        recorder: CostRecorder,
+        cost_weight: float,
+        latency_budget_ms: float,
+        token_budget: int,
+    ):
+        self.quality_fn = quality_fn
+        self.recorder = recorder
+        self.cost_weight = cost_weight
+        self.latency_budget_ms = latency_budget_ms
+        self.token_budget = token_budget
+        self.records: list[CostRecord] = []
+        self._lock = threading.Lock()
+        # MIPRO and Evaluate introspect the metric's name when logging
+        self.__name__ = getattr(quality_fn, "__name__", type(self).__name__)
+
+    def __call__(self, example, prediction, trace=None) -> float:
+        return self._score(example, prediction, trace)[1]
+
+    def quality(self, example, prediction, trace=None) -> float:
+        """Score quality alone while still recording cost, for reporting evaluations."""
+        return self._score(example, prediction, trace)[0]
+
+    def penalty(self, latency_ms: Optional[float], completion_tokens: int) -> float:
+        token_term = min(completion_tokens / self.token_budget, _MAX_COST_TERM) if self.token_budget else 0.0
+        if latency_ms is None:
+            return token_term
+        latency_term = min(latency_ms / self.latency_budget_ms, _MAX_COST_TERM) if self.latency_budget_ms else 0.0
+        return _LATENCY_SHARE * latency_term + (1 - _LATENCY_SHARE) * token_term
+
+    def _score(self, example, prediction, trace) -> tuple[float, float]:
+        quality = self.quality_fn(example, prediction, trace)
+        cost = self.recorder.pop(prediction)
+        if cost is None:
+            return quality, quality
+        objective = quality - self.cost_weight * self.penalty(cost.latency_ms, cost.completion_tokens)
+        with self._lock:
+            self.records.append(CostRecord(
+                fingerprint=cost.fingerprint,
+                quality=quality,
+                objective=objective,
+                latency_ms=cost.latency_ms,
+                completion_tokens=cost.completion_tokens,
+            ))
+        return quality, objective
+
+
+def summarize_candidates(
+    records: Iterable[CostRecord],
+    labels: dict[str, str],
+    latency_slo_ms: float,
+) -> list[CandidateCost]:
+    """Aggregate per-example records by prompt fingerprint and mark the quality/latency/token Pareto frontier."""
+    grouped: dict[str, list[CostRecord]] = {}
+    for record in records:
+        grouped.setdefault(record.fingerprint, []).append(record)
+
+    candidates = []
+    for fingerprint, rows in grouped.items():
+        latencies = [row.latency_ms for row in rows if row.latency_ms is not None]
+        p95 = float(np.percentile(latencies, 95)) if latencies else None
+        candidates.append(CandidateCost(
+            label=labels.get(fingerprint, f"trial-{fingerprint[:8]}"),
+            fingerprint=fingerprint,
+            examples=len(rows),
+            quality=float(np.mean([row.quality for row in rows])),
+            objective=float(np.mean([row.objective for row in rows])),
+            p95_latency_ms=p95,
+            avg_completion_tokens=float(np.mean([row.completion_tokens for row in rows])),
+            meets_slo=p95 is not None and p95 <= latency_slo_ms,
+        ))
+
+    for candidate in candidates:
+        candidate.on_frontier = not any(_dominates(other, candidate) for other in candidates if other is not candidate)
+    return sorted(candidates, key=lambda candidate: (not candidate.on_frontier, -candidate.quality))
+
+
+def candidate_labels(compiled: dspy.Module) -> dict[str, str]:
+    """Name MIPRO's fully evaluated candidates by rank, and the program it returned as ``selected``."""
+    labels = {}
+    for rank, entry in enumerate(getattr(compiled, "candidate_programs", None) or []):
+        labels.setdefault(program_fingerprint(entry["program"]), f"candidate-{rank}")
+    labels[program_fingerprint(compiled)] = "selected"
+    return labels
+
+
+def estimate_completion_tokens(prediction: Any) -> int:
+    """Rough completion size (~4 characters per token) for cache hits and LMs that report no usage."""
+    try:
+        text = "".join(str(prediction[key]) for key in prediction.keys())
+    except (AttributeError, TypeError):
+        text = str(prediction)
+    return max(1, len(text) // 4)
+
+
+def _completion_tokens(usage: Optional[dict[str, Any]]) -> Optional[int]:
+    if not usage:
+        return None
+    total = sum(int((entry or {}).get("completion_tokens") or 0) for entry in usage.values())
+    return total or None
+
+
+def _dominates(a: CandidateCost, b: CandidateCost) -> bool:
+    a_latency = a.p95_latency_ms if a.p95_latency_ms is not None else float("inf")
+    b_latency = b.p95_latency_ms if b.p95_latency_ms is not None else float("inf")
+    no_worse = a.quality >= b.quality and a_latency <= b_latency and a.avg_completion_tokens <= b.avg_completion_tokens
+    better = a.quality > b.quality or a_latency < b_latency or a.avg_completion_tokens < b.avg_completion_tokens
+    return no_worse and better
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import math
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import dspy
+from dspy.teleprompt.utils import get_signature, set_signature
+from dspy.utils.callback import BaseCallback
+from dspy.utils.parallelizer import ParallelExecutor
+
+from ..models import TrialSchedule
+from .warm_start import WarmStartMIPROv2
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExhausted(BaseException):
+    """Raised from the LM call that would go over a ``TrialBudget`` cap.
+
+    Derives from ``BaseException`` so it gets past the ``except Exception`` DSPy wraps around callbacks, adapters and
+    demo bootstrapping; ``SuccessiveHalving`` and ``HalvingMIPROv2.compile`` are the ones that catch it.
+    """
+
+
+class TrialBudget:
+    """Caps on the LM calls and tokens one compile may spend.
+
+    ``callback`` counts every LM call as it starts and its tokens as it ends, wherever it comes from (demo
+    bootstrapping and instruction proposals included), and raises ``BudgetExhausted`` from the first call made once a
+    cap is reached. The scheduler also checks the caps before it starts scoring an example, and an example in flight
+    counts as one call until it finishes, so scoring stops at the cap instead of running into it.
+    """
+
+    def __init__(self, max_lm_calls: Optional[int] = None, max_tokens: Optional[int] = None):
+        self.max_lm_calls = max_lm_calls
+        self.max_tokens = max_tokens
+        self.lm_calls = 0
+        self.tokens = 0
+        self.exhausted = False
+        self._in_flight = 0
+        self._calls: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.callback = _CallCounter(self)
+
+    def reserve(self) -> bool:
+        with self._lock:
+            if self._over(self.lm_calls + self._in_flight):
+                self.exhausted = True
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _over(self, calls: int) -> bool:
+        over_calls = self.max_lm_calls is not None and calls >= self.max_lm_calls
+        over_tokens = self.max_tokens is not None and self.tokens >= self.max_tokens
+        return over_calls or over_tokens
+
+    def _start_call(self, call_id: str, lm: Any) -> None:
+        with self._lock:
+            if self._over(self.lm_calls):
+                self.exhausted = True
+                raise BudgetExhausted(f"Trial budget spent: {self.lm_calls} LM calls, {self.tokens} tokens")
+            self.lm_calls += 1
+            self._calls[call_id] = lm
+
+    def _end_call(self, call_id: str, outputs: Any) -> None:
+        with self._lock:
+            lm = self._calls.pop(call_id, None)
+        tokens = _call_tokens(lm, outputs)
+        with self._lock:
+            self.tokens += tokens
+
+
+class _CallCounter(BaseCallback):
+    def __init__(self, budget: TrialBudget):
+        self.budget = budget
+
+    def on_lm_start(self, call_id: str, instance: Any, inputs: dict[str, Any]) -> None:
+        self.budget._start_call(call_id, instance)
+
+    def on_lm_end(self, call_id: str, outputs: Optional[Any], exception: Optional[Exception] = None) -> None:
+        self.budget._end_call(call_id, outputs)
+
+
+def _call_tokens(lm: Any, outputs: Any) -> int:
+    """Tokens billed for the LM call that returned ``outputs``, from the history entry DSPy recorded for it."""
+    if outputs is None:
+        return 0
+    for entry in reversed(getattr(lm, "history", None) or []):
+        if entry.get("outputs") is not outputs:
+            continue
+        if getattr(entry.get("response"), "cache_hit", False):
+            return 0
+        usage = entry.get("usage") or {}
+        return int(usage.get("total_tokens") or 0) or (
+            int(usage.get("prompt_tokens") or 0) + int(usage.get("completion_tokens") or 0)
+        )
+    return 0
+
+
+@dataclass
+class HalvingResult:
+    best_index: int
+    mean_scores: list[Optional[float]]
+    evaluated: list[int]
+    schedule: TrialSchedule
+    programs: list[Any] = field(default_factory=list, repr=False)
+
+    @property
+    def best(self) -> Any:
+        return self.programs[self.best_index]
+
+
+class SuccessiveHalving:
+    """Score candidates on growing slices of a shuffled valset and keep the best ``1/eta`` after each rung.
+
+    Rung ``r`` covers the first ``min_examples * eta**r`` examples (the last rung is the full valset). Scores carry
+    over between rungs, so a survivor is only run on the examples it has not seen yet. With ``n`` candidates this
+    costs roughly ``n * min_examples * log_eta(n)`` program runs instead of ``n * len(valset)``.
+    """
+
+    def __init__(
+        self,
+        metric: Callable[..., float],
+        valset: list[dspy.Example],
+        budget: Optional[TrialBudget] = None,
+        min_examples: int = 8,
+        eta: int = 3,
+        num_threads: Optional[int] = None,
+        seed: int = 0,
+    ):
+        if eta < 2:
+            raise ValueError(f"eta must be at least 2, got {eta}")
+        self.metric = metric
+        self.examples = list(valset)
+        random.Random(seed).shuffle(self.examples)
+        self.budget = budget or TrialBudget()
+        self.min_examples = max(1, min_examples)
+        self.eta = eta
+        self.num_threads = num_threads
+
+    def rung_sizes(self) -> list[int]:
+        total = len(self.examples)
+        sizes = [min(self.min_examples, total)]
+        while sizes[-1] < total:
+            sizes.append(min(total, sizes[-1] * self.eta))
+        return sizes
+
+    def run(self, programs: list[Any]) -> HalvingResult:
+        callbacks = dspy.settings.callbacks
+        if self.budget.callback in callbacks:
+            return self._run(programs)
+        with dspy.context(callbacks=[*callbacks, self.budget.callback]):
+            return self._run(programs)
+
+    def _run(self, programs: list[Any]) -> HalvingResult:
+        scores: list[list[float]] = [[] for _ in programs]
+        seen = [0] * len(programs)
+        alive = list(range(len(programs)))
+        schedule = TrialSchedule(
+            candidates=len(programs),
+            valset_size=len(self.examples),
+            baseline_eval_calls=len(programs) * len(self.examples),
+        )
+        for size in self.rung_sizes():
+            for index in alive:
+                batch = self.examples[seen[index]:size]
+                seen[index] = size
+                scores[index].extend(score for score in self._score(programs[index], batch) if score is not None)
+                if self.budget.exhausted:
+                    break
+            schedule.rung_examples.append(size)
+            schedule.rung_candidates.append(len(alive))
+            if self.budget.exhausted:
+                break
+            logger.info("Rung of %d examples: %d candidates scored", size, len(alive))
+            keep = max(1, math.ceil(len(alive) / self.eta))
+            # Stable sort: on ties the earlier candidate (the unmodified program first) survives
+            alive = sorted(alive, key=lambda index: -_mean(scores[index]))[:keep]
+
+        # After an early stop, prefer candidates scored on more examples over lucky small samples
+        best = max(alive, key=lambda index: (len(scores[index]), _mean(scores[index]), -index))
+        schedule.eval_calls = sum(len(row) for row in scores)
+        schedule.lm_calls = self.budget.lm_calls
+        schedule.tokens = self.budget.tokens
+        schedule.budget_exhausted = self.budget.exhausted
+        return HalvingResult(
+            best_index=best,
+            mean_scores=[_mean(row) if row else None for row in scores],
+            evaluated=[len(row) for row in scores],
+            schedule=schedule,
+            programs=programs,
+        )
+
+    def _score(self, program: Any, examples: list[dspy.Example]) -> list[Optional[float]]:
+        if not examples:
+            return []
+
+        def score(example: dspy.Example) -> Optional[float]:
+            if not self.budget.reserve():
+                return None
+            try:
+                return float(self.metric(example, program(**example.inputs())))
+            except BudgetExhausted:
+                # A parse retry or a multi-call program ran into the cap; the example goes unscored
+                return None
+            except Exception as exc:
+                # Same as dspy.Evaluate: a failing example scores zero instead of aborting the search
+                logger.warning("Candidate failed on an example: %s", exc)
+                return 0.0
+            finally:
+                self.budget.release()
+
+        executor = ParallelExecutor(num_threads=self.num_threads, disable_progress_bar=True, max_errors=len(examples))
+        return executor.execute(score, examples)
+
+
+def _mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else float("-inf")
+
+
+class HalvingMIPROv2(WarmStartMIPROv2):
+    """MIPROv2 that proposes demos and instructions as usual, then picks among them with successive halving.
+
+    The Bayesian search over (instruction, demo set) combinations is replaced by sampling ``num_trials`` distinct
+    combinations (plus the unmodified program) and racing them with ``SuccessiveHalving`` under ``budget``.
+    """
+
+    def __init__(self, *args, budget: Optional[TrialBudget] = None, min_examples: int = 8, eta: int = 3, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget or TrialBudget()
+        self.min_examples = min_examples
+        self.eta = eta
+
+    def compile(self, student: Any, **kwargs) -> Any:
+        with dspy.context(callbacks=[*dspy.settings.callbacks, self.budget.callback]):
+            try:
+                return super().compile(student, **kwargs)
+            except BudgetExhausted:
+                # Only bootstrapping and proposals can get here; the halving race catches it per example
+                logger.warning(
+                    "Trial budget spent before any candidate was scored (%d LM calls, %d tokens); returning the "
+                    "unmodified program without scoring it",
+                    self.budget.lm_calls,
+                    self.budget.tokens,
+                )
+                program = student.deepcopy()
+                program.trial_schedule = TrialSchedule(
+                    candidates=0,
+                    valset_size=0,
+                    lm_calls=self.budget.lm_calls,
+                    tokens=self.budget.tokens,
+                    budget_exhausted=True,
+                )
+                return program
+
+    def _optimize_prompt_parameters(
+        self,
+        program: Any,
+        instruction_candidates: dict[int, list[str]],
+        demo_candidates: Optional[list],
+        evaluate: Any,
+        valset: list,
+        num_trials: int,
+        minibatch: bool,
+        minibatch_size: int,
+        minibatch_full_eval_steps: int,
+        seed: int,
+    ) -> Any:
+        predictors = range(len(program.predictors()))
+        choices = [range(len(instruction_candidates[index])) for index in predictors]
+        if demo_candidates:
+            choices += [range(len(demo_candidates[index])) for index in predictors]
+        combinations = list(itertools.product(*choices))[1:]  # all-zero is the unmodified program
+        random.Random(seed).shuffle(combinations)
+
+        programs = [program.deepcopy()]
+        for combination in combinations[:num_trials]:
+            candidate = program.deepcopy()
+            for index, predictor in enumerate(candidate.predictors()):
+                set_signature(predictor, get_signature(predictor).with_instructions(
+                    instruction_candidates[index][combination[index]]
+                ))
+                if demo_candidates:
+                    predictor.demos = demo_candidates[index][combination[len(predictors) + index]]
+            programs.append(candidate)
+
+        result = SuccessiveHalving(
+            self.metric, valset, self.budget, self.min_examples, self.eta, self.num_threads, seed
+        ).run(programs)
+        best = result.best.deepcopy()
+        best.score = result.mean_scores[result.best_index]
+        best.trial_schedule = result.schedule
+        # Same shape as MIPROv2's candidate list; programs that went further in the race come first, then by score
+        ranked = sorted(
+            (index for index, score in enumerate(result.mean_scores) if score is not None),
+            key=lambda index: (-result.evaluated[index], -result.mean_scores[index], index),
+        )
+        best.candidate_programs = [
+            {
+                "score": result.mean_scores[index],
+                "program": programs[index],
+                "full_eval": result.evaluated[index] == len(valset),
+            }
+            for index in ranked
+        ]
+        return best
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
 
 import dspy
 
 from ..config import get_settings
+from ..datasets import Dataset
+from ..evaluate.embeddings import get_embedding_scorer
+from ..lm import get_shared_lm
 from ..models import TrainingExample, PromptCandidate
+from ..profiling import get_profiler
+from ..tracing import get_trace_sampler
+from .halving import HalvingMIPROv2, TrialBudget
+from .warm_start import WarmStartMIPROv2, load_warm_start_module
+from .cost import CostAwareMetric, CostRecorder, candidate_labels, summarize_candidates
 
 
 class TarotReadingSignature(dspy.Signature):
@@ -40,46 +50,88 @@ class TarotReadingModule(dspy.Module):
         prompt = json.dumps(state, indent=2, default=str)
         target_path.write_text(prompt, encoding="utf-8")
 
+    def load_prompt(self, source_path: Path) -> "TarotReadingModule":
+        """Restore generator state written by ``export_prompt``."""
+        import json
+        self.generator.load_state(json.loads(Path(source_path).read_text(encoding="utf-8")))
+        self.prompt_path = Path(source_path)
+        return self
+
+
+def run_mipro(
+    training_examples: Iterable[TrainingExample] | Dataset, output_dir: Path, warm_start: str | None = None
+) -> PromptCandidate:
+    """Run a MIPROv2 optimizer over collected training examples with enhanced MLflow tracking.
 
-def run_mipro(training_examples: Iterable[TrainingExample], output_dir: Path) -> PromptCandidate:
-    """Run a MIPROv2 optimizer over collected training examples with enhanced MLflow tracking."""
+    With ``warm_start`` (a model URI, see ``load_warm_start_module``) the search starts from that module and proposes
+    only ``WARM_START_CANDIDATES`` instructions and demo sets for ``WARM_START_TRIALS`` trials instead of MIPRO's
+    light auto settings.
+    """
 
     import uuid
     from datetime import datetime
     from ..postgres_store import PostgresStore
 
     settings = get_settings()
-    lm = dspy.LM(
-        model=settings.groq_dev_model,
-        api_base=settings.groq_api_base,
-        api_key=settings.groq_api_key,
-        max_tokens=2000,
+    # Measure latency and completion tokens of every reading generated during compile and eval
+    recorder = CostRecorder(module_types=(TarotReadingModule,))
+    dspy.settings.configure(
+        lm=get_shared_lm(),
+        track_usage=True,
+        callbacks=[*(cb for cb in dspy.settings.callbacks if not isinstance(cb, CostRecorder)), recorder],
+    )
+    objective = CostAwareMetric(
+        _metric_fn,
+        recorder,
+        cost_weight=settings.objective_cost_weight,
+        latency_budget_ms=settings.latency_slo_p95_ms,
+        token_budget=settings.completion_token_budget,
     )
-    dspy.settings.configure(lm=lm)
 
-    module = TarotReadingModule()
+    module = load_warm_start_module(warm_start) if warm_start else TarotReadingModule()
     
     # Enhanced optimizer configuration with proper metrics
-    optimizer = dspy.MIPROv2(
-        metric=_metric_fn, 
+    optimizer_kwargs = dict(
+        metric=get_trace_sampler().wrap_metric(get_profiler().wrap("metrics.objective", objective)),
         init_temperature=0.7,
         auto="light"  # Use light mode for faster optimization
     )
+    compile_kwargs = {}
+    if warm_start:
+        # The promoted program is already a strong candidate; a few new proposals around it are enough
+        optimizer_kwargs.update(auto=None, num_candidates=settings.warm_start_candidates)
+        compile_kwargs["num_trials"] = settings.warm_start_trials
+    if settings.trial_scheduler == "halving":
+        optimizer = HalvingMIPROv2(
+            **optimizer_kwargs,
+            budget=TrialBudget(settings.trial_max_lm_calls, settings.trial_max_tokens),
+            min_examples=settings.halving_min_examples,
+            eta=settings.halving_eta,
+        )
+    else:
+        optimizer = WarmStartMIPROv2(**optimizer_kwargs)
 
-    dataset = [
-        dspy.Example(
-            intent=example.intent,
-            spread_type=example.spread_type,
-            cards=[card.model_dump() for card in example.cards],
-            tone=example.tone,
-            overview=example.overview,
-            card_breakdowns=[item.model_dump() for item in example.card_breakdowns],
-            synthesis=example.synthesis,
-            actionable_reflection=example.actionable_reflection,
-            disclaimer="For reflection and entertainment; not medical or financial advice.",
-        ).with_inputs("intent", "spread_type", "cards", "tone")
-        for example in training_examples
-    ]
+    # Split data for training and evaluation (the last 20% is held out)
+    training_examples = Dataset.of(training_examples)
+    train_examples, eval_examples = training_examples.split(val_fraction=0.2)
+    with get_profiler().span("optimize.prepare_examples", rows=len(training_examples)):
+        trainset = train_examples.to_dspy()
+        evalset = eval_examples.to_dspy()
+    dataset = trainset + evalset
+
+    # MIPRO scores the same valset against every candidate; tokenize each gold text once instead of per call
+    get_gold_token_index().index(
+        text for example in dataset for text in (example.overview, example.synthesis, example.actionable_reflection)
+    )
+    if settings.metric_backend == "embedding":
+        # Gold readings are embedded in large batches up front; the metric then only encodes new predictions
+        with get_profiler().span("metrics.embed_gold", rows=len(dataset)):
+            get_embedding_scorer().warm([
+                str(text)
+                for example in dataset
+                for text in (example.overview, example.synthesis, example.actionable_reflection, example.intent)
+                if text
+            ])
 
     # Generate a unique ID for this prompt version
     prompt_version_id = str(uuid.uuid4())
@@ -94,19 +146,23 @@ def run_mipro(training_examples: Iterable[TrainingExample], output_dir: Path) ->
             "init_temperature": 0.7,
             "max_tokens": 2000,
             "model": settings.groq_dev_model,
-            "training_examples_count": len(list(training_examples)),
-            "auto": "light",
-            "num_candidates": 3
+            "training_examples_count": len(training_examples),
+            "auto": optimizer_kwargs["auto"],
+            "num_candidates": optimizer_kwargs.get("num_candidates", 3),
+            "num_trials": compile_kwargs.get("num_trials"),
+            "warm_start": warm_start,
+            "objective_cost_weight": settings.objective_cost_weight,
+            "latency_slo_p95_ms": settings.latency_slo_p95_ms,
+            "completion_token_budget": settings.completion_token_budget,
         }
     )
 
-    # Split data for training and evaluation
-    eval_size = max(1, len(dataset) // 5)  # Use 20% for evaluation
-    trainset = dataset[:-eval_size]
-    evalset = dataset[-eval_size:]
-
     # Compile the module - this will be automatically logged due to MLflow autologging
-    result = optimizer.compile(module, trainset=trainset, valset=evalset)
+    if warm_start:
+        # Without auto settings MIPRO refuses a minibatch (35 by default) larger than the valset
+        compile_kwargs["minibatch"] = len(evalset) > 35
+    with get_profiler().span("optimize.compile", rows=len(trainset)):
+        result = optimizer.compile(module, trainset=trainset, valset=evalset, **compile_kwargs)
 
     output_dir.mkdir(parents=True, exist_ok=True)
     prompt_path = output_dir / "prompt.txt"
@@ -116,8 +172,14 @@ def run_mipro(training_examples: Iterable[TrainingExample], output_dir: Path) ->
     from ..mlflow_tracker import get_mlflow_tracker
     tracker = get_mlflow_tracker("mipro-optimization")
     
-    # Run DSPy evaluation with automatic logging
-    eval_scores = tracker.log_dspy_evaluation(evalset, result, _metric_fn)
+    # Run DSPy evaluation with automatic logging; reported scores stay pure quality
+    eval_scores = tracker.log_dspy_evaluation(evalset, result, objective.quality)
+
+    frontier = summarize_candidates(objective.records, candidate_labels(result), settings.latency_slo_p95_ms)
+    tracker.log_candidate_frontier(frontier)
+    schedule = getattr(result, "trial_schedule", None)
+    if schedule is not None:
+        tracker.log_trial_schedule(schedule)
     
     # Log the compiled module for deployment
     model_info = tracker.log_compiled_module(result, f"tarot_module_{prompt_version_id[:8]}")
@@ -143,7 +205,7 @@ def run_mipro(training_examples: Iterable[TrainingExample], output_dir: Path) ->
     evaluation = EvaluationRun(
         id=evaluation_id,
         prompt_version_id=str(actual_prompt_version_id),
-        dataset=f"training_set_{len(list(training_examples))}",
+        dataset=f"training_set_{len(training_examples)}",
         metrics=metrics,
         guardrail_violations=[],
         created_at=datetime.now()
@@ -154,7 +216,10 @@ def run_mipro(training_examples: Iterable[TrainingExample], output_dir: Path) ->
     return PromptCandidate(
         prompt_path=str(prompt_path), 
         optimizer="MIPROv2", 
-        loss=eval_scores.get("overall", eval_scores.get("dspy_eval_overall", 0.0))
+        loss=eval_scores.get("overall", eval_scores.get("dspy_eval_overall", 0.0)),
+        frontier=frontier,
+        schedule=schedule,
+        warm_start=warm_start,
     )
 
 
@@ -163,6 +228,8 @@ def _metric_fn(example, prediction, trace=None) -> float:
     # Handle case where pred might be None or have missing fields
     if prediction is None:
         return 0.0
+    if get_settings().metric_backend == "embedding":
+        return get_embedding_scorer().score(example, prediction)
     
     # Extract gold values from example
     gold_overview = example.overview
@@ -175,16 +242,17 @@ def _metric_fn(example, prediction, trace=None) -> float:
     pred_actionable = getattr(prediction, "actionable_reflection", None)
     
     # Calculate multiple aspect scores
+    index = get_gold_token_index()
     scores = []
     
     if gold_overview and pred_overview:
-        scores.append(_overlap_score(str(gold_overview), str(pred_overview)))
+        scores.append(index.overlap(str(gold_overview), str(pred_overview)))
     
     if gold_synthesis and pred_synthesis:
-        scores.append(_overlap_score(str(gold_synthesis), str(pred_synthesis)))
+        scores.append(index.overlap(str(gold_synthesis), str(pred_synthesis)))
     
     if gold_actionable and pred_actionable:
-        scores.append(_overlap_score(str(gold_actionable), str(pred_actionable)))
+        scores.append(index.overlap(str(gold_actionable), str(pred_actionable)))
     
     # Return the average of all calculated scores
     return sum(scores) / len(scores) if scores else 0.0
@@ -196,3 +264,45 @@ def _overlap_score(gold: str, pred: str) -> float:
     if not gold_tokens:
         return 0.0
     return len(gold_tokens & pred_tokens) / len(gold_tokens)
+
+
+class GoldTokenIndex:
+    """Gold texts tokenized once into frozen sets of ids from a shared vocabulary.
+
+    ``overlap`` returns exactly what ``_overlap_score`` does, but only the prediction is tokenized per call: its tokens
+    are mapped through the vocabulary (tokens no gold text uses map to ``None`` and can never intersect) and
+    intersected with the cached gold id set.
+    """
+
+    def __init__(self):
+        self.vocabulary: dict[str, int] = {}
+        self._gold: dict[str, frozenset[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._gold)
+
+    def gold_ids(self, text: str) -> frozenset[int]:
+        ids = self._gold.get(text)
+        if ids is None:
+            with self._lock:
+                vocabulary = self.vocabulary
+                ids = frozenset(vocabulary.setdefault(token, len(vocabulary)) for token in text.lower().split())
+                self._gold[text] = ids
+        return ids
+
+    def index(self, texts: Iterable[str | None]) -> None:
+        for text in texts:
+            if text:
+                self.gold_ids(str(text))
+
+    def overlap(self, gold: str, pred: str) -> float:
+        gold_ids = self.gold_ids(gold)
+        if not gold_ids:
+            return 0.0
+        return len(gold_ids.intersection(map(self.vocabulary.get, pred.lower().split()))) / len(gold_ids)
+
+
+@lru_cache()
+def get_gold_token_index() -> GoldTokenIndex:
+    return GoldTokenIndex()
@@ -0,0 +1,92 @@
+"""Warm starts: begin a nightly search from the promoted reading module instead of a blank one.
+
+The promoted module is found through ``WARM_START_MODEL_URI`` (an exported prompt file or an MLflow URI) or, failing
+that, the prompt file ``prompt promote --prompt`` kept for the active prompt version in the prompt workspace. MIPRO already proposes a student's
+own instructions as the first instruction candidate; ``WarmStartMIPROv2`` does the same for its demos, so the
+unmodified promoted program is always in the race and new instructions can be tried with the demos that won before.
+"""
+from __future__ import annotations
+
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+import dspy
+
+from ..config import EnvironmentSettings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def promoted_prompt_path(version: int, settings: Optional[EnvironmentSettings] = None) -> Path:
+    return (settings or get_settings()).prompt_workspace / "promoted" / f"prompt-v{version}.txt"
+
+
+def keep_promoted_prompt(version: int, prompt_path: Optional[Path],
+                         settings: Optional[EnvironmentSettings] = None) -> Optional[Path]:
+    """Keep the exported prompt of newly promoted ``version`` where the next warm start looks for it.
+
+    Prompts kept for earlier versions are removed, also when ``prompt_path`` is ``None``, so a demoted prompt is never
+    warm-started from.
+    """
+    target = promoted_prompt_path(version, settings)
+    for stale in target.parent.glob("prompt-v*.txt"):
+        stale.unlink()
+    if prompt_path is None:
+        return None
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(prompt_path, target)
+    return target
+
+
+def promoted_model_uri(active_version: Optional[int], settings: Optional[EnvironmentSettings] = None) -> Optional[str]:
+    """``WARM_START_MODEL_URI`` if set, else the prompt kept for ``active_version``, else ``None`` (start from
+    scratch)."""
+    settings = settings or get_settings()
+    if settings.warm_start_model_uri:
+        return settings.warm_start_model_uri
+    if active_version is None:
+        return None
+    path = promoted_prompt_path(active_version, settings)
+    return str(path) if path.is_file() else None
+
+
+def load_warm_start_module(model_uri: str) -> Any:
+    """A fresh ``TarotReadingModule`` carrying the instructions and demos of the module at ``model_uri``."""
+    from ..serving import load_reading_module
+    from .mipro import TarotReadingModule
+
+    loaded = load_reading_module(model_uri)
+    module = TarotReadingModule()
+    # Copy state rather than reuse the object: an MLflow model may be a pickled module of an older class version
+    module.load_state(loaded.dump_state())
+    for predictor in module.predictors():
+        # Saved state restores demos as plain dicts; the proposer and bootstrapper expect examples
+        predictor.demos = [dspy.Example(**demo) if isinstance(demo, dict) else demo for demo in predictor.demos]
+    demos = sum(len(predictor.demos) for predictor in module.predictors())
+    logger.info("Warm start from %s with %d demos", model_uri, demos)
+    return module
+
+
+def seed_demo_candidates(program: Any, demo_candidates: Optional[dict[int, list]]) -> Optional[dict[int, list]]:
+    """Put each predictor's current demos first among its demo candidates, if it has any."""
+    predictors = program.predictors()
+    if not demo_candidates or not any(predictor.demos for predictor in predictors):
+        return demo_candidates
+    return {
+        index: [list(predictors[index].demos), *candidates]
+        for index, candidates in demo_candidates.items()
+    }
+
+
+class WarmStartMIPROv2(dspy.MIPROv2):
+    """MIPROv2 whose first demo candidate per predictor is the student's own demos.
+
+    With a blank student this is plain MIPROv2. With a warm-started one, the all-first combination is the promoted
+    program exactly as it was (its instruction is already MIPRO's first instruction candidate).
+    """
+
+    def _bootstrap_fewshot_examples(self, program: Any, trainset: list, seed: int, teacher: Any, **kwargs) -> Optional[dict[int, list]]:
+        demo_candidates = super()._bootstrap_fewshot_examples(program, trainset, seed, teacher, **kwargs)
+        return seed_demo_candidates(program, demo_candidates)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """How a table is range-partitioned by month."""
+
+    table: str
+    column: str
+    # Uniqueness the parent cannot enforce (it would have to include the partition key), kept per partition instead
+    partition_unique: tuple[str, ...] = ()
+    # Indexes created on the parent and cascaded to every partition
+    indexes: tuple[tuple[str, str], ...] = ()
+
+
+# feedback stays a plain table: its (reading_id, user_id) upsert key cannot be a unique index on a partitioned table
+PARTITIONED_TABLES = {
+    "readings": PartitionSpec(
+        table="readings",
+        column="created_at",
+        # hmac is derived from (user, iso_date) and readings are created on that date, so a monthly unique index
+        # still rejects a duplicate daily reading
+        partition_unique=("hmac",),
+        indexes=(
+            ("idx_readings_user_id", "user_id"),
+            ("idx_readings_created_at", "created_at DESC"),
+            ("idx_readings_iso_date", "iso_date"),
+            ("idx_readings_user_iso_date", "user_id, iso_date"),
+        ),
+    ),
+    "telemetry_events": PartitionSpec(
+        table="telemetry_events",
+        column="timestamp",
+        indexes=(
+            ("idx_telemetry_events_timestamp", "timestamp"),
+            ("idx_telemetry_events_type_timestamp", "type, timestamp"),
+            ("idx_telemetry_events_user_id", "user_id"),
+            ("idx_telemetry_events_session_id", "session_id"),
+        ),
+    ),
+}
+
+
+def month_floor(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def iter_months(start: datetime, end: datetime) -> Iterator[datetime]:
+    """Month starts from the month of ``start`` through the month of ``end``, inclusive."""
+    month, last = month_floor(start), month_floor(end)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(table: str, name: str) -> Optional[datetime]:
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})", name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def partition_bounds(month: datetime) -> str:
+    return f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def partition_ddl(spec: PartitionSpec, month: datetime) -> list[str]:
+    """Idempotent statements creating one monthly partition and its per-partition unique indexes."""
+    name = partition_name(spec.table, month)
+    statements = [f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {spec.table} {partition_bounds(month)}"]
+    return statements + _unique_index_ddl(spec, name)
+
+
+def default_partition_ddl(spec: PartitionSpec) -> list[str]:
+    """Idempotent statements creating the DEFAULT partition, which takes rows no monthly partition covers yet
+    instead of failing the insert; ``ensure-partitions`` moves them out once their month's partition exists."""
+    name = default_partition_name(spec.table)
+    statements = [f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {spec.table} DEFAULT"]
+    return statements + _unique_index_ddl(spec, name)
+
+
+def _unique_index_ddl(spec: PartitionSpec, name: str) -> list[str]:
+    return [
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_{column}_key ON {name} ({column})" for column in spec.partition_unique
+    ]
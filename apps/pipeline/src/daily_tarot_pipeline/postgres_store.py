@@ -1,6 +1,6 @@
 import os
 from contextlib import contextmanager
-from typing import Generator, Optional, Any
+from typing import Any, Generator, Iterable, Iterator, Optional
 import uuid
 from datetime import datetime, timezone
 import json
@@ -9,8 +9,30 @@ from psycopg import Connection
 from psycopg.rows import dict_row
 from pydantic import BaseModel, Field
 
-from .models import ReadingRecord, EvaluationRun, PromptVersion, FeedbackRecord, TrainingExample
+from .models import CachedReading, UsageAggregate, ReadingRecord, EvaluationRun, PromptVersion, FeedbackRecord, TrainingExample
 from .config import EnvironmentSettings
+from .profiling import get_profiler
+from .partitioning import (
+    PARTITIONED_TABLES,
+    PartitionSpec,
+    add_months,
+    default_partition_ddl,
+    default_partition_name,
+    iter_months,
+    month_floor,
+    partition_bounds,
+    partition_ddl,
+    partition_month,
+    partition_name,
+)
+
+QUALITY_WATCH_CHANNEL = "tarot_quality"
+# Advisory lock serializing manifest saves with deletion of unreferenced training_examples
+TRAINING_EXAMPLES_LOCK = 72_617_001
+# Watermark of raw telemetry deletion; events before it only survive in the rollup tables
+TELEMETRY_COMPACTION_JOB = "telemetry_compaction"
+# Tables whose inserts notify the watch worker, with the column holding the reading id
+QUALITY_WATCH_TABLES = {"readings": "id", "feedback": "reading_id"}
 
 
 class PostgresStore:
@@ -34,11 +56,13 @@ class PostgresStore:
         finally:
             conn.close()
 
-    def fetch_readings(self, limit: int = 1000) -> list[ReadingRecord]:
-        """Fetch recent readings for dataset creation"""
+    def fetch_readings(self, limit: int = 1000, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> list[ReadingRecord]:
+        """Fetch recent readings for dataset creation; a window lets Postgres prune monthly partitions"""
+        where, params = _time_window("created_at", since, until)
         with self.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
+                cur.execute(f"""
                     SELECT id::text, user_id::text, iso_date, spread_type, hmac, intent, cards, 
                            prompt_version, overview, card_breakdowns, synthesis, 
                            actionable_reflection, tone, 
@@ -49,11 +73,40 @@ class PostgresStore:
                            END as model,
                            created_at
                     FROM readings
+                    WHERE {where}
                     ORDER BY created_at DESC
                     LIMIT %s
-                """, [limit])
-                rows = cur.fetchall()
-                return [ReadingRecord(**row) for row in rows]
+                """, [*params, limit])
+                with get_profiler().span("db.fetch_readings") as span:
+                    rows = cur.fetchall()
+                    span.rows = len(rows)
+        with get_profiler().span("validate.readings", rows=len(rows)):
+            return [ReadingRecord(**row) for row in rows]
+
+    def iter_readings(self, limit: Optional[int] = None, batch_size: int = 1000,
+                      since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[ReadingRecord]:
+        """Stream readings newest-first through a server-side cursor"""
+        where, params = _time_window("created_at", since, until)
+        with self.connection() as conn:
+            with conn.cursor(name="iter_readings") as cur:
+                cur.itersize = batch_size
+                cur.execute(f"""
+                    SELECT id::text, user_id::text, iso_date, spread_type, hmac, intent, cards,
+                           prompt_version, overview, card_breakdowns, synthesis,
+                           actionable_reflection, tone,
+                           CASE
+                               WHEN model = 'openai/gpt-oss-20b' THEN 'groq/openai/gpt-oss-20b'
+                               WHEN model = 'openai/gpt-oss-120b' THEN 'groq/openai/gpt-oss-120b'
+                               ELSE model
+                           END as model,
+                           created_at
+                    FROM readings
+                    WHERE {where}
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                """, [*params, limit])
+                for row in cur:
+                    yield ReadingRecord(**row)
 
     def save_evaluation_run(self, run_data: dict[str, Any]) -> None:
         """Save evaluation run results"""
@@ -83,6 +136,20 @@ class PostgresStore:
                 rows = cur.fetchall()
                 return [PromptVersion(**row) for row in rows]
 
+    def fetch_active_prompt_version(self) -> Optional[PromptVersion]:
+        """The prompt version currently activated by ``prompt promote``, if any"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, prompt, active, created_at
+                    FROM prompt_versions
+                    WHERE active
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                """)
+                row = cur.fetchone()
+                return PromptVersion(**row) if row else None
+
     def save_prompt_version(self, version: int, prompt: str, active: bool = False) -> None:
         """Save a new prompt version"""
         with self.connection() as conn:
@@ -116,29 +183,37 @@ class PostgresStore:
 
     def save_training_dataset(self, name: str, data: list[dict]) -> None:
         """Save training dataset"""
-        with self.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO training_datasets (name, data, created_at)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (name) DO UPDATE SET
-                        data = EXCLUDED.data,
-                        created_at = EXCLUDED.created_at
-                """, [name, json.dumps(data), datetime.now(timezone.utc)])
-                conn.commit()
+        with get_profiler().span("serialize.dataset_json", rows=len(data)):
+            payload = json.dumps(data)
+        with get_profiler().span("db.save_dataset", rows=len(data)):
+            with self.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT INTO training_datasets (name, data, created_at)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (name) DO UPDATE SET
+                            data = EXCLUDED.data,
+                            created_at = EXCLUDED.created_at
+                    """, [name, payload, datetime.now(timezone.utc)])
+                    conn.commit()
 
-    def fetch_feedback(self, limit: int = 1000) -> list[FeedbackRecord]:
+    def fetch_feedback(self, limit: int = 1000, since: Optional[datetime] = None) -> list[FeedbackRecord]:
         """Fetch recent feedback for dataset creation"""
+        where, params = _time_window("created_at", since, None)
         with self.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
+                cur.execute(f"""
                     SELECT reading_id::text, user_id::text, thumb, rationale, created_at
                     FROM feedback
+                    WHERE {where}
                     ORDER BY created_at DESC
                     LIMIT %s
-                """, [limit])
-                rows = cur.fetchall()
-                return [FeedbackRecord(**row) for row in rows]
+                """, [*params, limit])
+                with get_profiler().span("db.fetch_feedback") as span:
+                    rows = cur.fetchall()
+                    span.rows = len(rows)
+        with get_profiler().span("validate.feedback", rows=len(rows)):
+            return [FeedbackRecord(**row) for row in rows]
 
     def insert_prompt_version(self, prompt_id: str, optimizer: str, status: str = "candidate", metadata: dict = None) -> int:
         """Insert a new prompt version (converted from old system) and return the integer ID"""
@@ -186,19 +261,157 @@ class PostgresStore:
                 conn.commit()
 
     def get_training_dataset(self, name: str) -> Optional[list[dict]]:
-        """Get training dataset by name"""
+        """Get training dataset by name; manifest datasets are expanded from training_examples in manifest order"""
         with self.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                    SELECT data FROM training_datasets WHERE name = %s
+                    SELECT data, example_hashes FROM training_datasets WHERE name = %s
                 """, [name])
                 row = cur.fetchone()
-                return json.loads(row['data']) if row else None
+                if row is None:
+                    return None
+                if row['example_hashes'] is None:
+                    return json.loads(row['data']) if isinstance(row['data'], str) else row['data']
+                found = self._fetch_training_examples(cur, list(dict.fromkeys(row['example_hashes'])))
+                return [found[example_hash] for example_hash in row['example_hashes']]
 
-    def append_training_examples(self, dataset_name: str, examples: list['TrainingExample']) -> None:
-        """Save training dataset (method name compatibility)"""
-        data = [example.model_dump() for example in examples]
-        self.save_training_dataset(dataset_name, data)
+    def get_dataset_manifest(self, name: str) -> Optional[list[str]]:
+        """Example hashes of a dataset, or None if it does not exist or still stores its examples inline"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT example_hashes FROM training_datasets WHERE name = %s", [name])
+                row = cur.fetchone()
+                return row['example_hashes'] if row else None
+
+    def fetch_training_examples(self, hashes: list[str]) -> dict[str, dict]:
+        """Stored examples by content hash; each hash is fetched once however often it is requested"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                return self._fetch_training_examples(cur, list(dict.fromkeys(hashes)))
+
+    def _fetch_training_examples(self, cur, hashes: list[str]) -> dict[str, dict]:
+        with get_profiler().span("db.fetch_training_examples") as span:
+            cur.execute("SELECT hash, data FROM training_examples WHERE hash = ANY(%s)", [hashes])
+            found = {row['hash']: row['data'] for row in cur.fetchall()}
+            span.rows = len(found)
+        missing = len(hashes) - len(found)
+        if missing:
+            raise LookupError(f"{missing} dataset examples are missing from training_examples")
+        return found
+
+    def save_dataset_manifest(self, name: str, hashes: list[str], examples: dict[str, str]) -> int:
+        """Store a dataset as a manifest of example hashes; ``examples`` maps hash to example JSON.
+
+        Only examples not stored by an earlier dataset are sent. Returns how many were new.
+        """
+        with get_profiler().span("db.save_dataset", rows=len(hashes)):
+            with self.connection() as conn:
+                with conn.cursor() as cur:
+                    # `gc` deletes unreferenced examples under the same lock, so none vanishes before the manifest lands
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", [TRAINING_EXAMPLES_LOCK])
+                    cur.execute("SELECT hash FROM training_examples WHERE hash = ANY(%s)", [list(examples)])
+                    stored = {row['hash'] for row in cur.fetchall()}
+                    new = [example_hash for example_hash in examples if example_hash not in stored]
+                    cur.execute("""
+                        INSERT INTO training_examples (hash, data)
+                        SELECT hash, data::jsonb FROM unnest(%s::text[], %s::text[]) AS new(hash, data)
+                        ON CONFLICT (hash) DO NOTHING
+                    """, [new, [examples[example_hash] for example_hash in new]])
+                    cur.execute("""
+                        INSERT INTO training_datasets (name, data, example_hashes, created_at)
+                        VALUES (%s, NULL, %s, %s)
+                        ON CONFLICT (name) DO UPDATE SET
+                            data = NULL,
+                            example_hashes = EXCLUDED.example_hashes,
+                            created_at = EXCLUDED.created_at
+                    """, [name, hashes, datetime.now(timezone.utc)])
+                    conn.commit()
+                    return len(new)
+
+    def list_training_datasets(self, prefix: str = "") -> list[dict[str, Any]]:
+        """Datasets newest first with their size and whether they are stored as a manifest"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT name, created_at, example_hashes IS NOT NULL AS manifest,
+                           COALESCE(cardinality(example_hashes), jsonb_array_length(data)) AS examples
+                    FROM training_datasets
+                    WHERE name LIKE %s
+                    ORDER BY created_at DESC
+                """, [prefix.replace("%", r"\%").replace("_", r"\_") + "%"])
+                return cur.fetchall()
+
+    def fetch_promoted_datasets(self) -> set[str]:
+        """Datasets the active prompt version was evaluated on"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT DISTINCT e.dataset_name
+                    FROM evaluation_runs e JOIN prompt_versions p ON p.id = e.prompt_version
+                    WHERE p.active
+                """)
+                return {row['dataset_name'] for row in cur.fetchall()}
+
+    def training_storage_report(self, names: list[str]) -> dict[str, int]:
+        """What deleting the datasets ``names`` would free: their rows, evaluation runs and examples no other
+        dataset references"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT COUNT(*) AS datasets, COALESCE(SUM(pg_column_size(t.*)), 0) AS dataset_bytes
+                    FROM training_datasets t WHERE name = ANY(%s)
+                """, [names])
+                report = dict(cur.fetchone())
+                cur.execute("SELECT COUNT(*) AS evaluation_runs FROM evaluation_runs WHERE dataset_name = ANY(%s)", [names])
+                report.update(cur.fetchone())
+                cur.execute("""
+                    WITH kept AS (
+                        SELECT DISTINCT unnest(example_hashes) AS hash FROM training_datasets WHERE NOT name = ANY(%s)
+                    )
+                    SELECT COUNT(*) AS examples, COALESCE(SUM(pg_column_size(e.data)), 0) AS example_bytes
+                    FROM training_examples e LEFT JOIN kept USING (hash)
+                    WHERE kept.hash IS NULL
+                """, [names])
+                report.update(cur.fetchone())
+                return report
+
+    def delete_training_datasets(self, names: list[str], batch_size: int = 100) -> dict[str, int]:
+        """Delete datasets and their evaluation runs, ``batch_size`` datasets per short transaction"""
+        deleted = {"datasets": 0, "evaluation_runs": 0}
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                for start in range(0, len(names), batch_size):
+                    batch = names[start:start + batch_size]
+                    cur.execute("SET LOCAL lock_timeout = '5s'")
+                    cur.execute("DELETE FROM evaluation_runs WHERE dataset_name = ANY(%s)", [batch])
+                    deleted["evaluation_runs"] += cur.rowcount
+                    cur.execute("DELETE FROM training_datasets WHERE name = ANY(%s)", [batch])
+                    deleted["datasets"] += cur.rowcount
+                    conn.commit()
+        return deleted
+
+    def delete_orphan_training_examples(self, batch_size: int = 1000) -> int:
+        """Delete examples no dataset manifest references, in batches that skip rows other sessions hold"""
+        deleted = 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                while True:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", [TRAINING_EXAMPLES_LOCK])
+                    cur.execute("""
+                        WITH kept AS (SELECT DISTINCT unnest(example_hashes) AS hash FROM training_datasets)
+                        DELETE FROM training_examples WHERE hash IN (
+                            SELECT e.hash FROM training_examples e LEFT JOIN kept USING (hash)
+                            WHERE kept.hash IS NULL
+                            LIMIT %s
+                            FOR UPDATE OF e SKIP LOCKED
+                        )
+                    """, [batch_size])
+                    conn.commit()
+                    deleted += cur.rowcount
+                    if cur.rowcount < batch_size:
+                        break
+        self.set_watermark(TELEMETRY_COMPACTION_JOB, cutoff)
+        return deleted
 
     def get_evaluation_runs(self, prompt_version: Optional[int] = None) -> list[EvaluationRun]:
         """Get evaluation runs, optionally filtered by prompt version"""
@@ -220,6 +433,412 @@ class PostgresStore:
                 rows = cur.fetchall()
                 return [EvaluationRun(**row) for row in rows]
 
+    def fetch_latest_prompt_version(self) -> Optional[str]:
+        """Prompt version of the most recently served reading"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT prompt_version::text AS prompt_version
+                    FROM readings
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                """)
+                row = cur.fetchone()
+                return row['prompt_version'] if row else None
+
+    def fetch_reading_key_frequencies(self, prompt_version: str, since: datetime, limit: int) -> list[dict[str, Any]]:
+        """Most frequent (spread, tone, cards) combinations served under a prompt version"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                # JSONB equality is order-normalized, so identical draws group together
+                cur.execute("""
+                    SELECT spread_type::text AS spread_type, tone::text AS tone, cards, COUNT(*) AS frequency
+                    FROM readings
+                    WHERE prompt_version::text = %s AND created_at >= %s
+                    GROUP BY spread_type, tone, cards
+                    ORDER BY frequency DESC
+                    LIMIT %s
+                """, [prompt_version, since, limit])
+                return cur.fetchall()
+
+    def fetch_fresh_cache_keys(self, prompt_version: str) -> set[str]:
+        """Cache keys that are still valid for a prompt version"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT cache_key FROM reading_cache
+                    WHERE prompt_version = %s AND expires_at > NOW()
+                """, [prompt_version])
+                return {row['cache_key'] for row in cur.fetchall()}
+
+    def upsert_cached_readings(self, entries: list[CachedReading]) -> None:
+        """Insert or replace precomputed readings"""
+        if not entries:
+            return
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany("""
+                    INSERT INTO reading_cache
+                    (cache_key, prompt_version, spread_type, tone, cards, overview, card_breakdowns,
+                     synthesis, actionable_reflection, model, frequency, created_at, expires_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), %s)
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        overview = EXCLUDED.overview,
+                        card_breakdowns = EXCLUDED.card_breakdowns,
+                        synthesis = EXCLUDED.synthesis,
+                        actionable_reflection = EXCLUDED.actionable_reflection,
+                        model = EXCLUDED.model,
+                        frequency = EXCLUDED.frequency,
+                        created_at = EXCLUDED.created_at,
+                        expires_at = EXCLUDED.expires_at
+                """, [
+                    [
+                        entry.cache_key, entry.prompt_version, entry.spread_type, entry.tone,
+                        json.dumps(entry.cards), entry.overview, json.dumps(entry.card_breakdowns),
+                        entry.synthesis, entry.actionable_reflection, entry.model, entry.frequency,
+                        entry.expires_at,
+                    ]
+                    for entry in entries
+                ])
+                conn.commit()
+
+    def invalidate_reading_cache(self, keep_prompt_version: Optional[str] = None) -> int:
+        """Drop expired entries and entries generated under any other prompt version"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                if keep_prompt_version is None:
+                    cur.execute("DELETE FROM reading_cache WHERE expires_at <= NOW()")
+                else:
+                    cur.execute("""
+                        DELETE FROM reading_cache
+                        WHERE expires_at <= NOW() OR prompt_version <> %s
+                    """, [keep_prompt_version])
+                deleted = cur.rowcount
+                conn.commit()
+                return deleted
+
+    def reading_cache_hit_stats(self, prompt_version: str, since: datetime) -> dict[str, Any]:
+        """Share of served readings that a fresh cache entry would have answered"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT
+                        COUNT(*) AS readings,
+                        COUNT(*) FILTER (WHERE coalesce(r.intent, '') = '') AS intentless_readings,
+                        COUNT(c.cache_key) AS cache_hits,
+                        COUNT(c.cache_key) FILTER (WHERE coalesce(r.intent, '') = '') AS intentless_cache_hits,
+                        COUNT(DISTINCT (r.spread_type::text, r.tone::text, r.cards::text)) AS distinct_keys
+                    FROM readings r
+                    LEFT JOIN reading_cache c
+                      ON c.prompt_version = r.prompt_version::text
+                     AND c.spread_type = r.spread_type::text
+                     AND c.tone = r.tone::text
+                     AND c.cards = r.cards
+                     AND c.expires_at > NOW()
+                    WHERE r.prompt_version::text = %s AND r.created_at >= %s
+                """, [prompt_version, since])
+                return cur.fetchone()
+
+    def aggregate_groq_usage(self, since: datetime, until: Optional[datetime] = None) -> list[UsageAggregate]:
+        """Latency percentiles, throughput and cost per model and prompt version, aggregated in Postgres"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT
+                        g.model,
+                        r.prompt_version::text AS prompt_version,
+                        COUNT(*) AS calls,
+                        percentile_cont(0.50) WITHIN GROUP (ORDER BY g.latency_ms) AS p50_latency_ms,
+                        percentile_cont(0.95) WITHIN GROUP (ORDER BY g.latency_ms) AS p95_latency_ms,
+                        percentile_cont(0.99) WITHIN GROUP (ORDER BY g.latency_ms) AS p99_latency_ms,
+                        AVG(g.prompt_tokens)::float AS avg_prompt_tokens,
+                        AVG(g.completion_tokens)::float AS avg_completion_tokens,
+                        COALESCE(SUM(g.completion_tokens)::float / NULLIF(SUM(g.latency_ms), 0) * 1000, 0) AS tokens_per_second,
+                        COALESCE(AVG(g.cost_cents), 0)::float AS avg_cost_cents,
+                        COALESCE(SUM(g.cost_cents), 0)::float AS total_cost_cents
+                    FROM groq_usage g
+                    LEFT JOIN readings r ON r.id = g.reading_id
+                    WHERE g.request_timestamp >= %s
+                      AND (%s::timestamptz IS NULL OR g.request_timestamp < %s::timestamptz)
+                    GROUP BY g.model, r.prompt_version
+                    ORDER BY g.model, r.prompt_version
+                """, [since, until, until])
+                return [UsageAggregate(**row) for row in cur.fetchall()]
+
+    def copy_users(self, user_ids: Iterable[str]) -> int:
+        """Bulk-load placeholder users for synthetic readings; existing ids are skipped"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                # init.sql names the column hashed_password, the pipeline schema password_hash
+                cur.execute("""
+                    SELECT column_name FROM information_schema.columns
+                    WHERE table_name = 'users' AND column_name IN ('hashed_password', 'password_hash')
+                """)
+                password_column = cur.fetchone()['column_name']
+                cur.execute("CREATE TEMP TABLE synthetic_users (id UUID, email TEXT) ON COMMIT DROP")
+                with cur.copy("COPY synthetic_users (id, email) FROM STDIN") as copy:
+                    for user_id in user_ids:
+                        copy.write_row((user_id, f"synthetic+{user_id}@example.invalid"))
+                cur.execute(f"""
+                    INSERT INTO users (id, email, {password_column})
+                    SELECT id, email, 'synthetic' FROM synthetic_users
+                    ON CONFLICT DO NOTHING
+                """)
+                inserted = cur.rowcount
+                conn.commit()
+                return inserted
+
+    def synthetic_schema_problems(self, spread_types: Iterable[str], tones: Iterable[str]) -> list[str]:
+        """Why the COPY loaders would reject synthetic rows here; empty when the database has the init.sql schema"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT table_name, column_name, data_type, is_nullable FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name IN ('readings', 'feedback')
+                """)
+                columns = {(row['table_name'], row['column_name']): row for row in cur.fetchall()}
+                cur.execute("""
+                    SELECT t.typname, e.enumlabel FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid
+                    WHERE t.typname IN ('spread_type_enum', 'tone_enum')
+                """)
+                labels: dict[str, set[str]] = {}
+                for row in cur.fetchall():
+                    labels.setdefault(row['typname'], set()).add(row['enumlabel'])
+
+        problems = []
+        for column in ('thumb', 'rationale'):
+            if ('feedback', column) not in columns:
+                problems.append(f"feedback has no {column} column")
+        prompt_version = columns.get(('readings', 'prompt_version'))
+        if prompt_version is not None and prompt_version['data_type'] != 'text':
+            problems.append(f"readings.prompt_version is {prompt_version['data_type']}, not text")
+        intent = columns.get(('readings', 'intent'))
+        if intent is not None and intent['is_nullable'] != 'YES':
+            problems.append("readings.intent is NOT NULL")
+        for enum, values in (('spread_type_enum', spread_types), ('tone_enum', tones)):
+            missing = sorted(set(values) - labels.get(enum, set()))
+            if missing:
+                problems.append(f"{enum} lacks {', '.join(missing)}")
+        return problems
+
+    def copy_readings(self, readings: Iterable[ReadingRecord]) -> int:
+        """Stream readings into the readings table with COPY"""
+        count = 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy("""
+                    COPY readings (id, user_id, iso_date, spread_type, hmac, intent, cards, prompt_version, overview,
+                                   card_breakdowns, synthesis, actionable_reflection, tone, model, created_at)
+                    FROM STDIN
+                """) as copy:
+                    for reading in readings:
+                        copy.write_row((
+                            reading.id, reading.user_id, reading.iso_date, reading.spread_type, reading.hmac,
+                            reading.intent,
+                            json.dumps([card.model_dump(by_alias=True) for card in reading.cards]),
+                            reading.prompt_version, reading.overview,
+                            json.dumps([item.model_dump(by_alias=True) for item in reading.card_breakdowns]),
+                            reading.synthesis, reading.actionable_reflection, reading.tone,
+                            reading.model.removeprefix("groq/"), reading.created_at,
+                        ))
+                        count += 1
+                conn.commit()
+                return count
+
+    def copy_feedback(self, feedback: Iterable[FeedbackRecord]) -> int:
+        """Stream feedback rows into the feedback table with COPY"""
+        count = 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy("COPY feedback (reading_id, user_id, thumb, rationale, created_at) FROM STDIN") as copy:
+                    for item in feedback:
+                        copy.write_row((item.reading_id, item.user_id, item.thumb, item.rationale, item.created_at))
+                        count += 1
+                conn.commit()
+                return count
+
+    def get_watermark(self, job: str) -> Optional[datetime]:
+        """Last committed watermark of an incremental job"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT watermark FROM pipeline_watermarks WHERE job = %s", [job])
+                row = cur.fetchone()
+                return row['watermark'] if row else None
+
+    def set_watermark(self, job: str, watermark: datetime) -> None:
+        """Advance the watermark of an incremental job; it never moves backwards"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO pipeline_watermarks (job, watermark, updated_at) VALUES (%s, %s, NOW())
+                    ON CONFLICT (job) DO UPDATE SET
+                        watermark = GREATEST(pipeline_watermarks.watermark, EXCLUDED.watermark),
+                        updated_at = EXCLUDED.updated_at
+                """, [job, watermark])
+                conn.commit()
+
+    @contextmanager
+    def listen(self, channel: str) -> Generator[Connection, None, None]:
+        """Autocommit connection subscribed to ``channel``; read notifications with ``conn.notifies()``"""
+        conn = psycopg.connect(**self.connection_params, autocommit=True)
+        try:
+            conn.execute(f"LISTEN {channel}")
+            yield conn
+        finally:
+            conn.close()
+
+    def fetch_reading_ids_since(self, since: datetime, limit: int = 10000) -> list[str]:
+        """Ids of readings created after ``since``, oldest first, for catching up on missed notifications"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id::text FROM readings WHERE created_at > %s ORDER BY created_at LIMIT %s
+                """, [since, limit])
+                return [row['id'] for row in cur.fetchall()]
+
+    def fetch_readings_by_ids(self, ids: list[str]) -> list[ReadingRecord]:
+        """Readings with the given ids, oldest first"""
+        if not ids:
+            return []
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id::text, user_id::text, iso_date, spread_type, hmac, intent, cards,
+                           prompt_version::text, overview, card_breakdowns, synthesis,
+                           actionable_reflection, tone,
+                           CASE
+                               WHEN model = 'openai/gpt-oss-20b' THEN 'groq/openai/gpt-oss-20b'
+                               WHEN model = 'openai/gpt-oss-120b' THEN 'groq/openai/gpt-oss-120b'
+                               ELSE model
+                           END as model,
+                           created_at
+                    FROM readings
+                    WHERE id = ANY(%s::uuid[])
+                    ORDER BY created_at
+                """, [ids])
+                with get_profiler().span("db.fetch_readings_by_ids") as span:
+                    rows = cur.fetchall()
+                    span.rows = len(rows)
+        return [ReadingRecord(**row) for row in rows]
+
+    def fetch_feedback_thumbs(self, reading_ids: list[str]) -> list[dict[str, Any]]:
+        """Latest thumb of each given reading with the reading's prompt version"""
+        if not reading_ids:
+            return []
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT DISTINCT ON (f.reading_id) f.reading_id::text, r.prompt_version::text, f.thumb
+                    FROM feedback f
+                    JOIN readings r ON r.id = f.reading_id
+                    WHERE f.reading_id = ANY(%s::uuid[]) AND f.thumb IS NOT NULL
+                    ORDER BY f.reading_id, f.created_at DESC
+                """, [reading_ids])
+                return cur.fetchall()
+
+    def insert_alert(self, type: str, message: str, metadata: Optional[dict[str, Any]] = None) -> None:
+        """Raise an alert for the web app's admin view"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO alerts (type, message, metadata) VALUES (%s, %s, %s)
+                """, [type, message, json.dumps(metadata) if metadata is not None else None])
+                conn.commit()
+
+    def earliest_telemetry_timestamp(self) -> Optional[datetime]:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MIN(timestamp) AS earliest FROM telemetry_events")
+                return cur.fetchone()['earliest']
+
+    def rollup_telemetry(self, job: str, start: datetime, end: datetime) -> dict[str, int]:
+        """Recompute hourly rollups for [start, end), the daily rollups of the days it touches, and advance the watermark.
+
+        Everything commits in one transaction, so a failed run leaves the previous watermark and rollups intact and
+        a rerun recomputes the same window.
+        """
+        ttft = """
+            CASE WHEN type = 'reading_time_to_first_token' AND jsonb_typeof(data->'timeToFirstToken') = 'number'
+                      AND (data->>'timeToFirstToken')::float > 0
+                 THEN (data->>'timeToFirstToken')::float END
+        """
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    INSERT INTO telemetry_rollup_hourly
+                        (bucket, type, events, sessions, users, ttft_sum_ms, ttft_count, updated_at)
+                    SELECT date_trunc('hour', timestamp) AS bucket, COALESCE(type, '*'),
+                           COUNT(*), COUNT(DISTINCT session_id), COUNT(DISTINCT user_id),
+                           COALESCE(SUM({ttft}), 0), COUNT({ttft}), NOW()
+                    FROM telemetry_events
+                    WHERE timestamp >= %s AND timestamp < %s
+                    GROUP BY GROUPING SETS ((date_trunc('hour', timestamp), type), (date_trunc('hour', timestamp)))
+                    ON CONFLICT (bucket, type) DO UPDATE SET
+                        events = EXCLUDED.events,
+                        sessions = EXCLUDED.sessions,
+                        users = EXCLUDED.users,
+                        ttft_sum_ms = EXCLUDED.ttft_sum_ms,
+                        ttft_count = EXCLUDED.ttft_count,
+                        updated_at = EXCLUDED.updated_at
+                """, [start, end])
+                hours = cur.rowcount
+                # Distinct sessions and users are not additive across hours, so days are recounted from raw events
+                cur.execute(f"""
+                    INSERT INTO telemetry_rollup_daily
+                        (day, type, events, sessions, users, ttft_sum_ms, ttft_count, updated_at)
+                    SELECT (timestamp AT TIME ZONE 'UTC')::date AS day, COALESCE(type, '*'),
+                           COUNT(*), COUNT(DISTINCT session_id), COUNT(DISTINCT user_id),
+                           COALESCE(SUM({ttft}), 0), COUNT({ttft}), NOW()
+                    FROM telemetry_events
+                    WHERE timestamp >= date_trunc('day', %s::timestamptz AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                      AND timestamp < %s
+                    GROUP BY GROUPING SETS (((timestamp AT TIME ZONE 'UTC')::date, type), ((timestamp AT TIME ZONE 'UTC')::date))
+                    ON CONFLICT (day, type) DO UPDATE SET
+                        events = EXCLUDED.events,
+                        sessions = EXCLUDED.sessions,
+                        users = EXCLUDED.users,
+                        ttft_sum_ms = EXCLUDED.ttft_sum_ms,
+                        ttft_count = EXCLUDED.ttft_count,
+                        updated_at = EXCLUDED.updated_at
+                """, [start, end])
+                days = cur.rowcount
+                # Who did what per hour, so distinct sessions, returning users and completion rates survive compaction
+                cur.execute("DELETE FROM telemetry_rollup_members WHERE bucket >= %s AND bucket < %s", [start, end])
+                cur.execute("""
+                    INSERT INTO telemetry_rollup_members (bucket, type, session_id, user_id)
+                    SELECT DISTINCT date_trunc('hour', timestamp), type, session_id, user_id
+                    FROM telemetry_events
+                    WHERE timestamp >= %s AND timestamp < %s
+                """, [start, end])
+                cur.execute("""
+                    INSERT INTO pipeline_watermarks (job, watermark, updated_at) VALUES (%s, %s, NOW())
+                    ON CONFLICT (job) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = EXCLUDED.updated_at
+                """, [job, end])
+                conn.commit()
+                return {"hourly_rows": hours, "daily_rows": days}
+
+    def delete_telemetry_before(self, cutoff: datetime, batch_size: int = 10000) -> int:
+        """Delete raw telemetry events older than ``cutoff`` in short batches so no long lock is held.
+
+        On a partitioned table, months entirely before the cutoff are dropped first and only the boundary month is
+        deleted row by row. The cutoff is recorded as the compaction watermark, before which readers use the rollups.
+        """
+        self.drop_partitions_before("telemetry_events", cutoff)
+        deleted = 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                while True:
+                    cur.execute("""
+                        DELETE FROM telemetry_events
+                        WHERE id IN (SELECT id FROM telemetry_events WHERE timestamp < %s LIMIT %s)
+                    """, [cutoff, batch_size])
+                    conn.commit()
+                    deleted += cur.rowcount
+                    if cur.rowcount < batch_size:
+                        break
+        self.set_watermark(TELEMETRY_COMPACTION_JOB, cutoff)
+        return deleted
+
     def initialize_schema(self) -> None:
         """Initialize database schema if it doesn't exist"""
         with self.connection() as conn:
@@ -281,14 +900,28 @@ class PostgresStore:
             )
         """)
 
+        # Monthly range partitions need the partition key in every unique constraint, and nothing can
+        # reference readings(id) alone
+        partitioned = self.settings.postgres_partitioning
+        reading_fk = "" if partitioned else "REFERENCES readings(id)"
+        id_column = "id UUID NOT NULL" if partitioned else "id UUID PRIMARY KEY"
+
+        def partitioned_by(column: str) -> tuple[str, str]:
+            if not partitioned:
+                return "", ""
+            return f", PRIMARY KEY (id, {column})", f" PARTITION BY RANGE ({column})"
+
+        readings_key, readings_partitioning = partitioned_by("created_at")
+        telemetry_key, telemetry_partitioning = partitioned_by("timestamp")
+
         # Readings table
-        cur.execute("""
+        cur.execute(f"""
             CREATE TABLE IF NOT EXISTS readings (
-                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                {id_column} DEFAULT gen_random_uuid(),
                 user_id UUID REFERENCES users(id) ON DELETE SET NULL,
                 iso_date TEXT NOT NULL,
                 spread_type spread_type_enum NOT NULL,
-                hmac TEXT NOT NULL UNIQUE,
+                hmac TEXT NOT NULL{"" if partitioned else " UNIQUE"},
                 intent TEXT NOT NULL,
                 cards JSONB NOT NULL,
                 prompt_version INTEGER,
@@ -298,15 +931,15 @@ class PostgresStore:
                 actionable_reflection TEXT NOT NULL,
                 tone tone_enum,
                 model TEXT NOT NULL,
-                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            )
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(){readings_key}
+            ){readings_partitioning}
         """)
 
         # Feedback table
-        cur.execute("""
+        cur.execute(f"""
             CREATE TABLE IF NOT EXISTS feedback (
                 id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                reading_id UUID NOT NULL REFERENCES readings(id) ON DELETE CASCADE,
+                reading_id UUID NOT NULL {reading_fk}{" ON DELETE CASCADE" if reading_fk else ""},
                 user_id UUID REFERENCES users(id) ON DELETE SET NULL,
                 rating INTEGER CHECK (rating >= 1 AND rating <= 5),
                 category TEXT,
@@ -345,6 +978,17 @@ class PostgresStore:
             )
         """)
 
+        # Examples of manifest datasets, stored once per content hash (see datasets.example_hash)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS training_examples (
+                hash TEXT PRIMARY KEY,
+                data JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        cur.execute("ALTER TABLE training_datasets ADD COLUMN IF NOT EXISTS example_hashes TEXT[]")
+        cur.execute("ALTER TABLE training_datasets ALTER COLUMN data DROP NOT NULL")
+
         # Push subscriptions table
         cur.execute("""
             CREATE TABLE IF NOT EXISTS push_subscriptions (
@@ -369,6 +1013,94 @@ class PostgresStore:
             )
         """)
 
+        # Groq usage table (written by the web app per generated reading)
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS groq_usage (
+                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+                reading_id UUID {reading_fk}{" ON DELETE SET NULL" if reading_fk else ""},
+                model TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                latency_ms INTEGER NOT NULL,
+                request_timestamp TIMESTAMPTZ NOT NULL,
+                response_timestamp TIMESTAMPTZ NOT NULL,
+                cost_cents INTEGER DEFAULT 0,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+
+        # Precomputed readings keyed by (spread, tone, cards, prompt version)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS reading_cache (
+                cache_key TEXT PRIMARY KEY,
+                prompt_version TEXT NOT NULL,
+                spread_type TEXT NOT NULL,
+                tone TEXT NOT NULL,
+                cards JSONB NOT NULL,
+                overview TEXT NOT NULL,
+                card_breakdowns JSONB NOT NULL,
+                synthesis TEXT NOT NULL,
+                actionable_reflection TEXT NOT NULL,
+                model TEXT NOT NULL,
+                frequency INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                expires_at TIMESTAMPTZ NOT NULL
+            )
+        """)
+
+        # Raw telemetry events (written by the web app's /api/telemetry)
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS telemetry_events (
+                {id_column} DEFAULT gen_random_uuid(),
+                type TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                timestamp TIMESTAMPTZ NOT NULL,
+                user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+                data JSONB,
+                metadata JSONB,
+                raw_event JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(){telemetry_key}
+            ){telemetry_partitioning}
+        """)
+
+        # Hourly and daily telemetry rollups; type '*' aggregates all event types
+        for table, bucket in (("telemetry_rollup_hourly", "bucket TIMESTAMPTZ"), ("telemetry_rollup_daily", "day DATE")):
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {bucket} NOT NULL,
+                    type TEXT NOT NULL,
+                    events BIGINT NOT NULL,
+                    sessions BIGINT NOT NULL,
+                    users BIGINT NOT NULL,
+                    ttft_sum_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    ttft_count BIGINT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY ({bucket.split()[0]}, type)
+                )
+            """)
+
+        # Distinct (type, session, user) per rolled-up hour; read for compacted ranges
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS telemetry_rollup_members (
+                bucket TIMESTAMPTZ NOT NULL,
+                type TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                user_id UUID
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_telemetry_rollup_members_bucket ON telemetry_rollup_members(bucket)")
+
+        # Progress markers of incremental jobs
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+                job TEXT PRIMARY KEY,
+                watermark TIMESTAMPTZ NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+
         # Create indexes for better performance
         indexes = [
             "CREATE INDEX IF NOT EXISTS idx_readings_user_id ON readings(user_id)",
@@ -376,7 +1108,194 @@ class PostgresStore:
             "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)",
             "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)",
             "CREATE INDEX IF NOT EXISTS idx_feedback_reading_id ON feedback(reading_id)",
+            "CREATE INDEX IF NOT EXISTS idx_groq_usage_timestamp ON groq_usage(request_timestamp)",
+            "CREATE INDEX IF NOT EXISTS idx_groq_usage_reading_id ON groq_usage(reading_id)",
+            "CREATE INDEX IF NOT EXISTS idx_reading_cache_prompt_version ON reading_cache(prompt_version, expires_at)",
+            "CREATE INDEX IF NOT EXISTS idx_telemetry_events_timestamp ON telemetry_events(timestamp)",
+            "CREATE INDEX IF NOT EXISTS idx_telemetry_events_type_timestamp ON telemetry_events(type, timestamp)",
         ]
 
         for index_sql in indexes:
-            cur.execute(index_sql)
\ No newline at end of file
+            cur.execute(index_sql)
+
+        self._create_quality_triggers(cur, QUALITY_WATCH_TABLES)
+
+        if partitioned:
+            now = datetime.now(timezone.utc)
+            for spec in PARTITIONED_TABLES.values():
+                self._create_partitions(cur, spec, now, add_months(month_floor(now), self.settings.partition_months_ahead))
+
+    def _create_quality_triggers(self, cur, tables: dict[str, str]) -> None:
+        """NOTIFY `tarot-pipeline watch` (see watch.py) with the reading id of every row inserted into ``tables``.
+
+        On a partitioned table the trigger is cloned onto every partition, so the logical table name is passed as an
+        argument rather than read from TG_TABLE_NAME.
+        """
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION notify_quality_watch() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{QUALITY_WATCH_CHANNEL}', json_build_object(
+                    'table', TG_ARGV[0], 'reading_id', to_jsonb(NEW)->>TG_ARGV[1])::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        for table, reading_column in tables.items():
+            cur.execute(f"DROP TRIGGER IF EXISTS {table}_notify_quality_watch ON {table}")
+            cur.execute(f"""
+                CREATE TRIGGER {table}_notify_quality_watch AFTER INSERT ON {table}
+                FOR EACH ROW EXECUTE FUNCTION notify_quality_watch('{table}', '{reading_column}')
+            """)
+
+    def is_partitioned(self, table: str) -> bool:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+                return cur.fetchone() is not None
+
+    def list_partitions(self, table: str) -> list[dict[str, Any]]:
+        """Partitions of a table with their bounds and approximate row counts"""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bounds,
+                           c.reltuples::bigint AS approx_rows, pg_total_relation_size(c.oid) AS bytes
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = to_regclass(%s)
+                    ORDER BY c.relname
+                """, [table])
+                return cur.fetchall()
+
+    def ensure_partitions(self, months_ahead: Optional[int] = None) -> dict[str, int]:
+        """Create monthly partitions through ``months_ahead`` months from now for every partitioned table, plus one
+        for every month with rows in a DEFAULT partition, moving those rows in; returns partition -> rows moved"""
+        months_ahead = self.settings.partition_months_ahead if months_ahead is None else months_ahead
+        now = datetime.now(timezone.utc)
+        created = {}
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                for spec in PARTITIONED_TABLES.values():
+                    cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [spec.table])
+                    if cur.fetchone() is not None:
+                        created |= self._create_partitions(cur, spec, now, add_months(month_floor(now), months_ahead))
+                conn.commit()
+        return created
+
+    def migrate_to_partitioned(self, table: str, months_ahead: Optional[int] = None) -> dict[str, Any]:
+        """Rebuild a plain table as a monthly range-partitioned one in a single transaction.
+
+        Rows are copied into partitions covering their full time range, primary key and indexes are rebuilt on the
+        parent after the load, and foreign keys referencing the old table are dropped because a partitioned table's
+        unique keys must include the partition column.
+        """
+        spec = PARTITIONED_TABLES[table]
+        months_ahead = self.settings.partition_months_ahead if months_ahead is None else months_ahead
+        legacy = f"{table}_unpartitioned"
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+                if cur.fetchone() is not None:
+                    raise ValueError(f"{table} is already partitioned")
+                cur.execute(f"SELECT MIN({spec.column}) AS first, MAX({spec.column}) AS last FROM {table}")
+                bounds = cur.fetchone()
+                now = datetime.now(timezone.utc)
+                first = bounds["first"] or now
+                last = max(bounds["last"] or now, add_months(month_floor(now), months_ahead))
+
+                cur.execute("""
+                    SELECT conrelid::regclass::text AS referencing, conname
+                    FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(%s)
+                """, [table])
+                dropped_fks = [f"{row['referencing']}.{row['conname']}" for row in cur.fetchall()]
+                for fk in dropped_fks:
+                    referencing, name = fk.rsplit(".", 1)
+                    cur.execute(f'ALTER TABLE {referencing} DROP CONSTRAINT "{name}"')
+
+                cur.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+                cur.execute(f"""
+                    CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+                    PARTITION BY RANGE ({spec.column})
+                """)
+                partitions = list(self._create_partitions(cur, spec, first, last))
+                cur.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+                copied = cur.rowcount
+                cur.execute(f"DROP TABLE {legacy}")
+                cur.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {spec.column})")
+                for name, columns in spec.indexes:
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+                self._create_quality_triggers(cur, {t: c for t, c in QUALITY_WATCH_TABLES.items() if t == table})
+                conn.commit()
+        return {"table": table, "rows": copied, "partitions": partitions, "dropped_foreign_keys": dropped_fks}
+
+    def drop_partitions_before(self, table: str, cutoff: datetime) -> list[str]:
+        """Drop whole monthly partitions that end at or before ``cutoff``; no-op on plain tables"""
+        dropped = []
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT c.relname AS name FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = to_regclass(%s)
+                """, [table])
+                for row in cur.fetchall():
+                    month = partition_month(table, row["name"])
+                    if month is not None and add_months(month, 1) <= cutoff:
+                        cur.execute(f"DROP TABLE {row['name']}")
+                        dropped.append(row["name"])
+                conn.commit()
+        return sorted(dropped)
+
+    def _create_partitions(self, cur, spec: PartitionSpec, start: datetime, end: datetime) -> dict[str, int]:
+        """Create the DEFAULT partition and the monthly partitions from ``start`` through ``end``, widened to every
+        month the DEFAULT partition holds rows for; returns each monthly partition with the rows moved into it."""
+        for statement in default_partition_ddl(spec):
+            cur.execute(statement)
+        cur.execute(f"SELECT MIN({spec.column}) AS first, MAX({spec.column}) AS last "
+                    f"FROM {default_partition_name(spec.table)}")
+        stray = cur.fetchone()
+        if stray["first"] is not None:
+            start, end = min(start, stray["first"]), max(end, stray["last"])
+        partitions = {}
+        for month in iter_months(start, end):
+            name = partition_name(spec.table, month)
+            moved = 0
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL AS present", [name])
+            if stray["first"] is not None and not cur.fetchone()["present"]:
+                moved = self._move_out_of_default(cur, spec, month)
+            for statement in partition_ddl(spec, month):
+                cur.execute(statement)
+            partitions[name] = moved
+        return partitions
+
+    def _move_out_of_default(self, cur, spec: PartitionSpec, month: datetime) -> int:
+        """Build ``month``'s partition as a plain table from its rows in the DEFAULT partition, then attach it.
+
+        Postgres refuses to create a partition whose range the DEFAULT partition still has rows in, so the rows are
+        deleted from it in the same transaction before the attach validates the bounds.
+        """
+        name = partition_name(spec.table, month)
+        cur.execute(f"CREATE TABLE {name} (LIKE {spec.table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cur.execute(f"""
+            WITH moved AS (
+                DELETE FROM {default_partition_name(spec.table)}
+                WHERE {spec.column} >= %s AND {spec.column} < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """, [month, add_months(month, 1)])
+        moved = cur.rowcount
+        cur.execute(f"ALTER TABLE {spec.table} ATTACH PARTITION {name} {partition_bounds(month)}")
+        return moved
+
+
+def _time_window(column: str, since: Optional[datetime], until: Optional[datetime]) -> tuple[str, list[Any]]:
+    """WHERE clause for a half-open time window, built only from the bounds given so the planner sees plain
+    range predicates it can prune partitions with."""
+    clauses, params = ["TRUE"], []
+    if since is not None:
+        clauses.append(f"{column} >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{column} < %s")
+        params.append(until)
+    return " AND ".join(clauses), params
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from dspy.utils.callback import BaseCallback
+
+
+@dataclass
+class Span:
+    """One timed stage. ``rows`` is set by the caller once it knows how many records the stage handled."""
+
+    name: str
+    parent: Optional[str]
+    thread_id: int
+    start: float
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    peak_mb: Optional[float] = None
+    rows: Optional[int] = None
+    _cpu_start: float = field(default=0.0, repr=False)
+    _mem_base: int = field(default=0, repr=False)
+    _mem_peak: int = field(default=0, repr=False)
+
+
+@dataclass
+class SpanStats:
+    """Spans of one name aggregated over a run."""
+
+    count: int = 0
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    peak_mb: Optional[float] = None
+    rows: int = 0
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        return self.rows / (self.wall_ms / 1000) if self.rows and self.wall_ms else None
+
+    def as_metrics(self, name: str) -> dict[str, float]:
+        metrics = {
+            f"profile.{name}.count": float(self.count),
+            f"profile.{name}.wall_ms": self.wall_ms,
+            f"profile.{name}.cpu_ms": self.cpu_ms,
+        }
+        if self.peak_mb is not None:
+            metrics[f"profile.{name}.peak_mb"] = self.peak_mb
+        if self.rows:
+            metrics[f"profile.{name}.rows"] = float(self.rows)
+            metrics[f"profile.{name}.rows_per_s"] = self.rows_per_second
+        return metrics
+
+
+class Profiler:
+    """Collects nested stage spans with wall time, thread CPU time, row counts and, optionally, peak memory.
+
+    Spans nest per thread. Peak memory comes from tracemalloc, which slows allocation-heavy code noticeably, so it is
+    only measured when ``trace_memory`` is on; a span's peak is relative to allocations live when it started and
+    includes its children (tracemalloc is process-wide, so concurrent spans see each other's allocations). Finished
+    spans are kept (up to ``max_spans``) for the Chrome trace; aggregates are always complete.
+    """
+
+    def __init__(self, trace_memory: bool = False, max_spans: int = 100_000, trace_path: Optional[Path] = None):
+        self.trace_memory = trace_memory
+        self.max_spans = max_spans
+        # Where the CLI writes the Chrome trace; when set, tracked runs also log it as an artifact
+        self.trace_path = trace_path
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self._stats: dict[str, SpanStats] = {}
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def begin(self, name: str, rows: Optional[int] = None) -> Span:
+        stack = self._stack()
+        span = Span(
+            name=name,
+            parent=stack[-1].name if stack else None,
+            thread_id=threading.get_ident(),
+            start=time.perf_counter(),
+            rows=rows,
+            _cpu_start=time.thread_time(),
+        )
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            for open_span in stack:
+                open_span._mem_peak = max(open_span._mem_peak, peak)
+            tracemalloc.reset_peak()
+            span._mem_base = span._mem_peak = current
+        stack.append(span)
+        return span
+
+    def end(self, span: Span) -> Span:
+        span.wall_ms = (time.perf_counter() - span.start) * 1000
+        span.cpu_ms = (time.thread_time() - span._cpu_start) * 1000
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            span._mem_peak = max(span._mem_peak, peak)
+            span.peak_mb = round((span._mem_peak - span._mem_base) / 1e6, 3)
+            if stack:
+                stack[-1]._mem_peak = max(stack[-1]._mem_peak, span._mem_peak)
+            tracemalloc.reset_peak()
+        with self._lock:
+            stats = self._stats.setdefault(span.name, SpanStats())
+            stats.count += 1
+            stats.wall_ms += span.wall_ms
+            stats.cpu_ms += span.cpu_ms
+            stats.rows += span.rows or 0
+            if span.peak_mb is not None:
+                stats.peak_mb = max(stats.peak_mb or 0.0, span.peak_mb)
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+        return span
+
+    @contextmanager
+    def span(self, name: str, rows: Optional[int] = None) -> Iterator[Span]:
+        span = self.begin(name, rows)
+        try:
+            yield span
+        finally:
+            self.end(span)
+
+    def wrap(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Time every call of ``fn`` as a ``name`` span (used for metric functions called by optimizers)."""
+
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapped
+
+    def summary(self) -> dict[str, SpanStats]:
+        with self._lock:
+            return dict(self._stats)
+
+    def as_metrics(self) -> dict[str, float]:
+        metrics: dict[str, float] = {}
+        for name, stats in self.summary().items():
+            metrics.update(stats.as_metrics(name))
+        return metrics
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Spans as Chrome trace events, viewable in chrome://tracing or https://ui.perfetto.dev."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": round((span.start - self._origin) * 1e6, 1),
+                "dur": round(span.wall_ms * 1000, 1),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {
+                    key: value
+                    for key, value in (("cpu_ms", round(span.cpu_ms, 3)), ("peak_mb", span.peak_mb), ("rows", span.rows))
+                    if value is not None
+                },
+            }
+            for span in spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_spans": self.dropped}}
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        return path
+
+    def report(self, limit: int = 25) -> str:
+        """Plain-text table of the slowest span names by total wall time."""
+        rows = sorted(self.summary().items(), key=lambda item: item[1].wall_ms, reverse=True)[:limit]
+        lines = [f"{'span':<32} {'count':>7} {'wall ms':>11} {'cpu ms':>11} {'peak MB':>9} {'rows/s':>10}"]
+        for name, stats in rows:
+            peak = f"{stats.peak_mb:.1f}" if stats.peak_mb is not None else "-"
+            rate = f"{stats.rows_per_second:.0f}" if stats.rows_per_second else "-"
+            lines.append(f"{name:<32} {stats.count:>7} {stats.wall_ms:>11.1f} {stats.cpu_ms:>11.1f} {peak:>9} {rate:>10}")
+        return "\n".join(lines)
+
+
+class LMSpanCallback(BaseCallback):
+    """Record every DSPy LM call as an ``lm.call`` span, including calls made from optimizer worker threads."""
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+        self._open: dict[str, Span] = {}
+
+    def on_lm_start(self, call_id: str, instance: Any, inputs: dict[str, Any]) -> None:
+        self._open[call_id] = self.profiler.begin("lm.call")
+
+    def on_lm_end(self, call_id: str, outputs: Optional[Any], exception: Optional[Exception] = None) -> None:
+        span = self._open.pop(call_id, None)
+        if span is not None:
+            self.profiler.end(span)
+
+
+@lru_cache()
+def get_profiler() -> Profiler:
+    """Process-wide profiler so every stage of a command lands in one report."""
+    return Profiler()
+
+
+def enable_memory_tracing() -> None:
+    profiler = get_profiler()
+    profiler.trace_memory = True
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
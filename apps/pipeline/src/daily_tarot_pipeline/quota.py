@@ -0,0 +1,402 @@
+"""Shared Groq quota for every process that uses the key: nightly optimization, evaluations and the model server.
+
+Each process used to throttle on its own, so overlapping jobs ran into 429 storms whose retries wasted more quota.
+Now every LM call first takes a lease from one SQLite file (``QUOTA_DB_PATH``): a request from a requests bucket, an
+estimate of its tokens from a tokens bucket and, with ``QUOTA_MAX_CONCURRENCY``, a concurrency slot. Buckets refill
+at ``QUOTA_REQUESTS_PER_MINUTE`` / ``QUOTA_TOKENS_PER_MINUTE`` and hold ``QUOTA_BURST_SECONDS`` of traffic. The
+estimate is corrected from the call's usage when it ends, and a 429 empties both buckets for its retry-after, so
+every process backs off together. While the quota is installed, LMs built by ``build_lm`` turn off litellm's own
+retries and retry through the callback instead, so every attempt takes a lease and every 429 is seen.
+
+Priorities: ``serving`` > ``interactive`` > ``batch``. A caller waits while a higher-priority caller is waiting, and
+only ``serving`` may take the last ``QUOTA_SERVING_RESERVE`` of either bucket, so the model server keeps headroom
+while a nightly run saturates the rest.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+import dspy
+import litellm
+from dspy.utils.callback import BaseCallback
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"serving": 0, "interactive": 1, "batch": 2}
+# A waiter that has not polled for this long belongs to a dead process and no longer blocks lower priorities
+_WAITER_STALE_S = 5.0
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class QuotaLease:
+    id: str
+    priority: str
+    tokens: int
+    waited_s: float
+
+
+@dataclass
+class QuotaStats:
+    """What this process's callers experienced; bucket levels shared by all processes are in ``utilization``."""
+    acquired: int = 0
+    waited: int = 0
+    wait_seconds: float = 0.0
+    timed_out: int = 0
+    rate_limited: int = 0
+    refunded_tokens: int = 0
+
+
+class QuotaCoordinator:
+    """Token buckets for requests and tokens plus a concurrency limit, shared through a local SQLite file."""
+
+    def __init__(
+        self,
+        path: Path,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        burst_seconds: float = 10.0,
+        serving_reserve: float = 0.2,
+        lease_timeout_s: float = 300.0,
+        poll_s: float = 0.05,
+    ):
+        self.path = Path(path)
+        self.rates = {
+            name: per_minute / 60
+            for name, per_minute in (("requests", requests_per_minute), ("tokens", tokens_per_minute))
+            if per_minute
+        }
+        # Never below one request, so a low RPM still admits calls one at a time
+        self.capacity = {name: max(1.0, rate * burst_seconds) for name, rate in self.rates.items()}
+        self.max_concurrency = max_concurrency
+        self.serving_reserve = serving_reserve
+        self.lease_timeout_s = lease_timeout_s
+        self.poll_s = poll_s
+        self.stats = QuotaStats()
+        self._stats_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS quota_buckets (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS quota_leases (
+                    id TEXT PRIMARY KEY,
+                    priority INTEGER NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS quota_waiters (
+                    id TEXT PRIMARY KEY,
+                    priority INTEGER NOT NULL,
+                    polled_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; every update runs in an explicit BEGIN IMMEDIATE, which serializes processes on the file
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def acquire(self, priority: str = "batch", tokens: int = 0, timeout: Optional[float] = None) -> Optional[QuotaLease]:
+        """Block until a request, ``tokens`` and a slot are available; ``None`` if ``timeout`` seconds pass first."""
+        rank = PRIORITIES[priority]
+        need = {"requests": 1.0, "tokens": float(tokens)}
+        lease_id = uuid.uuid4().hex
+        started = time.monotonic()
+        waited = False
+        with closing(self._connect()) as conn:
+            try:
+                while True:
+                    delay = self._try_acquire(conn, lease_id, rank, need)
+                    if delay is None:
+                        waited_s = time.monotonic() - started
+                        self._count(acquired=1, waited=int(waited), wait_seconds=waited_s if waited else 0.0)
+                        return QuotaLease(lease_id, priority, tokens, waited_s)
+                    waited = True
+                    if timeout is not None and time.monotonic() - started + delay > timeout:
+                        self._count(timed_out=1, wait_seconds=time.monotonic() - started)
+                        return None
+                    time.sleep(delay)
+            finally:
+                if waited:
+                    conn.execute("DELETE FROM quota_waiters WHERE id = ?", [lease_id])
+
+    def _try_acquire(self, conn: sqlite3.Connection, lease_id: str, rank: int, need: dict[str, float]) -> Optional[float]:
+        """Take the lease and return ``None``, or register as a waiter and return how long to sleep."""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM quota_leases WHERE expires_at < ?", [now])
+            conn.execute("DELETE FROM quota_waiters WHERE polled_at < ?", [now - _WAITER_STALE_S])
+            levels = self._levels(conn, now)
+            delay = 0.0
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM quota_waiters WHERE priority < ? AND id != ?", [rank, lease_id]
+            ).fetchone()[0]
+            if ahead:
+                delay = self.poll_s
+            if self.max_concurrency is not None and not delay:
+                active = conn.execute("SELECT COUNT(*) FROM quota_leases").fetchone()[0]
+                if active >= self.max_concurrency:
+                    delay = self.poll_s
+            for name, rate in self.rates.items():
+                capacity = self.capacity[name]
+                # A call larger than the bucket could never start; it waits for a full bucket instead
+                required = min(need[name], capacity)
+                if rank != PRIORITIES["serving"]:
+                    required = min(capacity, required + self.serving_reserve * capacity)
+                if levels[name] < required:
+                    delay = max(delay, (required - levels[name]) / rate)
+            if delay:
+                conn.execute(
+                    "INSERT INTO quota_waiters (id, priority, polled_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET polled_at = excluded.polled_at",
+                    [lease_id, rank, now],
+                )
+                conn.execute("COMMIT")
+                return min(max(delay, self.poll_s), 1.0)
+            for name in self.rates:
+                self._set_level(conn, name, levels[name] - need[name], now)
+            conn.execute(
+                "INSERT INTO quota_leases (id, priority, tokens, expires_at) VALUES (?, ?, ?, ?)",
+                [lease_id, rank, int(need["tokens"]), now + self.lease_timeout_s],
+            )
+            conn.execute("COMMIT")
+            return None
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, lease: QuotaLease, tokens_used: Optional[int] = None) -> None:
+        """Free the lease's slot and settle its token estimate against ``tokens_used`` (refund or extra charge)."""
+        refund = 0 if tokens_used is None else lease.tokens - tokens_used
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM quota_leases WHERE id = ?", [lease.id])
+                if refund and "tokens" in self.rates:
+                    now = time.time()
+                    level = self._levels(conn, now)["tokens"]
+                    self._set_level(conn, "tokens", min(self.capacity["tokens"], level + refund), now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if refund > 0:
+            self._count(refunded_tokens=refund)
+
+    def penalize(self, retry_after: float) -> None:
+        """After a 429, put every bucket ``retry_after`` seconds of refill below empty, for all processes."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                levels = self._levels(conn, now)
+                for name, rate in self.rates.items():
+                    self._set_level(conn, name, min(levels[name], -rate * retry_after), now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._count(rate_limited=1)
+
+    def _levels(self, conn: sqlite3.Connection, now: float) -> dict[str, float]:
+        rows = dict(
+            (name, (level, updated_at))
+            for name, level, updated_at in conn.execute("SELECT name, level, updated_at FROM quota_buckets")
+        )
+        levels = {}
+        for name, rate in self.rates.items():
+            # A bucket nobody has used yet starts full
+            level, updated_at = rows.get(name, (self.capacity[name], now))
+            levels[name] = min(self.capacity[name], level + max(0.0, now - updated_at) * rate)
+        return levels
+
+    def _set_level(self, conn: sqlite3.Connection, name: str, level: float, now: float) -> None:
+        conn.execute(
+            "INSERT INTO quota_buckets (name, level, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET level = excluded.level, updated_at = excluded.updated_at",
+            [name, level, now],
+        )
+
+    def _count(self, **increments: float) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def utilization(self) -> dict[str, Any]:
+        """Bucket levels, leases and waiters by priority across all processes, plus this process's stats."""
+        now = time.time()
+        by_rank = {rank: name for name, rank in PRIORITIES.items()}
+        with closing(self._connect()) as conn:
+            levels = self._levels(conn, now)
+            leases = conn.execute(
+                "SELECT priority, COUNT(*) FROM quota_leases WHERE expires_at >= ? GROUP BY priority", [now]
+            ).fetchall()
+            waiters = conn.execute(
+                "SELECT priority, COUNT(*) FROM quota_waiters WHERE polled_at >= ? GROUP BY priority",
+                [now - _WAITER_STALE_S],
+            ).fetchall()
+        return {
+            **{
+                name: {
+                    "available": round(max(0.0, levels[name]), 1),
+                    "capacity": self.capacity[name],
+                    "per_minute": round(rate * 60),
+                    "utilization": round(1 - max(0.0, levels[name]) / self.capacity[name], 3),
+                }
+                for name, rate in self.rates.items()
+            },
+            "in_flight": {by_rank[rank]: count for rank, count in leases},
+            "waiting": {by_rank[rank]: count for rank, count in waiters},
+            "max_concurrency": self.max_concurrency,
+            "process": dict(self.stats.__dict__, wait_seconds=round(self.stats.wait_seconds, 3)),
+        }
+
+
+class QuotaCallback(BaseCallback):
+    """Take a quota lease before every DSPy LM call and settle it when the call ends.
+
+    DSPy swallows callback exceptions, so a caller that cannot get a lease within ``QUOTA_MAX_WAIT_S`` logs a warning
+    and makes the call anyway. Calls answered from the DSPy cache still take a request from the bucket (the cache is
+    checked after callbacks run) but get their whole token estimate back.
+    """
+
+    def __init__(
+        self,
+        coordinator: Optional[QuotaCoordinator] = None,
+        priority: Optional[str] = None,
+        max_wait_s: Optional[float] = None,
+    ):
+        self._coordinator = coordinator
+        self._priority = priority
+        self._max_wait_s = max_wait_s
+        self._leases: dict[str, tuple[QuotaLease, Any, Any]] = {}
+
+    @property
+    def coordinator(self) -> Optional[QuotaCoordinator]:
+        # Resolved on first use so installing the callback never needs settings (e.g. for ``--help``)
+        return self._coordinator or get_quota_coordinator()
+
+    @property
+    def priority(self) -> str:
+        return self._priority or get_settings().quota_priority
+
+    @property
+    def max_wait_s(self) -> float:
+        return self._max_wait_s if self._max_wait_s is not None else get_settings().quota_max_wait_s
+
+    def on_lm_start(self, call_id: str, instance: Any, inputs: dict[str, Any]) -> None:
+        coordinator = self.coordinator
+        if coordinator is None:
+            return
+        messages = inputs.get("messages") or inputs.get("prompt")
+        lease = coordinator.acquire(self.priority, _estimate_tokens(instance, inputs), timeout=self.max_wait_s)
+        if lease is None:
+            logger.warning("No %s quota lease within %.0fs; calling anyway", self.priority, self.max_wait_s)
+            return
+        self._leases[call_id] = (lease, instance, messages)
+
+    def on_lm_end(self, call_id: str, outputs: Optional[Any], exception: Optional[Exception] = None) -> None:
+        held = self._leases.pop(call_id, None)
+        coordinator = self.coordinator
+        if exception is not None and coordinator is not None and _is_rate_limit(exception):
+            coordinator.penalize(_retry_after(exception))
+        if held is None:
+            return
+        lease, instance, messages = held
+        coordinator.release(lease, None if exception is not None else _tokens_used(instance, messages))
+
+
+def _estimate_tokens(instance: Any, inputs: dict[str, Any]) -> int:
+    messages = inputs.get("messages") or [{"content": inputs.get("prompt") or ""}]
+    prompt_chars = sum(len(str(message.get("content") or "")) for message in messages)
+    kwargs = {**getattr(instance, "kwargs", {}), **(inputs.get("kwargs") or {})}
+    return math.ceil(prompt_chars / _CHARS_PER_TOKEN) + int(kwargs.get("max_tokens") or 0)
+
+
+def _tokens_used(instance: Any, messages: Any) -> Optional[int]:
+    """Billed tokens of the history entry for ``messages``; ``None`` when history is off or the entry is gone."""
+    for entry in reversed(getattr(instance, "history", [])[-16:]):
+        if entry.get("messages") == messages or entry.get("prompt") == messages:
+            if getattr(entry.get("response"), "cache_hit", False):
+                return 0
+            usage = entry.get("usage") or {}
+            return int(usage.get("total_tokens") or 0) or None
+    return None
+
+
+def _is_rate_limit(exception: Exception) -> bool:
+    return getattr(exception, "status_code", None) == 429 or type(exception).__name__.endswith("RateLimitError")
+
+
+def _retry_after(exception: Exception) -> float:
+    """Seconds a 429 asks to wait: the stub's ``retry_after`` or the response's Retry-After header, else one."""
+    value = getattr(exception, "retry_after", None)
+    if value is None:
+        value = getattr(getattr(exception, "response", None), "headers", {}).get("retry-after")
+    try:
+        return float(value) if value else 1.0
+    except ValueError:
+        return 1.0
+
+
+def is_retryable(exception: Exception) -> bool:
+    """Failures litellm would retry: rate limits, timeouts, dropped connections and 5xx responses."""
+    status = getattr(exception, "status_code", None)
+    return (
+        _is_rate_limit(exception)
+        or isinstance(exception, (litellm.Timeout, litellm.APIConnectionError))
+        or (isinstance(status, int) and status >= 500)
+    )
+
+
+def quota_owns_retries(lm: Any) -> bool:
+    """Whether ``lm``'s calls go through a ``QuotaCallback`` with a coordinator, which then owns rate-limit backoff."""
+    callbacks = [*(dspy.settings.callbacks or []), *(getattr(lm, "callbacks", None) or [])]
+    return any(isinstance(callback, QuotaCallback) and callback.coordinator is not None for callback in callbacks)
+
+
+@lru_cache()
+def get_quota_coordinator() -> Optional[QuotaCoordinator]:
+    """Process-wide coordinator on ``QUOTA_DB_PATH``; ``None`` (no coordination) until a quota limit is set."""
+    settings = get_settings()
+    if not (settings.quota_requests_per_minute or settings.quota_tokens_per_minute or settings.quota_max_concurrency):
+        return None
+    return QuotaCoordinator(
+        settings.quota_db_path,
+        requests_per_minute=settings.quota_requests_per_minute,
+        tokens_per_minute=settings.quota_tokens_per_minute,
+        max_concurrency=settings.quota_max_concurrency,
+        burst_seconds=settings.quota_burst_seconds,
+        serving_reserve=settings.quota_serving_reserve,
+    )
+
+
+def install_quota(priority: Optional[str] = None) -> QuotaCallback:
+    """Route every LM call of this process through the shared quota, at ``priority`` (default ``QUOTA_PRIORITY``)."""
+    callback = QuotaCallback(priority=priority)
+    dspy.settings.configure(
+        callbacks=[*(cb for cb in dspy.settings.callbacks if not isinstance(cb, QuotaCallback)), callback]
+    )
+    return callback
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+import dspy
+
+from .models import CachedReading, CardBreakdown
+from .postgres_store import PostgresStore
+
+logger = logging.getLogger(__name__)
+
+# readingSchema.model in the web app, which serves cached rows as readings of that model
+SERVABLE_MODELS = ("openai/gpt-oss-20b", "openai/gpt-oss-120b")
+
+
+def reading_cache_key(spread_type: str, tone: str, prompt_version: str, cards: Iterable[dict[str, Any]]) -> str:
+    """Stable key for a draw; mirrored by ``readingCacheKey`` in the web app's server/reading.ts."""
+    canonical = [
+        spread_type,
+        tone,
+        prompt_version,
+        [[card["cardId"], card["orientation"], card["position"]] for card in cards],
+    ]
+    payload = json.dumps(canonical, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheRefreshResult:
+    candidates: int
+    already_fresh: int
+    generated: int
+    failed: int
+    invalidated: int
+
+
+def refresh_reading_cache(
+    store: PostgresStore,
+    module: dspy.Module,
+    lm: dspy.BaseLM,
+    prompt_version: str,
+    top_n: int = 500,
+    ttl: timedelta = timedelta(days=7),
+    lookback: timedelta = timedelta(days=30),
+    concurrency: int = 4,
+) -> CacheRefreshResult:
+    """Materialize readings for the most frequent draws served under ``prompt_version``.
+
+    Entries from other prompt versions are invalidated first, and keys that already have a fresh entry are skipped,
+    so repeated refreshes only pay for new or expired draws.
+    """
+    invalidated = store.invalidate_reading_cache(keep_prompt_version=prompt_version)
+    since = datetime.now(timezone.utc) - lookback
+    frequencies = [row for row in store.fetch_reading_key_frequencies(prompt_version, since, top_n) if row["tone"]]
+    fresh = store.fetch_fresh_cache_keys(prompt_version)
+
+    pending = []
+    for row in frequencies:
+        cards = row["cards"] if isinstance(row["cards"], list) else json.loads(row["cards"])
+        key = reading_cache_key(row["spread_type"], row["tone"], prompt_version, cards)
+        if key not in fresh:
+            pending.append((key, row, cards))
+
+    expires_at = datetime.now(timezone.utc) + ttl
+    model = lm.model.removeprefix("groq/")
+
+    def generate(item: tuple[str, dict[str, Any], list[dict]]) -> CachedReading | None:
+        key, row, cards = item
+        try:
+            with dspy.context(lm=lm):
+                # Cached readings are intent-agnostic; the web app only serves them when no intent was given
+                prediction = module(intent=None, spread_type=row["spread_type"], cards=cards, tone=row["tone"])
+            return CachedReading(
+                cache_key=key,
+                prompt_version=prompt_version,
+                spread_type=row["spread_type"],
+                tone=row["tone"],
+                cards=cards,
+                overview=str(prediction.overview),
+                card_breakdowns=_parse_breakdowns(prediction.card_breakdowns, cards),
+                synthesis=str(prediction.synthesis),
+                actionable_reflection=str(prediction.actionable_reflection),
+                model=model,
+                frequency=row["frequency"],
+                expires_at=expires_at,
+            )
+        except Exception:
+            logger.warning("Could not cache the %s %s reading %s", row["spread_type"], row["tone"], key, exc_info=True)
+            return None
+
+    if model in SERVABLE_MODELS:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(generate, pending))
+    else:
+        # The web app would reject these rows, so count them as failed rather than spend calls on them
+        logger.warning("Not caching readings from %s; the web app only serves %s", model, ", ".join(SERVABLE_MODELS))
+        results = [None] * len(pending)
+
+    entries = [entry for entry in results if entry is not None]
+    store.upsert_cached_readings(entries)
+    return CacheRefreshResult(
+        candidates=len(frequencies),
+        already_fresh=len(frequencies) - len(pending),
+        generated=len(entries),
+        failed=len(results) - len(entries),
+        invalidated=invalidated,
+    )
+
+
+def cache_hit_report(store: PostgresStore, prompt_version: str, lookback: timedelta = timedelta(days=7)) -> dict[str, float]:
+    """Hit-rate analytics for the cache over readings served in the lookback window."""
+    since = datetime.now(timezone.utc) - lookback
+    stats = store.reading_cache_hit_stats(prompt_version, since)
+    readings = stats["readings"] or 0
+    intentless = stats["intentless_readings"] or 0
+    return {
+        "readings": float(readings),
+        "distinct_keys": float(stats["distinct_keys"] or 0),
+        "hit_rate": stats["cache_hits"] / readings if readings else 0.0,
+        "servable_hit_rate": stats["intentless_cache_hits"] / intentless if intentless else 0.0,
+        "repeat_ratio": 1 - (stats["distinct_keys"] / readings) if readings else 0.0,
+    }
+
+
+def _parse_breakdowns(value: Any, cards: list[dict]) -> list[dict]:
+    """Validated breakdowns in the web app's shape, one for each drawn card with its orientation."""
+    if isinstance(value, list):
+        parsed = value
+    else:
+        try:
+            parsed = json.loads(str(value))
+        except json.JSONDecodeError:
+            raise ValueError("card_breakdowns is not valid JSON")
+    if not isinstance(parsed, list):
+        raise ValueError("card_breakdowns must be a list")
+    breakdowns = [
+        CardBreakdown.model_validate(item if isinstance(item, (dict, CardBreakdown)) else dict(item))
+        for item in parsed
+    ]
+    covered = sorted((breakdown.card_id, breakdown.orientation) for breakdown in breakdowns)
+    drawn = sorted((card["cardId"], card["orientation"]) for card in cards)
+    if covered != drawn:
+        raise ValueError(f"card_breakdowns cover {covered}, expected the drawn cards {drawn}")
+    for breakdown in breakdowns:
+        if not breakdown.summary.strip():
+            raise ValueError(f"Empty summary for {breakdown.card_id}")
+    return [breakdown.model_dump(by_alias=True) for breakdown in breakdowns]
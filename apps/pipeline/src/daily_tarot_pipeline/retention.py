@@ -0,0 +1,243 @@
+"""Retention and garbage collection of pipeline artifacts.
+
+A nightly run leaves the same dataset name in several places: a ``training_datasets`` row and its ``evaluation_runs``,
+a prompt directory under PROMPT_WORKSPACE, a dump under ``./data/datasets`` and MLflow runs (with artifacts and traces)
+whose ``dataset_name`` param points at it. ``plan_gc`` decides per dataset name, so those copies are kept or deleted
+together, and ``run_gc`` deletes MLflow and files first and Postgres last: an interrupted run leaves the dataset rows
+in place and the next one finishes the job. Promoted lineage is never deleted: the datasets the active prompt version
+was evaluated on, and the MLflow runs behind WARM_START_MODEL_URI or a registered model version.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+from urllib.parse import urlparse
+
+from mlflow import MlflowClient
+from mlflow.entities import ViewType
+from mlflow.tracing.constant import TraceMetadataKey
+
+from .config import EnvironmentSettings
+from .mlflow_tracker import MLFLOW_DATA_DIR
+from .postgres_store import PostgresStore
+
+_TRACE_DELETE_BATCH = 100
+
+
+@dataclass
+class RetentionPolicy:
+    """Managed datasets (by name prefix) older than ``max_age`` are deleted, except the ``keep_last`` newest per prefix."""
+
+    max_age: timedelta = timedelta(days=30)
+    keep_last: int = 7
+    prefixes: tuple[str, ...] = ("nightly_", "feedback-built-")
+
+    def managed(self, name: str) -> bool:
+        return name.startswith(self.prefixes)
+
+
+@dataclass
+class RunCandidate:
+    run_id: str
+    experiment_id: str
+    name: str
+    dataset: Optional[str]
+    bytes: int
+
+
+@dataclass
+class GcPlan:
+    cutoff: datetime
+    datasets: list[str] = field(default_factory=list)
+    protected: set[str] = field(default_factory=set)
+    storage: dict[str, int] = field(default_factory=dict)
+    paths: list[tuple[Path, int]] = field(default_factory=list)
+    runs: list[RunCandidate] = field(default_factory=list)
+    # Runs already marked deleted in MLflow whose metadata and artifacts were never purged, past the same retention
+    purge_runs: list[RunCandidate] = field(default_factory=list)
+    traces: dict[str, list[str]] = field(default_factory=dict)
+
+    def report(self) -> list[str]:
+        run_bytes = sum(run.bytes for run in self.runs)
+        purge_bytes = sum(run.bytes for run in self.purge_runs)
+        trace_count = sum(len(ids) for ids in self.traces.values())
+        return [
+            f"Cutoff {self.cutoff.isoformat()}; {len(self.protected)} datasets in promoted lineage are kept",
+            f"Postgres: {len(self.datasets)} datasets ({_size(self.storage.get('dataset_bytes', 0))}), "
+            f"{self.storage.get('evaluation_runs', 0)} evaluation runs, {self.storage.get('examples', 0)} unreferenced "
+            f"examples ({_size(self.storage.get('example_bytes', 0))})",
+            f"Files: {len(self.paths)} prompt directories and dataset dumps ({_size(sum(size for _, size in self.paths))})",
+            f"MLflow: {len(self.runs)} runs ({_size(run_bytes)} of artifacts), {len(self.purge_runs)} already deleted "
+            f"runs to purge ({_size(purge_bytes)}), {trace_count} traces",
+        ]
+
+
+def select_datasets(rows: Iterable[dict[str, Any]], policy: RetentionPolicy, protected: set[str],
+                    now: datetime) -> list[str]:
+    """Names of managed datasets past retention; ``rows`` are ``list_training_datasets`` rows, newest first."""
+    cutoff = now - policy.max_age
+    seen = {prefix: 0 for prefix in policy.prefixes}
+    doomed = []
+    for row in rows:
+        prefix = next((prefix for prefix in policy.prefixes if row["name"].startswith(prefix)), None)
+        if prefix is None:
+            continue
+        seen[prefix] += 1
+        if seen[prefix] <= policy.keep_last or row["name"] in protected or row["created_at"] >= cutoff:
+            continue
+        doomed.append(row["name"])
+    return doomed
+
+
+def protected_runs(client: MlflowClient, settings: EnvironmentSettings) -> set[str]:
+    """MLflow runs serving or warm-starting the promoted prompt: the WARM_START_MODEL_URI run and registered models."""
+    run_ids = {version.run_id for version in client.search_model_versions() if version.run_id}
+    uri = settings.warm_start_model_uri or ""
+    if uri.startswith("runs:/"):
+        run_ids.add(uri[len("runs:/"):].split("/", 1)[0])
+    return run_ids
+
+
+def plan_gc(store: PostgresStore, client: MlflowClient, settings: EnvironmentSettings,
+            policy: Optional[RetentionPolicy] = None, now: Optional[datetime] = None,
+            data_dir: Path = MLFLOW_DATA_DIR) -> GcPlan:
+    """Everything a ``run_gc`` with the same arguments would delete, with sizes; deletes nothing."""
+    policy = policy or RetentionPolicy()
+    now = now or datetime.now(timezone.utc)
+    plan = GcPlan(cutoff=now - policy.max_age)
+    plan.protected = store.fetch_promoted_datasets()
+    rows = store.list_training_datasets()
+    plan.datasets = select_datasets(rows, policy, plan.protected, now)
+    plan.storage = store.training_storage_report(plan.datasets)
+    doomed = set(plan.datasets)
+    kept = {row["name"] for row in rows} - doomed
+
+    for path in _dataset_paths(settings.prompt_workspace, data_dir / "datasets"):
+        name = path.stem if path.is_file() else path.name
+        if name in plan.protected or not policy.managed(name) or name in kept:
+            continue
+        # Dumps and prompt directories of datasets that were never stored go by their own age
+        if name in doomed or datetime.fromtimestamp(path.stat().st_mtime, timezone.utc) < plan.cutoff:
+            plan.paths.append((path, _disk_usage(path)))
+
+    keep_runs = protected_runs(client, settings)
+    kept_run_ids = set(keep_runs)
+
+    def expired(run: Any, index: int) -> bool:
+        dataset = run.data.params.get("dataset_name")
+        if run.info.run_id in keep_runs or dataset in plan.protected or dataset in kept:
+            return False
+        if dataset in doomed:
+            return True
+        started = datetime.fromtimestamp(run.info.start_time / 1000, timezone.utc)
+        return index >= policy.keep_last and started < plan.cutoff
+
+    for experiment in client.search_experiments(view_type=ViewType.ALL):
+        # Runs deleted in MLflow (by hand or an interrupted gc) are purged by the same rules as active ones
+        for view_type, candidates in ((ViewType.ACTIVE_ONLY, plan.runs), (ViewType.DELETED_ONLY, plan.purge_runs)):
+            for index, run in enumerate(_search_runs(client, experiment.experiment_id, view_type)):
+                if not expired(run, index):
+                    kept_run_ids.add(run.info.run_id)
+                    continue
+                candidates.append(RunCandidate(run.info.run_id, experiment.experiment_id, run.info.run_name or "",
+                                               run.data.params.get("dataset_name"),
+                                               _artifact_bytes(run.info.artifact_uri)))
+        trace_ids = [info.request_id for info in _old_traces(client, experiment.experiment_id, plan.cutoff)
+                     if info.request_metadata.get(TraceMetadataKey.SOURCE_RUN) not in kept_run_ids]
+        if trace_ids:
+            plan.traces[experiment.experiment_id] = trace_ids
+    return plan
+
+
+def run_gc(store: PostgresStore, client: MlflowClient, plan: GcPlan, tracking_uri: str,
+           batch_size: int = 500) -> dict[str, int]:
+    """Delete what ``plan`` lists: MLflow runs and traces, then files, then Postgres rows in short batches."""
+    deleted: dict[str, int] = {"runs": 0, "traces": 0, "paths": 0}
+    for run in plan.runs:
+        client.delete_run(run.run_id)
+        deleted["runs"] += 1
+    purge = [run.run_id for run in plan.runs + plan.purge_runs]
+    for start in range(0, len(purge), batch_size):
+        # `mlflow gc` removes deleted runs' metadata and their artifacts from whichever artifact store holds them
+        subprocess.run([sys.executable, "-m", "mlflow", "gc", "--backend-store-uri", tracking_uri,
+                        "--run-ids", ",".join(purge[start:start + batch_size])], check=True)
+    for experiment_id, trace_ids in plan.traces.items():
+        for start in range(0, len(trace_ids), _TRACE_DELETE_BATCH):
+            deleted["traces"] += client.delete_traces(experiment_id,
+                                                      trace_ids=trace_ids[start:start + _TRACE_DELETE_BATCH])
+
+    for path, _ in plan.paths:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        deleted["paths"] += 1
+
+    deleted.update(store.delete_training_datasets(plan.datasets, batch_size=max(1, batch_size // 5)))
+    deleted["examples"] = store.delete_orphan_training_examples(batch_size=batch_size)
+    return deleted
+
+
+def _dataset_paths(prompt_workspace: Path, dump_dir: Path) -> Iterator[Path]:
+    if prompt_workspace.is_dir():
+        yield from (path for path in prompt_workspace.iterdir() if path.is_dir() and path.name != "promoted")
+    if dump_dir.is_dir():
+        yield from dump_dir.glob("*.json")
+
+
+def _search_runs(client: MlflowClient, experiment_id: str, view_type: int) -> Iterator[Any]:
+    """Runs of one experiment, newest first."""
+    page_token = None
+    while True:
+        page = client.search_runs([experiment_id], run_view_type=view_type, order_by=["attributes.start_time DESC"],
+                                  page_token=page_token)
+        yield from page
+        page_token = page.token
+        if not page_token:
+            return
+
+
+def _old_traces(client: MlflowClient, experiment_id: str, cutoff: datetime) -> Iterator[Any]:
+    page_token = None
+    while True:
+        page = client.search_traces(locations=[experiment_id],
+                                    filter_string=f"trace.timestamp_ms < {int(cutoff.timestamp() * 1000)}",
+                                    max_results=500, page_token=page_token, include_spans=False)
+        yield from (trace.info for trace in page)
+        page_token = page.token
+        if not page_token:
+            return
+
+
+def _artifact_bytes(artifact_uri: str) -> int:
+    parsed = urlparse(artifact_uri)
+    if parsed.scheme not in ("", "file"):
+        return 0
+    return _disk_usage(Path(parsed.path))
+
+
+def _disk_usage(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _size(count: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import bisect
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+import dspy
+from pydantic import ValidationError
+
+from .lm import http_pool_stats
+from .models import ReadingRequest
+
+if TYPE_CHECKING:
+    from .quota import QuotaCoordinator
+
+BASELINE_MODEL_URI = "baseline"
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+def load_reading_module(model_uri: str) -> dspy.Module:
+    """Load a compiled reading module from an MLflow URI, an exported prompt file, or the baseline."""
+    from .optimizers.mipro import TarotReadingModule
+
+    if model_uri == BASELINE_MODEL_URI:
+        return TarotReadingModule()
+    path = Path(model_uri)
+    if path.is_file():
+        return TarotReadingModule().load_prompt(path)
+
+    import mlflow.dspy
+
+    return mlflow.dspy.load_model(model_uri)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with quantile estimates."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * len(buckets_ms)
+        self.total_ms = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        millis = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, millis)] += 1
+            self.total_ms += millis
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-th observation."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for bound, bucket_count in zip(self.buckets_ms, self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return bound
+            return self.buckets_ms[-1]
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            buckets = {("+Inf" if bound == float("inf") else str(bound)): n for bound, n in zip(self.buckets_ms, self.counts)}
+            count, total = self.count, self.total_ms
+        return {
+            "count": count,
+            "mean_ms": total / count if count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    loads: int = 0
+    evictions: int = 0
+
+
+class ModelPool:
+    """LRU pool of loaded DSPy modules keyed by model URI."""
+
+    def __init__(self, capacity: int = 4, loader: Callable[[str], dspy.Module] = load_reading_module):
+        if capacity < 1:
+            raise ValueError("Model pool capacity must be at least 1")
+        self.capacity = capacity
+        self.loader = loader
+        self.stats = PoolStats()
+        self.load_latency = LatencyHistogram()
+        self._modules: OrderedDict[str, dspy.Module] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+
+    def get(self, model_uri: str) -> dspy.Module:
+        with self._lock:
+            module = self._modules.get(model_uri)
+            if module is not None:
+                self._modules.move_to_end(model_uri)
+                self.stats.hits += 1
+                return module
+            load_lock = self._load_locks.setdefault(model_uri, threading.Lock())
+
+        # Only one thread deserializes a given URI; the others wait and reuse it.
+        with load_lock:
+            with self._lock:
+                module = self._modules.get(model_uri)
+                if module is not None:
+                    self.stats.hits += 1
+                    return module
+            started = time.perf_counter()
+            module = self.loader(model_uri)
+            self.load_latency.observe(time.perf_counter() - started)
+            with self._lock:
+                self._modules[model_uri] = module
+                self.stats.loads += 1
+                while len(self._modules) > self.capacity:
+                    evicted, _ = self._modules.popitem(last=False)
+                    self._load_locks.pop(evicted, None)
+                    self.stats.evictions += 1
+            return module
+
+    def loaded(self) -> list[str]:
+        with self._lock:
+            return list(self._modules)
+
+
+class PredictionDispatcher:
+    """Runs prediction requests on a bounded worker pool, each as its own module call on a pooled module.
+
+    Requests are not batched: a reading's latency is what the user waits for, and batched generation
+    (``batched_generation``) is for offline workloads only.
+    """
+
+    def __init__(self, pool: ModelPool, lm: dspy.BaseLM, max_workers: int = 8):
+        self.pool = pool
+        self.lm = lm
+        self.queue_latency = LatencyHistogram()
+        self.predict_latency = LatencyHistogram()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tarot-predict")
+
+    def submit(self, model_uri: str, inputs: dict[str, Any]) -> Future:
+        return self._executor.submit(self._predict, model_uri, inputs, time.perf_counter())
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _predict(self, model_uri: str, inputs: dict[str, Any], enqueued_at: float) -> dspy.Prediction:
+        started = time.perf_counter()
+        self.queue_latency.observe(started - enqueued_at)
+        try:
+            module = self.pool.get(model_uri)
+            with dspy.context(lm=self.lm):
+                return module(**inputs)
+        finally:
+            self.predict_latency.observe(time.perf_counter() - started)
+
+
+class BadRequest(ValueError):
+    """A request the server refuses; answered with 400."""
+
+
+class ReadingServer:
+    """In-process HTTP server answering reading predictions from warm, pooled modules.
+
+    Only ``default_model_uri`` and ``allowed_model_uris`` are served: loading a module reads a local file or unpickles
+    an MLflow model, so a request can pick among them but never name a new one.
+    """
+
+    def __init__(
+        self,
+        default_model_uri: str,
+        lm: dspy.BaseLM,
+        pool_size: int = 4,
+        max_workers: int = 8,
+        quota: QuotaCoordinator | None = None,
+        allowed_model_uris: Iterable[str] = (),
+    ):
+        self.default_model_uri = default_model_uri
+        self.allowed_model_uris = {default_model_uri, *allowed_model_uris}
+        self.quota = quota
+        self.pool = ModelPool(capacity=pool_size)
+        self.dispatcher = PredictionDispatcher(self.pool, lm, max_workers)
+        self.request_latency = LatencyHistogram()
+        self.errors = 0
+        self.rejected = 0
+
+    def predict(self, payload: dict[str, Any]) -> dict[str, Any]:
+        try:
+            request = ReadingRequest.model_validate(payload)
+        except ValidationError as exc:
+            raise BadRequest(_validation_message(exc)) from exc
+        model_uri = request.model_uri or self.default_model_uri
+        if model_uri not in self.allowed_model_uris:
+            raise BadRequest(f"Model {model_uri!r} is not served here")
+        prediction = self.dispatcher.submit(model_uri, request.inputs()).result()
+        return {"model_uri": model_uri, **{key: prediction[key] for key in prediction.keys()}}
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "requests": self.request_latency.snapshot(),
+            "queue_wait": self.dispatcher.queue_latency.snapshot(),
+            "predict": self.dispatcher.predict_latency.snapshot(),
+            "model_load": self.pool.load_latency.snapshot(),
+            "pool": {**self.pool.stats.__dict__, "loaded": self.pool.loaded(), "capacity": self.pool.capacity},
+            "errors": self.errors,
+            "rejected": self.rejected,
+            **({"quota": self.quota.utilization()} if self.quota is not None else {}),
+            **({"http": http} if (http := http_pool_stats()) is not None else {}),
+        }
+
+    def serve(self, host: str = "0.0.0.0", port: int = 8080) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer((host, port), _handler_for(self))
+        server.daemon_threads = True
+        return server
+
+    def close(self) -> None:
+        self.dispatcher.close()
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'request'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _handler_for(app: ReadingServer) -> type[BaseHTTPRequestHandler]:
+    class ReadingRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "loaded": app.pool.loaded()})
+            elif self.path == "/metrics":
+                self._reply(200, app.metrics())
+            else:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self) -> None:
+            if self.path not in ("/predict", "/invocations"):
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+                return
+            started = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(payload, dict):
+                    raise BadRequest("Request body must be a JSON object")
+                self._reply(200, app.predict(payload))
+            except (BadRequest, json.JSONDecodeError) as exc:
+                app.rejected += 1
+                self._reply(400, {"error": str(exc)})
+            except Exception as exc:
+                app.errors += 1
+                self._reply(500, {"error": str(exc)})
+            finally:
+                app.request_latency.observe(time.perf_counter() - started)
+
+        def _reply(self, status: int, body: dict[str, Any]) -> None:
+            data = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # Per-request access logs dominate load tests; latency lives in /metrics instead.
+            pass
+
+    return ReadingRequestHandler
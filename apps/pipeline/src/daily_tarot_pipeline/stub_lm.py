@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import copy
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Literal, Optional
+
+import dspy
+import httpx
+import litellm
+
+STUB_MODEL_NAME = "stub/tarot-reading"
+
+_OUTPUT_SECTION = re.compile(r"Your output fields are:\s*(.*?)(?:\n\n|\Z)", re.DOTALL)
+_FIELD_NAME = re.compile(r"^\s*\d+\.\s*`(\w+)`", re.MULTILINE)
+_CARD_ID = re.compile(r"""['"](?:cardId|card_id)['"]\s*:\s*['"]([\w-]+)['"]""")
+_ORIENTATION = re.compile(r"""['"]orientation['"]\s*:\s*['"](upright|reversed)['"]""")
+_BATCH_REQUESTS = re.compile(r"\[\[ ## requests ## \]\]\s*")
+
+_CANNED_TEXT = {
+    "overview": "The cards suggest a gentle turning point; perhaps consider what is quietly asking for attention.",
+    "synthesis": "Together the spread might invite patience, pairing curiosity with steady, compassionate effort.",
+    "actionable_reflection": "What is one small step you could explore today? Take time to notice how it feels.",
+    "disclaimer": "For reflection and entertainment; not medical or financial advice.",
+}
+
+
+@dataclass
+class StubProfile:
+    """Latency and failure behaviour of the stub LM.
+
+    ``latency_ms`` is the median time to first token: ``fixed`` always waits exactly that long, ``uniform`` draws from
+    ``latency_ms * (1 ± latency_spread)`` and ``lognormal`` uses ``latency_spread`` as sigma, which gives the long tail
+    seen on hosted endpoints. ``ms_per_token`` adds generation time per completion token. ``rate_limit_rate`` and
+    ``error_rate`` inject random 429s and 500s; ``requests_per_minute`` enforces a token bucket like Groq's RPM limit.
+    """
+
+    latency_ms: float = 0.0
+    latency_distribution: Literal["fixed", "uniform", "lognormal"] = "fixed"
+    latency_spread: float = 0.5
+    ms_per_token: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    requests_per_minute: Optional[int] = None
+    seed: int = 0
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "StubProfile":
+        return cls(
+            latency_ms=settings.stub_latency_ms,
+            latency_distribution=settings.stub_latency_distribution,
+            latency_spread=settings.stub_latency_spread,
+            ms_per_token=settings.stub_ms_per_token,
+            error_rate=settings.stub_error_rate,
+            rate_limit_rate=settings.stub_rate_limit_rate,
+            requests_per_minute=settings.stub_requests_per_minute,
+            seed=settings.stub_seed,
+        )
+
+
+@dataclass
+class StubStats:
+    calls: int = 0
+    completed: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    completion_tokens: int = 0
+    sleep_seconds: float = 0.0
+
+
+class StubRateLimitError(litellm.RateLimitError):
+    """429 from the stub; ``retry_after`` mirrors the Retry-After header the HTTP server sends."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(
+            message=f"Rate limit reached for {model}; retry after {retry_after:.2f}s",
+            llm_provider="stub",
+            model=model,
+            response=httpx.Response(429, headers={"retry-after": f"{retry_after:.3f}"}),
+        )
+        self.retry_after = retry_after
+
+
+class StubLM(dspy.LM):
+    """Offline stand-in for the Groq LM that returns schema-valid tarot readings.
+
+    Output fields are read from the ChatAdapter system prompt, so any signature that the pipeline compiles gets a
+    parseable completion. Card ids found in the request are echoed into ``card_breakdowns``. Latency and failures
+    follow ``profile`` and are drawn from a seeded generator, so a run is reproducible for a fixed call order.
+    Failures raise the same litellm exception types the Groq client does. It subclasses ``dspy.LM`` rather than
+    ``BaseLM`` because DSPy only fires ``on_lm_start``/``on_lm_end`` callbacks for ``dspy.LM`` instances.
+    """
+
+    def __init__(
+        self,
+        model: str = STUB_MODEL_NAME,
+        latency_ms: float = 0.0,
+        profile: Optional[StubProfile] = None,
+        **kwargs: Any,
+    ):
+        kwargs.setdefault("cache", False)
+        super().__init__(model=model, **kwargs)
+        self.profile = profile or StubProfile(latency_ms=latency_ms)
+        self.stats = StubStats()
+        self._rng = random.Random(f"stub:{self.profile.seed}")
+        self._lock = threading.Lock()
+        rpm = self.profile.requests_per_minute
+        self._bucket = float(rpm) if rpm else 0.0
+        self._bucket_updated = time.monotonic()
+
+    def __deepcopy__(self, memo: dict) -> "StubLM":
+        """``LM.copy`` deep-copies; copies keep their own kwargs but share the profile, generator and stats."""
+        clone = copy.copy(self)
+        clone.kwargs = copy.deepcopy(self.kwargs, memo)
+        clone.callbacks = list(self.callbacks)
+        clone.history = []
+        return clone
+
+    @property
+    def latency_ms(self) -> float:
+        return self.profile.latency_ms
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        messages = messages or [{"role": "user", "content": prompt or ""}]
+        content = self.complete(messages)
+        response = _completion_response(self.model, content, messages)
+        delay = self._admit(response.usage["completion_tokens"])
+        if delay:
+            time.sleep(delay)
+        # dspy.LM.forward reports usage itself, so overriding it has to as well
+        if dspy.settings.usage_tracker:
+            dspy.settings.usage_tracker.add_usage(self.model, dict(response.usage))
+        return response
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        return self.forward(prompt=prompt, messages=messages, **kwargs)
+
+    def _admit(self, completion_tokens: int) -> float:
+        """Count the call, raise an injected failure or return the seconds the response should take."""
+        profile = self.profile
+        with self._lock:
+            self.stats.calls += 1
+            retry_after = self._take_token()
+            if retry_after is None and profile.rate_limit_rate and self._rng.random() < profile.rate_limit_rate:
+                retry_after = round(self._rng.uniform(0.5, 2.0), 3)
+            if retry_after is not None:
+                self.stats.rate_limited += 1
+                raise StubRateLimitError(self.model, retry_after)
+            if profile.error_rate and self._rng.random() < profile.error_rate:
+                self.stats.errors += 1
+                raise litellm.InternalServerError(
+                    message="Injected stub failure", llm_provider="stub", model=self.model
+                )
+            delay = (self._sample_latency_ms() + profile.ms_per_token * completion_tokens) / 1000
+            self.stats.completed += 1
+            self.stats.completion_tokens += completion_tokens
+            self.stats.sleep_seconds += delay
+        return delay
+
+    def _sample_latency_ms(self) -> float:
+        profile = self.profile
+        if not profile.latency_ms or profile.latency_distribution == "fixed":
+            return profile.latency_ms
+        if profile.latency_distribution == "uniform":
+            spread = profile.latency_ms * profile.latency_spread
+            return max(0.0, self._rng.uniform(profile.latency_ms - spread, profile.latency_ms + spread))
+        return self._rng.lognormvariate(math.log(profile.latency_ms), profile.latency_spread)
+
+    def _take_token(self) -> Optional[float]:
+        """Token bucket refilled at ``requests_per_minute``; returns seconds until a token is available if empty."""
+        rpm = self.profile.requests_per_minute
+        if not rpm:
+            return None
+        now = time.monotonic()
+        self._bucket = min(float(rpm), self._bucket + (now - self._bucket_updated) * rpm / 60)
+        self._bucket_updated = now
+        if self._bucket >= 1:
+            self._bucket -= 1
+            return None
+        return round((1 - self._bucket) * 60 / rpm, 3)
+
+    def complete(self, messages: list[dict[str, Any]]) -> str:
+        """Render a ChatAdapter-formatted completion for the requested output fields."""
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        request = str(messages[-1].get("content", "")) if messages else ""
+        section = _OUTPUT_SECTION.search(system)
+        fields = _FIELD_NAME.findall(section.group(1)) if section else list(_CANNED_TEXT)
+
+        sections = []
+        for name in fields:
+            sections.append(f"[[ ## {name} ## ]]\n{self._field_value(name, request)}")
+        sections.append("[[ ## completed ## ]]")
+        return "\n\n".join(sections)
+
+    def _field_value(self, name: str, request: str) -> str:
+        if name == "card_breakdowns":
+            return json.dumps(_card_breakdowns(request))
+        if name == "readings":
+            # Multi-reading requests (see batched_generation.py): one reading per request, breakdowns from its own cards
+            section = _BATCH_REQUESTS.search(request)
+            requests = json.JSONDecoder().raw_decode(request, section.end())[0] if section else []
+            return json.dumps([
+                {"index": item.get("index", i), **_CANNED_TEXT, "card_breakdowns": _card_breakdowns(json.dumps(item))}
+                for i, item in enumerate(requests)
+            ])
+        return _CANNED_TEXT.get(name, f"Stub {name.replace('_', ' ')}.")
+
+
+def _card_breakdowns(request: str) -> list[dict[str, str]]:
+    card_ids = _CARD_ID.findall(request) or ["00-fool"]
+    orientations = _ORIENTATION.findall(request)
+    return [
+        {
+            "cardId": card_id,
+            "orientation": orientations[i] if i < len(orientations) else "upright",
+            "summary": f"{card_id} points toward a theme worth exploring with curiosity.",
+        }
+        for i, card_id in enumerate(card_ids)
+    ]
+
+
+def _completion_response(model: str, content: str, messages: list[dict[str, Any]]) -> SimpleNamespace:
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+    completion_tokens = len(content) // 4
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=None), finish_reason="stop")],
+        usage={
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    )
+
+
+class StubLMServer:
+    """OpenAI-compatible chat completions endpoint backed by a :class:`StubLM`.
+
+    Point ``dspy.LM("openai/<anything>", api_base="http://host:port/v1")`` at it to exercise the real litellm HTTP
+    client, retries and Retry-After handling without network access.
+    """
+
+    def __init__(self, lm: Optional[StubLM] = None):
+        self.lm = lm or StubLM()
+
+    def chat_completion(self, payload: dict[str, Any]) -> dict[str, Any]:
+        response = self.lm.forward(messages=payload.get("messages") or [])
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model") or self.lm.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": response.choices[0].message.content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": response.usage,
+        }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8089) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer((host, port), _handler_for(self))
+        server.daemon_threads = True
+        return server
+
+
+def _handler_for(app: StubLMServer) -> type[BaseHTTPRequestHandler]:
+    class StubRequestHandler(BaseHTTPRequestHandler):
+        # Keep connections open between requests, as the Groq API does; without Nagle, so the body written after the
+        # headers is not held back for the client's delayed ACK
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            if self.path in ("/v1/models", "/models"):
+                self._reply(200, {"object": "list", "data": [{"id": app.lm.model, "object": "model"}]})
+            elif self.path == "/metrics":
+                self._reply(200, app.lm.stats.__dict__)
+            else:
+                self._reply(404, _error_body(f"Unknown path {self.path}", "not_found"))
+
+        def do_POST(self) -> None:
+            if self.path not in ("/v1/chat/completions", "/chat/completions"):
+                self._reply(404, _error_body(f"Unknown path {self.path}", "not_found"))
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                self._reply(200, app.chat_completion(json.loads(self.rfile.read(length) or b"{}")))
+            except StubRateLimitError as exc:
+                self._reply(429, _error_body(str(exc), "rate_limit_exceeded"),
+                            {"Retry-After": f"{math.ceil(exc.retry_after)}"})
+            except Exception as exc:
+                self._reply(500, _error_body(str(exc), "server_error"))
+
+        def _reply(self, status: int, body: dict[str, Any], headers: Optional[dict[str, str]] = None) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return StubRequestHandler
+
+
+def _error_body(message: str, code: str) -> dict[str, Any]:
+    return {"error": {"message": message, "type": code, "code": code}}
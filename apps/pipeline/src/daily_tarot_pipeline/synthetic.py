@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, Optional
+
+from .deck import DECK, SPREAD_POSITIONS, TarotCard
+from .models import CardBreakdown, CardDraw, FeedbackRecord, ReadingRecord
+
+# Every tone_enum value; "warm-analytical" is the web app's default
+TONES = ("reflective", "direct", "inspirational", "cautious", "warm-analytical")
+SPREAD_WEIGHTS = {"single": 0.5, "three-card": 0.4, "celtic-cross": 0.1}
+# Token windows scored by evaluate.metrics.length_window_metric
+LENGTH_WINDOWS = {"single": (100, 300), "three-card": (200, 500), "celtic-cross": (400, 800)}
+MODELS = ("groq/openai/gpt-oss-20b", "groq/openai/gpt-oss-120b")
+DISCLAIMER = "This reading is for reflection and entertainment, not medical, legal or financial advice."
+
+_INTENTS = (
+    "What should I focus on at work this week?",
+    "How can I support a friend who is struggling?",
+    "Where is my creative energy best spent?",
+    "What am I not seeing about this relationship?",
+    "How do I approach a difficult conversation?",
+    "What does this new chapter ask of me?",
+)
+_FILLER = (
+    "Notice where this energy already shows up in small, ordinary moments.",
+    "There may be an invitation here to slow down and listen more closely.",
+    "Consider how past patterns could be gently rewritten rather than repeated.",
+    "Perhaps the clearest path forward is the one you keep circling back to.",
+    "Trust could grow from steady, modest steps instead of a single leap.",
+    "Explore what feels nourishing and what merely feels familiar.",
+    "The cards suggest a season of integration rather than dramatic change.",
+    "Compassion for yourself might open room for compassion toward others.",
+)
+_REFLECTIONS = (
+    "What is one small action you could take today to honor this?",
+    "Where might you practice patience before deciding?",
+    "How could you make space this week to reflect on what matters most?",
+    "Which conversation have you been postponing, and what would help you begin it?",
+)
+_RATIONALES_UP = ("Felt very relevant.", "Loved the reflection prompt.", "Clear and kind.", None)
+_RATIONALES_DOWN = ("Too generic.", "Too long.", "Did not match my question.", None)
+
+
+@dataclass
+class SyntheticConfig:
+    readings: int = 10_000
+    users: int = 1_000
+    seed: int = 0
+    start: datetime = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    days: int = 90
+    feedback_rate: float = 0.3
+    positive_rate: float = 0.7
+    intent_rate: float = 0.6
+    # Share of readings whose length falls inside the spread's token window; the rest over- or undershoot it
+    in_window_rate: float = 0.85
+    prompt_versions: tuple[str, ...] = ("v1", "v2")
+
+
+def synthetic_user_ids(config: SyntheticConfig) -> list[str]:
+    rng = random.Random(f"users:{config.seed}")
+    return [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(config.users)]
+
+
+def generate_readings(config: SyntheticConfig) -> Iterator[ReadingRecord]:
+    """Deterministic stream of readings; the same config always yields the same records."""
+    rng = random.Random(f"readings:{config.seed}")
+    users = synthetic_user_ids(config)
+    spreads, weights = list(SPREAD_WEIGHTS), list(SPREAD_WEIGHTS.values())
+    span_seconds = config.days * 86400
+    for index in range(config.readings):
+        spread_type = rng.choices(spreads, weights)[0]
+        positions = SPREAD_POSITIONS[spread_type]
+        drawn = rng.sample(DECK, len(positions))
+        orientations = ["reversed" if rng.random() < 0.5 else "upright" for _ in drawn]
+        user_id = rng.choice(users)
+        created_at = config.start + timedelta(seconds=rng.random() * span_seconds)
+        iso_date = created_at.date().isoformat()
+        tone = rng.choice(TONES)
+        overview, synthesis, reflection = _reading_text(rng, config, spread_type, drawn, orientations, positions)
+        yield ReadingRecord(
+            id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            user_id=user_id,
+            iso_date=iso_date,
+            spread_type=spread_type,
+            hmac=hashlib.sha256(f"{user_id}:{iso_date}:{index}".encode()).hexdigest(),
+            intent=rng.choice(_INTENTS) if rng.random() < config.intent_rate else None,
+            cards=[
+                CardDraw(card_id=card.id, orientation=orientation, position=position)
+                for card, orientation, position in zip(drawn, orientations, positions)
+            ],
+            prompt_version=rng.choice(config.prompt_versions),
+            overview=overview,
+            card_breakdowns=[
+                CardBreakdown(card_id=card.id, orientation=orientation, summary=_meaning(card, orientation))
+                for card, orientation in zip(drawn, orientations)
+            ],
+            synthesis=synthesis,
+            actionable_reflection=reflection,
+            tone=tone,
+            model=rng.choice(MODELS),
+            created_at=created_at,
+        )
+
+
+def generate_feedback(readings: Iterable[ReadingRecord], config: SyntheticConfig) -> Iterator[FeedbackRecord]:
+    """At most one thumb per reading, left by the reading's user shortly after it was created."""
+    rng = random.Random(f"feedback:{config.seed}")
+    for reading in readings:
+        if rng.random() >= config.feedback_rate:
+            continue
+        positive = rng.random() < config.positive_rate
+        yield FeedbackRecord(
+            reading_id=reading.id,
+            user_id=reading.user_id,
+            thumb=1 if positive else -1,
+            rationale=rng.choice(_RATIONALES_UP if positive else _RATIONALES_DOWN),
+            created_at=reading.created_at + timedelta(minutes=rng.randint(1, 600)),
+        )
+
+
+def reading_to_json(reading: ReadingRecord) -> str:
+    """JSON line readable by ``batch_predict.iter_jsonl_examples``."""
+    return json.dumps(reading.model_dump(mode="json", by_alias=True))
+
+
+class InMemoryStore:
+    """Store stand-in exposing the PostgresStore methods the dataset stages use."""
+
+    def __init__(self, readings: Iterable[ReadingRecord], feedback: Iterable[FeedbackRecord]):
+        self.readings = sorted(readings, key=lambda reading: reading.created_at, reverse=True)
+        self.feedback = sorted(feedback, key=lambda item: item.created_at, reverse=True)
+        # Content-addressed examples and dataset manifests, as in PostgresStore.save_dataset_manifest
+        self.examples: dict[str, str] = {}
+        self.datasets: dict[str, list[str]] = {}
+        self.alerts: list[dict[str, Any]] = []
+        self._by_id = {reading.id: reading for reading in self.readings}
+
+    def fetch_readings(self, limit: int = 1000, since: Optional[datetime] = None) -> list[ReadingRecord]:
+        rows = self.readings if since is None else [r for r in self.readings if r.created_at >= since]
+        return rows[:limit]
+
+    def fetch_feedback(self, limit: int = 1000, since: Optional[datetime] = None) -> list[FeedbackRecord]:
+        rows = self.feedback if since is None else [f for f in self.feedback if f.created_at >= since]
+        return rows[:limit]
+
+    def save_dataset_manifest(self, name: str, hashes: list[str], examples: dict[str, str]) -> int:
+        new = [example_hash for example_hash in examples if example_hash not in self.examples]
+        self.examples.update((example_hash, examples[example_hash]) for example_hash in new)
+        self.datasets[name] = list(hashes)
+        return len(new)
+
+    def get_dataset_manifest(self, name: str) -> Optional[list[str]]:
+        return self.datasets.get(name)
+
+    def get_training_dataset(self, name: str) -> Optional[list[dict]]:
+        manifest = self.datasets.get(name)
+        return None if manifest is None else [json.loads(self.examples[example_hash]) for example_hash in manifest]
+
+    def fetch_training_examples(self, hashes: list[str]) -> dict[str, dict]:
+        return {example_hash: json.loads(self.examples[example_hash]) for example_hash in dict.fromkeys(hashes)}
+
+    def fetch_readings_by_ids(self, ids: list[str]) -> list[ReadingRecord]:
+        return sorted((self._by_id[id] for id in ids if id in self._by_id), key=lambda reading: reading.created_at)
+
+    def fetch_feedback_thumbs(self, reading_ids: list[str]) -> list[dict[str, Any]]:
+        wanted = set(reading_ids)
+        latest = {}
+        for item in self.feedback:
+            if item.reading_id in wanted:
+                latest.setdefault(item.reading_id, item)
+        return [{"reading_id": id, "prompt_version": self._by_id[id].prompt_version, "thumb": item.thumb}
+                for id, item in latest.items()]
+
+    def insert_alert(self, type: str, message: str, metadata: Optional[dict[str, Any]] = None) -> None:
+        self.alerts.append({"type": type, "message": message, "metadata": metadata})
+
+
+def _meaning(card: TarotCard, orientation: str) -> str:
+    return card.upright_meaning if orientation == "upright" else card.reversed_meaning
+
+
+def _reading_text(
+    rng: random.Random,
+    config: SyntheticConfig,
+    spread_type: str,
+    cards: list[TarotCard],
+    orientations: list[str],
+    positions: tuple[str, ...],
+) -> tuple[str, str, str]:
+    low, high = LENGTH_WINDOWS[spread_type]
+    if rng.random() < config.in_window_rate:
+        target_tokens = rng.uniform(low, high)
+    else:
+        target_tokens = rng.choice((rng.uniform(low * 0.4, low), rng.uniform(high, high * 1.6)))
+    # length_window_metric estimates tokens as characters / 4 over the three fields
+    budget = int(target_tokens * 4)
+
+    mentions = [
+        f"{card.name} {'reversed' if orientation == 'reversed' else 'upright'} in the {position} position speaks of "
+        f"{_meaning(card, orientation)[0].lower()}{_meaning(card, orientation)[1:]}"
+        for card, orientation, position in zip(cards, orientations, positions)
+    ]
+    reflection = [rng.choice(_REFLECTIONS)]
+    if rng.random() < 0.9:
+        reflection.append(DISCLAIMER)
+    return (
+        _fill(rng, mentions, int(budget * 0.45)),
+        _fill(rng, [], int(budget * 0.35)),
+        _fill(rng, reflection, int(budget * 0.20)),
+    )
+
+
+def _fill(rng: random.Random, sentences: list[str], budget: int) -> str:
+    text = " ".join(sentences)
+    parts = [text] if text else []
+    length = len(text)
+    while length < budget:
+        sentence = rng.choice(_FILLER)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from .postgres_store import PostgresStore
+
+ROLLUP_JOB = "telemetry_rollup"
+
+
+@dataclass
+class RollupResult:
+    windows: list[tuple[datetime, datetime]] = field(default_factory=list)
+    hourly_rows: int = 0
+    daily_rows: int = 0
+    watermark: Optional[datetime] = None
+    retention_cutoff: Optional[datetime] = None
+    deleted: int = 0
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value: datetime) -> datetime:
+    return floor_hour(value).replace(hour=0)
+
+
+def rollup_windows(
+    watermark: datetime,
+    now: datetime,
+    lateness: timedelta = timedelta(minutes=15),
+    max_window: timedelta = timedelta(days=1),
+) -> list[tuple[datetime, datetime]]:
+    """Hour-aligned [start, end) windows from the watermark up to the last hour that can no longer receive events.
+
+    Windows are capped at ``max_window`` so a long backlog commits progress in bounded transactions.
+    """
+    start = floor_hour(watermark)
+    end = floor_hour(now - lateness)
+    windows = []
+    while start < end:
+        stop = min(start + max_window, end)
+        windows.append((start, stop))
+        start = stop
+    return windows
+
+
+def retention_cutoff(watermark: datetime, now: datetime, retention: timedelta) -> datetime:
+    """Raw events older than this can be dropped.
+
+    Never past the start of the watermark's day: the daily rollup of a partially rolled-up day is recounted from raw
+    events on the next run.
+    """
+    return min(now - retention, floor_day(watermark))
+
+
+def run_rollup(
+    store: PostgresStore,
+    now: Optional[datetime] = None,
+    lateness: timedelta = timedelta(minutes=15),
+    retention: Optional[timedelta] = timedelta(days=90),
+    batch_size: int = 10000,
+) -> RollupResult:
+    """Roll raw telemetry up to the current watermark, then delete raw events past the retention window.
+
+    Events that arrive more than ``lateness`` after their timestamp, once their hour has been rolled up, are kept
+    in the raw table but not counted in the rollups.
+    """
+    now = now or datetime.now(timezone.utc)
+    result = RollupResult()
+    committed = store.get_watermark(ROLLUP_JOB)
+    watermark = committed or store.earliest_telemetry_timestamp()
+    if watermark is None:
+        return result
+
+    for start, end in rollup_windows(watermark, now, lateness):
+        counts = store.rollup_telemetry(ROLLUP_JOB, start, end)
+        result.windows.append((start, end))
+        result.hourly_rows += counts["hourly_rows"]
+        result.daily_rows += counts["daily_rows"]
+        watermark = end
+    result.watermark = watermark
+
+    # Only events already covered by a committed watermark are ever deleted
+    if retention is not None and (committed is not None or result.windows):
+        result.retention_cutoff = retention_cutoff(watermark, now, retention)
+        result.deleted = store.delete_telemetry_before(result.retention_cutoff, batch_size)
+    return result
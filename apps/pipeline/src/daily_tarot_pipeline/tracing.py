@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Literal, Optional
+
+import mlflow
+from mlflow.tracking import MlflowClient
+
+from .config import EnvironmentSettings, get_settings
+
+TraceMode = Literal["all", "sampled", "low-score", "off"]
+
+
+@dataclass
+class TraceSamplingStats:
+    """Counters describing how many scored calls were traced, kept and deleted in the current run.
+
+    Head-sampled calls never wrote a trace; tail-pruned and over-cap traces were written and deleted afterwards, so
+    only the former are writes avoided.
+    """
+
+    scored_calls: int = 0
+    head_dropped: int = 0
+    tail_dropped: int = 0
+    cap_dropped: int = 0
+    kept: int = 0
+
+    @property
+    def avoided(self) -> int:
+        """Scored calls whose trace was never written."""
+        return self.head_dropped
+
+    @property
+    def deleted(self) -> int:
+        """Traces written and then deleted by tail sampling or the cap."""
+        return self.tail_dropped + self.cap_dropped
+
+    @property
+    def avoided_ratio(self) -> float:
+        return self.avoided / self.scored_calls if self.scored_calls else 0.0
+
+    @property
+    def deleted_ratio(self) -> float:
+        return self.deleted / self.scored_calls if self.scored_calls else 0.0
+
+    def as_metrics(self) -> dict[str, float]:
+        return {
+            "trace_scored_calls": float(self.scored_calls),
+            "trace_kept": float(self.kept),
+            "trace_head_dropped": float(self.head_dropped),
+            "trace_tail_dropped": float(self.tail_dropped),
+            "trace_cap_dropped": float(self.cap_dropped),
+            "trace_avoided_ratio": self.avoided_ratio,
+            "trace_deleted_ratio": self.deleted_ratio,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"Traces kept {self.kept}/{self.scored_calls} scored calls: {self.avoided} never written "
+            f"(head-sampled out, {self.avoided_ratio:.0%}), {self.deleted} written then deleted "
+            f"({self.tail_dropped} by score, {self.cap_dropped} over cap)"
+        )
+
+
+@dataclass
+class TraceSampler:
+    """Head/tail sampling policy for DSPy autolog traces.
+
+    Head sampling is delegated to MLflow's tracer (``MLFLOW_TRACE_SAMPLING_RATIO``) so sampled-out
+    calls never serialize spans. Tail sampling happens after scoring: metric wrappers record the score
+    of the trace each prediction produced and ``prune`` deletes traces that scored above the threshold
+    or exceed the per-run cap, keeping the lowest-scoring ones.
+
+    Only scored traces are counted, pruned and capped. Traces a compile writes without scoring them
+    (demo bootstrapping, instruction proposals) are kept as head sampling left them. ``reset`` starts
+    the counters and the cap over for a new run.
+    """
+
+    mode: TraceMode = "sampled"
+    sample_rate: float = 0.1
+    score_threshold: float = 0.5
+    max_traces: int = 200
+    stats: TraceSamplingStats = field(default_factory=TraceSamplingStats)
+    _scores: dict[str, float] = field(default_factory=dict, repr=False)
+    _seen: set[str] = field(default_factory=set, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if not 0.0 <= self.sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be within [0, 1], got {self.sample_rate}")
+
+    @classmethod
+    def from_settings(cls, settings: EnvironmentSettings) -> "TraceSampler":
+        return cls(
+            mode=settings.trace_mode,
+            sample_rate=settings.trace_sample_rate,
+            score_threshold=settings.trace_score_threshold,
+            max_traces=settings.trace_max_per_run,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def head_ratio(self) -> float:
+        """Fraction of root spans MLflow should record before any score is known."""
+        if self.mode == "off":
+            return 0.0
+        if self.mode == "sampled":
+            return self.sample_rate
+        return 1.0
+
+    def reset(self) -> None:
+        """Forget the scores, seen traces and counters of the previous run."""
+        with self._lock:
+            self.stats = TraceSamplingStats()
+            self._scores.clear()
+            self._seen.clear()
+
+    def wrap_metric(self, metric_fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a DSPy metric so every score is attributed to the trace of its prediction."""
+
+        def sampled_metric(example, prediction, trace=None):
+            score = metric_fn(example, prediction, trace)
+            self.record(mlflow.get_last_active_trace_id(thread_local=True), score)
+            return score
+
+        return sampled_metric
+
+    def record(self, trace_id: Optional[str], score: Any) -> None:
+        with self._lock:
+            self.stats.scored_calls += 1
+            if trace_id is None or trace_id in self._seen:
+                # No new trace was started for this call, so the head sampler dropped it.
+                self.stats.head_dropped += 1
+                return
+            self._seen.add(trace_id)
+            try:
+                self._scores[trace_id] = float(score)
+            except (TypeError, ValueError):
+                self._scores[trace_id] = 0.0
+
+    def select_for_deletion(self) -> tuple[list[str], list[str]]:
+        """Return (tail-pruned, over-cap) trace ids given the scores recorded so far."""
+        ranked = sorted(self._scores.items(), key=lambda item: item[1])
+        if self.mode == "low-score":
+            tail = [trace_id for trace_id, score in ranked if score > self.score_threshold]
+            ranked = [(trace_id, score) for trace_id, score in ranked if score <= self.score_threshold]
+        else:
+            tail = []
+        if self.max_traces > 0:
+            budget = max(0, self.max_traces - self.stats.kept)
+            over_cap = [trace_id for trace_id, _ in ranked[budget:]]
+        else:
+            over_cap = []
+        return tail, over_cap
+
+    def prune(self, experiment_id: Optional[str] = None) -> TraceSamplingStats:
+        """Delete traces that tail sampling or the cap rejected, then reset recorded scores."""
+        tail, over_cap = self.select_for_deletion()
+        doomed = tail + over_cap
+        if doomed:
+            experiment_id = experiment_id or _active_experiment_id()
+            client = MlflowClient()
+            # The tracking store caps the number of ids per request.
+            for start in range(0, len(doomed), 100):
+                client.delete_traces(experiment_id, trace_ids=doomed[start:start + 100])
+        with self._lock:
+            self.stats.tail_dropped += len(tail)
+            self.stats.cap_dropped += len(over_cap)
+            self.stats.kept += len(self._scores) - len(doomed)
+            self._scores.clear()
+        return self.stats
+
+
+def _active_experiment_id() -> str:
+    run = mlflow.active_run()
+    if run is not None:
+        return run.info.experiment_id
+    from mlflow.tracking.fluent import _get_experiment_id
+
+    return _get_experiment_id()
+
+
+@lru_cache()
+def get_trace_sampler() -> TraceSampler:
+    """Process-wide sampler so compile and eval traces share one per-run budget."""
+    return TraceSampler.from_settings(get_settings())
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from .models import UsageAggregate
+
+# Model name of aggregates built from batch-predict output rather than groq_usage
+BATCH_PREDICT_MODEL = "batch-predict"
+_OUTPUT_FIELDS = ("overview", "card_breakdowns", "synthesis", "actionable_reflection")
+
+# Fields compared between prompt versions, and whether higher is worse
+REGRESSION_FIELDS = {
+    "p95_latency_ms": True,
+    "avg_completion_tokens": True,
+    "avg_cost_cents": True,
+    "tokens_per_second": False,
+}
+
+
+@dataclass
+class UsageRegression:
+    model: str
+    prompt_version: str
+    baseline_version: str
+    field: str
+    baseline: float
+    candidate: float
+
+    @property
+    def change(self) -> float:
+        return (self.candidate - self.baseline) / self.baseline if self.baseline else float("inf")
+
+    def describe(self) -> str:
+        return (
+            f"{self.model} prompt {self.prompt_version}: {self.field} {self.baseline:.1f} -> {self.candidate:.1f} "
+            f"({self.change:+.0%} vs {self.baseline_version})"
+        )
+
+
+def find_regressions(
+    aggregates: Iterable[UsageAggregate],
+    baseline_version: str,
+    tolerance: float = 0.10,
+    min_calls: int = 20,
+) -> list[UsageRegression]:
+    """Flag prompt versions whose latency, token use or cost is worse than the baseline on the same model.
+
+    Versions with fewer than ``min_calls`` calls are skipped so a handful of slow canary requests cannot block a
+    promotion on their own.
+    """
+    aggregates = list(aggregates)
+    baselines = {agg.model: agg for agg in aggregates if agg.prompt_version == baseline_version}
+    regressions = []
+    for agg in aggregates:
+        if agg.prompt_version in (None, baseline_version) or agg.calls < min_calls:
+            continue
+        baseline = baselines.get(agg.model)
+        if baseline is None or baseline.calls < min_calls:
+            continue
+        for field, higher_is_worse in REGRESSION_FIELDS.items():
+            base_value, cand_value = getattr(baseline, field), getattr(agg, field)
+            if not base_value:
+                continue
+            change = (cand_value - base_value) / base_value
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append(UsageRegression(
+                    model=agg.model,
+                    prompt_version=agg.prompt_version,
+                    baseline_version=baseline_version,
+                    field=field,
+                    baseline=base_value,
+                    candidate=cand_value,
+                ))
+    return regressions
+
+
+def uncompared_versions(
+    aggregates: Iterable[UsageAggregate],
+    baseline_version: str,
+    min_calls: int = 20,
+) -> list[str]:
+    """Why each aggregate ``find_regressions`` skips was not compared, so an empty result is not mistaken for a pass."""
+    aggregates = list(aggregates)
+    baselines = {agg.model: agg for agg in aggregates if agg.prompt_version == baseline_version}
+    reasons = []
+    for agg in aggregates:
+        if agg.prompt_version in (None, baseline_version):
+            continue
+        baseline = baselines.get(agg.model)
+        if agg.calls < min_calls:
+            reasons.append(f"{agg.model} prompt {agg.prompt_version}: {agg.calls} calls, fewer than {min_calls}")
+        elif baseline is None:
+            reasons.append(f"{agg.model} prompt {agg.prompt_version}: no {baseline_version} calls on this model")
+        elif baseline.calls < min_calls:
+            reasons.append(f"{agg.model} prompt {agg.prompt_version}: {baseline_version} has {baseline.calls} calls, "
+                           f"fewer than {min_calls}")
+    return reasons
+
+
+def batch_usage(output_dir: Path, prompt_version: str) -> UsageAggregate:
+    """Latency and completion-token aggregate of the successful rows of one batch-predict output.
+
+    batch-predict records latency but no token usage, so completion tokens are estimated at ~4 characters per token
+    and cost is left at 0, which ``find_regressions`` skips.
+    """
+    from .batch_predict import read_predictions
+
+    rows = [row for row in read_predictions(output_dir).to_pylist() if row["status"] == "ok"]
+    latencies = np.array([row["latency_ms"] or 0.0 for row in rows], dtype=np.float64)
+    tokens = np.array([sum(len(row[field] or "") for field in _OUTPUT_FIELDS) // 4 for row in rows], dtype=np.float64)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if rows else (0.0, 0.0, 0.0)
+    return UsageAggregate(
+        model=BATCH_PREDICT_MODEL,
+        prompt_version=prompt_version,
+        calls=len(rows),
+        p50_latency_ms=float(p50),
+        p95_latency_ms=float(p95),
+        p99_latency_ms=float(p99),
+        avg_prompt_tokens=0.0,
+        avg_completion_tokens=float(tokens.mean()) if rows else 0.0,
+        tokens_per_second=float(tokens.sum() / latencies.sum() * 1000) if latencies.sum() else 0.0,
+        avg_cost_cents=0.0,
+        total_cost_cents=0.0,
+    )
+
+
+def batch_regressions(baseline_dir: Path, candidate_dir: Path, tolerance: float = 0.10,
+                      min_calls: int = 20) -> list[UsageRegression]:
+    """Regressions of a candidate prompt's batch-predict run against the baseline's over the same dataset.
+
+    A candidate has no serving traffic in groq_usage before it is promoted, so ``prompt promote`` gates on the
+    offline runs it already compares for quality. Raises ``ValueError`` when either run has fewer than ``min_calls``
+    successful rows, since the gate could not have found a regression.
+    """
+    aggregates = [batch_usage(baseline_dir, "baseline"), batch_usage(candidate_dir, "candidate")]
+    uncompared = uncompared_versions(aggregates, "baseline", min_calls)
+    if uncompared:
+        raise ValueError(f"Batch-predict usage not compared: {'; '.join(uncompared)}")
+    return find_regressions(aggregates, "baseline", tolerance, min_calls)
+
+
+def usage_metrics(aggregates: Iterable[UsageAggregate]) -> dict[str, float]:
+    """Flatten aggregates into MLflow metric names like ``usage.gpt_oss_20b.v1.p95_latency_ms``."""
+    metrics = {}
+    for agg in aggregates:
+        prefix = f"usage.{_metric_key(agg.model)}.{_metric_key(agg.prompt_version or 'unknown')}"
+        for field in ("calls", "p50_latency_ms", "p95_latency_ms", "p99_latency_ms", "avg_completion_tokens",
+                      "tokens_per_second", "avg_cost_cents", "total_cost_cents"):
+            metrics[f"{prefix}.{field}"] = float(getattr(agg, field))
+    return metrics
+
+
+def _metric_key(value: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_\-.]+", "_", value.removeprefix("groq/").removeprefix("openai/"))
@@ -0,0 +1,273 @@
+"""Near-real-time quality scoring of new readings and feedback.
+
+Inserts into ``readings`` and ``feedback`` fire ``NOTIFY tarot_quality`` with the reading id (see
+``PostgresStore._create_quality_triggers``). ``QualityWatcher`` buffers the ids, fetches and scores them in
+micro-batches with the metric suite and keeps rolling aggregates per prompt version. When a version's recent window
+falls well below its own earlier readings, or too many of its recent readings get a thumbs-down, it raises a row in
+``alerts``. Memory stays bounded by the batch size, the window length and the number of tracked prompt versions,
+however long the worker runs.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Optional, Protocol
+
+from .datasets import _to_training_example
+from .evaluate.metrics import METRIC_FUNCTIONS, example_scores
+from .models import ReadingRecord
+from .postgres_store import QUALITY_WATCH_CHANNEL, PostgresStore
+
+logger = logging.getLogger(__name__)
+
+WATCH_JOB = "quality_watch"
+_DIMENSIONS = (*METRIC_FUNCTIONS, "composite")
+
+
+class WatchSource(Protocol):
+    def fetch_readings_by_ids(self, ids: list[str]) -> list[ReadingRecord]: ...
+
+    def fetch_feedback_thumbs(self, reading_ids: list[str]) -> list[dict[str, Any]]: ...
+
+    def insert_alert(self, type: str, message: str, metadata: Optional[dict[str, Any]] = None) -> None: ...
+
+
+class VersionQuality:
+    """Rolling quality of one prompt version: the last ``window`` score vectors and thumbs, and a running mean of the
+    composite scores that have left the window, which serves as the version's baseline."""
+
+    def __init__(self, window: int):
+        self.scores: deque[dict[str, float]] = deque(maxlen=window)
+        self.thumbs: deque[int] = deque(maxlen=window)
+        self.history_sum = 0.0
+        self.history_count = 0
+        self.last_alert: dict[str, datetime] = {}
+
+    def add_scores(self, scores: dict[str, float]) -> None:
+        if len(self.scores) == self.scores.maxlen:
+            self.history_sum += self.scores[0]["composite"]
+            self.history_count += 1
+        self.scores.append(scores)
+
+    def mean(self, dimension: str = "composite") -> Optional[float]:
+        if not self.scores:
+            return None
+        return sum(scores[dimension] for scores in self.scores) / len(self.scores)
+
+    @property
+    def baseline(self) -> Optional[float]:
+        return self.history_sum / self.history_count if self.history_count else None
+
+    @property
+    def thumbs_down_rate(self) -> Optional[float]:
+        return sum(thumb < 0 for thumb in self.thumbs) / len(self.thumbs) if self.thumbs else None
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "window": len(self.scores),
+            "means": {name: self.mean(name) for name in _DIMENSIONS} if self.scores else {},
+            "baseline": self.baseline,
+            "scored": len(self.scores) + self.history_count,
+            "feedback": len(self.thumbs),
+            "thumbs_down_rate": self.thumbs_down_rate,
+        }
+
+
+@dataclass
+class WatchStats:
+    notifications: int = 0
+    batches: int = 0
+    readings: int = 0
+    feedback: int = 0
+    alerts: int = 0
+    fetch_s: float = 0.0
+    score_s: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.readings / self.score_s if self.score_s else 0.0
+        return (f"{self.readings} readings and {self.feedback} thumbs in {self.batches} batches over {elapsed:.0f}s; "
+                f"{self.alerts} alerts; scoring {rate:,.0f} readings/s, fetch {self.fetch_s:.2f}s")
+
+
+class QualityWatcher:
+    """Micro-batches notified reading ids, scores them and raises alerts on per-prompt-version quality drops."""
+
+    def __init__(
+        self,
+        source: WatchSource,
+        batch_size: int = 200,
+        window: int = 200,
+        max_drop: float = 0.1,
+        max_thumbs_down_rate: float = 0.5,
+        cooldown: timedelta = timedelta(hours=1),
+        max_versions: int = 32,
+    ):
+        self.source = source
+        self.batch_size = batch_size
+        self.window = window
+        self.max_drop = max_drop
+        self.max_thumbs_down_rate = max_thumbs_down_rate
+        self.cooldown = cooldown
+        self.max_versions = max_versions
+        self.versions: OrderedDict[str, VersionQuality] = OrderedDict()
+        # Insertion-ordered sets, so duplicate notifications of one row are scored once per batch
+        self.pending_readings: dict[str, None] = {}
+        self.pending_feedback: dict[str, None] = {}
+        # Readings already scored by the startup catch-up whose notifications may still be queued
+        self.skip: set[str] = set()
+        self.watermark: Optional[datetime] = None
+        self.stats = WatchStats()
+
+    @property
+    def pending(self) -> int:
+        return len(self.pending_readings) + len(self.pending_feedback)
+
+    def notify(self, payload: str) -> bool:
+        """Queue one notification; True once a full batch is pending."""
+        self.stats.notifications += 1
+        try:
+            event = json.loads(payload)
+            if event["table"] == "feedback":
+                self.pending_feedback[event["reading_id"]] = None
+            elif event["reading_id"] not in self.skip:
+                self.pending_readings[event["reading_id"]] = None
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed %s notification: %r", QUALITY_WATCH_CHANNEL, payload)
+        return self.pending >= self.batch_size
+
+    def flush(self, now: Optional[datetime] = None) -> list[dict[str, Any]]:
+        """Score everything pending and return the alerts raised."""
+        reading_ids, self.pending_readings = list(self.pending_readings), {}
+        feedback_ids, self.pending_feedback = list(self.pending_feedback), {}
+        if not reading_ids and not feedback_ids:
+            return []
+        started = time.perf_counter()
+        readings = self.source.fetch_readings_by_ids(reading_ids)
+        thumbs = self.source.fetch_feedback_thumbs(feedback_ids)
+        self.stats.fetch_s += time.perf_counter() - started
+
+        touched = self.score(readings)
+        for row in thumbs:
+            self._version(row["prompt_version"]).thumbs.append(row["thumb"])
+            touched.add(row["prompt_version"])
+        self.stats.batches += 1
+        self.stats.feedback += len(thumbs)
+        return self._check(touched, now or datetime.now(timezone.utc))
+
+    def score(self, readings: Iterable[ReadingRecord]) -> set[str]:
+        """Add readings to their versions' windows; returns the versions touched."""
+        started = time.perf_counter()
+        touched = set()
+        count = 0
+        for reading in readings:
+            self._version(reading.prompt_version).add_scores(example_scores(_to_training_example(reading, None)))
+            touched.add(reading.prompt_version)
+            if self.watermark is None or reading.created_at > self.watermark:
+                self.watermark = reading.created_at
+            count += 1
+        self.stats.score_s += time.perf_counter() - started
+        self.stats.readings += count
+        return touched
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        return {version: quality.summary() for version, quality in self.versions.items()}
+
+    def _version(self, prompt_version: str) -> VersionQuality:
+        quality = self.versions.get(prompt_version)
+        if quality is None:
+            quality = self.versions[prompt_version] = VersionQuality(self.window)
+            while len(self.versions) > self.max_versions:
+                self.versions.popitem(last=False)
+        self.versions.move_to_end(prompt_version)
+        return quality
+
+    def _check(self, versions: Iterable[str], now: datetime) -> list[dict[str, Any]]:
+        alerts = []
+        for version in sorted(versions):
+            quality = self.versions.get(version)
+            if quality is None:
+                continue
+            mean, baseline = quality.mean(), quality.baseline
+            # Only compare a full window against a baseline of at least one full window
+            if (len(quality.scores) == self.window and quality.history_count >= self.window
+                    and baseline - mean > self.max_drop):
+                alerts.append(self._alert(
+                    quality, now, "quality_drop",
+                    f"Prompt version {version}: composite score of the last {self.window} readings fell to "
+                    f"{mean:.3f} from {baseline:.3f}",
+                    version,
+                ))
+            rate = quality.thumbs_down_rate
+            if len(quality.thumbs) == self.window and rate > self.max_thumbs_down_rate:
+                alerts.append(self._alert(
+                    quality, now, "thumbs_down_rate",
+                    f"Prompt version {version}: {rate:.0%} of the last {self.window} rated readings got a thumbs-down",
+                    version,
+                ))
+        return [alert for alert in alerts if alert is not None]
+
+    def _alert(self, quality: VersionQuality, now: datetime, kind: str, message: str,
+               version: str) -> Optional[dict[str, Any]]:
+        last = quality.last_alert.get(kind)
+        if last is not None and now - last < self.cooldown:
+            return None
+        quality.last_alert[kind] = now
+        alert = {"type": kind, "message": message, "metadata": {"prompt_version": version, **quality.summary()}}
+        self.source.insert_alert(**alert)
+        self.stats.alerts += 1
+        return alert
+
+
+def run_watch(
+    store: PostgresStore,
+    watcher: QualityWatcher,
+    max_wait_s: float = 2.0,
+    backfill_limit: int = 10000,
+    should_stop: Callable[[], bool] = lambda: False,
+    on_flush: Optional[Callable[[list[dict[str, Any]]], None]] = None,
+) -> None:
+    """Listen for inserts and score them in batches of ``watcher.batch_size`` or every ``max_wait_s``.
+
+    Readings inserted since the last committed watermark, while the worker was down, are scored first. The watermark
+    advances after each batch, so a restart neither rescans history nor misses more than one batch.
+    """
+    with store.listen(QUALITY_WATCH_CHANNEL) as conn:
+        watermark = store.get_watermark(WATCH_JOB)
+        # Subscribed before the catch-up query, so nothing falls in between; rows seen by both are scored once
+        if watermark is not None:
+            ids = store.fetch_reading_ids_since(watermark, limit=backfill_limit)
+            watcher.skip = set(ids)
+            for start in range(0, len(ids), watcher.batch_size):
+                watcher.pending_readings.update(dict.fromkeys(ids[start:start + watcher.batch_size]))
+                _flush(store, watcher, on_flush)
+
+        deadline = None
+        while not should_stop():
+            timeout = max_wait_s if deadline is None else max(deadline - time.monotonic(), 0.0)
+            received = 0
+            for notification in conn.notifies(timeout=timeout, stop_after=watcher.batch_size - watcher.pending):
+                received += 1
+                watcher.notify(notification.payload)
+            if not received:
+                # The queue has drained past everything inserted during the catch-up
+                watcher.skip = set()
+            if watcher.pending and deadline is None:
+                deadline = time.monotonic() + max_wait_s
+            if watcher.pending >= watcher.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                _flush(store, watcher, on_flush)
+                deadline = None
+
+
+def _flush(store: PostgresStore, watcher: QualityWatcher,
+           on_flush: Optional[Callable[[list[dict[str, Any]]], None]]) -> None:
+    alerts = watcher.flush()
+    if watcher.watermark is not None:
+        store.set_watermark(WATCH_JOB, watcher.watermark)
+    if on_flush is not None:
+        on_flush(alerts)
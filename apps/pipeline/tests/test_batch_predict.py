@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from daily_tarot_pipeline.batch_predict import example_row_id, read_predictions, run_batch_predict
+from daily_tarot_pipeline.models import CardBreakdown, CardDraw, TrainingExample
+from daily_tarot_pipeline.stub_lm import StubLM
+
+
+def _example(intent: str) -> TrainingExample:
+    return TrainingExample(
+        intent=intent,
+        spread_type="single",
+        cards=[CardDraw(card_id="00-fool", orientation="upright", position="present")],
+        overview="The Fool opens possibilities.",
+        card_breakdowns=[CardBreakdown(card_id="00-fool", orientation="upright", summary="New journey")],
+        synthesis="Trust the start.",
+        actionable_reflection="Take one concrete step.",
+        tone="warm",
+        prompt_version="v1",
+    )
+
+
+def test_rerun_retries_only_failed_rows(tmp_path):
+    examples = [_example(f"intent {i}") for i in range(10)]
+    attempts: dict[str, int] = {}
+    calls = []
+
+    def flaky_module(intent, spread_type, cards, tone):
+        calls.append(intent)
+        attempts[intent] = attempts.get(intent, 0) + 1
+        if intent in {"intent 3", "intent 7"} and attempts[intent] == 1:
+            raise RuntimeError("rate limited")
+        return SimpleNamespace(overview="o", card_breakdowns=[], synthesis="s", actionable_reflection="a")
+
+    first = run_batch_predict(examples, flaky_module, StubLM(), tmp_path, label="v1", concurrency=3, flush_rows=4)
+    assert (first.succeeded, first.failed, first.parts_written) == (8, 2, 3)
+
+    calls.clear()
+    second = run_batch_predict(examples, flaky_module, StubLM(), tmp_path, label="v1", concurrency=3)
+    assert sorted(calls) == ["intent 3", "intent 7"]
+    assert (second.succeeded, second.skipped) == (2, 8)
+
+    table = read_predictions(tmp_path)
+    assert table.num_rows == 10
+    assert set(table.column("status").to_pylist()) == {"ok"}
+
+
+def test_row_ids_follow_content_not_position(tmp_path):
+    examples = [_example(f"intent {i}") for i in range(4)]
+    module = lambda **_: SimpleNamespace(overview="o", card_breakdowns=[], synthesis="s", actionable_reflection="a")
+    run_batch_predict(examples, module, StubLM(), tmp_path, label="v1")
+
+    calls = []
+
+    def counting_module(intent, spread_type, cards, tone):
+        calls.append(intent)
+        return module()
+
+    # Dropping the first row and appending a new one only predicts the new row
+    rerun = run_batch_predict([*examples[1:], _example("intent 4")], counting_module, StubLM(), tmp_path, label="v1")
+    assert calls == ["intent 4"]
+    assert (rerun.succeeded, rerun.skipped) == (1, 3)
+    assert example_row_id(examples[1]) == example_row_id(_example("intent 1"))
@@ -0,0 +1,61 @@
+import json
+
+import dspy
+
+from daily_tarot_pipeline.batch_predict import read_predictions, run_batch_predict
+from daily_tarot_pipeline.batched_generation import BatchedReadingGenerator
+from daily_tarot_pipeline.datasets import Dataset, build_training_examples
+from daily_tarot_pipeline.optimizers.mipro import TarotReadingModule
+from daily_tarot_pipeline.stub_lm import StubLM
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+
+class PartialBatchLM(StubLM):
+    """Drops the second reading of every batch and blanks the overview of the third."""
+
+    def _field_value(self, name, request):
+        value = super()._field_value(name, request)
+        if name != "readings":
+            return value
+        readings = json.loads(value)
+        for reading in readings:
+            if reading["index"] == 2:
+                reading["overview"] = ""
+        return json.dumps([reading for reading in readings if reading["index"] != 1])
+
+
+def _examples(count: int) -> Dataset:
+    readings = list(generate_readings(SyntheticConfig(readings=count, seed=5)))
+    return Dataset.of(build_training_examples(InMemoryStore(readings, []), limit=count))
+
+
+def test_batches_share_one_request_and_invalid_readings_fall_back():
+    examples = _examples(10).to_dspy()
+    module = TarotReadingModule()
+    module.generator.demos = examples[:2]
+    inputs = [example.inputs().toDict() for example in examples]
+
+    lm = StubLM()
+    generator = BatchedReadingGenerator(module, batch_size=4)
+    with dspy.context(lm=lm):
+        predictions = generator(inputs)
+    assert lm.stats.calls == 3 and generator.stats.batched == 10
+    breakdowns = [[item["cardId"] for item in prediction.card_breakdowns] for prediction in predictions]
+    assert breakdowns == [[card["card_id"] for card in example.cards] for example in examples]
+
+    lm = PartialBatchLM()
+    generator = BatchedReadingGenerator(module, batch_size=4)
+    with dspy.context(lm=lm):
+        program = generator.precompute(examples)
+        predictions = [program(**example.inputs()) for example in examples]
+    # Batches of 4, 4 and 2 lose readings 1 and 2 each: 5 single calls on top of the 3 batched ones
+    assert (generator.stats.batched, generator.stats.fallbacks, lm.stats.calls) == (5, 5, 8)
+    assert all(prediction.overview for prediction in predictions)
+
+
+def test_batch_predict_writes_one_row_per_reading(tmp_path):
+    lm = StubLM()
+    result = run_batch_predict(_examples(9), TarotReadingModule(), lm, tmp_path, label="v1", concurrency=2, batch_size=4)
+    assert (result.succeeded, result.failed, lm.stats.calls) == (9, 0, 3)
+    assert result.batch_stats.summary().startswith("Batched generation: 9 readings from 3 requests")
+    assert read_predictions(tmp_path).num_rows == 9
@@ -0,0 +1,51 @@
+import pytest
+
+from daily_tarot_pipeline.deck import DECK
+from daily_tarot_pipeline.evaluate.card_index import canonical_card_id, card_coverage, mentioned_card_ids
+from daily_tarot_pipeline.evaluate.metrics import card_coverage_metric
+from daily_tarot_pipeline.models import CardBreakdown, CardDraw, TrainingExample
+
+
+def _example(card, orientation: str, overview: str) -> TrainingExample:
+    meaning = card.upright_meaning if orientation == "upright" else card.reversed_meaning
+    return TrainingExample(
+        intent=None,
+        spread_type="single",
+        cards=[CardDraw(card_id=card.id, orientation=orientation, position="focus")],
+        overview=overview,
+        card_breakdowns=[CardBreakdown(card_id=card.id, orientation=orientation, summary=meaning)],
+        synthesis=f"It speaks of {meaning.lower()}",
+        actionable_reflection="What could you explore today?",
+        tone="reflective",
+        prompt_version="v1",
+    )
+
+
+@pytest.mark.parametrize("orientation", ["upright", "reversed"])
+def test_every_card_is_recognised_by_name_and_nothing_else_is(orientation):
+    for card in DECK:
+        example = _example(card, orientation, f"{card.name} {orientation} sits at the heart of this draw.")
+        assert card_coverage_metric(example) == 1.0, card.id
+        text = f"{example.overview} {example.synthesis}"
+        assert mentioned_card_ids(text) == {card.id}, card.id
+
+        unnamed = _example(card, orientation, "A quiet card sits at the heart of this draw.")
+        assert card_coverage_metric(unnamed) == 0.0, card.id
+
+
+def test_aliases_suit_rank_phrasing_and_legacy_ids():
+    text = "The 2 of Coins steadies the Knight  of\nRods, while the Hanged Man waits beside the Wheel of Fortune."
+    assert mentioned_card_ids(text) == {"pentacles-02", "wands-12", "major-12", "major-10"}
+    assert canonical_card_id("00-fool") == "major-00"
+    assert card_coverage("The Fool leaps.", ["00-fool", "major-21"]) == 0.5
+    # Ranks do not bleed into each other and unknown ids still match literally
+    assert mentioned_card_ids("Ten of Cups, Queen of Swords") == {"cups-10", "swords-13"}
+    assert card_coverage("see custom-card here", ["custom-card"]) == 1.0
+    assert mentioned_card_ids("your inner strength and the world at large") == set()
+
+
+def test_large_spreads_score_the_same_through_the_full_deck_scan():
+    cards = [card.id for card in DECK[:9]] + ["00-fool", "custom-card"]
+    text = " ".join(card.name for card in DECK[:5]) + " and a custom-card"
+    assert card_coverage(text, cards) == 7 / 11
+    assert card_coverage(text, cards) == sum(card_coverage(text, [card_id]) for card_id in cards) / len(cards)
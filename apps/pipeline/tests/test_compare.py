@@ -0,0 +1,56 @@
+import numpy as np
+
+from daily_tarot_pipeline.evaluate.compare import ScoreFrame, align_frames, compare_frames, paired_bootstrap
+
+
+def _frame(label, row_ids, composite):
+    return ScoreFrame(
+        label=label,
+        row_ids=np.array(row_ids, dtype=object),
+        spread_type=np.array(["single", "three-card"] * (len(row_ids) // 2), dtype=object),
+        tone=np.array(["direct"] * len(row_ids), dtype=object),
+        scores={"composite": np.array(composite, dtype=np.float64)},
+    )
+
+
+def test_paired_bootstrap_interval_excludes_zero_for_clear_shift():
+    deltas = np.random.default_rng(7).normal(0.05, 0.1, size=5000)
+    mean, low, high, prob = paired_bootstrap(deltas, n_resamples=500)
+    assert low < mean < high
+    assert low > 0
+    assert prob == 1.0
+
+
+def test_compare_frames_pairs_rows_and_breaks_down_by_group():
+    baseline = _frame("v1", ["a", "b", "c", "d"], [0.5, 0.5, 0.5, 0.5])
+    candidate = _frame("v2", ["d", "c", "b", "a"], [0.9, 0.5, 0.9, 0.5])
+
+    base_aligned, cand_aligned = align_frames([baseline, candidate])
+    results = {r.group: r for r in compare_frames(base_aligned, cand_aligned, by=("spread_type",), n_resamples=200)}
+
+    assert results["all"].n == 4
+    assert results["all"].delta == 0.2
+    # Rows a and c are "single" in the baseline ordering and did not change
+    assert results["spread_type=single"].delta == 0.0
+    assert results["spread_type=three-card"].delta == 0.4
+
+
+def test_failed_predictions_score_zero_in_the_paired_comparison():
+    baseline = _frame("v1", ["a", "b", "c", "d"], [0.5, 0.5, 0.5, 0.5])
+    # The candidate failed on c and d; dropping them would hide the failures behind a win on a and b
+    candidate = ScoreFrame(
+        label="v2",
+        row_ids=np.array(["a", "b", "c", "d"], dtype=object),
+        spread_type=baseline.spread_type,
+        tone=baseline.tone,
+        scores={"composite": np.array([0.9, 0.9, 0.0, 0.0])},
+        ok=np.array([True, True, False, False]),
+    )
+
+    base_aligned, cand_aligned = align_frames([baseline, candidate])
+    overall = compare_frames(base_aligned, cand_aligned, by=(), n_resamples=200)[0]
+
+    assert (base_aligned.failed, cand_aligned.failed) == (0, 2)
+    assert overall.n == 4
+    assert round(overall.delta, 6) == -0.05
+    assert not overall.significant_win
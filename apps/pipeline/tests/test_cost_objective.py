@@ -0,0 +1,47 @@
+import dspy
+
+from daily_tarot_pipeline.models import CandidateCost
+from daily_tarot_pipeline.optimizers.cost import (
+    CostAwareMetric,
+    CostRecord,
+    CostRecorder,
+    program_fingerprint,
+    summarize_candidates,
+)
+from daily_tarot_pipeline.optimizers.mipro import TarotReadingModule
+from daily_tarot_pipeline.stub_lm import StubLM
+
+
+def test_recorder_measures_module_calls_and_metric_applies_penalty():
+    module = TarotReadingModule()
+    recorder = CostRecorder(module_types=(TarotReadingModule,))
+    metric = CostAwareMetric(lambda example, prediction, trace=None: 0.8, recorder,
+                             cost_weight=0.5, latency_budget_ms=1000, token_budget=100)
+
+    with dspy.context(lm=StubLM(), track_usage=True, callbacks=[recorder]):
+        prediction = module(intent=None, spread_type="single", tone="wise",
+                            cards=[{"cardId": "00-fool", "orientation": "upright", "position": "present"}])
+
+    objective = metric(dspy.Example(), prediction)
+    [record] = metric.records
+    assert record.fingerprint == program_fingerprint(module)
+    assert record.completion_tokens > 0 and record.latency_ms is not None
+    assert objective == 0.8 - 0.5 * metric.penalty(record.latency_ms, record.completion_tokens)
+    assert objective < 0.8
+    # Costs are consumed once; an unknown prediction scores as pure quality
+    assert metric(dspy.Example(), prediction) == 0.8
+
+
+def test_summarize_candidates_marks_pareto_frontier_and_slo():
+    def records(fingerprint, quality, latency, tokens):
+        return [CostRecord(fingerprint, quality, quality, latency, tokens) for _ in range(5)]
+
+    rows = records("fast", 0.6, 800, 200) + records("best", 0.7, 3000, 500) + records("dominated", 0.5, 2000, 400)
+    summary = summarize_candidates(rows, {"best": "selected"}, latency_slo_ms=1000)
+    by_label = {candidate.label: candidate for candidate in summary}
+
+    assert isinstance(summary[0], CandidateCost)
+    assert by_label["selected"].on_frontier and not by_label["selected"].meets_slo
+    assert by_label["trial-fast"].on_frontier and by_label["trial-fast"].meets_slo
+    assert not by_label["trial-dominate"].on_frontier
+    assert [candidate.label for candidate in summary][-1] == "trial-dominate"
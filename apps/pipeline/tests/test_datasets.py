@@ -1,8 +1,11 @@
 from datetime import datetime
 from typing import List
 
-from daily_tarot_pipeline.datasets import build_training_examples
+import pytest
+
+from daily_tarot_pipeline.datasets import Dataset, build_training_examples, diff_manifests, load_dataset, persist_dataset
 from daily_tarot_pipeline.models import CardBreakdown, CardDraw, FeedbackRecord, ReadingRecord
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
 
 
 class FakeStore:
@@ -10,10 +13,10 @@ class FakeStore:
         self._readings = readings
         self._feedback = feedback
 
-    def fetch_readings(self, limit: int = 1000):
+    def fetch_readings(self, limit: int = 1000, since=None):
         return self._readings
 
-    def fetch_feedback(self, limit: int = 1000):
+    def fetch_feedback(self, limit: int = 1000, since=None):
         return self._feedback
 
 
@@ -48,3 +51,55 @@ def test_build_training_examples_merges_feedback():
     example = examples[0]
     assert example.feedback_thumb == 1
     assert example.feedback_rationale == "Accurate"
+
+
+@pytest.fixture(scope="module")
+def examples():
+    readings = list(generate_readings(SyntheticConfig(readings=50, seed=3)))
+    return build_training_examples(InMemoryStore(readings, []), limit=50)
+
+
+def test_dataset_views_share_the_store_and_cover_every_row(examples):
+    dataset = Dataset.of(examples)
+    assert dataset.store.examples is examples and Dataset.of(dataset) is dataset
+
+    train, val = dataset.split(val_fraction=0.2)
+    assert (len(train), len(val)) == (40, 10)
+    assert list(val) == examples[40:] and val[0] is examples[40]
+
+    shuffled = dataset.shuffle(seed=7)
+    assert list(shuffled.rows) == list(dataset.shuffle(seed=7).rows) != list(dataset.rows)
+    shards = [shuffled.shard(index, 3) for index in range(3)]
+    assert sorted(row for shard in shards for row in shard.rows) == list(range(50))
+    assert all(shard.store is dataset.store for shard in shards)
+    with pytest.raises(ValueError):
+        dataset.shard(3, 3)
+
+
+def test_arrow_file_round_trips_and_views_decode_lazily(examples, tmp_path):
+    path = Dataset.of(examples).save(tmp_path / "examples.arrow")
+    dataset = Dataset.open(path)
+    assert list(dataset) == examples
+    view = dataset.shuffle(seed=1)[5:15]
+    assert list(view) == [examples[row] for row in view.rows]
+    assert view.to_arrow().num_rows == 10
+    [example] = dataset[-1:].to_dspy()
+    assert example.overview == examples[-1].overview and set(example.inputs().keys()) == {"intent", "spread_type", "cards", "tone"}
+
+
+def test_datasets_are_manifests_over_shared_examples(examples):
+    store = InMemoryStore([], [])
+    assert persist_dataset(store, "nightly_1", examples[:30]) == 30
+    # The next night repeats 20 examples, one of them twice, and adds 20 new ones
+    assert persist_dataset(store, "nightly_2", examples[10:] + examples[10:11]) == 20
+    assert len(store.examples) == 50 and len(store.datasets["nightly_2"]) == 41
+
+    cache = {}
+    first, second = load_dataset(store, "nightly_1", cache), load_dataset(store, "nightly_2", cache)
+    assert list(second) == examples[10:] + examples[10:11]
+    assert len(cache) == 50 and second[0] is first[10] and second[-1] is second[0]
+    assert load_dataset(store, "missing") is None
+
+    diff = diff_manifests(store.datasets["nightly_1"], store.datasets["nightly_2"])
+    assert (len(diff.added), len(diff.removed), diff.unchanged) == (20, 10, 20)
+    assert [cache[example_hash] for example_hash in diff.added] == examples[30:]
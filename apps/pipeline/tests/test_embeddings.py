@@ -0,0 +1,58 @@
+import dspy
+import numpy as np
+import pytest
+
+from daily_tarot_pipeline.evaluate.embeddings import EmbeddingCache, EmbeddingScorer, HashingEncoder, text_digest
+
+
+class CountingEncoder(HashingEncoder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.batches: list[int] = []
+
+    def encode(self, texts):
+        self.batches.append(len(texts))
+        return super().encode(texts)
+
+
+def test_vectors_persist_across_processes_and_only_new_texts_are_encoded(tmp_path):
+    texts = [f"The Star reversed asks you to rest, day {day}." for day in range(10)]
+    first = EmbeddingScorer(CountingEncoder(), EmbeddingCache(tmp_path, 64), batch_size=4)
+    expected = first.embed(texts)
+    assert first.encoder.batches == [4, 4, 2]
+
+    second = EmbeddingScorer(CountingEncoder(), EmbeddingCache(tmp_path, 64), batch_size=4)
+    np.testing.assert_allclose(second.embed([*texts, "A new reading."])[:10], expected)
+    assert second.encoder.batches == [1]
+    assert len(second.cache) == 11
+
+
+def test_rows_left_without_a_key_are_dropped_before_the_next_append(tmp_path):
+    cache = EmbeddingCache(tmp_path, 64)
+    encoder = HashingEncoder(dim=64)
+    cache.append([text_digest("one")], encoder.encode(["one"]))
+    with (tmp_path / "vectors.f32").open("ab") as torn:
+        torn.write(encoder.encode(["orphan"]).tobytes())
+    cache.append([text_digest("two")], encoder.encode(["two"]))
+
+    reopened = EmbeddingCache(tmp_path, 64)
+    rows = reopened.lookup([text_digest("one"), text_digest("two")])
+    np.testing.assert_allclose(reopened.vectors([rows[text_digest("two")]]), encoder.encode(["two"]))
+
+
+def test_score_rewards_similar_readings_and_intent_relevance(tmp_path):
+    scorer = EmbeddingScorer(HashingEncoder(), EmbeddingCache(tmp_path, 384))
+    gold = dspy.Example(
+        intent="my career change",
+        overview="The Chariot pushes your career change forward.",
+        synthesis="Momentum favours a bold move at work.",
+        actionable_reflection="What first step could you take this week?",
+    )
+    close = dspy.Prediction(
+        overview="The Chariot pushes your career change forward with resolve.",
+        synthesis="Momentum favours a bold move at work.",
+        actionable_reflection="What first step could you take this week?",
+    )
+    far = dspy.Prediction(overview="Cups overflow.", synthesis="Rest by the sea.", actionable_reflection="Breathe.")
+    assert scorer.score(gold, close) > 0.7 > scorer.score(gold, far)
+    assert scorer.similarity(["same text"], ["same text"])[0] == pytest.approx(1.0)
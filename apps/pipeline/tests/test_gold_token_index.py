@@ -0,0 +1,32 @@
+import dspy
+import pytest
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.optimizers.mipro import GoldTokenIndex, _metric_fn, _overlap_score
+
+
+def test_overlap_matches_the_set_based_score_and_tokenizes_gold_once():
+    index = GoldTokenIndex()
+    gold = "The Tower clears space; the old walls fall."
+    for pred in ["the tower clears SPACE;", "Nothing here", "", gold, "walls fall. fall. the"]:
+        assert index.overlap(gold, pred) == _overlap_score(gold, pred)
+    assert index.overlap("", "anything") == _overlap_score("", "anything") == 0.0
+    assert len(index) == 2
+    assert len(index.vocabulary) == len(set(gold.lower().split()))
+
+
+@pytest.fixture()
+def settings(monkeypatch, tmp_path):
+    for name, value in {"LM_BACKEND": "stub", "METRIC_BACKEND": "overlap", "PROMPT_WORKSPACE": str(tmp_path),
+                        "DATASET_WORKSPACE": str(tmp_path)}.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+def test_metric_fn_scores_each_gold_field(settings):
+    example = dspy.Example(overview="a b c d", synthesis="e f", actionable_reflection="g")
+    prediction = dspy.Prediction(overview="a b", synthesis="e f x", actionable_reflection="h")
+    assert _metric_fn(example, prediction) == (0.5 + 1.0 + 0.0) / 3
+    assert _metric_fn(example, None) == 0.0
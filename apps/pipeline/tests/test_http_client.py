@@ -0,0 +1,91 @@
+import threading
+import uuid
+
+import dspy
+import httpx
+import litellm
+import pytest
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.lm import (
+    PooledLM,
+    build_http_client,
+    build_http_transport,
+    build_lm,
+    get_http_client,
+    get_http_transport,
+    http_pool_stats,
+)
+from daily_tarot_pipeline.stub_lm import StubLM, StubLMServer
+
+
+@pytest.fixture()
+def stub_api_base(monkeypatch):
+    server = StubLMServer(StubLM()).serve(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    monkeypatch.setenv("LM_BACKEND", "stub-http")
+    monkeypatch.setenv("STUB_API_BASE", api_base)
+    get_settings.cache_clear()
+    yield api_base
+    get_settings.cache_clear()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(litellm, "client_session", None)
+    litellm.in_memory_llm_clients_cache.flush_cache()
+    get_http_transport.cache_clear()
+    get_http_client.cache_clear()
+    yield
+    get_http_transport.cache_clear()
+    get_http_client.cache_clear()
+    litellm.in_memory_llm_clients_cache.flush_cache()
+
+
+def test_requests_share_one_keep_alive_connection(stub_api_base):
+    transport = build_http_transport()
+    with build_http_client(transport) as client:
+        for _ in range(4):
+            assert client.get(f"{stub_api_base}/models").status_code == 200
+
+    stats = transport.stats()
+    assert stats["requests"] == 4 and stats["connections_opened"] == 1 and stats["reused"] == 3
+    assert stats["in_use"] == 0
+
+
+def test_built_lms_share_the_process_pool(stub_api_base, fresh_pool):
+    assert http_pool_stats() is None
+    lms = [build_lm(cache=False, num_retries=0) for _ in range(2)]
+    assert all(isinstance(lm, PooledLM) for lm in lms)
+    for lm, intent in zip(lms * 2, ("my week", "my work", "my home", "my love life")):
+        with dspy.context(lm=lm):
+            assert dspy.Predict("intent -> overview")(intent=intent).overview
+
+    assert litellm.client_session is get_http_client()
+    stats = http_pool_stats()
+    assert stats["requests"] == 4 and stats["connections_opened"] == 1
+
+
+def test_pool_stays_out_of_saved_state_and_cache_keys(stub_api_base, fresh_pool):
+    lm = build_lm(cache=True, num_retries=0)
+    intent = f"my week {uuid.uuid4()}"
+    with dspy.context(lm=lm):
+        dspy.Predict("intent -> overview")(intent=intent)
+
+    assert "client" not in lm.dump_state() and "timeout" not in lm.dump_state()
+    with dspy.context(lm=build_lm(cache=True, num_retries=0)):
+        # Same request from another LM: served from the cache, so the key does not depend on the per-call client
+        assert dspy.Predict("intent -> overview")(intent=intent).overview
+    assert http_pool_stats()["requests"] == 1
+
+
+def test_groq_calls_take_the_shared_client(stub_api_base, fresh_pool):
+    lm = PooledLM("groq/openai/gpt-oss-20b", api_key="test")
+    kwargs = lm._pooled_kwargs({})
+    assert kwargs["client"].client is get_http_client()
+    assert isinstance(kwargs["timeout"], httpx.Timeout)
+    assert "client" not in PooledLM("openai/stub-tarot")._pooled_kwargs({})
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+from daily_tarot_pipeline.partitioning import (
+    PARTITIONED_TABLES,
+    add_months,
+    default_partition_ddl,
+    iter_months,
+    partition_ddl,
+    partition_month,
+    partition_name,
+)
+from daily_tarot_pipeline.postgres_store import _time_window
+
+
+def test_months_cover_the_range_across_a_year_boundary():
+    months = list(iter_months(datetime(2025, 11, 17, 9, tzinfo=timezone.utc), datetime(2026, 2, 1, tzinfo=timezone.utc)))
+    assert [partition_name("readings", month) for month in months] == [
+        "readings_p2025_11", "readings_p2025_12", "readings_p2026_01", "readings_p2026_02",
+    ]
+    assert add_months(months[0], -11) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+    assert partition_month("readings", "readings_p2026_01") == months[2]
+    assert partition_month("readings", "readings_default") is None
+
+
+def test_partition_ddl_bounds_and_per_partition_unique_index():
+    statements = partition_ddl(PARTITIONED_TABLES["readings"], datetime(2026, 12, 1, tzinfo=timezone.utc))
+    assert "PARTITION OF readings FOR VALUES FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')" in statements[0]
+    assert statements[1] == "CREATE UNIQUE INDEX IF NOT EXISTS readings_p2026_12_hmac_key ON readings_p2026_12 (hmac)"
+
+
+def test_default_partition_ddl_keeps_the_per_partition_unique_index():
+    assert default_partition_ddl(PARTITIONED_TABLES["readings"]) == [
+        "CREATE TABLE IF NOT EXISTS readings_default PARTITION OF readings DEFAULT",
+        "CREATE UNIQUE INDEX IF NOT EXISTS readings_default_hmac_key ON readings_default (hmac)",
+    ]
+    assert default_partition_ddl(PARTITIONED_TABLES["telemetry_events"]) == [
+        "CREATE TABLE IF NOT EXISTS telemetry_events_default PARTITION OF telemetry_events DEFAULT",
+    ]
+
+
+def test_time_window_only_emits_given_bounds():
+    since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert _time_window("created_at", None, None) == ("TRUE", [])
+    assert _time_window("created_at", since, None) == ("TRUE AND created_at >= %s", [since])
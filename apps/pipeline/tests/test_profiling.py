@@ -0,0 +1,53 @@
+import threading
+
+import dspy
+
+from daily_tarot_pipeline.profiling import LMSpanCallback, Profiler
+from daily_tarot_pipeline.stub_lm import StubLM
+
+
+def test_spans_nest_and_aggregate_per_name():
+    profiler = Profiler(trace_memory=True)
+    with profiler.span("dataset.build") as outer:
+        for _ in range(3):
+            with profiler.span("validate.readings", rows=100):
+                payload = [bytearray(100_000) for _ in range(10)]
+                del payload
+        outer.rows = 300
+
+    summary = profiler.summary()
+    assert summary["validate.readings"].count == 3
+    assert summary["validate.readings"].rows == 300
+    assert summary["validate.readings"].peak_mb >= 1.0
+    # The parent's peak includes its children's allocations
+    assert summary["dataset.build"].peak_mb >= summary["validate.readings"].peak_mb
+    assert summary["dataset.build"].wall_ms >= summary["validate.readings"].wall_ms
+    assert [span.parent for span in profiler.spans] == ["dataset.build"] * 3 + [None]
+
+    metrics = profiler.as_metrics()
+    assert metrics["profile.validate.readings.rows"] == 300
+    assert metrics["profile.validate.readings.rows_per_s"] > 0
+
+
+def test_chrome_trace_has_one_complete_event_per_span_and_thread():
+    profiler = Profiler(max_spans=3)
+    worker = threading.Thread(target=lambda: profiler.wrap("metrics.objective", lambda: 1.0)())
+    worker.start()
+    worker.join()
+    for _ in range(3):
+        with profiler.span("db.fetch_readings"):
+            pass
+
+    trace = profiler.chrome_trace()
+    assert [event["ph"] for event in trace["traceEvents"]] == ["X"] * 3
+    assert len({event["tid"] for event in trace["traceEvents"]}) == 2
+    assert trace["otherData"]["dropped_spans"] == 1
+    assert profiler.summary()["db.fetch_readings"].count == 3
+
+
+def test_lm_calls_are_recorded_as_spans():
+    profiler = Profiler()
+    lm = StubLM(callbacks=[LMSpanCallback(profiler)])
+    with dspy.context(lm=lm):
+        dspy.Predict("intent -> overview")(intent="What should I focus on?")
+    assert profiler.summary()["lm.call"].count == 1
@@ -0,0 +1,105 @@
+import threading
+
+import dspy
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.lm import PooledLM
+from daily_tarot_pipeline.quota import QuotaCallback, QuotaCoordinator
+from daily_tarot_pipeline.stub_lm import STUB_MODEL_NAME, StubLM, StubLMServer, StubRateLimitError
+
+
+def test_requests_bucket_is_shared_by_coordinators_on_one_file(tmp_path):
+    # 600 requests per minute with half a second of burst: five calls at once, then one every 0.1s
+    nightly = QuotaCoordinator(tmp_path / "quota.sqlite3", requests_per_minute=600, burst_seconds=0.5, serving_reserve=0)
+    evaluation = QuotaCoordinator(tmp_path / "quota.sqlite3", requests_per_minute=600, burst_seconds=0.5, serving_reserve=0)
+    for _ in range(5):
+        assert nightly.acquire(timeout=0) is not None
+    assert evaluation.acquire(timeout=0) is None
+
+    lease = evaluation.acquire(timeout=1)
+    assert lease is not None and lease.waited_s > 0.05
+    assert evaluation.stats.waited == 1 and evaluation.stats.timed_out == 1
+
+
+def test_serving_keeps_the_reserve_and_jumps_the_queue(tmp_path):
+    path = tmp_path / "quota.sqlite3"
+    batch = QuotaCoordinator(path, requests_per_minute=60, burst_seconds=5, serving_reserve=0.2)
+    serving = QuotaCoordinator(path, requests_per_minute=60, burst_seconds=5, serving_reserve=0.2)
+    taken = [batch.acquire("batch", timeout=0) for _ in range(5)]
+    assert sum(lease is not None for lease in taken) == 4
+    assert serving.acquire("serving", timeout=0) is not None
+
+    # With one slot held by batch, the serving caller waits; once the slot frees, later batch callers queue behind it
+    slots = QuotaCoordinator(tmp_path / "slots.sqlite3", max_concurrency=1)
+    held = slots.acquire("batch")
+    leases = []
+    waiting = threading.Thread(target=lambda: leases.append(slots.acquire("serving", timeout=3)))
+    waiting.start()
+    try:
+        while slots.utilization()["waiting"] != {"serving": 1}:
+            pass
+        slots.release(held)
+        assert slots.acquire("batch", timeout=0) is None
+    finally:
+        waiting.join()
+    assert leases[0] is not None and leases[0].priority == "serving"
+
+
+def test_concurrency_slots_and_429_backoff(tmp_path):
+    path = tmp_path / "quota.sqlite3"
+    coordinator = QuotaCoordinator(path, requests_per_minute=6000, max_concurrency=1)
+    held = coordinator.acquire(timeout=0)
+    assert coordinator.acquire(timeout=0.1) is None
+    coordinator.release(held)
+    assert coordinator.acquire(timeout=0) is not None
+
+    other = QuotaCoordinator(path, requests_per_minute=6000)
+    other.penalize(retry_after=0.3)
+    assert coordinator.utilization()["requests"]["available"] == 0
+    assert other.acquire(timeout=0.1) is None
+
+
+def test_callback_settles_the_token_estimate_and_backs_off_on_429(tmp_path):
+    coordinator = QuotaCoordinator(tmp_path / "quota.sqlite3", tokens_per_minute=600_000, max_concurrency=2)
+    callback = QuotaCallback(coordinator, "batch", max_wait_s=0.1)
+    with dspy.context(lm=StubLM(max_tokens=1000), callbacks=[callback]):
+        dspy.Predict("intent -> overview")(intent="my week")
+    assert coordinator.stats.acquired == 1 and coordinator.stats.refunded_tokens > 0
+    assert coordinator.utilization()["in_flight"] == {}
+
+    callback.on_lm_start("call", StubLM(), {"messages": [{"role": "user", "content": "hi"}]})
+    callback.on_lm_end("call", None, StubRateLimitError("stub", retry_after=5))
+    assert coordinator.stats.rate_limited == 1
+    assert coordinator.utilization()["tokens"]["available"] == 0
+    assert coordinator.acquire(tokens=1, timeout=0.1) is None
+
+
+class _RateLimitedOnce(StubLM):
+    def _admit(self, completion_tokens: int) -> float:
+        if not self.stats.rate_limited:
+            self.stats.calls += 1
+            self.stats.rate_limited += 1
+            raise StubRateLimitError(self.model, retry_after=0.2)
+        return super()._admit(completion_tokens)
+
+
+def test_every_retry_of_a_429_goes_through_the_quota(tmp_path, monkeypatch):
+    monkeypatch.setenv("LM_BACKEND", "stub-http")
+    get_settings.cache_clear()
+    stub = _RateLimitedOnce()
+    server = StubLMServer(stub).serve(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    coordinator = QuotaCoordinator(tmp_path / "quota.sqlite3", requests_per_minute=6000)
+    lm = PooledLM(f"openai/{STUB_MODEL_NAME}", api_base=f"http://127.0.0.1:{server.server_address[1]}/v1",
+                  api_key="stub", cache=False, num_retries=2)
+    try:
+        with dspy.context(lm=lm, callbacks=[QuotaCallback(coordinator, "batch", max_wait_s=5)]):
+            assert dspy.Predict("intent -> overview")(intent="my week").overview
+    finally:
+        server.shutdown()
+        server.server_close()
+        get_settings.cache_clear()
+
+    # litellm did not retry on its own: the 429 penalized the buckets and the retry waited for a second lease
+    assert (stub.stats.calls, stub.stats.rate_limited, stub.stats.completed) == (2, 1, 1)
+    assert (coordinator.stats.acquired, coordinator.stats.rate_limited, coordinator.stats.waited) == (2, 1, 1)
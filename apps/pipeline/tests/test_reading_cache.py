@@ -0,0 +1,106 @@
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from daily_tarot_pipeline.reading_cache import _parse_breakdowns, reading_cache_key, refresh_reading_cache
+
+
+def test_reading_cache_key_matches_web_app_hash():
+    # Same value as readingCacheKey() in apps/web/server/reading.ts for this draw
+    key = reading_cache_key(
+        "single",
+        "warm-analytical",
+        "v1.deterministic",
+        [{"cardId": "00-fool", "orientation": "upright", "position": "present"}],
+    )
+    assert key == "a41fd02a363dd5c28465979ea20e692d3e6b63a19a6e55f9c540afac99373759"
+
+
+def test_reading_cache_key_depends_on_orientation_and_prompt_version():
+    cards = [{"cardId": "00-fool", "orientation": "upright", "position": "present"}]
+    reversed_cards = [{**cards[0], "orientation": "reversed"}]
+
+    base = reading_cache_key("single", "direct", "v1", cards)
+    assert base != reading_cache_key("single", "direct", "v1", reversed_cards)
+    assert base != reading_cache_key("single", "direct", "v2", cards)
+
+
+def test_parse_breakdowns_requires_exactly_the_drawn_cards():
+    cards = [
+        {"cardId": "major-00", "orientation": "upright", "position": "past"},
+        {"cardId": "major-01", "orientation": "reversed", "position": "present"},
+    ]
+    breakdowns = [
+        {"card_id": "major-01", "orientation": "reversed", "summary": "Stalled will."},
+        {"cardId": "major-00", "orientation": "upright", "summary": "A fresh start."},
+    ]
+
+    parsed = _parse_breakdowns(json.dumps(breakdowns), cards)
+    assert parsed == [
+        {"cardId": "major-01", "orientation": "reversed", "summary": "Stalled will."},
+        {"cardId": "major-00", "orientation": "upright", "summary": "A fresh start."},
+    ]
+
+    for wrong in (
+        breakdowns[:1],
+        [*breakdowns, breakdowns[0]],
+        [{**breakdowns[0], "orientation": "upright"}, breakdowns[1]],
+        [{"cardId": "major-00", "summary": "No orientation."}, breakdowns[0]],
+    ):
+        with pytest.raises(ValueError):
+            _parse_breakdowns(wrong, cards)
+
+
+class _FakeStore:
+    def __init__(self, rows):
+        self.rows = rows
+        self.upserted = []
+
+    def invalidate_reading_cache(self, keep_prompt_version):
+        return 0
+
+    def fetch_reading_key_frequencies(self, prompt_version, since, top_n):
+        return self.rows
+
+    def fetch_fresh_cache_keys(self, prompt_version):
+        return set()
+
+    def upsert_cached_readings(self, entries):
+        self.upserted.extend(entries)
+
+
+def _breakdown_module(breakdowns):
+    def module(**kwargs):
+        return SimpleNamespace(
+            overview="Overview.",
+            card_breakdowns=breakdowns,
+            synthesis="Synthesis.",
+            actionable_reflection="Reflect.",
+        )
+
+    return module
+
+
+def test_refresh_only_caches_valid_readings_from_servable_models(caplog):
+    card = {"cardId": "major-00", "orientation": "upright", "position": "present"}
+    rows = [{"spread_type": "single", "tone": "direct", "cards": [card], "frequency": 3}]
+    good = _breakdown_module([{"cardId": "major-00", "orientation": "upright", "summary": "A fresh start."}])
+
+    store = _FakeStore(rows)
+    result = refresh_reading_cache(store, good, SimpleNamespace(model="groq/openai/gpt-oss-20b"), "v1")
+    assert result.generated == 1
+    assert store.upserted[0].model == "openai/gpt-oss-20b"
+    assert store.upserted[0].card_breakdowns == [{"cardId": "major-00", "orientation": "upright", "summary": "A fresh start."}]
+
+    store = _FakeStore(rows)
+    result = refresh_reading_cache(store, good, SimpleNamespace(model="stub/tarot-reading"), "v1")
+    assert (result.generated, result.failed, store.upserted) == (0, 1, [])
+
+    store = _FakeStore(rows)
+    wrong_card = _breakdown_module([{"cardId": "major-01", "orientation": "upright", "summary": "Not drawn."}])
+    with caplog.at_level(logging.WARNING, logger="daily_tarot_pipeline.reading_cache"):
+        result = refresh_reading_cache(store, wrong_card, SimpleNamespace(model="groq/openai/gpt-oss-20b"), "v1")
+    assert (result.generated, result.failed, store.upserted) == (0, 1, [])
+    assert any(record.exc_info for record in caplog.records)
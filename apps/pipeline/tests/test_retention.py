@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import mlflow
+import pytest
+from mlflow import MlflowClient
+
+from daily_tarot_pipeline.config import EnvironmentSettings
+from daily_tarot_pipeline.retention import RetentionPolicy, plan_gc, run_gc, select_datasets
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def _row(name, days_old):
+    return {"name": name, "created_at": NOW - timedelta(days=days_old), "manifest": True}
+
+
+def test_select_datasets_keeps_recent_newest_and_promoted():
+    rows = [_row(f"nightly_{day:02d}", 40 + day) for day in range(5)] + [_row("nightly_recent", 3), _row("handmade", 90)]
+    rows.sort(key=lambda row: row["created_at"], reverse=True)
+    policy = RetentionPolicy(max_age=timedelta(days=30), keep_last=2)
+    assert select_datasets(rows, policy, {"nightly_03"}, NOW) == ["nightly_01", "nightly_02", "nightly_04"]
+
+
+class _FakeStore:
+    def __init__(self, rows, protected):
+        self.rows = rows
+        self.protected = protected
+        self.deleted = []
+
+    def fetch_promoted_datasets(self):
+        return self.protected
+
+    def list_training_datasets(self, prefix=""):
+        return sorted(self.rows, key=lambda row: row["created_at"], reverse=True)
+
+    def training_storage_report(self, names):
+        return {"datasets": len(names), "dataset_bytes": 0, "evaluation_runs": 0, "examples": 0, "example_bytes": 0}
+
+    def delete_training_datasets(self, names, batch_size=100):
+        self.deleted.extend(names)
+        return {"datasets": len(names), "evaluation_runs": 0}
+
+    def delete_orphan_training_examples(self, batch_size=1000):
+        return 0
+
+
+@pytest.fixture()
+def mlflow_client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    uri = f"sqlite:///{tmp_path}/mlflow.db"
+    mlflow.set_tracking_uri(uri)
+    yield MlflowClient(uri), uri
+    mlflow.set_tracking_uri(None)
+
+
+def test_gc_deletes_each_dataset_everywhere_and_spares_promoted_lineage(tmp_path, mlflow_client):
+    client, uri = mlflow_client
+    settings = EnvironmentSettings(lm_backend="stub", prompt_workspace=tmp_path / "prompts")
+    names = {"nightly_old": 60, "nightly_promoted": 50, "nightly_new": 1}
+    store = _FakeStore([_row(name, age) for name, age in names.items()], {"nightly_promoted"})
+    experiment_id = client.create_experiment("nightly-workflow")
+    runs = {}
+    for name, age in names.items():
+        run = client.create_run(experiment_id, start_time=int((NOW - timedelta(days=age)).timestamp() * 1000))
+        client.log_param(run.info.run_id, "dataset_name", name)
+        client.set_terminated(run.info.run_id)
+        runs[name] = run.info.run_id
+        for directory, path in ((settings.prompt_workspace / name, "prompt.txt"), (tmp_path / "data" / "datasets", f"{name}.json")):
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / path).write_text("x" * 100)
+    # Runs deleted in MLflow but never purged: only the one past retention is purged
+    for name, age in {"ad_hoc_recent": 2, "ad_hoc_old": 60}.items():
+        run = client.create_run(experiment_id, start_time=int((NOW - timedelta(days=age)).timestamp() * 1000))
+        client.log_param(run.info.run_id, "dataset_name", name)
+        client.delete_run(run.info.run_id)
+        runs[name] = run.info.run_id
+    orphan = tmp_path / "data" / "datasets" / "nightly_never_stored.json"
+    orphan.write_text("{}")
+    os.utime(orphan, (0, 0))
+
+    policy = RetentionPolicy(max_age=timedelta(days=30), keep_last=1)
+    plan = plan_gc(store, client, settings, policy, now=NOW, data_dir=tmp_path / "data")
+    assert plan.datasets == ["nightly_old"]
+    assert [run.run_id for run in plan.runs] == [runs["nightly_old"]]
+    assert [run.run_id for run in plan.purge_runs] == [runs["ad_hoc_old"]]
+    assert sorted(path.name for path, _ in plan.paths) == ["nightly_never_stored.json", "nightly_old", "nightly_old.json"]
+    assert "1 runs" in plan.report()[-1]
+
+    deleted = run_gc(store, client, plan, uri)
+    assert (deleted["runs"], deleted["paths"], store.deleted) == (1, 3, ["nightly_old"])
+    remaining = {run.data.params["dataset_name"] for run in client.search_runs([experiment_id], run_view_type=3)}
+    assert remaining == {"nightly_promoted", "nightly_new", "ad_hoc_recent"}
+    assert (settings.prompt_workspace / "nightly_promoted").is_dir() and not (settings.prompt_workspace / "nightly_old").exists()
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from dataclasses import replace
+
+from daily_tarot_pipeline.datasets import build_training_examples
+from daily_tarot_pipeline.evaluate import metrics
+from daily_tarot_pipeline.evaluate.metrics import detailed_evaluation
+from daily_tarot_pipeline.evaluate.score_cache import ScoreCache, example_content_hash, metric_suite_version
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+
+def _examples(count: int = 200):
+    readings = list(generate_readings(SyntheticConfig(readings=count, seed=5)))
+    return build_training_examples(InMemoryStore(readings, []), limit=count)
+
+
+def test_cached_evaluation_matches_and_only_scores_changed_examples(tmp_path):
+    examples = _examples()
+    cache = ScoreCache(tmp_path / "scores.sqlite3")
+    expected = detailed_evaluation(examples)
+
+    assert detailed_evaluation(examples, cache=cache) == expected
+    assert (cache.stats.hits, cache.stats.misses) == (0, len(examples))
+
+    examples[0] = examples[0].model_copy(update={"overview": "A different overview."})
+    assert detailed_evaluation(examples, cache=cache) == detailed_evaluation(examples)
+    assert (cache.stats.hits, cache.stats.misses) == (len(examples) - 1, len(examples) + 1)
+
+
+def test_feedback_does_not_change_the_content_hash():
+    example = _examples(1)[0]
+    assert example_content_hash(example) == example_content_hash(example.model_copy(update={"feedback_thumb": -1}))
+
+
+def test_suite_version_follows_weights_and_invalidates_old_scores(tmp_path, monkeypatch):
+    examples = _examples(50)
+    old = ScoreCache(tmp_path / "scores.sqlite3")
+    detailed_evaluation(examples, cache=old)
+
+    monkeypatch.setitem(metrics.METRIC_WEIGHTS, "length", 0.2)
+    assert metric_suite_version() != old.suite_version
+    new = ScoreCache(tmp_path / "scores.sqlite3")
+    detailed_evaluation(examples, cache=new)
+    assert new.stats.hits == 0
+    assert new.prune_stale() == len(examples)
+
+
+def test_suite_version_does_not_depend_on_the_hash_seed():
+    script = "from daily_tarot_pipeline.evaluate.score_cache import metric_suite_version; print(metric_suite_version())"
+    versions = {
+        subprocess.run([sys.executable, "-c", script], env={**os.environ, "PYTHONHASHSEED": seed},
+                       capture_output=True, text=True, check=True).stdout.strip()
+        for seed in ("1", "2", "3")
+    }
+    assert versions == {metric_suite_version()}
+
+
+
+def test_suite_version_follows_the_deck(monkeypatch):
+    from daily_tarot_pipeline.evaluate import card_index
+
+    before = metric_suite_version()
+    renamed = replace(card_index.DECK[0], name="The Wanderer")
+    with monkeypatch.context() as patch:
+        patch.setattr(card_index, "DECK", (renamed, *card_index.DECK[1:]))
+        assert metric_suite_version() != before
+    with monkeypatch.context() as patch:
+        patch.setitem(card_index.CARDS_BY_ID, renamed.id, renamed)
+        assert metric_suite_version() != before
+    assert metric_suite_version() == before
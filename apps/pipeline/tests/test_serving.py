@@ -0,0 +1,84 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import dspy
+
+from daily_tarot_pipeline.serving import LatencyHistogram, ModelPool, ReadingServer
+from daily_tarot_pipeline.stub_lm import StubLM
+
+
+def test_model_pool_evicts_least_recently_used():
+    loaded = []
+
+    def loader(uri):
+        loaded.append(uri)
+        return object()
+
+    pool = ModelPool(capacity=2, loader=loader)
+    first = pool.get("runs:/a/model")
+    pool.get("runs:/b/model")
+    assert pool.get("runs:/a/model") is first
+    pool.get("runs:/c/model")
+
+    assert pool.loaded() == ["runs:/a/model", "runs:/c/model"]
+    assert loaded == ["runs:/a/model", "runs:/b/model", "runs:/c/model"]
+    assert (pool.stats.hits, pool.stats.loads, pool.stats.evictions) == (1, 3, 1)
+
+
+def test_latency_histogram_quantiles_use_bucket_bounds():
+    histogram = LatencyHistogram(buckets_ms=(10, 100, float("inf")))
+    for seconds in [0.005] * 90 + [0.050] * 9 + [2.0]:
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50_ms"] == 10
+    assert snapshot["p95_ms"] == 100
+    assert snapshot["buckets"] == {"10": 90, "100": 9, "+Inf": 1}
+
+
+def _post(port, body):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/predict", data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_server_only_loads_allowed_models_and_rejects_bad_requests():
+    loaded = []
+
+    def loader(uri):
+        loaded.append(uri)
+        return lambda **inputs: dspy.Prediction(overview=f"{inputs['tone']} {inputs['cards'][0]['cardId']}")
+
+    app = ReadingServer("baseline", StubLM(), max_workers=2, allowed_model_uris=["runs:/b/model"])
+    app.pool.loader = loader
+    http = app.serve(host="127.0.0.1", port=0)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    port = http.server_address[1]
+    card = {"cardId": "major-00", "orientation": "upright", "position": "focus"}
+    try:
+        assert _post(port, {"cards": [card]}) == (200, {"model_uri": "baseline", "overview": "reflective major-00"})
+        assert _post(port, {"cards": [card], "model_uri": "runs:/b/model", "tone": "warm-analytical"})[0] == 200
+        for body in (
+            {"cards": [card], "model_uri": "/etc/passwd"},
+            {"cards": [card], "model_uri": "runs:/unknown/model"},
+            {"cards": [card], "tone": "sarcastic"},
+            {"cards": [card], "spread_type": "three-card"},
+            {"cards": [{**card, "cardId": "99-nothing"}]},
+            {"cards": [card], "spread_type": "pentagram"},
+        ):
+            status, reply = _post(port, body)
+            assert status == 400 and reply["error"]
+    finally:
+        http.shutdown()
+        http.server_close()
+        app.close()
+
+    assert loaded == ["baseline", "runs:/b/model"]
+    assert app.metrics()["rejected"] == 6 and app.metrics()["errors"] == 0
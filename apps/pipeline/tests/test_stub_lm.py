@@ -0,0 +1,83 @@
+import json
+import statistics
+import threading
+import urllib.error
+import urllib.request
+
+import dspy
+import litellm
+import pytest
+
+from daily_tarot_pipeline.stub_lm import StubLM, StubLMServer, StubProfile, StubRateLimitError
+
+MESSAGES = [{"role": "user", "content": "Read {'cardId': '17-star', 'orientation': 'reversed'}"}]
+
+
+def _outcomes(lm: StubLM, calls: int) -> list[str]:
+    outcomes = []
+    for _ in range(calls):
+        try:
+            lm.forward(messages=MESSAGES)
+            outcomes.append("ok")
+        except StubRateLimitError:
+            outcomes.append("429")
+        except litellm.InternalServerError:
+            outcomes.append("500")
+    return outcomes
+
+
+def test_failures_are_seeded_and_counted():
+    profile = StubProfile(error_rate=0.2, rate_limit_rate=0.2, seed=3)
+    first = StubLM(profile=profile)
+    outcomes = _outcomes(first, 200)
+    assert outcomes == _outcomes(StubLM(profile=profile), 200)
+    assert {"ok", "429", "500"} == set(outcomes)
+    assert (first.stats.calls, first.stats.rate_limited, first.stats.errors) == (
+        200, outcomes.count("429"), outcomes.count("500"),
+    )
+
+
+def test_token_bucket_returns_retry_after():
+    lm = StubLM(profile=StubProfile(requests_per_minute=2))
+    lm.forward(messages=MESSAGES)
+    lm.forward(messages=MESSAGES)
+    with pytest.raises(StubRateLimitError) as raised:
+        lm.forward(messages=MESSAGES)
+    assert 0 < raised.value.retry_after <= 30
+
+
+def test_lognormal_latency_centres_on_the_median():
+    lm = StubLM(profile=StubProfile(latency_ms=200, latency_distribution="lognormal", latency_spread=0.5))
+    samples = [lm._sample_latency_ms() for _ in range(2000)]
+    assert 180 < statistics.median(samples) < 220
+    assert max(samples) > 2 * 200
+
+
+@pytest.fixture
+def stub_server():
+    app = StubLMServer(StubLM(profile=StubProfile(requests_per_minute=2)))
+    server = app.serve(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield app, f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_server_speaks_openai_chat_completions(stub_server):
+    app, api_base = stub_server
+    lm = dspy.LM("openai/stub-tarot", api_base=api_base, api_key="stub", cache=False, num_retries=0)
+    with dspy.context(lm=lm):
+        prediction = dspy.Predict("intent -> overview, synthesis")(intent="What should I focus on?")
+    assert prediction.overview and prediction.synthesis
+
+    payload = json.dumps({"model": "stub", "messages": MESSAGES}).encode()
+    request = urllib.request.Request(f"{api_base}/chat/completions", data=payload,
+                                     headers={"Content-Type": "application/json"})
+    body = json.load(urllib.request.urlopen(request))
+    assert body["choices"][0]["message"]["content"].endswith("[[ ## completed ## ]]")
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        urllib.request.urlopen(request)
+    assert raised.value.code == 429
+    assert int(raised.value.headers["Retry-After"]) >= 1
+    assert app.lm.stats.rate_limited == 1
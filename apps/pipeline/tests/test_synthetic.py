@@ -0,0 +1,35 @@
+from daily_tarot_pipeline.datasets import build_training_examples
+from daily_tarot_pipeline.deck import DECK, SPREAD_POSITIONS
+from daily_tarot_pipeline.evaluate.metrics import length_window_metric
+from daily_tarot_pipeline.synthetic import TONES, InMemoryStore, SyntheticConfig, generate_feedback, generate_readings
+
+
+def test_deck_mirrors_the_web_app():
+    assert len(DECK) == 78
+    assert len({card.id for card in DECK}) == 78
+    assert sum(card.arcana == "major" for card in DECK) == 22
+
+
+def test_generator_is_deterministic_and_well_formed():
+    config = SyntheticConfig(readings=300, users=20, seed=7)
+    first = list(generate_readings(config))
+    assert first == list(generate_readings(config))
+    assert list(generate_readings(SyntheticConfig(readings=300, users=20, seed=8))) != first
+
+    for reading in first:
+        assert [card.position for card in reading.cards] == list(SPREAD_POSITIONS[reading.spread_type])
+        assert len({card.card_id for card in reading.cards}) == len(reading.cards)
+    # Every tone the web app can send, including its default, shows up in the corpus
+    assert {reading.tone for reading in first} == set(TONES) and "warm-analytical" in TONES
+
+    feedback = list(generate_feedback(first, config))
+    assert 0 < len(feedback) < len(first)
+    assert len({item.reading_id for item in feedback}) == len(feedback)
+
+
+def test_lengths_mostly_fall_in_the_metric_window():
+    config = SyntheticConfig(readings=500, in_window_rate=0.85)
+    readings = list(generate_readings(config))
+    examples = build_training_examples(InMemoryStore(readings, []), limit=len(readings))
+    in_window = sum(length_window_metric(example) == 1.0 for example in examples) / len(examples)
+    assert 0.75 < in_window < 0.95
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from daily_tarot_pipeline.telemetry_rollup import ROLLUP_JOB, retention_cutoff, rollup_windows, run_rollup
+
+
+def _at(day, hour, minute=0):
+    return datetime(2026, 3, day, hour, minute, tzinfo=timezone.utc)
+
+
+def test_rollup_windows_stop_before_the_lateness_allowance_and_cap_size():
+    windows = rollup_windows(_at(1, 22, 40), _at(3, 1, 10), lateness=timedelta(minutes=15))
+
+    assert windows[0][0] == _at(1, 22)
+    assert windows[-1][1] == _at(3, 0)
+    assert all(end - start <= timedelta(days=1) for start, end in windows)
+    assert rollup_windows(_at(3, 0), _at(3, 0, 10)) == []
+
+
+def test_retention_never_passes_the_watermark_day():
+    assert retention_cutoff(_at(20, 5), _at(20, 6), timedelta(days=90)) == _at(20, 6) - timedelta(days=90)
+    assert retention_cutoff(_at(2, 5), _at(20, 6), timedelta(days=1)) == _at(2, 0)
+
+
+class _FakeStore:
+    def __init__(self, watermark=None, earliest=None):
+        self.watermark = watermark
+        self.earliest = earliest
+        self.rolled = []
+        self.deleted_before = None
+
+    def get_watermark(self, job):
+        assert job == ROLLUP_JOB
+        return self.watermark
+
+    def earliest_telemetry_timestamp(self):
+        return self.earliest
+
+    def rollup_telemetry(self, job, start, end):
+        self.rolled.append((start, end))
+        self.watermark = end
+        return {"hourly_rows": 2, "daily_rows": 1}
+
+    def delete_telemetry_before(self, cutoff, batch_size):
+        self.deleted_before = cutoff
+        return 7
+
+
+def test_run_rollup_resumes_from_watermark_then_compacts():
+    store = _FakeStore(watermark=_at(10, 3))
+    result = run_rollup(store, now=_at(10, 6, 30), retention=timedelta(days=1))
+
+    assert store.rolled == [(_at(10, 3), _at(10, 6))]
+    assert result.watermark == _at(10, 6)
+    assert store.deleted_before == _at(9, 6, 30)
+    assert (result.hourly_rows, result.deleted) == (2, 7)
+
+
+def test_run_rollup_without_events_does_nothing():
+    store = _FakeStore()
+    result = run_rollup(store, now=_at(10, 6))
+    assert result.watermark is None and store.deleted_before is None
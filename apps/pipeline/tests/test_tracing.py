@@ -0,0 +1,73 @@
+import dspy
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.mlflow_tracker import MLflowTracker
+from daily_tarot_pipeline.optimizers.mipro import TarotReadingModule, _metric_fn
+from daily_tarot_pipeline.stub_lm import StubLM
+from daily_tarot_pipeline.tracing import TraceSampler
+
+
+def test_low_score_mode_keeps_only_failures_within_cap():
+    sampler = TraceSampler(mode="low-score", score_threshold=0.5, max_traces=2)
+    for trace_id, score in [("t1", 0.9), ("t2", 0.1), ("t3", 0.4), ("t4", 0.3), ("t5", 0.7)]:
+        sampler.record(trace_id, score)
+
+    tail, over_cap = sampler.select_for_deletion()
+
+    assert sorted(tail) == ["t1", "t5"]
+    assert over_cap == ["t3"]
+
+
+def test_repeated_or_missing_trace_ids_count_as_head_dropped():
+    sampler = TraceSampler(mode="sampled", sample_rate=0.5)
+    sampler.record("t1", 1.0)
+    sampler.record("t1", 0.2)
+    sampler.record(None, 0.4)
+
+    assert sampler.stats.scored_calls == 3
+    assert sampler.stats.head_dropped == 2
+    assert sampler.head_ratio == 0.5
+
+
+def test_eval_metric_runs_through_the_sampled_wrapper(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LM_BACKEND", "stub")
+    monkeypatch.setenv("METRIC_BACKEND", "overlap")
+    get_settings.cache_clear()
+    sampler = TraceSampler(mode="sampled", sample_rate=1.0)
+    tracker = MLflowTracker("test-eval", sampler=sampler)
+    cards = [{"cardId": "00-fool", "orientation": "upright", "position": "present"}]
+    examples = [
+        dspy.Example(intent=intent, spread_type="single", tone="wise", cards=cards,
+                     overview="A fresh start", synthesis="Trust the leap", actionable_reflection="Take one step",
+                     ).with_inputs("intent", "spread_type", "tone", "cards")
+        for intent in ("my week", "my work")
+    ]
+
+    # The same metric `eval dataset --model-uri` passes: DSPy's Evaluate calls it as metric(example, prediction)
+    with dspy.context(lm=StubLM()), tracker.start_run(run_name="eval"):
+        scores = tracker.log_dspy_evaluation(examples, TarotReadingModule(), _metric_fn)
+
+    assert sampler.stats.scored_calls == len(examples)
+    assert scores["overall"] > 0
+    get_settings.cache_clear()
+
+
+def test_stats_split_unwritten_from_deleted_traces_and_reset_per_run(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LM_BACKEND", "stub")
+    get_settings.cache_clear()
+    sampler = TraceSampler(mode="low-score", score_threshold=0.5, max_traces=1)
+    for trace_id, score in [("t1", 0.9), ("t2", 0.1), ("t3", 0.2), (None, 0.3)]:
+        sampler.record(trace_id, score)
+    tail, over_cap = sampler.select_for_deletion()
+    sampler.stats.tail_dropped, sampler.stats.cap_dropped = len(tail), len(over_cap)
+
+    assert (sampler.stats.avoided, sampler.stats.deleted) == (1, 2)
+    assert "1 never written" in sampler.stats.summary() and "2 written then deleted" in sampler.stats.summary()
+
+    tracker = MLflowTracker("test-reset", sampler=sampler)
+    with tracker.start_run(run_name="next"):
+        assert sampler.stats.scored_calls == 0
+        assert sampler.select_for_deletion() == ([], [])
+    get_settings.cache_clear()
@@ -0,0 +1,89 @@
+import dspy
+
+from daily_tarot_pipeline.datasets import Dataset, build_training_examples
+from daily_tarot_pipeline.optimizers.halving import HalvingMIPROv2, SuccessiveHalving, TrialBudget
+from daily_tarot_pipeline.optimizers.mipro import GoldTokenIndex, TarotReadingModule
+from daily_tarot_pipeline.stub_lm import StubLM
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+
+class Candidate(dspy.Module):
+    def __init__(self, quality: float):
+        super().__init__()
+        self.quality = quality
+        self.generate = dspy.Predict("intent -> overview")
+
+    def forward(self, intent):
+        prediction = self.generate(intent=intent)
+        prediction.quality = self.quality
+        return prediction
+
+
+def _valset(size: int):
+    return [dspy.Example(intent=f"question {index}").with_inputs("intent") for index in range(size)]
+
+
+def _quality(example, prediction, trace=None) -> float:
+    return prediction.quality
+
+
+def test_only_the_best_candidate_reaches_the_full_valset():
+    candidates = [Candidate(quality) for quality in (0.5, 0.2, 0.3, 0.4, 0.1, 0.9, 0.6, 0.3, 0.2)]
+    lm = StubLM()
+    with dspy.context(lm=lm):
+        result = SuccessiveHalving(_quality, _valset(40), min_examples=4, eta=3).run(candidates)
+
+    schedule = result.schedule
+    assert result.best_index == 5
+    assert (schedule.rung_examples, schedule.rung_candidates) == ([4, 12, 36, 40], [9, 3, 1, 1])
+    assert schedule.eval_calls == 9 * 4 + 3 * 8 + 24 + 4
+    assert schedule.eval_calls == schedule.lm_calls == lm.stats.calls
+    assert schedule.eval_calls_saved == 9 * 40 - schedule.eval_calls
+
+
+def test_lm_call_cap_stops_the_search():
+    candidates = [Candidate(quality) for quality in (0.5, 0.7, 0.6)]
+    budget = TrialBudget(max_lm_calls=20)
+    with dspy.context(lm=StubLM()):
+        result = SuccessiveHalving(_quality, _valset(40), budget, min_examples=8, num_threads=1).run(candidates)
+    assert result.schedule.budget_exhausted and budget.lm_calls == 20
+    # The third candidate was cut short, so the best fully scored one of the first rung wins
+    assert result.best_index == 1 and result.evaluated == [8, 8, 4]
+
+
+def test_mipro_compile_with_stub_lm_spends_less_than_full_evaluation():
+    readings = list(generate_readings(SyntheticConfig(readings=60, seed=2)))
+    train, val = Dataset.of(build_training_examples(InMemoryStore(readings, []), limit=60)).split(val_fraction=0.5)
+    index = GoldTokenIndex()
+    lm = StubLM()
+
+    def metric(example, prediction, trace=None):
+        return index.overlap(example.overview, prediction.overview or "")
+
+    with dspy.context(lm=lm):
+        optimizer = HalvingMIPROv2(metric=metric, auto="light", budget=TrialBudget(), min_examples=5, num_threads=4)
+        compiled = optimizer.compile(TarotReadingModule(), trainset=train.to_dspy(), valset=val.to_dspy())
+
+    schedule = compiled.trial_schedule
+    assert schedule.candidates > 1 and schedule.rung_examples[-1] == len(val)
+    assert schedule.eval_calls < schedule.baseline_eval_calls
+    assert schedule.lm_calls == lm.stats.calls
+    assert schedule.tokens > 0
+    assert compiled.candidate_programs[0]["score"] == compiled.score
+
+
+def test_budget_caps_bootstrap_and_proposal_calls_too(caplog):
+    readings = list(generate_readings(SyntheticConfig(readings=60, seed=2)))
+    train, val = Dataset.of(build_training_examples(InMemoryStore(readings, []), limit=60)).split(val_fraction=0.5)
+    lm = StubLM()
+    budget = TrialBudget(max_lm_calls=3)
+
+    with dspy.context(lm=lm), caplog.at_level("WARNING", logger="daily_tarot_pipeline.optimizers.halving"):
+        optimizer = HalvingMIPROv2(metric=lambda example, prediction, trace=None: 1.0, auto="light", budget=budget,
+                                   min_examples=5, num_threads=4)
+        compiled = optimizer.compile(TarotReadingModule(), trainset=train.to_dspy(), valset=val.to_dspy())
+
+    assert lm.stats.calls == budget.lm_calls == 3
+    assert compiled.trial_schedule.budget_exhausted and compiled.trial_schedule.candidates == 0
+    assert not hasattr(compiled, "score")
+    assert "without scoring it" in caplog.text
@@ -0,0 +1,89 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from daily_tarot_pipeline.batch_predict import PREDICTION_SCHEMA
+from daily_tarot_pipeline.models import UsageAggregate
+from daily_tarot_pipeline.usage import batch_regressions, find_regressions, uncompared_versions, usage_metrics
+
+
+def _agg(prompt_version, p95, completion, calls=100, tps=50.0):
+    return UsageAggregate(
+        model="openai/gpt-oss-120b",
+        prompt_version=prompt_version,
+        calls=calls,
+        p50_latency_ms=p95 / 2,
+        p95_latency_ms=p95,
+        p99_latency_ms=p95 * 1.2,
+        avg_prompt_tokens=400,
+        avg_completion_tokens=completion,
+        tokens_per_second=tps,
+        avg_cost_cents=1.0,
+        total_cost_cents=calls * 1.0,
+    )
+
+
+def test_find_regressions_flags_slower_and_longer_candidates():
+    aggregates = [
+        _agg("v1", p95=1000, completion=300),
+        _agg("v2", p95=1400, completion=310),
+        _agg("v3", p95=1050, completion=290),
+        _agg("v4", p95=5000, completion=900, calls=5),
+    ]
+
+    regressions = find_regressions(aggregates, "v1", tolerance=0.10, min_calls=20)
+
+    assert [(r.prompt_version, r.field) for r in regressions] == [("v2", "p95_latency_ms")]
+    assert round(regressions[0].change, 2) == 0.40
+
+
+def test_usage_metrics_use_safe_names():
+    metrics = usage_metrics([_agg("v1.deterministic", p95=1000, completion=300)])
+    assert metrics["usage.gpt-oss-120b.v1.deterministic.p95_latency_ms"] == 1000.0
+
+
+def _write_batch_output(output_dir, latency_ms, overview, rows=40):
+    output_dir.mkdir()
+    table = pa.Table.from_pylist([
+        {"row_id": f"r{i}", "status": "ok", "label": output_dir.name, "spread_type": "single", "tone": "direct",
+         "overview": overview, "synthesis": "Steady", "actionable_reflection": "Rest", "card_breakdowns": "[]",
+         "latency_ms": latency_ms + i}
+        for i in range(rows)
+    ], schema=PREDICTION_SCHEMA)
+    pq.write_table(table, output_dir / "part-00000.parquet")
+    return output_dir
+
+
+def test_batch_regressions_gate_a_slower_candidate(tmp_path):
+    baseline = _write_batch_output(tmp_path / "v1", latency_ms=800, overview="A calm week ahead.")
+    slower = _write_batch_output(tmp_path / "v2", latency_ms=1200, overview="A calm week ahead.")
+    wordier = _write_batch_output(tmp_path / "v3", latency_ms=800, overview="A calm week ahead. " * 10)
+
+    regressions = batch_regressions(baseline, slower)
+    assert {(r.prompt_version, r.field) for r in regressions} == {
+        ("candidate", "p95_latency_ms"), ("candidate", "tokens_per_second")}
+    assert [r.field for r in batch_regressions(baseline, wordier)] == ["avg_completion_tokens"]
+    assert batch_regressions(baseline, baseline) == []
+
+
+def test_batch_regressions_refuse_runs_too_small_to_compare(tmp_path):
+    baseline = _write_batch_output(tmp_path / "v1", latency_ms=800, overview="A calm week ahead.")
+    tiny = _write_batch_output(tmp_path / "v2", latency_ms=5000, overview="A calm week ahead.", rows=5)
+
+    with pytest.raises(ValueError, match="5 calls, fewer than 20"):
+        batch_regressions(baseline, tiny)
+    with pytest.raises(ValueError, match="baseline has 5 calls"):
+        batch_regressions(tiny, baseline)
+
+
+def test_uncompared_versions_explain_what_find_regressions_skipped():
+    aggregates = [
+        _agg("v1", p95=1000, completion=300),
+        _agg("v2", p95=1000, completion=300, calls=5),
+        _agg("v3", p95=1000, completion=300).model_copy(update={"model": "openai/gpt-oss-20b"}),
+    ]
+
+    assert uncompared_versions(aggregates, "v1", min_calls=20) == [
+        "openai/gpt-oss-120b prompt v2: 5 calls, fewer than 20",
+        "openai/gpt-oss-20b prompt v3: no v1 calls on this model",
+    ]
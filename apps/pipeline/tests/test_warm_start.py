@@ -0,0 +1,95 @@
+import dspy
+import pytest
+
+from daily_tarot_pipeline.config import get_settings
+from daily_tarot_pipeline.datasets import Dataset, build_training_examples
+from daily_tarot_pipeline.optimizers.halving import HalvingMIPROv2, TrialBudget
+from daily_tarot_pipeline.optimizers.mipro import GoldTokenIndex, TarotReadingModule
+from daily_tarot_pipeline.optimizers.warm_start import (
+    keep_promoted_prompt,
+    load_warm_start_module,
+    promoted_model_uri,
+)
+from daily_tarot_pipeline.stub_lm import StubLM
+from daily_tarot_pipeline.synthetic import InMemoryStore, SyntheticConfig, generate_readings
+
+INSTRUCTIONS = "Read the cards warmly and name each one."
+
+
+@pytest.fixture()
+def settings(monkeypatch, tmp_path):
+    for name, value in {"LM_BACKEND": "stub", "PROMPT_WORKSPACE": str(tmp_path / "prompts"),
+                        "DATASET_WORKSPACE": str(tmp_path / "datasets")}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("WARM_START_MODEL_URI", raising=False)
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+def _promoted(train: list[dspy.Example]) -> TarotReadingModule:
+    module = TarotReadingModule()
+    module.generator.signature = module.generator.signature.with_instructions(INSTRUCTIONS)
+    module.generator.demos = train[:2]
+    return module
+
+
+def _split():
+    readings = list(generate_readings(SyntheticConfig(readings=40, seed=3)))
+    train, val = Dataset.of(build_training_examples(InMemoryStore(readings, []), limit=40)).split(val_fraction=0.5)
+    return train.to_dspy(), val.to_dspy()
+
+
+def test_promoted_prompt_is_found_and_restored(settings, tmp_path, monkeypatch):
+    train, _ = _split()
+    assert promoted_model_uri(1) is None
+
+    exported = tmp_path / "prompt.txt"
+    _promoted(train).export_prompt(exported)
+    kept = keep_promoted_prompt(1, exported)
+    assert promoted_model_uri(1) == str(kept)
+    module = load_warm_start_module(str(kept))
+    assert module.generator.signature.instructions == INSTRUCTIONS
+    assert [demo.overview for demo in module.generator.demos] == [example.overview for example in train[:2]]
+
+    monkeypatch.setenv("WARM_START_MODEL_URI", "runs:/abc/model")
+    get_settings.cache_clear()
+    assert promoted_model_uri(1) == "runs:/abc/model"
+
+
+def test_a_demoted_prompt_is_not_warm_started_from(settings, tmp_path):
+    exported = tmp_path / "prompt.txt"
+    exported.write_text(INSTRUCTIONS)
+    kept = keep_promoted_prompt(1, exported)
+
+    # Version 2 is promoted without --prompt: version 1's prompt is dropped, not reused
+    assert keep_promoted_prompt(2, None) is None
+    assert not kept.exists()
+    assert promoted_model_uri(2) is None
+
+    # A prompt kept for another version than the active one is ignored
+    keep_promoted_prompt(3, exported)
+    assert promoted_model_uri(2) is None
+    assert promoted_model_uri(None) is None
+
+
+def test_reduced_search_keeps_the_promoted_program_in_the_race():
+    train, val = _split()
+    index = GoldTokenIndex()
+
+    def metric(example, prediction, trace=None):
+        return index.overlap(example.overview, prediction.overview or "")
+
+    with dspy.context(lm=StubLM()):
+        optimizer = HalvingMIPROv2(metric=metric, auto=None, num_candidates=2, budget=TrialBudget(),
+                                   min_examples=5, num_threads=4)
+        compiled = optimizer.compile(_promoted(train), trainset=train, valset=val, num_trials=3,
+                                     minibatch=False)
+
+    assert compiled.trial_schedule.candidates == 4
+    promoted = [
+        entry["program"] for entry in compiled.candidate_programs
+        if entry["program"].generator.signature.instructions == INSTRUCTIONS
+        and [demo.overview for demo in entry["program"].generator.demos] == [example.overview for example in train[:2]]
+    ]
+    assert promoted
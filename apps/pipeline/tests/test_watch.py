@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from daily_tarot_pipeline.synthetic import SyntheticConfig, generate_readings
+from daily_tarot_pipeline.watch import QualityWatcher
+
+
+class _FakeSource:
+    def __init__(self, readings, thumbs=()):
+        self.readings = {reading.id: reading for reading in readings}
+        self.thumbs = {reading_id: thumb for reading_id, thumb in thumbs}
+        self.alerts = []
+
+    def fetch_readings_by_ids(self, ids):
+        return [self.readings[id] for id in ids if id in self.readings]
+
+    def fetch_feedback_thumbs(self, reading_ids):
+        return [{"reading_id": id, "prompt_version": self.readings[id].prompt_version, "thumb": self.thumbs[id]}
+                for id in reading_ids if id in self.thumbs]
+
+    def insert_alert(self, type, message, metadata=None):
+        self.alerts.append((type, message, metadata))
+
+
+def _event(table, reading):
+    return json.dumps({"table": table, "reading_id": reading.id})
+
+
+def test_quality_drop_alerts_once_per_cooldown():
+    readings = list(generate_readings(SyntheticConfig(readings=120, seed=3, prompt_versions=("v1",))))
+    # The last 40 readings lose their reflection prompt and most of their text
+    degraded = [reading.model_copy(update={"overview": "Cards.", "synthesis": "Things happen.", "actionable_reflection": "Okay."})
+                for reading in readings[80:]]
+    source = _FakeSource(readings[:80] + degraded)
+    watcher = QualityWatcher(source, batch_size=20, window=20, max_drop=0.2, cooldown=timedelta(hours=1))
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+    raised = []
+    for reading in readings[:80] + degraded:
+        if watcher.notify(_event("readings", reading)):
+            raised.extend(watcher.flush(now))
+    assert watcher.pending == 0 and watcher.stats.readings == 120 and watcher.stats.batches == 6
+    assert [alert["type"] for alert in raised] == ["quality_drop"]
+    assert raised[0]["metadata"]["prompt_version"] == "v1" and len(source.alerts) == 1
+    summary = watcher.summary()["v1"]
+    assert summary["window"] == 20 and summary["scored"] == 120
+    assert summary["means"]["composite"] < summary["baseline"] - 0.2
+
+    # Still degraded an hour later: the cooldown has passed, so the alert is raised again
+    for reading in degraded[:20]:
+        watcher.notify(_event("readings", reading))
+    assert [alert["type"] for alert in watcher.flush(now + timedelta(hours=2))] == ["quality_drop"]
+
+
+def test_thumbs_down_rate_and_bounded_state():
+    readings = list(generate_readings(SyntheticConfig(readings=40, seed=4, prompt_versions=("v1", "v2"))))
+    source = _FakeSource(readings, [(reading.id, -1 if reading.prompt_version == "v2" else 1) for reading in readings])
+    watcher = QualityWatcher(source, batch_size=100, window=5, max_versions=2)
+    for reading in readings:
+        watcher.notify(_event("feedback", reading))
+    watcher.notify(_event("feedback", readings[0]))
+    watcher.notify("not json")
+    assert watcher.pending == 40
+
+    alerts = watcher.flush()
+    assert [(alert["type"], alert["metadata"]["prompt_version"]) for alert in alerts] == [("thumbs_down_rate", "v2")]
+    assert all(len(quality.thumbs) == 5 for quality in watcher.versions.values())
+
+    late = readings[0].model_copy(update={"id": "late", "prompt_version": "v3"})
+    source.readings["late"] = late
+    watcher.notify(_event("readings", late))
+    watcher.flush()
+    assert len(watcher.versions) == 2 and "v3" in watcher.versions
+    assert watcher.watermark == late.created_at
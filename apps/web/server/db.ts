@@ -149,6 +149,16 @@ async function initializeSchema(client: PoolClient): Promise<void> {
   await client.query(`
     CREATE TABLE IF NOT EXISTS training_datasets (
       name TEXT PRIMARY KEY,
+      data JSONB,
+      example_hashes TEXT[],
+      created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+  `);
+
+  // Examples shared by dataset manifests, keyed by content hash (written by the pipeline)
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS training_examples (
+      hash TEXT PRIMARY KEY,
       data JSONB NOT NULL,
       created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
     )
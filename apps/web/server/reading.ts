@@ -1,6 +1,6 @@
 import { cardDrawSchema, readingSchema, type Reading } from "../lib/common";
 import { z } from "zod";
-import { randomUUID } from "crypto";
+import { createHash, randomUUID } from "crypto";
 import { deriveSeed, generateSpread, type SpreadType } from "../lib/seed";
 import { createChatCompletion, type ChatMessage } from "./groq";
 import { getEnv } from "./config";
@@ -216,13 +216,45 @@ async function generateReading(input: ReadingRequestInput): Promise<Reading> {
     })
   );
 
+  const tone = input.tone ?? "warm-analytical";
+  if (!input.intent) {
+    const cached = await findCachedReading(input.spreadType, tone, promptVersion, cards);
+    if (cached) {
+      const candidate = readingSchema.safeParse({
+        id: readingId,
+        seed: {
+          userId: input.userId,
+          isoDate: input.isoDate,
+          spreadType: input.spreadType,
+          hmac: seedForGeneration
+        },
+        intent: input.intent,
+        cards,
+        promptVersion,
+        overview: cached.overview,
+        cardBreakdowns: parseCachedBreakdowns(cached.card_breakdowns),
+        synthesis: cached.synthesis,
+        actionableReflection: cached.actionable_reflection,
+        tone,
+        createdAt: new Date().toISOString(),
+        model: cached.model
+      });
+      if (candidate.success) {
+        await persistReading(candidate.data);
+        return candidate.data;
+      }
+      // A cached row that does not make a valid reading is ignored; generate a fresh one instead
+      console.warn("Ignoring invalid cached reading", candidate.error.issues);
+    }
+  }
+
   const systemPrompt = buildSystemPrompt();
   const userPrompt = buildUserPrompt({
     userId: input.userId,
     isoDate: input.isoDate,
     intent: input.intent,
     spreadType: input.spreadType,
-    tone: input.tone ?? "warm-analytical",
+    tone,
     cards: spreads.map((entry) => ({
       id: entry.card.id,
       name: entry.card.name,
@@ -275,7 +307,7 @@ async function generateReading(input: ReadingRequestInput): Promise<Reading> {
     cardBreakdowns: parsed.data.cardBreakdowns,
     synthesis: parsed.data.synthesis,
     actionableReflection: parsed.data.actionableReflection,
-    tone: input.tone ?? "warm-analytical",
+    tone,
     createdAt: new Date().toISOString(),
     model: completion.raw && typeof completion.raw === "object" && "model" in (completion.raw as Record<string, unknown>)
       ? ((completion.raw as Record<string, unknown>).model as Reading["model"])
@@ -302,6 +334,59 @@ async function generateReading(input: ReadingRequestInput): Promise<Reading> {
   return record;
 }
 
+type CachedReadingRecord = {
+  overview: string;
+  card_breakdowns: string | Reading["cardBreakdowns"];
+  synthesis: string;
+  actionable_reflection: string;
+  model: string;
+};
+
+// Must match reading_cache_key in apps/pipeline/src/daily_tarot_pipeline/reading_cache.py
+function readingCacheKey(spreadType: string, tone: string, promptVersion: string, cards: Reading["cards"]): string {
+  const canonical = [
+    spreadType,
+    tone,
+    promptVersion,
+    cards.map((card) => [card.cardId, card.orientation, card.position])
+  ];
+  return createHash("sha256").update(JSON.stringify(canonical)).digest("hex");
+}
+
+async function findCachedReading(
+  spreadType: string,
+  tone: string,
+  promptVersion: string,
+  cards: Reading["cards"]
+): Promise<CachedReadingRecord | null> {
+  try {
+    const rows = await query<CachedReadingRecord>(
+      `
+      SELECT overview, card_breakdowns, synthesis, actionable_reflection, model
+      FROM reading_cache
+      WHERE cache_key = $1 AND expires_at > NOW()
+    `,
+      { params: [readingCacheKey(spreadType, tone, promptVersion, cards)] }
+    );
+    return rows[0] ?? null;
+  } catch (error) {
+    // The cache is an optimization; fall back to Groq if the table is missing or unreachable
+    console.warn("Reading cache lookup failed", error);
+    return null;
+  }
+}
+
+function parseCachedBreakdowns(value: unknown): unknown {
+  if (typeof value !== "string") {
+    return value;
+  }
+  try {
+    return JSON.parse(value);
+  } catch {
+    return null;
+  }
+}
+
 async function persistReading(reading: Reading) {
   await run(
     `
@@ -26,77 +26,200 @@ export async function storeTelemetryEvents(events: TelemetryEvent[]) {
   );
 }
 
-export async function getTelemetryMetrics(
-  startDate?: Date,
-  endDate?: Date
-) {
-  let whereClause = "1=1";
-  const params: any[] = [];
+type TypeCounts = Record<string, { events: number; ttftSum: number; ttftCount: number }>;
 
-  if (startDate) {
-    whereClause += ` AND timestamp >= $${params.length + 1}`;
-    params.push(startDate.toISOString());
+type Watermarks = { rollup: Date | null; compacted: Date | null };
+
+const HOUR_MS = 3_600_000;
+const DAY_MS = 24 * HOUR_MS;
+
+// Progress of the pipeline's telemetry job (`tarot-pipeline telemetry rollup`): hours before `rollup` are in the
+// rollup tables, and raw events before `compacted` have been deleted.
+async function getWatermarks(): Promise<Watermarks> {
+  try {
+    const rows = await query<{ job: string; watermark: string }>(
+      `SELECT job, watermark FROM pipeline_watermarks WHERE job IN ('telemetry_rollup', 'telemetry_compaction')`
+    );
+    const find = (job: string) => {
+      const row = rows.find((entry) => entry.job === job);
+      return row ? new Date(row.watermark) : null;
+    };
+    return { rollup: find("telemetry_rollup"), compacted: find("telemetry_compaction") };
+  } catch {
+    // Rollup tables not created yet; everything is read from raw events
+    return { rollup: null, compacted: null };
   }
+}
 
-  if (endDate) {
-    whereClause += ` AND timestamp <= $${params.length + 1}`;
-    params.push(endDate.toISOString());
+// Event counts per type. Rolled-up hours are read from the rollups: whole UTC days from telemetry_rollup_daily and
+// the remaining hours from telemetry_rollup_hourly, with a bucket cut by the range counted pro rata. Only events
+// after the rollup watermark are aggregated from the raw table.
+async function getTypeCounts(watermarks: Watermarks, startDate?: Date, endDate?: Date): Promise<TypeCounts> {
+  const counts: TypeCounts = {};
+  const add = (rows: any[]) => {
+    for (const row of rows) {
+      const entry = (counts[row.type] ??= { events: 0, ttftSum: 0, ttftCount: 0 });
+      entry.events += Number(row.events);
+      entry.ttftSum += Number(row.ttft_sum_ms);
+      entry.ttftCount += Number(row.ttft_count);
+    }
+  };
+
+  const { rollup } = watermarks;
+  let rawStart = startDate;
+  if (rollup && (!startDate || startDate < rollup)) {
+    const rollupEnd = endDate && endDate < rollup ? endDate : rollup;
+    const firstDay = startDate ? new Date(Math.ceil(startDate.getTime() / DAY_MS) * DAY_MS) : null;
+    const lastDay = new Date(Math.floor(rollupEnd.getTime() / DAY_MS) * DAY_MS);
+    const useDaily = !firstDay || firstDay < lastDay;
+
+    if (useDaily) {
+      const params: any[] = [lastDay.toISOString()];
+      if (firstDay) params.push(firstDay.toISOString());
+      add(await query(
+        `SELECT type, SUM(events) AS events, SUM(ttft_sum_ms) AS ttft_sum_ms, SUM(ttft_count) AS ttft_count
+         FROM telemetry_rollup_daily
+         WHERE type <> '*' AND day < ($1::timestamptz AT TIME ZONE 'UTC')::date
+           ${firstDay ? "AND day >= ($2::timestamptz AT TIME ZONE 'UTC')::date" : ""}
+         GROUP BY type`,
+        { params }
+      ));
+    }
+
+    // Hours outside the whole days above; a bucket only partly inside [start, rollupEnd) is weighted by its overlap
+    const hourly = (from: Date | null, to: Date) => query(
+      `SELECT type, SUM(events * weight) AS events, SUM(ttft_sum_ms * weight) AS ttft_sum_ms,
+              SUM(ttft_count * weight) AS ttft_count
+       FROM (
+         SELECT type, events, ttft_sum_ms, ttft_count,
+                LEAST(1, EXTRACT(EPOCH FROM (LEAST(bucket + interval '1 hour', $1::timestamptz)
+                                             - GREATEST(bucket, COALESCE($2::timestamptz, bucket)))) / 3600) AS weight
+         FROM telemetry_rollup_hourly
+         WHERE type <> '*' AND bucket < $1::timestamptz
+           AND ($2::timestamptz IS NULL OR bucket >= date_trunc('hour', $2::timestamptz))
+       ) buckets
+       WHERE weight > 0
+       GROUP BY type`,
+      { params: [to.toISOString(), from ? from.toISOString() : null] }
+    );
+    if (useDaily) {
+      if (startDate && firstDay && startDate < firstDay) add(await hourly(startDate, firstDay));
+      if (lastDay < rollupEnd) add(await hourly(lastDay, rollupEnd));
+    } else {
+      add(await hourly(startDate ?? null, rollupEnd));
+    }
+    rawStart = rollup;
   }
 
-  // Get all events in date range
-  const events = await query(
-    `SELECT * FROM telemetry_events WHERE ${whereClause} ORDER BY timestamp`,
-    { params }
-  );
+  if (!endDate || !rawStart || endDate >= rawStart) {
+    let whereClause = "1=1";
+    const params: any[] = [];
+    if (rawStart) {
+      whereClause += ` AND timestamp >= $${params.length + 1}`;
+      params.push(rawStart.toISOString());
+    }
+    if (endDate) {
+      whereClause += ` AND timestamp <= $${params.length + 1}`;
+      params.push(endDate.toISOString());
+    }
+    add(await query(
+      `SELECT type, COUNT(*) AS events,
+              COALESCE(SUM(ttft), 0) AS ttft_sum_ms, COUNT(ttft) AS ttft_count
+       FROM (
+         SELECT type,
+                CASE WHEN type = 'reading_time_to_first_token'
+                          AND jsonb_typeof(data->'timeToFirstToken') = 'number'
+                          AND (data->>'timeToFirstToken')::float > 0
+                     THEN (data->>'timeToFirstToken')::float END AS ttft
+         FROM telemetry_events
+         WHERE ${whereClause}
+       ) events
+       GROUP BY type`,
+      { params }
+    ));
+  }
+  return counts;
+}
+
+// Events with the columns distinct metrics need (type, session, user, time) as a CTE named `events`. Compacted
+// hours come from telemetry_rollup_members, which keeps one row per hour, type, session and user, and only hours
+// wholly inside the range are used; later events come from the raw table. Overlap between the two is harmless
+// because every metric built on it counts distinct values.
+function eventsCte(watermarks: Watermarks, startDate?: Date, endDate?: Date): { sql: string; params: any[] } {
+  const params: any[] = [startDate?.toISOString() ?? null, endDate?.toISOString() ?? null];
+  const members = watermarks.compacted
+    ? `SELECT type, session_id, user_id, bucket AS timestamp
+       FROM telemetry_rollup_members
+       WHERE bucket < $3::timestamptz
+         AND ($1::timestamptz IS NULL OR bucket >= $1::timestamptz)
+         AND ($2::timestamptz IS NULL OR bucket + interval '1 hour' <= $2::timestamptz)
+       UNION ALL`
+    : "";
+  if (watermarks.compacted) params.push(watermarks.compacted.toISOString());
+  return {
+    sql: `WITH events AS (
+      ${members}
+      SELECT type, session_id, user_id, timestamp
+      FROM telemetry_events
+      WHERE ($1::timestamptz IS NULL OR timestamp >= $1::timestamptz)
+        AND ($2::timestamptz IS NULL OR timestamp <= $2::timestamptz)
+    )`,
+    params,
+  };
+}
+
+export async function getTelemetryMetrics(
+  startDate?: Date,
+  endDate?: Date
+) {
+  const watermarks = await getWatermarks();
+  const counts = await getTypeCounts(watermarks, startDate, endDate);
+  const countOf = (type: string) => Math.round(counts[type]?.events ?? 0);
+  const ttft = counts['reading_time_to_first_token'];
+  const events = eventsCte(watermarks, startDate, endDate);
 
-  const completedReadings = events.filter((e: any) => e.type === 'reading_completed');
-  const submittedFeedback = events.filter((e: any) => e.type === 'feedback_submitted');
-  const thumbUps = events.filter((e: any) => e.type === 'thumb_up');
-  const timeToFirstTokens = events
-    .filter((e: any) => e.type === 'reading_time_to_first_token')
-    .map((e: any) => {
-      const data = JSON.parse(e.data || '{}');
-      return data.timeToFirstToken || 0;
-    })
-    .filter(t => t > 0);
+  // Distinct sessions and users are not additive across rollup buckets, so they are counted in SQL
+  const [uniques] = await query<{ sessions: string; users: string }>(
+    `${events.sql}
+     SELECT COUNT(DISTINCT session_id) AS sessions, COUNT(DISTINCT user_id) AS users FROM events`,
+    { params: events.params }
+  );
 
   // Calculate 7-day return rate
-  const sevenDayReturnRate = await calculateSevenDayReturnRate(startDate, endDate);
+  const sevenDayReturnRate = await calculateSevenDayReturnRate(events);
+
+  const completedReadings = countOf('reading_completed');
+  const submittedFeedback = countOf('feedback_submitted');
 
   const metrics = {
-    thumbRate: submittedFeedback.length > 0 ? thumbUps.length / submittedFeedback.length : 0,
-    optInRate: completedReadings.length > 0 ? submittedFeedback.length / completedReadings.length : 0,
+    thumbRate: submittedFeedback > 0 ? countOf('thumb_up') / submittedFeedback : 0,
+    optInRate: completedReadings > 0 ? submittedFeedback / completedReadings : 0,
     sevenDayReturnRate,
-    avgTimeToFirstToken: timeToFirstTokens.length > 0 
-      ? timeToFirstTokens.reduce((a, b) => a + b, 0) / timeToFirstTokens.length 
-      : 0,
-    completionRate: await calculateCompletionRate(startDate, endDate),
-    totalReadings: completedReadings.length,
-    totalFeedback: submittedFeedback.length,
-    totalEvents: events.length,
-    uniqueSessions: new Set(events.map((e: any) => e.session_id)).size,
-    uniqueUsers: new Set(events.filter((e: any) => e.user_id).map((e: any) => e.user_id)).size
+    avgTimeToFirstToken: ttft && ttft.ttftCount > 0 ? ttft.ttftSum / ttft.ttftCount : 0,
+    completionRate: await calculateCompletionRate(events),
+    totalReadings: completedReadings,
+    totalFeedback: submittedFeedback,
+    totalEvents: Math.round(Object.values(counts).reduce((total, entry) => total + entry.events, 0)),
+    uniqueSessions: Number(uniques?.sessions ?? 0),
+    uniqueUsers: Number(uniques?.users ?? 0)
   };
 
   return metrics;
 }
 
-async function calculateSevenDayReturnRate(startDate?: Date, endDate?: Date): Promise<number> {
+async function calculateSevenDayReturnRate(events: { sql: string; params: any[] }): Promise<number> {
   // Get user sessions and track returns within 7 days
   const userSessions = await query(`
+    ${events.sql}
     SELECT 
       user_id,
       MIN(timestamp) as first_session,
       COUNT(DISTINCT DATE(timestamp)) as session_days
-    FROM telemetry_events 
+    FROM events 
     WHERE user_id IS NOT NULL 
       AND type = 'session_start'
-      ${startDate ? 'AND timestamp >= $1' : ''}
-      ${endDate ? 'AND timestamp <= $2' : ''}
     GROUP BY user_id
-  `, { 
-    params: [startDate?.toISOString(), endDate?.toISOString()].filter(Boolean) 
-  });
+  `, { params: events.params });
 
   if (!userSessions.length) return 0;
 
@@ -104,29 +227,17 @@ async function calculateSevenDayReturnRate(startDate?: Date, endDate?: Date): Pr
   return returningUsers.length / userSessions.length;
 }
 
-async function calculateCompletionRate(startDate?: Date, endDate?: Date): Promise<number> {
-  const startedReadings = await query(`
-    SELECT COUNT(DISTINCT session_id) as started_count
-    FROM telemetry_events 
-    WHERE type = 'reading_started'
-      ${startDate ? 'AND timestamp >= $1' : ''}
-      ${endDate ? 'AND timestamp <= $2' : ''}
-  `, { 
-    params: [startDate?.toISOString(), endDate?.toISOString()].filter(Boolean) 
-  });
-
-  const completedReadings = await query(`
-    SELECT COUNT(DISTINCT session_id) as completed_count
-    FROM telemetry_events 
-    WHERE type = 'reading_completed'
-      ${startDate ? 'AND timestamp >= $1' : ''}
-      ${endDate ? 'AND timestamp <= $2' : ''}
-  `, { 
-    params: [startDate?.toISOString(), endDate?.toISOString()].filter(Boolean) 
-  });
+async function calculateCompletionRate(events: { sql: string; params: any[] }): Promise<number> {
+  const [row] = await query<{ started_count: string; completed_count: string }>(`
+    ${events.sql}
+    SELECT
+      COUNT(DISTINCT session_id) FILTER (WHERE type = 'reading_started') as started_count,
+      COUNT(DISTINCT session_id) FILTER (WHERE type = 'reading_completed') as completed_count
+    FROM events
+  `, { params: events.params });
 
-  const started = (startedReadings[0] as any)?.started_count || 0;
-  const completed = (completedReadings[0] as any)?.completed_count || 0;
+  const started = Number(row?.started_count ?? 0);
+  const completed = Number(row?.completed_count ?? 0);
 
   return started > 0 ? completed / started : 0;
 }